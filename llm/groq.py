@@ -0,0 +1,55 @@
+from typing import Any, Callable, Dict, List, Optional
+
+import groq
+from openai.types.chat import ChatCompletion
+
+from llm.openai import OpenAIClient
+
+
+class GroqClient(OpenAIClient):
+    """
+    A client for interacting with the Groq API.
+
+    Groq's SDK mirrors the OpenAI chat completions interface, so only client
+    construction differs. Completions are converted to OpenAI's
+    ``ChatCompletion`` type so callers see one response shape.
+    """
+
+    def __init__(
+        self,
+        model_id: str = "llama-3.3-70b-versatile",
+        keep_history: bool = True,
+        api_key: Optional[str] = None,
+        default_response_kwargs: Optional[Dict[str, Any]] = None,
+        prepare_messages_callback: Optional[Callable[[List], List]] = None,
+        **kwargs,
+    ) -> None:
+        """
+        Initialize the GroqClient with a specified model and history settings.
+        """
+        super().__init__(
+            model_id=model_id,
+            keep_history=keep_history,
+            api_key=api_key,
+            default_response_kwargs=default_response_kwargs,
+            prepare_messages_callback=prepare_messages_callback,
+            **kwargs,
+        )
+
+    def _initialize_client(self, api_key: str, base_url: Optional[str] = None, transport: Any = None, **kwargs) -> None:
+        """
+        Initialize the Groq client with the API key.
+        """
+        if transport is not None:
+            self.client = transport
+            return
+        self.client = groq.Groq(api_key=api_key, base_url=base_url, **kwargs)
+
+    def create_completion(self, messages: List[Dict[str, Any]], **kwargs):
+        """
+        Create a chat completion with the Groq model, normalized to OpenAI's shape.
+        """
+        completion = super().create_completion(messages, **kwargs)
+        if kwargs.get("stream", False) or isinstance(completion, ChatCompletion):
+            return completion
+        return ChatCompletion.model_validate(completion.model_dump(exclude_none=True))
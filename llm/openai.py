@@ -3,6 +3,8 @@ from typing import Any, Callable, Dict, List, Optional, Union
 
 import openai
 
+from llm.replay import transport_from_env
+
 
 class BaseClient:
     """
@@ -70,6 +72,22 @@ class BaseClient:
         """
         raise NotImplementedError("Subclasses must implement _make_api_call")
 
+    def create_completion(self, messages: List[Dict[str, Any]], **kwargs):
+        """
+        Create a raw chat completion without touching the conversation history.
+        This method should be implemented by subclasses.
+
+        Args:
+            messages (List[Dict[str, Any]]): The messages to send to the model.
+            **kwargs: Additional keyword arguments to pass to the model (e.g. tools, or
+                model to override model_id for this request).
+
+        Returns:
+            The provider's completion object, with ``choices[0].message`` holding
+            the content and any tool calls.
+        """
+        raise NotImplementedError("Subclasses must implement create_completion")
+
     def get_response(self, prompt: Union[str, List[Dict[str, Any]]], **kwargs):
         """
         Get a response from the client.
@@ -179,11 +197,31 @@ class OpenAIClient(BaseClient):
             **kwargs,
         )
 
-    def _initialize_client(self, api_key: str, base_url: Optional[str] = None, **kwargs) -> None:
+    def _initialize_client(self, api_key: str, base_url: Optional[str] = None, transport: Any = None, **kwargs) -> None:
         """
         Initialize the OpenAI client with the API key.
+
+        A ``transport`` exposing ``chat.completions.create`` (such as a
+        ReplayTransport) replaces the live client when given.
+        """
+        if transport is not None:
+            self.client = transport
+            return
+        self.client = transport_from_env(
+            lambda: openai.OpenAI(api_key=api_key, base_url=base_url, **kwargs)
+        )
+
+    def create_completion(self, messages: List[Dict[str, Any]], **kwargs):
+        """
+        Create a chat completion with the OpenAI model.
         """
-        self.client = openai.OpenAI(api_key=api_key, base_url=base_url, **kwargs)
+        request_kwargs = {"model": self.model_id, **self.default_response_kwargs}
+        request_kwargs.update(kwargs)
+
+        return self.client.chat.completions.create(
+            messages=messages,
+            **request_kwargs,
+        )
 
     def _make_api_call(
         self,
@@ -193,14 +231,7 @@ class OpenAIClient(BaseClient):
         """
         Make the API call to the OpenAI model.
         """
-        request_kwargs = self.default_response_kwargs.copy()
-        request_kwargs.update(kwargs)
-
-        completion = self.client.chat.completions.create(
-            model=self.model_id,
-            messages=messages,
-            **request_kwargs,
-        )
-        if request_kwargs.get("stream", False):
+        completion = self.create_completion(messages, **kwargs)
+        if kwargs.get("stream", self.default_response_kwargs.get("stream", False)):
             return completion
         return completion.choices[0].message.content
@@ -0,0 +1,242 @@
+import gzip
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from openai.types.chat import ChatCompletion
+
+RECORD_ENV_VAR = "IRIS_LLM_RECORD"
+REPLAY_ENV_VAR = "IRIS_LLM_REPLAY"
+
+
+class ReplayMissError(LookupError):
+    """Raised when a strict replay has no recording for a request."""
+
+
+def _open(path: str, mode: str):
+    """Open a recording file, transparently gzipping ``.gz`` paths."""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+
+
+def _digest(value: Any) -> str:
+    return hashlib.sha1(_dumps(value).encode("utf-8")).hexdigest()[:16]
+
+
+def request_fingerprint(request_kwargs: Dict[str, Any]) -> str:
+    """Return a stable key for a chat completion request.
+
+    Args:
+        request_kwargs (Dict[str, Any]): Keyword arguments passed to ``chat.completions.create``
+
+    Returns:
+        str: Short hex digest identifying the request
+    """
+    return _digest({k: v for k, v in request_kwargs.items() if k != "stream"})
+
+
+def lognormal_latency(median: float, sigma: float = 0.5, seed: Optional[int] = None) -> Callable[[Dict[str, Any]], float]:
+    """Build a synthetic latency model for replay.
+
+    Args:
+        median (float): Median latency in seconds
+        sigma (float, optional): Shape of the distribution. Defaults to 0.5
+        seed (int, optional): Seed for reproducible runs
+
+    Returns:
+        Callable: Function mapping a recorded entry to a latency in seconds
+    """
+    rng = random.Random(seed)
+    mu = 0.0 if median <= 0 else math.log(median)
+
+    def sample(entry: Dict[str, Any]) -> float:
+        return rng.lognormvariate(mu, sigma) if median > 0 else 0.0
+
+    return sample
+
+
+class _Completions:
+    def __init__(self, create: Callable[..., Any]):
+        self.create = create
+
+
+class _Chat:
+    def __init__(self, create: Callable[..., Any]):
+        self.completions = _Completions(create)
+
+
+class RecordingTransport:
+    """Wraps an OpenAI-style client and records every completion to disk.
+
+    The file is JSON lines. Tool definitions are written once per distinct
+    set and referenced by digest, which keeps recordings of tool-heavy
+    sessions small. Paths ending in ``.gz`` are gzip compressed.
+    """
+
+    def __init__(self, client: Any, path: str):
+        """Initialize the recorder
+
+        Args:
+            client: Object exposing ``chat.completions.create`` (e.g. ``openai.OpenAI``)
+            path (str): File to append recordings to
+        """
+        self.client = client
+        self.path = path
+        self.chat = _Chat(self._create)
+        self._lock = threading.Lock()
+        self._seen_tools = set()
+
+    def _create(self, **kwargs) -> Any:
+        start_time = time.perf_counter()
+        completion = self.client.chat.completions.create(**kwargs)
+        latency = time.perf_counter() - start_time
+
+        if kwargs.get("stream", False):
+            # Streams are consumed by the caller, there is nothing to record
+            return completion
+
+        request = dict(kwargs)
+        lines = []
+        tools = request.pop("tools", None)
+        with self._lock:
+            if tools is not None:
+                tools_digest = _digest(tools)
+                if tools_digest not in self._seen_tools:
+                    self._seen_tools.add(tools_digest)
+                    lines.append({"type": "tools", "digest": tools_digest, "tools": tools})
+                request["tools"] = {"$ref": tools_digest}
+
+            lines.append({
+                "type": "completion",
+                "key": request_fingerprint(kwargs),
+                "latency": round(latency, 6),
+                "request": request,
+                "response": completion.model_dump(exclude_none=True),
+            })
+
+            with _open(self.path, "a") as f:
+                for line in lines:
+                    f.write(_dumps(line) + "\n")
+
+        return completion
+
+
+class ReplayTransport:
+    """Serves recorded completions in place of a live OpenAI client.
+
+    Requests are matched on their fingerprint. Repeated identical requests
+    cycle through the recorded responses for that fingerprint, so a
+    recording can drive a benchmark loop indefinitely. Unmatched requests
+    fall back to recording order unless ``strict`` is set.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        latency: Union[str, float, Callable[[Dict[str, Any]], float]] = "recorded",
+        strict: bool = False,
+    ):
+        """Load a recording
+
+        Args:
+            path (str): Recording produced by RecordingTransport
+            latency (str | float | Callable, optional): "recorded" to sleep for the recorded
+                latency, "none" to return immediately, a number of seconds, or a callable
+                receiving the recorded entry. Defaults to "recorded"
+            strict (bool, optional): Raise ReplayMissError for unknown requests. Defaults to False
+        """
+        self.path = path
+        self.latency = latency
+        self.strict = strict
+        self.chat = _Chat(self._create)
+        self._lock = threading.Lock()
+        self._by_key: Dict[str, deque] = {}
+        self._entries: List[Dict[str, Any]] = []
+        self._position = 0
+        self._load()
+
+    def _load(self):
+        with _open(self.path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                if entry.get("type") != "completion":
+                    continue
+                self._entries.append(entry)
+                self._by_key.setdefault(entry["key"], deque()).append(entry)
+
+        if not self._entries:
+            raise ValueError(f"No recorded completions found in {self.path}")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _next_entry(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            matches = self._by_key.get(key)
+            if matches:
+                entry = matches.popleft()
+                matches.append(entry)
+                return entry
+
+            if self.strict:
+                raise ReplayMissError(f"No recording for request {key}")
+
+            entry = self._entries[self._position % len(self._entries)]
+            self._position += 1
+            return entry
+
+    def _delay(self, entry: Dict[str, Any]) -> float:
+        if self.latency == "recorded":
+            return entry.get("latency", 0.0)
+        if self.latency == "none":
+            return 0.0
+        if callable(self.latency):
+            return self.latency(entry)
+        return float(self.latency)
+
+    def _create(self, **kwargs) -> ChatCompletion:
+        if kwargs.get("stream", False):
+            raise ValueError("Streaming completions cannot be replayed")
+
+        entry = self._next_entry(request_fingerprint(kwargs))
+        delay = self._delay(entry)
+        if delay > 0:
+            time.sleep(delay)
+        return ChatCompletion.model_validate(entry["response"])
+
+
+def transport_from_env(factory: Callable[[], Any]) -> Any:
+    """Pick the chat completion transport based on the environment.
+
+    ``IRIS_LLM_REPLAY`` serves completions from a recording without touching
+    the network (the factory is never called, so no API key is needed).
+    ``IRIS_LLM_RECORD`` wraps the live client and records to the given file.
+
+    Args:
+        factory (Callable): Builds the live client
+
+    Returns:
+        Object exposing ``chat.completions.create``
+    """
+    replay_path = os.environ.get(REPLAY_ENV_VAR)
+    if replay_path:
+        return ReplayTransport(replay_path, latency=os.environ.get("IRIS_LLM_REPLAY_LATENCY", "recorded"))
+
+    record_path = os.environ.get(RECORD_ENV_VAR)
+    if record_path:
+        return RecordingTransport(factory(), record_path)
+
+    return factory()
@@ -0,0 +1,248 @@
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from openai.types.chat import ChatCompletion
+
+from llm.openai import BaseClient, OpenAIClient
+from orchestrator.metrics import record_llm_response
+from orchestrator.tracing import start_span
+from orchestrator.usage import get_usage_tracker
+
+STRATEGIES = ("failover", "fastest", "balance")
+
+
+class ProviderStats:
+    """Rolling latency and error rate for a single provider"""
+
+    def __init__(self, window: int = 50):
+        self.samples = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+
+    def record(self, latency: float, ok: bool):
+        self.samples.append((latency, ok))
+        self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+
+    @property
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    @property
+    def mean_latency(self) -> Optional[float]:
+        latencies = [latency for latency, ok in self.samples if ok]
+        if not latencies:
+            return None
+        return sum(latencies) / len(latencies)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "requests": len(self.samples),
+            "error_rate": round(self.error_rate, 3),
+            "mean_latency": self.mean_latency,
+            "consecutive_failures": self.consecutive_failures,
+            "cooling_down": self.cooldown_until > time.monotonic(),
+        }
+
+
+class AllProvidersFailedError(RuntimeError):
+    """Raised when every provider failed a request"""
+
+    def __init__(self, errors: Dict[str, Exception]):
+        self.errors = errors
+        details = ", ".join(f"{name}: {error}" for name, error in errors.items())
+        super().__init__(f"All LLM providers failed ({details})")
+
+
+class ProviderSelector:
+    """Routes chat completions across several LLM providers.
+
+    Exposes the same ``get_response(prompt, tools, max_tokens)`` call as
+    ``orchestrator.client.LLMClient`` and always returns an OpenAI
+    ``ChatCompletion``, so it can be dropped into ``ToolCallingLayer``.
+
+    Strategies:
+        failover: try providers in the configured order, skipping unhealthy ones
+        fastest: try healthy providers by rolling mean latency
+        balance: spread load, weighted by inverse rolling latency
+    """
+
+    def __init__(
+        self,
+        providers: Dict[str, BaseClient],
+        strategy: str = "failover",
+        window: int = 50,
+        max_error_rate: float = 0.5,
+        min_samples: int = 5,
+        max_consecutive_failures: int = 3,
+        cooldown: float = 30.0,
+        timeout: Optional[float] = None,
+    ):
+        """Initialize the selector
+
+        Args:
+            providers (Dict[str, BaseClient]): Clients keyed by name, in priority order
+            strategy (str, optional): One of "failover", "fastest" or "balance". Defaults to "failover"
+            window (int, optional): Number of recent requests tracked per provider. Defaults to 50
+            max_error_rate (float, optional): Error rate above which a provider is skipped. Defaults to 0.5
+            min_samples (int, optional): Requests needed before the error rate is trusted. Defaults to 5
+            max_consecutive_failures (int, optional): Failures in a row that trigger a cooldown. Defaults to 3
+            cooldown (float, optional): Seconds a failing provider is skipped. Defaults to 30
+            timeout (float, optional): Per-request timeout passed to the provider
+        """
+        if not providers:
+            raise ValueError("At least one LLM provider must be configured")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown strategy '{strategy}', expected one of {STRATEGIES}")
+
+        self.providers = dict(providers)
+        self.strategy = strategy
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.max_consecutive_failures = max_consecutive_failures
+        self.cooldown = cooldown
+        self.timeout = timeout
+        self.stats = {name: ProviderStats(window) for name in self.providers}
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    @classmethod
+    def from_env(cls) -> "ProviderSelector":
+        """Build a selector from environment variables
+
+        IRIS_LLM_PROVIDERS lists providers in priority order, e.g. "openai,groq,local".
+        IRIS_LLM_STRATEGY picks the strategy. Each provider reads its own settings:
+        OPENAI_API_KEY / IRIS_OPENAI_MODEL, GROQ_API_KEY / IRIS_GROQ_MODEL and
+        IRIS_LOCAL_LLM_BASE_URL / IRIS_LOCAL_LLM_MODEL for any OpenAI-compatible server.
+        """
+        names = [name.strip() for name in os.environ.get("IRIS_LLM_PROVIDERS", "openai").split(",") if name.strip()]
+        providers = {}
+        for name in names:
+            if name == "openai":
+                providers[name] = OpenAIClient(
+                    model_id=os.environ.get("IRIS_OPENAI_MODEL", "gpt-4o"),
+                    keep_history=False,
+                    api_key=os.environ.get("OPENAI_API_KEY"),
+                )
+            elif name == "groq":
+                from llm.groq import GroqClient
+
+                providers[name] = GroqClient(
+                    model_id=os.environ.get("IRIS_GROQ_MODEL", "llama-3.3-70b-versatile"),
+                    keep_history=False,
+                    api_key=os.environ.get("GROQ_API_KEY"),
+                )
+            elif name == "local":
+                base_url = os.environ.get("IRIS_LOCAL_LLM_BASE_URL")
+                if not base_url:
+                    raise ValueError("IRIS_LOCAL_LLM_BASE_URL must be set to use the local provider")
+                providers[name] = OpenAIClient(
+                    model_id=os.environ.get("IRIS_LOCAL_LLM_MODEL", "local-model"),
+                    base_url=base_url,
+                    keep_history=False,
+                    # Local OpenAI-compatible servers usually ignore the key but the SDK requires one
+                    api_key=os.environ.get("IRIS_LOCAL_LLM_API_KEY", "not-needed"),
+                )
+            else:
+                raise ValueError(f"Unknown LLM provider '{name}'")
+
+        return cls(providers, strategy=os.environ.get("IRIS_LLM_STRATEGY", "failover"))
+
+    def _is_healthy(self, name: str, now: float) -> bool:
+        stats = self.stats[name]
+        if stats.cooldown_until > now:
+            return False
+        return len(stats.samples) < self.min_samples or stats.error_rate <= self.max_error_rate
+
+    def _ordered_providers(self) -> List[str]:
+        now = time.monotonic()
+        with self._lock:
+            names = list(self.providers)
+            healthy = [name for name in names if self._is_healthy(name, now)]
+            unhealthy = [name for name in names if name not in healthy]
+
+            if self.strategy == "fastest":
+                # Providers without latency data go first so they get measured
+                healthy.sort(key=lambda name: self.stats[name].mean_latency or 0.0)
+            elif self.strategy == "balance" and len(healthy) > 1:
+                weights = {name: 1.0 / max(self.stats[name].mean_latency or 0.001, 0.001) for name in healthy}
+                ordered = []
+                while healthy:
+                    pick = self._random.choices(healthy, weights=[weights[name] for name in healthy])[0]
+                    ordered.append(pick)
+                    healthy.remove(pick)
+                healthy = ordered
+
+        # Unhealthy providers are still a last resort if everything else fails
+        return healthy + unhealthy
+
+    def _record(self, name: str, latency: float, ok: bool):
+        with self._lock:
+            stats = self.stats[name]
+            stats.record(latency, ok)
+            if not ok and stats.consecutive_failures >= self.max_consecutive_failures:
+                stats.cooldown_until = time.monotonic() + self.cooldown
+
+    @staticmethod
+    def _normalize(completion: Any) -> ChatCompletion:
+        if isinstance(completion, ChatCompletion):
+            return completion
+        return ChatCompletion.model_validate(completion.model_dump(exclude_none=True))
+
+    def complete(self, messages: List[Dict[str, Any]], **kwargs) -> ChatCompletion:
+        """Send messages to the best available provider
+
+        Args:
+            messages (List[Dict[str, Any]]): Chat messages
+            **kwargs: Extra completion arguments (tools, max_tokens, ...)
+
+        Returns:
+            ChatCompletion: Completion from the first provider that succeeded
+        """
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+
+        errors = {}
+        usage_tracker = get_usage_tracker()
+        for name in self._ordered_providers():
+            # Users over their daily budget get the provider's cheaper model, if one is configured
+            model = usage_tracker.select_model(self.providers[name].model_id)
+            request_kwargs = dict(kwargs, model=model) if model != self.providers[name].model_id else kwargs
+            start_time = time.perf_counter()
+            with start_span("llm.provider", **{"llm.provider": name, "llm.model": model}) as span:
+                try:
+                    completion = self.providers[name].create_completion(messages, **request_kwargs)
+                except Exception as e:
+                    span.record_exception(e)
+                    record_llm_response(model, time.perf_counter() - start_time, error=True)
+                    self._record(name, time.perf_counter() - start_time, ok=False)
+                    self.logger.warning(f"LLM provider {name} failed, trying next: {e}")
+                    errors[name] = e
+                    continue
+
+            self._record(name, time.perf_counter() - start_time, ok=True)
+            completion = self._normalize(completion)
+            record_llm_response(model, time.perf_counter() - start_time, completion)
+            usage_tracker.record(model, completion)
+            return completion
+
+        raise AllProvidersFailedError(errors)
+
+    def get_response(self, prompt: str, tools: Optional[List[Dict[str, Any]]] = None, max_tokens: int = 4096):
+        """Drop-in replacement for LLMClient.get_response"""
+        messages = [{"role": "user", "content": prompt}]
+        if tools:
+            return self.complete(messages, tools=tools, tool_choice="auto", max_tokens=max_tokens)
+        return self.complete(messages, max_tokens=max_tokens)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return rolling stats for every provider"""
+        with self._lock:
+            return {name: stats.as_dict() for name, stats in self.stats.items()}
@@ -1,3 +1,3 @@
-from .client import LLMClient
+from .client import LLMClient, create_llm_client
 
-__all__ = ["LLMClient"]
+__all__ = ["LLMClient", "create_llm_client"]
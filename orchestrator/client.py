@@ -1,33 +1,60 @@
 import os
+import time
 from typing import List, Dict, Any, Optional
 from dotenv import load_dotenv
 from openai import OpenAI
 
+from llm.replay import transport_from_env
+from orchestrator.metrics import record_llm_response
+from orchestrator.tracing import current_span, traced
+from orchestrator.usage import get_usage_tracker
+
 load_dotenv()
 
 MODEL = "gpt-4o"
 
 class LLMClient:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, transport=None):
+        # transport lets callers (and IRIS_LLM_RECORD / IRIS_LLM_REPLAY) swap the live client
+        self.client = transport or transport_from_env(lambda: OpenAI(api_key=os.getenv("OPENAI_API_KEY")))
         self.model = MODEL
 
+    @traced("llm.chat")
     def get_response(self, prompt: str, tools: Optional[List[Dict[str, Any]]] = None, max_tokens: int = 4096):
         messages = [{"role": "user", "content": prompt}]
+        usage_tracker = get_usage_tracker()
+        # Falls back to a cheaper model once the requesting user's budget is spent
+        model = usage_tracker.select_model(self.model)
+        span = current_span()
+        span.set_attributes(**{"llm.model": model, "llm.tools": len(tools or [])})
         
-        if tools:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                tools=tools,
-                tool_choice="auto",
-                max_tokens=max_tokens
-            )
-        else:
+        request_kwargs = {"tools": tools, "tool_choice": "auto"} if tools else {}
+        start_time = time.perf_counter()
+        try:
             response = self.client.chat.completions.create(
-                model=self.model,
+                model=model,
                 messages=messages,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                **request_kwargs
             )
+        except Exception:
+            record_llm_response(model, time.perf_counter() - start_time, error=True)
+            raise
+        record_llm_response(model, time.perf_counter() - start_time, response)
+        usage_tracker.record(model, response)
         
+        if getattr(response, "usage", None):
+            span.set_attributes(**{
+                "llm.prompt_tokens": response.usage.prompt_tokens,
+                "llm.completion_tokens": response.usage.completion_tokens,
+            })
         return response
+
+
+def create_llm_client():
+    """Return a multi-provider selector when IRIS_LLM_PROVIDERS is set, otherwise an LLMClient."""
+    if os.getenv("IRIS_LLM_PROVIDERS"):
+        from llm.selector import ProviderSelector
+
+        return ProviderSelector.from_env()
+    return LLMClient()
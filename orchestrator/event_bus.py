@@ -0,0 +1,113 @@
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+from orchestrator.metrics import Counter
+from tools.slack.dispatcher import EventDispatcher
+
+EVENT_BUS_DROPPED = Counter(
+    "iris_event_bus_dropped_total", "Events a subscriber dropped because its queue was full", ["bus", "subscriber"]
+)
+
+
+class Subscriber:
+    """One consumer on the bus with its own queue and workers"""
+
+    def __init__(self, bus: str, name: str, handler: Callable, workers: int, max_pending: int,
+                 timeout: Optional[float]):
+        self.name = name
+        self.timeout = timeout
+        self.dispatcher = EventDispatcher(handler, workers=workers, max_pending=max_pending, name=f"{bus}_{name}")
+
+    @property
+    def pending(self) -> int:
+        return self.dispatcher.pending
+
+
+class EventBus:
+    """In-process fan-out of events to independent subscribers
+
+    Every subscriber gets its own bounded EventDispatcher, so each keeps
+    per-key ordering and its own worker count, and a slow consumer only
+    fills its own queue. A subscriber with a timeout drops events once its
+    queue stays full that long; one without waits, pushing back on the
+    publisher. Subscribers that can drop are published to first, so they
+    never wait behind one that blocks.
+
+    The bus has the same submit() as an EventDispatcher, so it can be
+    passed anywhere a dispatcher is expected, e.g.
+    SlackService.listen_for_messages(dispatcher=bus).
+    """
+
+    def __init__(self, name: str = "slack_bus"):
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+        self._subscribers: Dict[str, Subscriber] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, name: str, handler: Callable, workers: int = 1, max_pending: int = 1000,
+                  timeout: Optional[float] = None) -> Subscriber:
+        """Register a consumer
+
+        Args:
+            name (str): Subscriber name, used in metrics and thread names
+            handler (Callable): Called with the arguments passed to publish()
+            workers (int, optional): Worker threads for this subscriber. Defaults to 1
+            max_pending (int, optional): Queued events before the subscriber is full. Defaults to 1000
+            timeout (float, optional): Seconds publish() waits for space before dropping the event
+                for this subscriber. Waits forever by default
+
+        Returns:
+            Subscriber: The new subscriber
+        """
+        with self._lock:
+            if name in self._subscribers:
+                raise ValueError(f"Subscriber '{name}' is already registered on {self.name}")
+            subscriber = Subscriber(self.name, name, handler, workers, max_pending, timeout)
+            self._subscribers[name] = subscriber
+        return subscriber
+
+    def unsubscribe(self, name: str, drain: bool = True):
+        """Remove a consumer, finishing its queued events by default"""
+        with self._lock:
+            subscriber = self._subscribers.pop(name)
+        subscriber.dispatcher.stop(drain=drain)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._subscribers
+
+    def publish(self, key: str, *args) -> int:
+        """Hand an event to every subscriber
+
+        Args:
+            key (str): Ordering key, see event_key()
+            *args: Arguments for the subscribers' handlers
+
+        Returns:
+            int: Number of subscribers that accepted the event
+        """
+        subscribers = sorted(self._subscribers.values(), key=lambda subscriber: subscriber.timeout is None)
+        accepted = 0
+        for subscriber in subscribers:
+            if subscriber.dispatcher.submit(key, *args, timeout=subscriber.timeout):
+                accepted += 1
+            else:
+                EVENT_BUS_DROPPED.labels(bus=self.name, subscriber=subscriber.name).inc()
+        return accepted
+
+    def submit(self, key: str, *args, timeout: Optional[float] = None) -> bool:
+        """Dispatcher-compatible publish(); per-subscriber timeouts apply instead of `timeout`"""
+        return self.publish(key, *args) > 0
+
+    @property
+    def pending(self) -> Dict[str, int]:
+        return {name: subscriber.pending for name, subscriber in self._subscribers.items()}
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every subscriber has handled its queued events"""
+        return all(subscriber.dispatcher.join(timeout) for subscriber in list(self._subscribers.values()))
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = 30.0):
+        """Stop every subscriber"""
+        for subscriber in list(self._subscribers.values()):
+            subscriber.dispatcher.stop(drain=drain, timeout=timeout)
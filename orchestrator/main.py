@@ -2,7 +2,8 @@ import asyncio
 import os
 
 from rich.console import Console
-from orchestrator.client import LLMClient
+from orchestrator.client import create_llm_client
+from orchestrator.tracing import current_span, traced
 from tools.tools import ToolCallingLayer
 
 class Orchestrator:
@@ -12,13 +13,15 @@ class Orchestrator:
     It is also responsible for receiving messages from the server and sending them to the user.
     """
 
-    def __init__(self):
+    def __init__(self, llm_client=None, tool_layer=None):
         self.console = Console()
-        self.llm_client = LLMClient()
-        self.tool_layer = ToolCallingLayer()
+        self.llm_client = llm_client or create_llm_client()
+        self.tool_layer = tool_layer or ToolCallingLayer(llm_client=self.llm_client)
 
+    @traced("orchestrator.process")
     def process(self, message: str):
         print(f"Processing message: {message}")
+        current_span().set_attribute("message.length", len(message))
         
         system_prompt = "You are a helpful assistant. Use available tools when appropriate."
         
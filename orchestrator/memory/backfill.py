@@ -0,0 +1,269 @@
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from orchestrator.metrics import Counter
+from tools.slack.outbox import TokenBucket
+from tools.slack.pagination import call_with_retry, paginate
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_MESSAGES = Counter("iris_backfill_messages_total", "Slack messages backfilled into memory", ["status"])
+
+# Same filter as live events in SlackService.handle_event
+SKIPPED_SUBTYPES = {"bot_message", "message_changed", "message_deleted"}
+
+# conversations.history and conversations.replies are Tier 3: about 50 calls per minute each
+DEFAULT_RATE = 50 / 60
+
+
+class BackfillCheckpoint:
+    """Per-channel history cursors saved to a JSON file after every page"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self.channels: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.channels = json.load(f)
+
+    def get(self, channel_id: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self.channels.get(channel_id, {"cursor": None, "done": False, "messages": 0}))
+
+    def update(self, channel_id: str, **fields):
+        with self._lock:
+            self.channels.setdefault(channel_id, {"cursor": None, "done": False, "messages": 0}).update(fields)
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.channels, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class SlackBackfill:
+    """Loads Slack history into memory through the live ingestion path
+
+    Channels are paged in parallel with conversations.history, and every
+    thread is fetched with conversations.replies. Both are paced by
+    per-method token buckets so the backfill stays inside Slack's rate
+    limits. Messages go through SlackMem0Adapter._process_message, so they
+    get the same importance scoring and conversation grouping as live
+    events. History arrives newest first, so a channel is read in windows
+    of window_pages pages, each stored oldest first; windows themselves go
+    from newest to oldest. A channel's cursor is checkpointed only after a
+    window and its threads are stored, so an interrupted run resumes
+    without gaps.
+    """
+
+    def __init__(
+        self,
+        adapter,
+        channels: List[str],
+        oldest: Optional[float] = None,
+        workers: int = 4,
+        rate: Optional[float] = None,
+        checkpoint_path: Optional[str] = None,
+        include_replies: bool = True,
+        page_size: int = 200,
+        window_pages: int = 10,
+    ):
+        """Initialize the backfill
+
+        Args:
+            adapter (SlackMem0Adapter): Adapter whose Slack client is read and whose ingestion path is fed
+            channels (List[str]): Channel IDs to backfill
+            oldest (float, optional): Only fetch messages after this Unix timestamp
+            workers (int, optional): Channels (and threads) fetched in parallel. Defaults to 4
+            rate (float, optional): Calls per second per API method. Defaults to IRIS_BACKFILL_RATE or 50/minute
+            checkpoint_path (str, optional): Cursor file. Defaults to backfill.json in IRIS_DATA_DIR
+            include_replies (bool, optional): Also fetch thread replies. Defaults to True
+            page_size (int, optional): Messages per API page. Defaults to 200
+            window_pages (int, optional): Pages collected and stored oldest first together. Defaults to 10
+        """
+        self.adapter = adapter
+        self.client = adapter.slack.client
+        self.channels = list(dict.fromkeys(channels))
+        self.oldest = oldest
+        self.workers = workers
+        self.include_replies = include_replies
+        self.page_size = page_size
+        self.window_pages = max(window_pages, 1)
+        rate = rate or float(os.environ.get("IRIS_BACKFILL_RATE", DEFAULT_RATE))
+        self.history_bucket = TokenBucket(rate, capacity=3)
+        self.replies_bucket = TokenBucket(rate, capacity=3)
+        self.checkpoint = BackfillCheckpoint(
+            checkpoint_path or os.path.join(os.environ.get("IRIS_DATA_DIR", ".iris"), "backfill.json")
+        )
+
+        self.messages = 0
+        self.failures = 0
+        self.threads = 0
+        self._counter_lock = threading.Lock()
+        self._started_at = None
+
+    @staticmethod
+    def _limited(bucket: TokenBucket, method: Callable) -> Callable:
+        def call(**kwargs):
+            bucket.acquire()
+            return method(**kwargs)
+        return call
+
+    @property
+    def rate(self) -> float:
+        """Messages stored per second since the run started"""
+        if not self._started_at:
+            return 0.0
+        return self.messages / max(time.monotonic() - self._started_at, 1e-6)
+
+    def _ingest(self, channel_id: str, message: dict) -> bool:
+        """Store one message, returning whether it was written"""
+        if message.get("subtype") in SKIPPED_SUBTYPES or not message.get("user"):
+            return False
+        try:
+            self.adapter._process_message(channel_id, message["user"], message.get("text", ""), dict(message, channel=channel_id))
+        except Exception as e:
+            logger.error(f"Error storing message {channel_id}/{message.get('ts')}: {e}")
+            BACKFILL_MESSAGES.labels(status="error").inc()
+            with self._counter_lock:
+                self.failures += 1
+            return False
+        BACKFILL_MESSAGES.labels(status="ok").inc()
+        with self._counter_lock:
+            self.messages += 1
+        return True
+
+    def _backfill_thread(self, channel_id: str, thread_ts: str) -> int:
+        replies = paginate(
+            self._limited(self.replies_bucket, self.client.conversations_replies),
+            "messages", channel=channel_id, ts=thread_ts, limit=self.page_size,
+        )
+        written = 0
+        for message in replies:
+            # The parent is returned first and was already stored from history
+            if message.get("ts") != thread_ts:
+                written += self._ingest(channel_id, message)
+        with self._counter_lock:
+            self.threads += 1
+        return written
+
+    def _backfill_channel(self, channel_id: str, thread_pool: ThreadPoolExecutor):
+        state = self.checkpoint.get(channel_id)
+        if state["done"]:
+            logger.info(f"{channel_id}: already backfilled, skipping")
+            return
+        cursor, stored = state["cursor"], state["messages"]
+        fetch = self._limited(self.history_bucket, self.client.conversations_history)
+
+        while True:
+            messages = []
+            for _ in range(self.window_pages):
+                kwargs = {"channel": channel_id, "cursor": cursor, "limit": self.page_size}
+                if self.oldest:
+                    kwargs["oldest"] = str(self.oldest)
+                response = call_with_retry(fetch, **kwargs)
+                messages.extend(response.get("messages", []))
+                cursor = (response.get("response_metadata") or {}).get("next_cursor") or None
+                if cursor is None:
+                    break
+
+            # History is newest first; store the whole window oldest first like live events
+            for message in reversed(messages):
+                stored += self._ingest(channel_id, message)
+            if self.include_replies:
+                threads = [m["ts"] for m in messages if m.get("reply_count")]
+                for future in [thread_pool.submit(self._backfill_thread, channel_id, ts) for ts in threads]:
+                    stored += future.result()
+
+            self.checkpoint.update(channel_id, cursor=cursor, done=cursor is None, messages=stored)
+            logger.info(f"{channel_id}: {stored} messages, {self.rate:.1f} msgs/sec overall")
+            if cursor is None:
+                return
+
+    def run(self) -> Dict[str, Any]:
+        """Backfill every channel
+
+        Returns:
+            dict: Messages and threads stored, failures, elapsed seconds and msgs/sec
+        """
+        self._started_at = time.monotonic()
+        errors = {}
+        with ThreadPoolExecutor(self.workers, thread_name_prefix="backfill-replies") as thread_pool:
+            with ThreadPoolExecutor(self.workers, thread_name_prefix="backfill-history") as channel_pool:
+                futures = {
+                    channel_id: channel_pool.submit(self._backfill_channel, channel_id, thread_pool)
+                    for channel_id in self.channels
+                }
+                for channel_id, future in futures.items():
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"{channel_id}: backfill stopped, rerun to resume: {e}")
+                        errors[channel_id] = str(e)
+
+        # Flush partially grouped conversations so nothing is left in memory
+        self.adapter.store_all_active_conversations()
+        elapsed = time.monotonic() - self._started_at
+        return {
+            "channels": len(self.channels),
+            "messages": self.messages,
+            "threads": self.threads,
+            "failures": self.failures,
+            "errors": errors,
+            "seconds": round(elapsed, 2),
+            "messages_per_second": round(self.rate, 2),
+        }
+
+
+def joined_channels(client) -> List[str]:
+    """IDs of every public and private channel the bot is a member of"""
+    channels = paginate(client.conversations_list, "channels", types="public_channel,private_channel", limit=1000)
+    return [channel["id"] for channel in channels if channel.get("is_member")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill Slack history into Mem0")
+    parser.add_argument("channels", nargs="*", help="Channel IDs to backfill")
+    parser.add_argument("--all-joined", action="store_true", help="Backfill every channel the bot is a member of")
+    parser.add_argument("--oldest", help="Only messages on or after this day (YYYY-MM-DD)")
+    parser.add_argument("--workers", type=int, default=4, help="Channels fetched in parallel")
+    parser.add_argument("--rate", type=float, help="API calls per second per method")
+    parser.add_argument("--checkpoint", help="Checkpoint file used to resume")
+    parser.add_argument("--no-replies", action="store_true", help="Skip thread replies")
+    parser.add_argument("--window-pages", type=int, default=10, help="History pages stored oldest first together")
+    args = parser.parse_args()
+
+    import dotenv
+    from orchestrator.memory.slack_mem0_adapter import SlackMem0Adapter
+
+    dotenv.load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    adapter = SlackMem0Adapter()
+    channels = list(args.channels)
+    if args.all_joined:
+        channels.extend(joined_channels(adapter.slack.client))
+    if not channels:
+        parser.error("Pass channel IDs or --all-joined")
+
+    backfill = SlackBackfill(
+        adapter,
+        channels,
+        oldest=datetime.strptime(args.oldest, "%Y-%m-%d").timestamp() if args.oldest else None,
+        workers=args.workers,
+        rate=args.rate,
+        checkpoint_path=args.checkpoint,
+        include_replies=not args.no_replies,
+        window_pages=args.window_pages,
+    )
+    print(json.dumps(backfill.run(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,11 @@
 import os
 import logging
+import time
 from mem0 import MemoryClient
 
+from orchestrator.metrics import MEM0_WRITE_LATENCY, MEM0_WRITES
+from orchestrator.tracing import traced
+
 class Mem0Memory:
     """Memory integration using Mem0's API"""
     
@@ -18,17 +22,24 @@ class Mem0Memory:
         self.logger = logging.getLogger(__name__)
         self.client = MemoryClient(api_key=self.api_key)
     
+    @traced("mem0.add_memory")
     def add_memory(self, content, metadata=None, user_id=None,agent_id=None):
         meta = metadata or {}
             
         print(f"Adding memory: {content}, {meta}, {user_id}, {agent_id}")
         
+        start_time = time.perf_counter()
         try:
             self.client.add(messages=content, user_id=user_id, agent_id=agent_id, metadata=meta)
+            MEM0_WRITES.labels(status="ok").inc()
         except Exception as e:
+            MEM0_WRITES.labels(status="error").inc()
             self.logger.error(f"Error adding memory to Mem0: {str(e)}")
             return None
+        finally:
+            MEM0_WRITE_LATENCY.observe(time.perf_counter() - start_time)
     
+    @traced("mem0.search_memories")
     def search_memories(self, query, user_id=None, metadata_filter=None):
         try:
             return self.client.search(query, user_id=user_id, metadata=metadata_filter)
@@ -1,34 +1,53 @@
 from tools.slack.service import SlackService
-from orchestrator.mem0_integration import Mem0Memory
+from orchestrator.memory.mem0_integration import Mem0Memory
+from orchestrator.tracing import current_span, start_span, traced
 import logging
 import re
+import threading
 
 class SlackMem0Adapter:
-    def __init__(self, mem0_api_key=None, slack_bot_token=None, slack_app_token=None):
+    def __init__(self, mem0_api_key=None, slack_bot_token=None, slack_app_token=None, slack_service=None, mem0=None):
+        """Initialize the adapter
+        
+        Args:
+            mem0_api_key (str, optional): Mem0 API key, used when no mem0 client is passed
+            slack_bot_token (str, optional): Slack bot token, used when no Slack service is passed
+            slack_app_token (str, optional): Slack app token, used when no Slack service is passed
+            slack_service (SlackService, optional): Existing service to share, e.g. the assistant's
+                when the adapter subscribes to its event bus instead of opening its own connection
+            mem0 (Mem0Memory, optional): Existing Mem0 client to share
+        """
         self.logger = logging.getLogger(__name__)
-        self.mem0 = Mem0Memory(api_key=mem0_api_key)
-        self.slack = SlackService(bot_token=slack_bot_token, app_token=slack_app_token)
+        self.mem0 = mem0 or Mem0Memory(api_key=mem0_api_key)
+        self.slack = slack_service or SlackService(bot_token=slack_bot_token, app_token=slack_app_token)
+        self._owns_slack = slack_service is None
         
         self.active_conversations = {}
+        # Messages arrive on several dispatcher workers at once
+        self._conversations_lock = threading.Lock()
     
     def start_listening(self):
         self.logger.info("Starting to listen for Slack messages...")
         return self.slack.listen_for_messages(self._process_message)
     
+    @traced("mem0_adapter.process_message")
     def _process_message(self, channel_id, user_id, text, event_data):
+        current_span().set_attributes(**{"slack.channel": channel_id, "slack.user": user_id})
         try:
-            user_info = self.slack.client.users_info(user=user_id)
-            user_name = user_info['user']['real_name']
-            user_email = user_info['user'].get('profile', {}).get('email')
+            with start_span("slack.users_info"):
+                user = self.slack.metadata.get_user(user_id)
+            user_name = user['real_name'] if user else user_id
+            user_email = user.get('profile', {}).get('email') if user else None
         except Exception as e:
             self.logger.error(f"Error getting user info: {str(e)}")
             user_name = user_id
             user_email = None
         
         try:
-            channel_info = self.slack.client.conversations_info(channel=channel_id)
-            channel_name = channel_info['channel'].get('name', channel_id)
-            is_direct_message = channel_info['channel']['is_im']
+            with start_span("slack.conversations_info"):
+                channel = self.slack.metadata.get_channel(channel_id)
+            channel_name = channel.get('name', channel_id) if channel else channel_id
+            is_direct_message = channel['is_im'] if channel else False
         except Exception as e:
             self.logger.error(f"Error getting channel info: {str(e)}")
             channel_name = channel_id
@@ -122,43 +141,48 @@ class SlackMem0Adapter:
         # Create conversation ID combining channel and thread
         conversation_key = f"{channel_id}:{thread_ts}"
         
-        # Check if this is part of an existing conversation
-        if conversation_key not in self.active_conversations:
-            # Start a new conversation
-            self.active_conversations[conversation_key] = {
-                "messages": [],
-                "participants": set(),
-                "start_time": metadata.get('ts'),
-                "channel_name": metadata.get('channel_name'),
-                "last_update": metadata.get('ts')
-            }
-        
-        # Add message to conversation
-        self.active_conversations[conversation_key]["messages"].append({
-            "user_id": user_id,
-            "content": text,
-            "timestamp": metadata.get('ts'),
-            "metadata": metadata
-        })
-        
-        # Add participant
-        self.active_conversations[conversation_key]["participants"].add(user_id)
-        
-        # Update last activity
-        self.active_conversations[conversation_key]["last_update"] = metadata.get('ts')
-        
-        # If conversation has enough messages or enough time has passed,
-        # store it as a complete conversation in Mem0
-        if len(self.active_conversations[conversation_key]["messages"]) >= 5:
+        with self._conversations_lock:
+            # Check if this is part of an existing conversation
+            if conversation_key not in self.active_conversations:
+                # Start a new conversation
+                self.active_conversations[conversation_key] = {
+                    "messages": [],
+                    "participants": set(),
+                    "start_time": metadata.get('ts'),
+                    "channel_name": metadata.get('channel_name'),
+                    "last_update": metadata.get('ts')
+                }
+            
+            # Add message to conversation
+            self.active_conversations[conversation_key]["messages"].append({
+                "user_id": user_id,
+                "content": text,
+                "timestamp": metadata.get('ts'),
+                "metadata": metadata
+            })
+            
+            # Add participant
+            self.active_conversations[conversation_key]["participants"].add(user_id)
+            
+            # Update last activity
+            self.active_conversations[conversation_key]["last_update"] = metadata.get('ts')
+            
+            # If conversation has enough messages or enough time has passed,
+            # store it as a complete conversation in Mem0
+            is_complete = len(self.active_conversations[conversation_key]["messages"]) >= 5
+        
+        if is_complete:
             self._store_conversation(conversation_key)
     
+    @traced("mem0_adapter.store_conversation")
     def _store_conversation(self, conversation_key):
         """Store a completed conversation in Mem0
         
         Args:
             conversation_key (str): Key identifying the conversation
         """
-        conversation = self.active_conversations.get(conversation_key)
+        with self._conversations_lock:
+            conversation = self.active_conversations.pop(conversation_key, None)
         if not conversation:
             return
         
@@ -192,9 +216,6 @@ class SlackMem0Adapter:
             metadata=conversation_metadata,
             user_id=conversation["messages"][0]["user_id"]
         )
-        
-        # Remove from active conversations
-        del self.active_conversations[conversation_key]
     
     def store_all_active_conversations(self):
         """Store all currently active conversations
@@ -206,5 +227,5 @@ class SlackMem0Adapter:
     def close(self):
         """Close connections and clean up"""
         self.store_all_active_conversations()
-        if hasattr(self.slack, 'close_connection'):
+        if self._owns_slack and hasattr(self.slack, 'close_connection'):
             self.slack.close_connection() 
\ No newline at end of file
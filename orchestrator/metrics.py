@@ -0,0 +1,391 @@
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+logger = logging.getLogger(__name__)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Tuple[str, str] = None) -> str:
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class _Sharded:
+    """Per-thread accumulators so hot paths never contend on a lock
+
+    Each thread writes only to its own shard. Readers sum every shard,
+    which may be a few increments stale but is never torn in a way that
+    matters for monitoring. Shards of threads that have exited are folded
+    into a retired total, so thread churn does not grow the shard list.
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._local = threading.local()
+        self._shards: List[Tuple["weakref.ref[threading.Thread]", List[float]]] = []
+        self._retired = [0.0] * size
+        self._lock = threading.Lock()
+
+    def shard(self) -> List[float]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = [0.0] * self._size
+            with self._lock:
+                self._prune()
+                self._shards.append((weakref.ref(threading.current_thread()), shard))
+            self._local.shard = shard
+            return shard
+
+    def _prune(self):
+        # A dead thread never writes again, so its shard can be folded in; caller holds the lock
+        live = []
+        for owner, shard in self._shards:
+            thread = owner()
+            if thread is not None and thread.is_alive():
+                live.append((owner, shard))
+            else:
+                for i, value in enumerate(shard):
+                    self._retired[i] += value
+        self._shards = live
+
+    def totals(self) -> List[float]:
+        with self._lock:
+            self._prune()
+            shards = [shard for _, shard in self._shards]
+            totals = list(self._retired)
+        for shard in shards:
+            for i, value in enumerate(shard):
+                totals[i] += value
+        return totals
+
+
+class _CounterChild:
+    def __init__(self):
+        self._values = _Sharded(1)
+
+    def inc(self, amount: float = 1.0):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        self._values.shard()[0] += amount
+
+    def get(self) -> float:
+        return self._values.totals()[0]
+
+
+class _GaugeChild:
+    def __init__(self):
+        self._value = 0.0
+        self._functions: List[Callable[[], float]] = []
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        self._value = float(value)
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        self.inc(-amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from a callable at scrape time instead of tracking it"""
+        with self._lock:
+            self._functions = [function]
+
+    def add_function(self, function: Callable[[], float]) -> Callable[[], None]:
+        """Add a callable whose value is summed with the others at scrape time
+
+        Lets several owners, e.g. two dispatchers with the same queue name,
+        report into one series.
+
+        Returns:
+            Callable: Removes the function again, e.g. when its owner stops
+        """
+        with self._lock:
+            self._functions = self._functions + [function]
+
+        def remove():
+            with self._lock:
+                self._functions = [f for f in self._functions if f is not function]
+        return remove
+
+    def get(self) -> float:
+        functions = self._functions
+        if functions:
+            try:
+                return float(sum(function() for function in functions))
+            except Exception as e:
+                logger.warning(f"Gauge callback failed: {e}")
+                return math.nan
+        return self._value
+
+
+class _HistogramChild:
+    def __init__(self, buckets: Tuple[float, ...]):
+        self._buckets = buckets
+        # One slot per bucket, then the +Inf bucket, then the sum
+        self._values = _Sharded(len(buckets) + 2)
+
+    def observe(self, value: float):
+        shard = self._values.shard()
+        shard[bisect.bisect_left(self._buckets, value)] += 1
+        shard[-1] += value
+
+    def time(self):
+        """Context manager that observes the duration of its block"""
+        return _Timer(self)
+
+    def get(self) -> Tuple[List[float], float, float]:
+        """Return (cumulative bucket counts, count, sum)"""
+        totals = self._values.totals()
+        cumulative, running = [], 0.0
+        for count in totals[:-1]:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, totals[-1]
+
+
+class _Timer:
+    __slots__ = ("histogram", "start_time")
+
+    def __init__(self, histogram: _HistogramChild):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start_time = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start_time)
+        return False
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), registry: "Registry" = None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        (registry or REGISTRY).register(self)
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, **labels):
+        """Return the child metric for a set of label values"""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _unlabelled(self):
+        if self.labelnames:
+            raise ValueError(f"Metric {self.name} requires labels {self.labelnames}")
+        return self._children[()]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonic counter, e.g. requests or tokens"""
+
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. queue depth"""
+
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._unlabelled().set(value)
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._unlabelled().dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        self._unlabelled().set_function(function)
+
+    def add_function(self, function: Callable[[], float]) -> Callable[[], None]:
+        return self._unlabelled().add_function(function)
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(child.get())}"
+
+
+class Histogram(_Metric):
+    """Distribution of observed values, e.g. latencies in seconds"""
+
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS, registry: "Registry" = None):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._unlabelled().observe(value)
+
+    def time(self):
+        return self._unlabelled().time()
+
+    def samples(self):
+        for key, child in list(self._children.items()):
+            cumulative, count, total = child.get()
+            for bound, value in zip(self.buckets + (math.inf,), cumulative):
+                labels = _format_labels(self.labelnames, key, ("le", _format_value(bound)))
+                yield f"{self.name}_bucket{labels} {_format_value(value)}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_count{labels} {_format_value(count)}"
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+
+
+class Registry:
+    """Collection of metrics rendered together in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def render() -> str:
+    """Render every registered metric in the Prometheus text format"""
+    return REGISTRY.render()
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "0.0.0.0") -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics from a background thread
+
+    For processes that do not run the FastAPI server, such as the Slack
+    listeners. Uses IRIS_METRICS_PORT when no port is given and does
+    nothing if neither is set.
+
+    Returns:
+        ThreadingHTTPServer: The running server, or None if disabled
+    """
+    port = port if port is not None else os.environ.get("IRIS_METRICS_PORT")
+    if not port:
+        return None
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Serving metrics on port {server.server_address[1]}")
+    return server
+
+
+# Metrics shared across the app. Defined here so every process exposes the same names.
+LLM_LATENCY = Histogram("iris_llm_request_seconds", "LLM request latency", ["model"])
+LLM_REQUESTS = Counter("iris_llm_requests_total", "LLM requests by outcome", ["model", "status"])
+LLM_TOKENS = Counter("iris_llm_tokens_total", "LLM tokens used", ["model", "type"])
+TOOL_LATENCY = Histogram("iris_tool_seconds", "Tool execution latency", ["tool"])
+TOOL_CALLS = Counter("iris_tool_calls_total", "Tool executions by outcome", ["tool", "status"])
+SLACK_EVENT_LAG = Histogram(
+    "iris_slack_event_lag_seconds", "Delay between a Slack event's timestamp and handling it",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+MEM0_WRITE_LATENCY = Histogram("iris_mem0_write_seconds", "Mem0 add_memory latency")
+MEM0_WRITES = Counter("iris_mem0_writes_total", "Mem0 writes by outcome", ["status"])
+WS_BROADCAST_LATENCY = Histogram("iris_ws_broadcast_seconds", "WebSocket fan-out latency")
+WS_CONNECTIONS = Gauge("iris_ws_connections", "Open WebSocket connections")
+QUEUE_DEPTH = Gauge("iris_queue_depth", "Items waiting in internal queues", ["queue"])
+QUEUE_WAIT = Histogram("iris_queue_wait_seconds", "Time items wait in internal queues before a worker picks them up", ["queue"])
+
+
+def record_llm_response(model: str, latency: float, response=None, error: bool = False):
+    """Record latency, outcome and token usage of one LLM request"""
+    LLM_LATENCY.labels(model=model).observe(latency)
+    LLM_REQUESTS.labels(model=model, status="error" if error else "ok").inc()
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.labels(model=model, type="prompt").inc(usage.prompt_tokens or 0)
+        LLM_TOKENS.labels(model=model, type="completion").inc(usage.completion_tokens or 0)
@@ -0,0 +1,262 @@
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = 0.01
+DEFAULT_SECONDS = 30
+MAX_SECONDS = 300
+MAX_DEPTH = 128
+
+
+class ProfilerBusyError(RuntimeError):
+    """Raised when a profile or heap snapshot is already running"""
+
+
+def _output_dir() -> str:
+    directory = os.environ.get("IRIS_PROFILE_DIR", os.path.join(os.environ.get("IRIS_DATA_DIR", ".iris"), "profiles"))
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _timestamp() -> str:
+    return datetime.now().strftime("%Y%m%d-%H%M%S")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = frame.f_globals.get("__name__", os.path.basename(code.co_filename))
+    return f"{module}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler for every thread in the process
+
+    A background thread reads sys._current_frames() at a fixed interval,
+    so the profiled code runs unmodified and the cost is bounded by the
+    sampling rate, not by how busy the process is.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        """Initialize the profiler
+
+        Args:
+            interval (float, optional): Seconds between samples. Defaults to 0.01 (100 Hz)
+        """
+        self.interval = max(interval, 0.001)
+
+    def sample(self, seconds: float) -> Counter:
+        """Sample all threads for a number of seconds
+
+        Args:
+            seconds (float): How long to sample for, capped at MAX_SECONDS
+
+        Returns:
+            Counter: Collapsed stacks ("thread;module:func;...") mapped to sample counts
+        """
+        seconds = min(max(seconds, 0.0), MAX_SECONDS)
+        own_id = threading.get_ident()
+        stacks = Counter()
+        deadline = time.monotonic() + seconds
+
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                labels = []
+                while frame is not None and len(labels) < MAX_DEPTH:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(thread_id, f"thread-{thread_id}"))
+                stacks[";".join(reversed(labels))] += 1
+            time.sleep(self.interval)
+
+        return stacks
+
+
+def write_collapsed(stacks: Counter, path: str) -> str:
+    """Write stacks in the collapsed format read by flamegraph.pl and speedscope"""
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, count in stacks.most_common():
+            f.write(f"{stack} {count}\n")
+    return path
+
+
+class HeapSnapshotter:
+    """Takes tracemalloc snapshots and reports what grew since the last one
+
+    tracemalloc is only started on the first request, so a process that
+    never asks for a snapshot pays nothing. Each later call diffs against
+    the previous snapshot, which makes steady growth (a leak) stand out.
+    """
+
+    def __init__(self, frames: int = 1):
+        """Initialize the snapshotter
+
+        Args:
+            frames (int, optional): Stack depth recorded per allocation. Defaults to 1, the cheapest
+        """
+        self.frames = frames
+        self.previous: Optional[tracemalloc.Snapshot] = None
+
+    def _take(self) -> tracemalloc.Snapshot:
+        snapshot = tracemalloc.take_snapshot()
+        return snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+
+    def diff(self, top: int = 25) -> Dict[str, object]:
+        """Snapshot the heap and compare it with the previous snapshot
+
+        Args:
+            top (int, optional): Number of allocation sites to report. Defaults to 25
+
+        Returns:
+            dict: "started" on the first call, otherwise the biggest changes by allocation site
+        """
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+            self.previous = self._take()
+            return {"status": "started", "message": "tracemalloc started, request another snapshot to see growth"}
+
+        current = self._take()
+        if self.previous is None:
+            self.previous = current
+            return {"status": "started", "message": "baseline snapshot taken, request another snapshot to see growth"}
+
+        stats = current.compare_to(self.previous, "lineno")[:top]
+        self.previous = current
+        traced_current, traced_peak = tracemalloc.get_traced_memory()
+        return {
+            "status": "ok",
+            "traced_bytes": traced_current,
+            "traced_peak_bytes": traced_peak,
+            "top": [
+                {
+                    "location": str(stat.traceback),
+                    "size_diff": stat.size_diff,
+                    "size": stat.size,
+                    "count_diff": stat.count_diff,
+                }
+                for stat in stats
+            ],
+        }
+
+    def stop(self):
+        """Stop tracemalloc and drop the stored snapshot"""
+        self.previous = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+_profile_lock = threading.Lock()
+_heap_lock = threading.Lock()
+_heap = HeapSnapshotter()
+
+
+def profile(seconds: float = DEFAULT_SECONDS, interval: float = DEFAULT_INTERVAL, path: Optional[str] = None) -> Dict[str, object]:
+    """Profile the process and write collapsed stacks to disk
+
+    Only one profile runs at a time.
+
+    Args:
+        seconds (float, optional): Sampling duration. Defaults to 30
+        interval (float, optional): Seconds between samples. Defaults to 0.01
+        path (str, optional): Output file. Defaults to a timestamped file in IRIS_PROFILE_DIR
+
+    Returns:
+        dict: Output path, sample count and the hottest stacks
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A profile is already running")
+    try:
+        stacks = SamplingProfiler(interval).sample(seconds)
+        path = path or os.path.join(_output_dir(), f"profile-{os.getpid()}-{_timestamp()}.folded")
+        write_collapsed(stacks, path)
+    finally:
+        _profile_lock.release()
+
+    logger.info(f"Wrote profile with {sum(stacks.values())} samples to {path}")
+    return {
+        "path": path,
+        "samples": sum(stacks.values()),
+        "top": [{"stack": stack, "samples": count} for stack, count in stacks.most_common(10)],
+    }
+
+
+def heap_diff(top: int = 25, write: bool = True) -> Dict[str, object]:
+    """Take a heap snapshot and diff it against the previous one
+
+    Args:
+        top (int, optional): Number of allocation sites to report. Defaults to 25
+        write (bool, optional): Also write the report to IRIS_PROFILE_DIR. Defaults to True
+
+    Returns:
+        dict: Snapshot report (see HeapSnapshotter.diff)
+    """
+    if not _heap_lock.acquire(blocking=False):
+        raise ProfilerBusyError("A heap snapshot is already running")
+    try:
+        report = _heap.diff(top)
+    finally:
+        _heap_lock.release()
+
+    if write and report["status"] == "ok":
+        path = os.path.join(_output_dir(), f"heap-{os.getpid()}-{_timestamp()}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"traced={report['traced_bytes']} peak={report['traced_peak_bytes']}\n")
+            for entry in report["top"]:
+                f.write(f"{entry['size_diff']:+d} B ({entry['count_diff']:+d} blocks) {entry['location']}\n")
+        report["path"] = path
+        logger.info(f"Wrote heap diff to {path}")
+    return report
+
+
+def stop_heap_tracking():
+    """Stop tracemalloc once leak hunting is done"""
+    with _heap_lock:
+        _heap.stop()
+
+
+def _run_in_background(name: str, target, *args):
+    def run():
+        try:
+            target(*args)
+        except ProfilerBusyError as e:
+            logger.warning(str(e))
+        except Exception as e:
+            logger.error(f"{name} failed: {e}")
+
+    threading.Thread(target=run, name=name, daemon=True).start()
+
+
+def install_signal_handlers(seconds: float = DEFAULT_SECONDS) -> bool:
+    """Profile on SIGUSR1 and snapshot the heap on SIGUSR2
+
+    Must be called from the main thread. The handlers only start a
+    background thread, so the interrupted code resumes immediately.
+
+    Args:
+        seconds (float, optional): Profile duration for SIGUSR1. Defaults to IRIS_PROFILE_SECONDS or 30
+
+    Returns:
+        bool: False on platforms without SIGUSR1/SIGUSR2
+    """
+    if not hasattr(signal, "SIGUSR1"):
+        return False
+    seconds = float(os.environ.get("IRIS_PROFILE_SECONDS", seconds))
+
+    signal.signal(signal.SIGUSR1, lambda signum, frame: _run_in_background("iris-profiler", profile, seconds))
+    signal.signal(signal.SIGUSR2, lambda signum, frame: _run_in_background("iris-heap-snapshot", heap_diff))
+    logger.info(f"Profiling hooks installed: kill -USR1 {os.getpid()} to profile, kill -USR2 for a heap diff")
+    return True
@@ -0,0 +1,313 @@
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+TRACE_FILE_ENV_VAR = "IRIS_TRACE_FILE"
+SAMPLE_RATE_ENV_VAR = "IRIS_TRACE_SAMPLE_RATE"
+
+# OTLP status codes
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+logger = logging.getLogger(__name__)
+
+
+def _new_id(num_bytes: int) -> str:
+    return random.getrandbits(num_bytes * 8).to_bytes(num_bytes, "big").hex()
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        # OTLP/JSON encodes 64-bit integers as strings
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class Span:
+    """A single timed operation within a trace"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "root", "attributes",
+                 "start_ns", "end_ns", "status", "status_message", "_children", "_ended")
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = _new_id(8)
+        if parent is None:
+            self.trace_id = _new_id(16)
+            self.parent_id = None
+            self.root = self
+            self._children: List["Span"] = []
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.root = parent.root
+            self._children = None
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.status = STATUS_OK
+        self.status_message = None
+        self._ended = False
+
+    @property
+    def duration(self) -> Optional[float]:
+        """Duration in seconds, or None while the span is open"""
+        if self.end_ns is None:
+            return None
+        return (self.end_ns - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def set_attributes(self, **attributes):
+        self.attributes.update(attributes)
+
+    def record_exception(self, exception: BaseException):
+        self.status = STATUS_ERROR
+        self.status_message = f"{type(exception).__name__}: {exception}"
+
+    def to_otlp(self) -> Dict[str, Any]:
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in self.attributes.items()],
+            "status": {"code": self.status},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        if self.status_message:
+            span["status"]["message"] = self.status_message
+        return span
+
+
+class _NoopSpan:
+    """Stands in for a span when tracing is off or the trace was not sampled"""
+
+    __slots__ = ()
+    duration = None
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, **attributes):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Any] = ContextVar("iris_current_span", default=None)
+
+
+class JsonlExporter:
+    """Appends finished traces to a file, one OTLP/JSON export request per line
+
+    The layout matches the OpenTelemetry collector's file exporter, so the
+    file can be loaded by OTLP tooling or read with any JSON lines reader.
+    """
+
+    def __init__(self, path: str, service_name: str = "iris"):
+        self.path = path
+        self.service_name = service_name
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]):
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{
+                    "scope": {"name": "iris.tracing"},
+                    "spans": [span.to_otlp() for span in spans],
+                }],
+            }]
+        }
+        line = json.dumps(request, separators=(",", ":"), default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+
+class _SpanContext:
+    __slots__ = ("tracer", "span", "token")
+
+    def __init__(self, tracer: "Tracer", span: Span):
+        self.tracer = tracer
+        self.span = span
+        self.token = None
+
+    def __enter__(self) -> Span:
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self.span.record_exception(exc)
+        _current_span.reset(self.token)
+        self.tracer._end(self.span)
+        return False
+
+
+class _UnsampledContext:
+    """Marks the rest of an unsampled trace so child spans stay no-ops"""
+
+    __slots__ = ("token",)
+
+    def __enter__(self):
+        self.token = _current_span.set(NOOP_SPAN)
+        return NOOP_SPAN
+
+    def __exit__(self, exc_type, exc, tb):
+        _current_span.reset(self.token)
+        return False
+
+
+class Tracer:
+    """Creates nested spans and hands finished traces to an exporter
+
+    Sampling is decided once per trace at the root span. When no exporter
+    is configured, span() returns a shared no-op context manager.
+    """
+
+    def __init__(self, exporter: Optional[JsonlExporter] = None, sample_rate: float = 1.0):
+        """Initialize the tracer
+
+        Args:
+            exporter (JsonlExporter, optional): Where finished traces go. Tracing is off without one
+            sample_rate (float, optional): Fraction of traces to record, 0 to 1. Defaults to 1.0
+        """
+        self.exporter = exporter
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.enabled = exporter is not None and self.sample_rate > 0
+
+    @classmethod
+    def from_env(cls) -> "Tracer":
+        """Build a tracer from IRIS_TRACE_FILE and IRIS_TRACE_SAMPLE_RATE"""
+        path = os.environ.get(TRACE_FILE_ENV_VAR)
+        if not path:
+            return cls()
+        try:
+            sample_rate = float(os.environ.get(SAMPLE_RATE_ENV_VAR, "1.0"))
+        except ValueError:
+            logger.warning(f"Invalid {SAMPLE_RATE_ENV_VAR}, tracing every request")
+            sample_rate = 1.0
+        return cls(JsonlExporter(path), sample_rate)
+
+    def span(self, name: str, **attributes):
+        """Start a span as a context manager
+
+        Args:
+            name (str): Operation name, e.g. "slack.send_message"
+            **attributes: Initial span attributes
+
+        Returns:
+            Context manager yielding the span (or a no-op span)
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+
+        parent = _current_span.get()
+        if parent is NOOP_SPAN:
+            return NOOP_SPAN
+        if parent is None and random.random() >= self.sample_rate:
+            return _UnsampledContext()
+        return _SpanContext(self, Span(name, parent, attributes))
+
+    def _end(self, span: Span):
+        span.end_ns = time.time_ns()
+        root = span.root
+        if span is not root and not root._ended:
+            root._children.append(span)
+            return
+
+        spans = [span] if span is not root else root._children + [root]
+        span._ended = True
+        try:
+            self.exporter.export(spans)
+        except Exception as e:
+            # Tracing must never break the request it observes
+            logger.warning(f"Failed to export trace: {e}")
+
+
+_tracer = Tracer.from_env()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer"""
+    return _tracer
+
+
+def configure_tracing(path: Optional[str], sample_rate: float = 1.0) -> Tracer:
+    """Replace the process-wide tracer
+
+    Args:
+        path (str, optional): JSONL file to export to, or None to disable tracing
+        sample_rate (float, optional): Fraction of traces to record. Defaults to 1.0
+
+    Returns:
+        Tracer: The new tracer
+    """
+    global _tracer
+    _tracer = Tracer(JsonlExporter(path) if path else None, sample_rate)
+    return _tracer
+
+
+def start_span(name: str, **attributes):
+    """Start a span on the process-wide tracer, e.g. ``with start_span("mem0.add"):``"""
+    return _tracer.span(name, **attributes)
+
+
+def current_span():
+    """Return the active span, or a no-op span outside of a sampled trace"""
+    span = _current_span.get()
+    return span if span is not None else NOOP_SPAN
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator that wraps every call of a function in a span
+
+    Args:
+        name (str, optional): Span name. Defaults to the function's qualified name
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not _tracer.enabled:
+                    return await func(*args, **kwargs)
+                with _tracer.span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _tracer.enabled:
+                return func(*args, **kwargs)
+            with _tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,297 @@
+import json
+import logging
+import logging.handlers
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+
+from orchestrator.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+TRIAGE_DECISIONS = Counter("iris_triage_decisions_total", "Slack messages by triage outcome", ["action", "reason"])
+
+ANSWER = "answer"
+DEFER = "defer"
+DROP = "drop"
+
+# Channel policies
+POLICY_ALL = "all"            # answer every message
+POLICY_TRIAGE = "triage"      # answer addressed messages, batch ones the classifier flags as requests
+POLICY_MENTIONS = "mentions"  # answer only DMs, mentions, commands and follow-ups
+POLICY_IGNORE = "ignore"      # never answer
+POLICIES = (POLICY_ALL, POLICY_TRIAGE, POLICY_MENTIONS, POLICY_IGNORE)
+
+# "iris create ...", "iris, schedule ...", "!remind ..."
+COMMAND_PATTERN = re.compile(
+    r"^\s*(?:!|iris[,:]?\s+)(?P<verb>create|schedule|remind|calc|calculate|send|dm|ask|help)\b(?P<args>.*)$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+INTENT_KEYWORDS: Dict[str, tuple] = {
+    "task": ("create an issue", "create a ticket", "file a bug", "open a ticket", "linear", "ticket", "bug", "issue", "assign"),
+    "meeting": ("schedule", "meeting", "calendar", "invite", "book a", "set up a call", "reschedule"),
+    "calculate": ("calculate", "how much is", "what is the total", "sum of", "average of"),
+    "message": ("remind", "notify", "let everyone know", "send a message", "ping"),
+}
+REQUEST_PATTERN = re.compile(r"\b(?:please|pls|can you|could you|would you|can someone|we need to|need to)\b|\?\s*$", re.IGNORECASE)
+
+_INTENT_PATTERNS = {
+    intent: re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in keywords) + r")\b", re.IGNORECASE)
+    for intent, keywords in INTENT_KEYWORDS.items()
+}
+
+
+class TriageDecision:
+    """What to do with one Slack message and why"""
+
+    __slots__ = ("action", "reason", "priority", "intent", "score", "command")
+
+    def __init__(self, action: str, reason: str, priority: str = "normal", intent: Optional[str] = None,
+                 score: int = 0, command: Optional[str] = None):
+        self.action = action
+        self.reason = reason
+        self.priority = priority
+        self.intent = intent
+        self.score = score
+        self.command = command
+
+    def as_dict(self) -> Dict[str, object]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+def classify(text: str):
+    """Score a message with the keyword/intent classifier
+
+    Returns:
+        tuple: (best intent or None, score). Each matched intent keyword and a
+        request phrasing ("can you", a trailing question mark, ...) add one point.
+    """
+    best_intent, best_hits = None, 0
+    for intent, pattern in _INTENT_PATTERNS.items():
+        hits = len(pattern.findall(text))
+        if hits > best_hits:
+            best_intent, best_hits = intent, hits
+    if not best_intent:
+        return None, 0
+    return best_intent, best_hits + (1 if REQUEST_PATTERN.search(text) else 0)
+
+
+def _load_policies(value: Optional[str]) -> Dict[str, str]:
+    """Read channel policies from inline JSON or a JSON file path"""
+    if not value:
+        return {}
+    if os.path.exists(value):
+        with open(value, encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+class Triage:
+    """Cheap local gate in front of the LLM for Slack messages
+
+    Checked in order: channel policy "ignore", DMs, mentions of the bot,
+    the command grammar, follow-ups in threads the bot answered, then
+    the channel policy with the keyword classifier. Everything else is
+    dropped without an LLM call. With a log path each decision is
+    appended to a size-rotated JSONL log so rules and thresholds can be
+    tuned from real traffic; message text is only logged when asked for.
+    """
+
+    def __init__(self, slack_service=None, bot_user_id: Optional[str] = None, policies: Optional[Dict[str, str]] = None,
+                 threshold: Optional[int] = None, log_path: Optional[str] = None, log_text: Optional[bool] = None,
+                 log_max_bytes: Optional[int] = None, log_backups: Optional[int] = None, max_threads: int = 1000):
+        """Initialize the triage stage
+
+        Args:
+            slack_service (SlackService, optional): Used for extract_mentions and to look up the bot's user ID
+            bot_user_id (str, optional): The bot's user ID. Defaults to auth.test on first use
+            policies (Dict[str, str], optional): Channel ID to policy, "*" for the default.
+                Defaults to IRIS_TRIAGE_POLICIES (JSON or a JSON file), falling back to "mentions"
+            threshold (int, optional): Classifier score needed to defer. Defaults to IRIS_TRIAGE_THRESHOLD or 2
+            log_path (str, optional): Decision log. Defaults to IRIS_TRIAGE_LOG, no log if unset
+            log_text (bool, optional): Include the first 200 characters of each message in the log.
+                Defaults to IRIS_TRIAGE_LOG_TEXT=1, off otherwise
+            log_max_bytes (int, optional): Size at which the log is rotated. Defaults to IRIS_TRIAGE_LOG_MAX_BYTES or 10 MB
+            log_backups (int, optional): Rotated logs kept. Defaults to IRIS_TRIAGE_LOG_BACKUPS or 3
+            max_threads (int, optional): Answered threads remembered for follow-ups. Defaults to 1000
+        """
+        self.slack_service = slack_service
+        self._bot_user_id = bot_user_id
+        self.policies = policies if policies is not None else _load_policies(os.environ.get("IRIS_TRIAGE_POLICIES"))
+        for channel_id, policy in self.policies.items():
+            if policy not in POLICIES:
+                raise ValueError(f"Unknown triage policy '{policy}' for {channel_id}, expected one of {POLICIES}")
+        self.threshold = threshold if threshold is not None else int(os.environ.get("IRIS_TRIAGE_THRESHOLD", 2))
+        self.log_path = log_path or os.environ.get("IRIS_TRIAGE_LOG")
+        self.log_text = log_text if log_text is not None else os.environ.get("IRIS_TRIAGE_LOG_TEXT") == "1"
+        self._log_handler = None
+        if self.log_path:
+            os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+            self._log_handler = logging.handlers.RotatingFileHandler(
+                self.log_path,
+                maxBytes=log_max_bytes or int(os.environ.get("IRIS_TRIAGE_LOG_MAX_BYTES", 10 * 1024 * 1024)),
+                backupCount=log_backups if log_backups is not None else int(os.environ.get("IRIS_TRIAGE_LOG_BACKUPS", 3)),
+                encoding="utf-8",
+                delay=True,
+            )
+        self.max_threads = max_threads
+        self._threads: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def bot_user_id(self) -> Optional[str]:
+        if self._bot_user_id is None and self.slack_service is not None:
+            try:
+                self._bot_user_id = self.slack_service.client.auth_test()["user_id"]
+            except Exception as e:
+                logger.error(f"Could not look up the bot user ID, mentions will not be detected: {e}")
+                self._bot_user_id = ""
+        return self._bot_user_id
+
+    def policy_for(self, channel_id: str) -> str:
+        return self.policies.get(channel_id, self.policies.get("*", POLICY_MENTIONS))
+
+    def _mentions(self, text: str):
+        if self.slack_service is not None:
+            return self.slack_service.extract_mentions(text)
+        return re.findall(r"<@(U[A-Z0-9]+)>", text)
+
+    def mark_engaged(self, channel_id: str, thread_ts: Optional[str]):
+        """Remember a thread the bot answered, so replies in it are follow-ups"""
+        if not thread_ts:
+            return
+        with self._lock:
+            self._threads[f"{channel_id}:{thread_ts}"] = time.time()
+            self._threads.move_to_end(f"{channel_id}:{thread_ts}")
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+
+    def _evaluate(self, channel_id: str, text: str, event_data: dict) -> TriageDecision:
+        policy = self.policy_for(channel_id)
+        if not text.strip():
+            return TriageDecision(DROP, "empty")
+        if policy == POLICY_IGNORE:
+            return TriageDecision(DROP, "channel_ignored")
+        if event_data.get("channel_type") == "im":
+            return TriageDecision(ANSWER, "direct_message")
+        if self.bot_user_id and self.bot_user_id in self._mentions(text):
+            return TriageDecision(ANSWER, "mention")
+
+        command = COMMAND_PATTERN.match(text)
+        if command:
+            return TriageDecision(ANSWER, "command", command=command.group("verb").lower())
+
+        thread_ts = event_data.get("thread_ts")
+        if thread_ts and f"{channel_id}:{thread_ts}" in self._threads:
+            return TriageDecision(ANSWER, "thread_followup")
+
+        if policy == POLICY_ALL:
+            return TriageDecision(ANSWER, "channel_all", priority="low")
+
+        intent, score = classify(text)
+        if policy == POLICY_TRIAGE and score >= self.threshold:
+            return TriageDecision(DEFER, "classifier", priority="low", intent=intent, score=score)
+        return TriageDecision(DROP, "ambient", intent=intent, score=score)
+
+    def decide(self, channel_id: str, user_id: str, text: str, event_data: dict) -> TriageDecision:
+        """Decide whether a message reaches the LLM
+
+        Returns:
+            TriageDecision: "answer" (normal priority unless the channel answers everything),
+            "defer" (low priority, answered later in a batch, see DeferredBatcher) or "drop"
+        """
+        decision = self._evaluate(channel_id, text or "", event_data)
+        TRIAGE_DECISIONS.labels(action=decision.action, reason=decision.reason).inc()
+        self._log(channel_id, user_id, text or "", event_data, decision)
+        return decision
+
+    def _log(self, channel_id: str, user_id: str, text: str, event_data: dict, decision: TriageDecision):
+        if self._log_handler is None:
+            return
+        entry = {
+            "time": time.time(),
+            "channel_id": channel_id,
+            "user_id": user_id,
+            "ts": event_data.get("ts"),
+            "policy": self.policy_for(channel_id),
+            **decision.as_dict(),
+        }
+        if self.log_text:
+            entry["text"] = text[:200]
+        # The handler serializes writes and rotates the file once it reaches the size limit
+        self._log_handler.handle(logging.makeLogRecord({"msg": json.dumps(entry)}))
+
+    def close(self):
+        """Close the decision log"""
+        if self._log_handler is not None:
+            self._log_handler.close()
+
+
+class DeferredBatcher:
+    """Holds deferred messages and answers each channel's backlog in one go
+
+    Messages triage deferred are collected per key (usually a workspace
+    and channel). `delay` seconds after the first one arrives, or once
+    `max_batch` are waiting, the handler is called once with all of them,
+    so a busy channel costs one LLM call per batch rather than one per
+    message.
+    """
+
+    def __init__(self, handler: Callable[[str, List[tuple]], None], delay: Optional[float] = None,
+                 max_batch: Optional[int] = None):
+        """Initialize the batcher
+
+        Args:
+            handler (Callable): Called with (key, messages), each message being the args passed to add()
+            delay (float, optional): Seconds a batch waits for more messages. Defaults to IRIS_TRIAGE_DEFER_DELAY or 120
+            max_batch (int, optional): Messages that trigger a batch early. Defaults to IRIS_TRIAGE_DEFER_BATCH or 10
+        """
+        self.handler = handler
+        self.delay = delay if delay is not None else float(os.environ.get("IRIS_TRIAGE_DEFER_DELAY", 120))
+        self.max_batch = max_batch or int(os.environ.get("IRIS_TRIAGE_DEFER_BATCH", 10))
+        self._batches: Dict[str, List[tuple]] = {}
+        self._timers: Dict[str, threading.Timer] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(batch) for batch in self._batches.values())
+
+    def add(self, key: str, *message):
+        """Hold a message until its batch is due"""
+        with self._lock:
+            batch = self._batches.setdefault(key, [])
+            batch.append(message)
+            full = len(batch) >= self.max_batch
+            if not full and key not in self._timers:
+                timer = threading.Timer(self.delay, self.flush, args=(key,))
+                timer.daemon = True
+                self._timers[key] = timer
+                timer.start()
+        if full:
+            self.flush(key)
+
+    def flush(self, key: str):
+        """Hand one key's held messages to the handler now"""
+        with self._lock:
+            batch = self._batches.pop(key, None)
+            timer = self._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+        if not batch:
+            return
+        try:
+            self.handler(key, batch)
+        except Exception as e:
+            logger.error(f"Error answering {len(batch)} deferred messages for {key}: {e}")
+
+    def close(self):
+        """Answer everything still held"""
+        with self._lock:
+            keys = list(self._batches)
+        for key in keys:
+            self.flush(key)
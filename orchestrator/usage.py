@@ -0,0 +1,477 @@
+import argparse
+import atexit
+import json
+import logging
+import os
+import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from orchestrator.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# USD per million tokens as (prompt, completion). Override with IRIS_MODEL_PRICES.
+DEFAULT_PRICES: Dict[str, Tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "llama-3.3-70b-versatile": (0.59, 0.79),
+}
+
+# Cheaper model to fall back to once a user's budget is spent
+DEFAULT_DOWNGRADES: Dict[str, str] = {
+    "gpt-4o": "gpt-4o-mini",
+}
+
+GROUP_COLUMNS = ("day", "user_id", "channel_id", "flow", "model")
+
+UNATTRIBUTED = "-"
+
+DEFERRED_REJECTED = Counter(
+    "iris_usage_deferred_rejected_total", "Over-budget jobs rejected because the deferred queue was full"
+)
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+def _load_json_setting(value: Optional[str]) -> Dict[str, Any]:
+    """Read a JSON object from an env value that is either inline JSON or a file path"""
+    if not value:
+        return {}
+    if os.path.exists(value):
+        with open(value, encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+class Attribution:
+    """Who and what a group of LLM calls is billed to"""
+
+    def __init__(self, user_id: Optional[str] = None, channel_id: Optional[str] = None, priority: str = "normal"):
+        self.user_id = user_id or UNATTRIBUTED
+        self.channel_id = channel_id or UNATTRIBUTED
+        self.priority = priority
+        self.tools: List[str] = []
+        self.records: List[Tuple[str, int, int]] = []
+
+    @property
+    def flow(self) -> str:
+        """Name of the flow, e.g. "linear_create_issue+slack_send_message" or "chat" """
+        return "+".join(sorted(set(self.tools))) or "chat"
+
+
+_attribution: ContextVar[Optional[Attribution]] = ContextVar("iris_usage_attribution", default=None)
+
+
+class UsageTracker:
+    """Aggregates token usage and cost in memory and flushes it to SQLite
+
+    Rows are keyed by (day, user, channel, flow, model). LLM calls made
+    inside usage_context() are held until the context ends, so the tools
+    used anywhere in the flow are attributed to every call in it.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        prices: Optional[Dict[str, Tuple[float, float]]] = None,
+        budgets: Optional[Dict[str, float]] = None,
+        downgrades: Optional[Dict[str, str]] = None,
+        flush_interval: float = 60.0,
+        max_deferred: int = 1000,
+        deferred_workers: int = 2,
+    ):
+        """Initialize the tracker
+
+        Args:
+            db_path (str): SQLite file used as the local store
+            prices (dict, optional): USD per million (prompt, completion) tokens by model
+            budgets (dict, optional): Daily USD budget by user ID; "default" applies to everyone else
+            downgrades (dict, optional): Model to switch to when a user is over budget
+            flush_interval (float, optional): Seconds between background flushes, 0 to disable. Defaults to 60
+            max_deferred (int, optional): Most deferred jobs kept at once; defer() rejects the rest. Defaults to 1000
+            deferred_workers (int, optional): Worker threads running released deferred jobs. Defaults to 2
+        """
+        self.db_path = db_path
+        self.prices = {model: tuple(price) for model, price in (prices or DEFAULT_PRICES).items()}
+        self.budgets = budgets or {}
+        self.downgrades = DEFAULT_DOWNGRADES if downgrades is None else downgrades
+        self.deferred = deque()
+        self.max_deferred = max_deferred
+        self.deferred_workers = deferred_workers
+        self._deferred_dispatcher = None
+        self._pending: Dict[Tuple[str, ...], List[float]] = {}
+        # Today's spend by (day, user); earlier days are dropped once the date changes
+        self._spend: Dict[Tuple[str, str], float] = {}
+        self._spend_day = _today()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._warned_models = set()
+        self._stop = threading.Event()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS usage (
+                    day TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    channel_id TEXT NOT NULL,
+                    flow TEXT NOT NULL,
+                    model TEXT NOT NULL,
+                    requests INTEGER NOT NULL,
+                    prompt_tokens INTEGER NOT NULL,
+                    completion_tokens INTEGER NOT NULL,
+                    cost REAL NOT NULL,
+                    PRIMARY KEY (day, user_id, channel_id, flow, model)
+                )
+                """
+            )
+
+        self._flusher = None
+        if flush_interval > 0:
+            self._flusher = threading.Thread(target=self._flush_loop, args=(flush_interval,), name="usage-flush", daemon=True)
+            self._flusher.start()
+
+    @classmethod
+    def from_env(cls) -> "UsageTracker":
+        """Build a tracker from IRIS_USAGE_DB, IRIS_MODEL_PRICES and IRIS_USAGE_BUDGETS
+
+        IRIS_MODEL_PRICES and IRIS_USAGE_BUDGETS accept inline JSON or a path to a JSON file.
+        """
+        data_dir = os.environ.get("IRIS_DATA_DIR", ".iris")
+        prices = dict(DEFAULT_PRICES)
+        prices.update(_load_json_setting(os.environ.get("IRIS_MODEL_PRICES")))
+        return cls(
+            db_path=os.environ.get("IRIS_USAGE_DB", os.path.join(data_dir, "usage.db")),
+            prices=prices,
+            budgets=_load_json_setting(os.environ.get("IRIS_USAGE_BUDGETS")),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Return the USD cost of a request"""
+        price = self.prices.get(model)
+        if price is None:
+            # Dated snapshots ("gpt-4o-2024-08-06") are billed like their base model
+            price = next((p for name, p in self.prices.items() if model.startswith(name + "-")), None)
+        if price is None:
+            if model not in self._warned_models:
+                self._warned_models.add(model)
+                logger.warning(f"No price configured for model {model}, recording cost as 0")
+            return 0.0
+        return (prompt_tokens * price[0] + completion_tokens * price[1]) / 1_000_000
+
+    def record(self, model: str, response: Any):
+        """Record the usage of one LLM response
+
+        Args:
+            model (str): Model that served the request
+            response: Completion with a ``usage`` attribute; responses without usage are ignored
+        """
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        prompt_tokens = usage.prompt_tokens or 0
+        completion_tokens = usage.completion_tokens or 0
+
+        attribution = _attribution.get()
+        if attribution is not None:
+            attribution.records.append((model, prompt_tokens, completion_tokens))
+            return
+        self._add(Attribution(), model, prompt_tokens, completion_tokens)
+
+    def commit(self, attribution: Attribution):
+        """Aggregate every call recorded under an attribution"""
+        for model, prompt_tokens, completion_tokens in attribution.records:
+            self._add(attribution, model, prompt_tokens, completion_tokens)
+        attribution.records.clear()
+
+    def _add(self, attribution: Attribution, model: str, prompt_tokens: int, completion_tokens: int):
+        day = _today()
+        cost = self.cost(model, prompt_tokens, completion_tokens)
+        key = (day, attribution.user_id, attribution.channel_id, attribution.flow, model)
+        with self._lock:
+            row = self._pending.setdefault(key, [0, 0, 0, 0.0])
+            row[0] += 1
+            row[1] += prompt_tokens
+            row[2] += completion_tokens
+            row[3] += cost
+            self._evict_spend(day)
+            spend_key = (day, attribution.user_id)
+            if spend_key in self._spend:
+                self._spend[spend_key] += cost
+
+    def _evict_spend(self, day: str):
+        """Drop cached spend from earlier days; callers hold the lock"""
+        if self._spend_day != day:
+            self._spend = {key: cost for key, cost in self._spend.items() if key[0] == day}
+            self._spend_day = day
+
+    def flush(self):
+        """Write pending aggregates to the local store"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+
+        rows = [key + tuple(values) for key, values in pending.items()]
+        with self._db_lock, self._connect() as conn:
+            conn.executemany(
+                """
+                INSERT INTO usage (day, user_id, channel_id, flow, model, requests, prompt_tokens, completion_tokens, cost)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (day, user_id, channel_id, flow, model) DO UPDATE SET
+                    requests = requests + excluded.requests,
+                    prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+                    completion_tokens = completion_tokens + excluded.completion_tokens,
+                    cost = cost + excluded.cost
+                """,
+                rows,
+            )
+
+    def _flush_loop(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+                self.run_deferred()
+            except Exception as e:
+                logger.error(f"Error flushing usage: {e}")
+
+    def close(self):
+        """Stop the background flush and write everything pending"""
+        self._stop.set()
+        self.flush()
+        if self._deferred_dispatcher is not None:
+            self._deferred_dispatcher.stop(drain=False, timeout=5.0)
+
+    def query(self, group_by: Sequence[str] = ("user_id",), since: Optional[str] = None,
+              until: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Aggregate stored usage
+
+        Args:
+            group_by (Sequence[str], optional): Columns among day, user_id, channel_id, flow, model. Defaults to user_id
+            since (str, optional): First day to include, YYYY-MM-DD
+            until (str, optional): Last day to include, YYYY-MM-DD
+            limit (int, optional): Maximum number of rows, most expensive first
+
+        Returns:
+            List[Dict[str, Any]]: One dict per group with requests, tokens and cost
+        """
+        columns = [column for column in group_by if column]
+        invalid = [column for column in columns if column not in GROUP_COLUMNS]
+        if invalid:
+            raise ValueError(f"Cannot group usage by {invalid}, expected any of {GROUP_COLUMNS}")
+
+        self.flush()
+        where, params = [], []
+        if since:
+            where.append("day >= ?")
+            params.append(since)
+        if until:
+            where.append("day <= ?")
+            params.append(until)
+
+        select = ", ".join(columns + [
+            "SUM(requests)", "SUM(prompt_tokens)", "SUM(completion_tokens)", "SUM(cost)",
+        ])
+        sql = f"SELECT {select} FROM usage"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if columns:
+            sql += " GROUP BY " + ", ".join(columns)
+        sql += " ORDER BY SUM(cost) DESC"
+        if limit:
+            sql += f" LIMIT {int(limit)}"
+
+        with self._db_lock, self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+
+        fields = columns + ["requests", "prompt_tokens", "completion_tokens", "cost"]
+        return [dict(zip(fields, row)) for row in rows if row[len(columns)] is not None]
+
+    def budget_for(self, user_id: str) -> Optional[float]:
+        """Return a user's daily budget in USD, or None if unlimited"""
+        budget = self.budgets.get(user_id, self.budgets.get("default"))
+        return float(budget) if budget is not None else None
+
+    def spent_today(self, user_id: str) -> float:
+        """Return what a user has spent today, including unflushed usage"""
+        day = _today()
+        spend_key = (day, user_id)
+        with self._lock:
+            self._evict_spend(day)
+            if spend_key in self._spend:
+                return self._spend[spend_key]
+
+        with self._db_lock, self._connect() as conn:
+            stored = conn.execute(
+                "SELECT COALESCE(SUM(cost), 0) FROM usage WHERE day = ? AND user_id = ?", (day, user_id)
+            ).fetchone()[0]
+        with self._lock:
+            pending = sum(row[3] for key, row in self._pending.items() if key[0] == day and key[1] == user_id)
+            # Cached from here on; _add keeps it current
+            return self._spend.setdefault(spend_key, stored + pending)
+
+    def over_budget(self, user_id: Optional[str]) -> bool:
+        """Whether a user has used up their daily budget"""
+        if not user_id or user_id == UNATTRIBUTED:
+            return False
+        budget = self.budget_for(user_id)
+        return budget is not None and self.spent_today(user_id) >= budget
+
+    def select_model(self, model: str) -> str:
+        """Return the model to use for the current attribution, downgraded when over budget"""
+        attribution = _attribution.get()
+        if attribution is not None and self.over_budget(attribution.user_id):
+            downgraded = self.downgrades.get(model, model)
+            if downgraded != model:
+                logger.info(f"User {attribution.user_id} is over budget, using {downgraded} instead of {model}")
+            return downgraded
+        return model
+
+    def should_defer(self, user_id: Optional[str], priority: str = "normal") -> bool:
+        """Whether work for a user should wait for the next budget period"""
+        return priority == "low" and self.over_budget(user_id)
+
+    def defer(self, user_id: str, func: Callable, *args, **kwargs) -> bool:
+        """Hold a job until the user is back under budget (checked on every flush)
+
+        Returns:
+            bool: False if the job was rejected because max_deferred jobs are already waiting
+        """
+        with self._lock:
+            if len(self.deferred) < self.max_deferred:
+                self.deferred.append((user_id, func, args, kwargs))
+                return True
+        DEFERRED_REJECTED.inc()
+        logger.warning(f"Rejecting deferred job for {user_id}, {self.max_deferred} jobs are already waiting")
+        return False
+
+    def run_deferred(self):
+        """Hand deferred jobs whose user is no longer over budget to the deferred workers
+
+        Jobs run on their own dispatcher, keyed by user, so a released
+        backlog never holds up the flush thread that releases it.
+        """
+        with self._lock:
+            jobs = list(self.deferred)
+            self.deferred.clear()
+        waiting = []
+        for job in jobs:
+            if self.over_budget(job[0]) or not self._get_deferred_dispatcher().submit(job[0], *job[1:], timeout=0):
+                waiting.append(job)
+        if waiting:
+            with self._lock:
+                self.deferred.extendleft(reversed(waiting))
+
+    def join_deferred(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every released deferred job has run
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        if self._deferred_dispatcher is None:
+            return True
+        return self._deferred_dispatcher.join(timeout)
+
+    def _get_deferred_dispatcher(self):
+        # Imported here: the dispatcher's metrics import orchestrator, which imports this module
+        from tools.slack.dispatcher import EventDispatcher
+
+        if self._deferred_dispatcher is None:
+            with self._lock:
+                if self._deferred_dispatcher is None:
+                    self._deferred_dispatcher = EventDispatcher(
+                        _run_deferred_job, workers=self.deferred_workers, max_pending=self.max_deferred,
+                        name="usage_deferred",
+                    )
+        return self._deferred_dispatcher
+
+
+def _run_deferred_job(func: Callable, args: tuple, kwargs: dict):
+    func(*args, **kwargs)
+
+
+_tracker: Optional[UsageTracker] = None
+_tracker_lock = threading.Lock()
+
+
+def get_usage_tracker() -> UsageTracker:
+    """Return the process-wide tracker, creating it from the environment on first use"""
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = UsageTracker.from_env()
+                atexit.register(_tracker.close)
+    return _tracker
+
+
+def set_usage_tracker(tracker: Optional[UsageTracker]):
+    """Replace the process-wide tracker"""
+    global _tracker
+    _tracker = tracker
+
+
+@contextmanager
+def usage_context(user_id: Optional[str] = None, channel_id: Optional[str] = None, priority: str = "normal"):
+    """Attribute every LLM call made inside the block to a Slack user and channel
+
+    Usage is committed when the block exits, tagged with the tools used.
+    """
+    attribution = Attribution(user_id, channel_id, priority)
+    token = _attribution.set(attribution)
+    try:
+        yield attribution
+    finally:
+        _attribution.reset(token)
+        if attribution.records:
+            get_usage_tracker().commit(attribution)
+
+
+def add_tool(tool_name: str):
+    """Tag the current attribution with a tool that was executed"""
+    attribution = _attribution.get()
+    if attribution is not None:
+        attribution.tools.append(tool_name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show LLM token usage and cost")
+    parser.add_argument("--by", default="user_id", help=f"Comma separated columns to group by: {', '.join(GROUP_COLUMNS)}")
+    parser.add_argument("--since", help="First day to include (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Last day to include (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int, default=20, help="Number of rows to show")
+    parser.add_argument("--json", action="store_true", help="Print JSON instead of a table")
+    args = parser.parse_args()
+
+    tracker = UsageTracker.from_env() if _tracker is None else _tracker
+    rows = tracker.query(group_by=args.by.split(","), since=args.since, until=args.until, limit=args.limit)
+
+    if args.json:
+        print(json.dumps(rows, indent=2))
+        return
+
+    from rich.console import Console
+    from rich.table import Table
+
+    table = Table(title="LLM usage")
+    for column in (rows[0].keys() if rows else args.by.split(",")):
+        table.add_column(column)
+    for row in rows:
+        table.add_row(*(f"${value:.4f}" if key == "cost" else str(value) for key, value in row.items()))
+    Console().print(table)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,25 @@
 import asyncio
+import hmac
+import json
+import logging
+import os
+import threading
+import time
 from typing import Dict, Set
 
 import uvicorn
 import websockets
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from rich.console import Console
+from slack_sdk.signature import SignatureVerifier
+
+from orchestrator import metrics, profiling
+from orchestrator.usage import get_usage_tracker
 
 app = FastAPI()
+logger = logging.getLogger(__name__)
 
 # Enable CORS for all origins
 app.add_middleware(
@@ -24,12 +36,16 @@ connections: Set[WebSocket] = set()
 # Store usernames per connection
 user_names: Dict[WebSocket, str] = {}
 
+metrics.WS_CONNECTIONS.set_function(lambda: len(connections))
+
 
 async def broadcast_message(message: dict, exclude_websocket: WebSocket = None):
     """Send a message to all connections except the sender"""
+    start_time = time.perf_counter()
     for connection in connections:
         if connection != exclude_websocket:
             await connection.send_json(message)
+    metrics.WS_BROADCAST_LATENCY.observe(time.perf_counter() - start_time)
 
 
 @app.get("/")
@@ -37,6 +53,121 @@ async def root():
     return {"message": "WebSocket Chat Server"}
 
 
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/usage")
+async def get_usage(by: str = "user_id", since: str = None, until: str = None, limit: int = 100,
+                    x_admin_token: str = Header(None)):
+    """Aggregated LLM token usage and cost, grouped by comma separated columns"""
+    require_admin(x_admin_token)
+    try:
+        rows = await asyncio.to_thread(
+            get_usage_tracker().query, group_by=by.split(","), since=since, until=until, limit=limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"group_by": by.split(","), "rows": rows}
+
+
+def require_admin(token: str = None):
+    """Admin endpoints are disabled unless IRIS_ADMIN_TOKEN is set and matches"""
+    expected = os.environ.get("IRIS_ADMIN_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=404, detail="Admin endpoints are disabled")
+    if not token or not hmac.compare_digest(token, expected):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/profile")
+async def admin_profile(seconds: float = profiling.DEFAULT_SECONDS, interval: float = profiling.DEFAULT_INTERVAL,
+                        x_admin_token: str = Header(None)):
+    """Sample every thread for N seconds and write collapsed stacks for a flamegraph"""
+    require_admin(x_admin_token)
+    try:
+        return await asyncio.to_thread(profiling.profile, seconds, interval)
+    except profiling.ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.post("/admin/heap")
+async def admin_heap(top: int = 25, stop: bool = False, x_admin_token: str = Header(None)):
+    """Diff a tracemalloc snapshot against the previous one (the first call starts tracing)"""
+    require_admin(x_admin_token)
+    if stop:
+        profiling.stop_heap_tracking()
+        return {"status": "stopped"}
+    try:
+        return await asyncio.to_thread(profiling.heap_diff, top)
+    except profiling.ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+# Workspaces for HTTP Events API ingestion, created on the first request in each worker process
+slack_registry = None
+_slack_registry_lock = threading.Lock()
+
+
+def get_slack_registry():
+    global slack_registry
+    with _slack_registry_lock:
+        if slack_registry is None:
+            import slack_listener
+
+            slack_registry = slack_listener.create_registry(listen=False)
+    return slack_registry
+
+
+@app.post("/slack/events")
+async def slack_events(request: Request, background_tasks: BackgroundTasks,
+                       x_slack_request_timestamp: str = Header(None), x_slack_signature: str = Header(None)):
+    """Slack Events API ingestion, an alternative to Socket Mode
+
+    Requests are verified against SLACK_SIGNING_SECRET and acknowledged
+    right away; events go into the same de-duplicated dispatcher Socket
+    Mode uses. Every uvicorn worker holds its own workspaces and worker
+    pool, so ingestion scales out with `uvicorn server:app --workers N`
+    behind a load balancer.
+    """
+    signing_secret = os.environ.get("SLACK_SIGNING_SECRET")
+    if not signing_secret:
+        raise HTTPException(status_code=404, detail="Slack events endpoint is disabled")
+
+    body = await request.body()
+    verifier = SignatureVerifier(signing_secret)
+    try:
+        valid = verifier.is_valid(body, x_slack_request_timestamp, x_slack_signature)
+    except ValueError:
+        # A timestamp that is not a number
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=403, detail="Invalid Slack signature")
+
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+    if payload.get("type") == "url_verification":
+        return {"challenge": payload.get("challenge")}
+
+    if payload.get("type") == "event_callback":
+        # Respond first, Slack retries anything not acknowledged within 3 seconds
+        background_tasks.add_task(
+            _ingest_slack_event, payload.get("event", {}), payload.get("event_id"), payload.get("team_id")
+        )
+    return PlainTextResponse("")
+
+
+def _ingest_slack_event(event_data: dict, event_id: str, team_id: str):
+    try:
+        get_slack_registry().handle_event(event_data, event_id=event_id, team_id=team_id)
+    except Exception as e:
+        logger.error(f"Error ingesting Slack event {event_id}: {e}")
+
+
 @app.websocket("/ws/{username}")
 async def websocket_endpoint(websocket: WebSocket, username: str):
     await websocket.accept()
@@ -1,14 +1,20 @@
 import os
 import signal
 import sys
+import threading
 import time
 
 import dotenv
 from rich.console import Console
-from tools.tools import ToolCallingLayer
 from datetime import datetime
-from orchestrator.main import Orchestrator
-from tools.slack.service import SlackService
+from orchestrator.event_bus import EventBus
+from orchestrator.memory.mem0_integration import Mem0Memory
+from orchestrator.memory.slack_mem0_adapter import SlackMem0Adapter
+from orchestrator.metrics import start_metrics_server
+from orchestrator.profiling import install_signal_handlers
+from orchestrator.triage import DEFER, DROP, DeferredBatcher, Triage
+from orchestrator.usage import get_usage_tracker, usage_context
+from tools.slack.workspaces import WorkspaceRegistry
 
 # Initialize console for pretty output
 console = Console()
@@ -16,39 +22,169 @@ console = Console()
 # Load environment variables
 dotenv.load_dotenv()
 
-tool_layer = ToolCallingLayer()
+registry = None
+bus = None
+
+# Mem0 subscriber state, one adapter per workspace sharing one Mem0 client
+mem0 = None
+mem0_adapters = {}
+_mem0_lock = threading.Lock()
 
 
 def handle_exit(signal, frame):
-    slack_service.close_connection()    
-    sys.exit(0)
     """Handle exit signals gracefully"""
     console.print("\n[bold yellow]Shutting down Slack listener...[/bold yellow]")
-    if slack_service and hasattr(slack_service, "socket_client"):
-        slack_service.close_connection()
+    if registry:
+        registry.close()
+    if bus:
+        bus.stop()
+    if batcher:
+        batcher.close()
+    for triage in triages.values():
+        triage.close()
+    for adapter in mem0_adapters.values():
+        adapter.close()
     sys.exit(0)
 
 
-# Register signal handlers
-signal.signal(signal.SIGINT, handle_exit)
-signal.signal(signal.SIGTERM, handle_exit)
+# One triage stage per workspace, channel policies and answered threads are workspace-local
+triages = {}
+
+# Deferred messages, batched per workspace and channel
+batcher = None
+
+
+def get_triage(workspace):
+    if workspace not in triages:
+        triages.setdefault(workspace, Triage(registry.get(workspace)))
+    return triages[workspace]
+
+
+def process_slack_message(workspace, channel_id, user_id, text, event_data):
+    # Ambient chatter is dropped locally and never reaches the LLM
+    decision = get_triage(workspace).decide(channel_id, user_id, text, event_data)
+    if decision.action == DROP:
+        return
+    console.print(f"[bold blue]Received message ({decision.reason}):[/bold blue] {text}")
+
+    usage_tracker = get_usage_tracker()
+    if usage_tracker.should_defer(user_id, decision.priority):
+        if usage_tracker.defer(
+            user_id, run_slack_message, workspace, channel_id, user_id, text, event_data, decision.priority
+        ):
+            console.print(f"[yellow]Deferring low-priority message from {user_id}, daily budget reached[/yellow]")
+        else:
+            console.print(f"[red]Dropping low-priority message from {user_id}, too many deferred messages[/red]")
+        return
+
+    if decision.action == DEFER:
+        # Requests nobody addressed to the bot wait and are answered together with the channel's other ones
+        get_batcher().add(f"{workspace}:{channel_id}", workspace, channel_id, user_id, text, event_data)
+        return
+
+    run_slack_message(workspace, channel_id, user_id, text, event_data, decision.priority)
 
-orchestrator = Orchestrator()
 
+def get_batcher():
+    global batcher
+    if batcher is None:
+        batcher = DeferredBatcher(run_deferred_messages)
+    return batcher
 
-def process_slack_message(channel_id, user_id, text, event_data):
-    console.print(f"[bold blue]Received message:[/bold blue] {text}")
+
+def run_deferred_messages(key, messages):
+    workspace, channel_id = messages[0][0], messages[0][1]
+    requests = "\n".join(f"- <@{user_id}>: {text}" for _, _, user_id, text, _ in messages)
+    console.print(f"[bold blue]Answering {len(messages)} deferred message(s) in {channel_id}[/bold blue]")
+    with usage_context(channel_id=channel_id, priority="low"):
+        answer_slack_message(
+            workspace,
+            f"These messages were posted in Slack channel {channel_id} and look like requests. "
+            f"Handle the ones that need action:\n{requests}",
+        )
+    triage = get_triage(workspace)
+    for _, _, _, _, event_data in messages:
+        triage.mark_engaged(channel_id, event_data.get("thread_ts") or event_data.get("ts"))
+
+
+def run_slack_message(workspace, channel_id, user_id, text, event_data, priority):
+    with usage_context(user_id=user_id, channel_id=channel_id, priority=priority):
+        answer_slack_message(workspace, text)
+    get_triage(workspace).mark_engaged(channel_id, event_data.get("thread_ts") or event_data.get("ts"))
+
+
+def answer_slack_message(workspace, text):
     # orchestrator.process(text)
-    tool_layer.process_query(text,f"You are a helpful assistant that can use tools to help the user. your tools include slack, google calendar, linear, and calculator. you can use these tools to help the user with their questions. you can also use the tools to help the user with their tasks. you can call multiple tools at once if needed. Todays date is {datetime.now().strftime('%Y-%m-%d')}")
+    registry.tool_layer(workspace).process_query(text,f"You are a helpful assistant that can use tools to help the user. your tools include slack, google calendar, linear, and calculator. you can use these tools to help the user with their questions. you can also use the tools to help the user with their tasks. you can call multiple tools at once if needed. Todays date is {datetime.now().strftime('%Y-%m-%d')}")
+
+
+def get_mem0_adapter(workspace):
+    with _mem0_lock:
+        if workspace not in mem0_adapters:
+            mem0_adapters[workspace] = SlackMem0Adapter(slack_service=registry.get(workspace), mem0=mem0)
+        return mem0_adapters[workspace]
+
+
+def store_slack_message(workspace, channel_id, user_id, text, event_data):
+    # Memory sees every message, whatever triage decides for the assistant
+    get_mem0_adapter(workspace)._process_message(channel_id, user_id, text, event_data)
+
+
+def create_bus():
+    """Fan Slack messages out to the assistant and, with MEM0_API_KEY set, to Mem0
+
+    Each subscriber has its own queue: the assistant waits for space,
+    while Mem0 drops messages when its queue is full, so a slow Mem0
+    backend never delays replies.
+    """
+    global mem0
+    event_bus = EventBus()
+    event_bus.subscribe("assistant", process_slack_message, workers=int(os.environ.get("IRIS_SLACK_WORKERS", 8)))
+    if os.environ.get("MEM0_API_KEY") and os.environ.get("IRIS_MEM0_INGEST", "1") != "0":
+        mem0 = Mem0Memory()
+        event_bus.subscribe(
+            "mem0",
+            store_slack_message,
+            workers=int(os.environ.get("IRIS_MEM0_WORKERS", 2)),
+            max_pending=int(os.environ.get("IRIS_MEM0_QUEUE", 5000)),
+            timeout=0,
+        )
+    return event_bus
+
+
+def create_registry(listen=True):
+    """Set up every configured workspace, publishing messages to one event bus
+
+    Args:
+        listen (bool, optional): Open Socket Mode connections. Pass False when events
+            arrive over HTTP instead (server.py's /slack/events). Defaults to True
+    """
+    global registry, bus
+    if registry is None:
+        bus = create_bus()
+        registry = WorkspaceRegistry.from_env()
+        if listen:
+            registry.listen(dispatcher=bus)
+        else:
+            registry.start(dispatcher=bus)
+    return registry
 
 
 def main():
     """Main function to run the Slack listener"""
+    # Register signal handlers
+    signal.signal(signal.SIGINT, handle_exit)
+    signal.signal(signal.SIGTERM, handle_exit)
+    install_signal_handlers()
+
     console.print("[bold green]Starting Slack listener...[/bold green]")
+    start_metrics_server()
 
-    if not os.environ.get("SLACK_BOT_TOKEN") or not os.environ.get("SLACK_APP_TOKEN"):
+    if not os.environ.get("IRIS_SLACK_WORKSPACES") and (
+        not os.environ.get("SLACK_BOT_TOKEN") or not os.environ.get("SLACK_APP_TOKEN")
+    ):
         console.print(
-            "[bold red]Error: SLACK_BOT_TOKEN and SLACK_APP_TOKEN must be set in environment variables[/bold red]"
+            "[bold red]Error: SLACK_BOT_TOKEN and SLACK_APP_TOKEN (or IRIS_SLACK_WORKSPACES) must be set in environment variables[/bold red]"
         )
         console.print(
             "Please add these to your .env file or export them in your shell."
@@ -56,15 +192,10 @@ def main():
         return
 
     try:
-        # Initialize the Slack service
-        global slack_service
-        slack_service = SlackService()
-
-        console.print("[bold green]Services initialized successfully![/bold green]")
+        # One Slack service per workspace, sharing the worker pool and LLM client
         console.print("[bold blue]Connecting to Slack...[/bold blue]")
-
-        # Start listening for messages
-        client = slack_service.listen_for_messages(process_slack_message)
+        create_registry()
+        console.print(f"[bold green]Services initialized for {len(registry)} workspace(s)![/bold green]")
 
         console.print(
             "[bold green]Connected to Slack! Listening for messages...[/bold green]"
@@ -0,0 +1,175 @@
+"""An in-memory Linear GraphQL API for tests
+
+Runs requests against a subset of Linear's schema with graphql-core, so
+documents are validated and executed for real, introspection included.
+"""
+from gql.transport import Transport
+from graphql import ExecutionResult, build_schema, graphql_sync, print_ast
+
+LINEAR_SDL = """
+    scalar DateTime
+    scalar DateTimeOrDuration
+
+    type Query {
+        teams(filter: TeamFilter, first: Int, after: String): TeamConnection!
+        users(filter: UserFilter, first: Int, after: String, includeDisabled: Boolean): UserConnection!
+        workflowStates(filter: WorkflowStateFilter, first: Int, after: String): WorkflowStateConnection!
+        issueLabels(filter: IssueLabelFilter, first: Int, after: String): IssueLabelConnection!
+    }
+
+    type Mutation {
+        issueCreate(input: IssueCreateInput!): IssuePayload!
+        issueUpdate(id: String!, input: IssueUpdateInput!): IssuePayload!
+    }
+
+    input StringComparator { eq: String }
+    input DateComparator { gt: DateTimeOrDuration }
+    input TeamFilter { name: StringComparator, updatedAt: DateComparator }
+    input UserFilter { email: StringComparator, updatedAt: DateComparator }
+    input WorkflowStateFilter { updatedAt: DateComparator }
+    input IssueLabelFilter { updatedAt: DateComparator }
+
+    type PageInfo { hasNextPage: Boolean!, endCursor: String }
+    type Team { id: ID!, name: String!, key: String!, updatedAt: DateTime! }
+    type TeamConnection { nodes: [Team!]!, pageInfo: PageInfo! }
+    type User { id: ID!, name: String!, displayName: String!, email: String!, active: Boolean!, updatedAt: DateTime! }
+    type UserConnection { nodes: [User!]!, pageInfo: PageInfo! }
+    type WorkflowState { id: ID!, name: String!, type: String!, team: Team!, updatedAt: DateTime! }
+    type WorkflowStateConnection { nodes: [WorkflowState!]!, pageInfo: PageInfo! }
+    type IssueLabel { id: ID!, name: String!, team: Team, updatedAt: DateTime! }
+    type IssueLabelConnection { nodes: [IssueLabel!]!, pageInfo: PageInfo! }
+
+    type Issue {
+        id: ID!
+        title: String!
+        description: String
+        url: String!
+        priority: Float!
+        state: WorkflowState
+        assignee: User
+        labelIds: [String!]!
+    }
+    type IssuePayload { success: Boolean!, issue: Issue }
+
+    input IssueCreateInput {
+        id: String
+        title: String!
+        description: String
+        teamId: String!
+        priority: Int
+        assigneeId: String
+        stateId: String
+        labelIds: [String!]
+    }
+    input IssueUpdateInput {
+        title: String
+        description: String
+        priority: Int
+        assigneeId: String
+    }
+"""
+
+SCHEMA = build_schema(LINEAR_SDL)
+
+
+def _connection(nodes, first=None, after=None):
+    # Cursors are plain offsets
+    start = int(after) if after else 0
+    end = start + first if first else len(nodes)
+    has_next = end < len(nodes)
+    return {"nodes": nodes[start:end], "pageInfo": {"hasNextPage": has_next, "endCursor": str(end) if has_next else None}}
+
+
+def _matches(node, filter):
+    for field, comparator in (filter or {}).items():
+        if "eq" in comparator and node[field] != comparator["eq"]:
+            return False
+        if "gt" in comparator and not node[field] > comparator["gt"]:
+            return False
+    return True
+
+
+class FakeLinear:
+    """Root value holding the fake workspace's data"""
+
+    UPDATED_AT = "2024-01-01T00:00:00.000Z"
+
+    def __init__(self):
+        updated = self.UPDATED_AT
+        engineering = {"id": "team-eng", "name": "Engineering", "key": "ENG", "updatedAt": updated}
+        self.teams = [engineering]
+        self.users = [{"id": "user-ada", "name": "Ada Lovelace", "displayName": "ada", "email": "ada@example.com",
+                       "active": True, "updatedAt": updated}]
+        self.states = [
+            {"id": "state-todo", "name": "Todo", "type": "unstarted", "team": engineering, "updatedAt": updated},
+            {"id": "state-doing", "name": "In Progress", "type": "started", "team": engineering, "updatedAt": updated},
+        ]
+        self.labels = [
+            {"id": "label-bug", "name": "Bug", "team": engineering, "updatedAt": updated},
+            {"id": "label-ops", "name": "Ops", "team": None, "updatedAt": updated},
+        ]
+        self.issues = {}
+
+    def resolve_teams(self, info, filter=None, first=None, after=None):
+        return _connection([team for team in self.teams if _matches(team, filter)], first, after)
+
+    def resolve_users(self, info, filter=None, first=None, after=None, includeDisabled=False):
+        users = [user for user in self.users if (includeDisabled or user["active"]) and _matches(user, filter)]
+        return _connection(users, first, after)
+
+    def resolve_workflowStates(self, info, filter=None, first=None, after=None):
+        return _connection([state for state in self.states if _matches(state, filter)], first, after)
+
+    def resolve_issueLabels(self, info, filter=None, first=None, after=None):
+        return _connection([label for label in self.labels if _matches(label, filter)], first, after)
+
+    def resolve_issueCreate(self, info, input):
+        if not any(team["id"] == input["teamId"] for team in self.teams):
+            raise ValueError("Entity not found: Team")
+        issue_id = input.get("id") or f"issue-{len(self.issues) + 1}"
+        assignee = next((user for user in self.users if user["id"] == input.get("assigneeId")), None)
+        state_id = input.get("stateId") or "state-todo"
+        state = next(state for state in self.states if state["id"] == state_id)
+        issue = dict(input, id=issue_id, url=f"https://linear.app/issue/{issue_id}", assignee=assignee,
+                     priority=input.get("priority") or 0, state=state, labelIds=input.get("labelIds") or [])
+        self.issues[issue_id] = issue
+        return {"success": True, "issue": issue}
+
+    def resolve_issueUpdate(self, info, id, input):
+        if id not in self.issues:
+            raise ValueError("Entity not found: Issue")
+        issue = self.issues[id]
+        issue.update(input)
+        return {"success": True, "issue": issue}
+
+
+class FakeLinearTransport(Transport):
+    """Sync gql transport that answers from FakeLinear"""
+
+    def __init__(self, linear=None, schema=SCHEMA):
+        self.linear = linear or FakeLinear()
+        self.schema = schema
+        self.requests = []
+        self.root = _Root(self.linear)
+
+    @property
+    def introspections(self) -> int:
+        return sum(1 for source in self.requests if "__schema" in source)
+
+    def execute(self, request, *args, **kwargs):
+        source = print_ast(request.document)
+        self.requests.append(source)
+        result = graphql_sync(self.schema, source, root_value=self.root, variable_values=request.variable_values,
+                              operation_name=request.operation_name)
+        # Errors as they come over the wire
+        return ExecutionResult(result.data, [error.formatted for error in result.errors] if result.errors else None)
+
+
+class _Root:
+    """Maps root field names onto FakeLinear.resolve_<field>"""
+
+    def __init__(self, linear):
+        self.linear = linear
+
+    def __getattr__(self, name):
+        return getattr(self.linear, f"resolve_{name}")
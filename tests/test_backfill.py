@@ -0,0 +1,102 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.memory.backfill import SlackBackfill
+
+
+class FakeSlackHistory:
+    """conversations.history / conversations.replies over canned pages"""
+
+    def __init__(self, fail_on_cursor=None):
+        self.fail_on_cursor = fail_on_cursor
+        self.history_calls = []
+
+    def conversations_history(self, channel, cursor=None, limit=200, **kwargs):
+        self.history_calls.append((channel, cursor))
+        if cursor and cursor == self.fail_on_cursor:
+            raise ConnectionError("network down")
+        if cursor is None:
+            messages = [
+                {"ts": "3.0", "user": "U1", "text": f"{channel} third", "reply_count": 2},
+                {"ts": "2.0", "user": "U2", "text": f"{channel} second"},
+                {"ts": "1.5", "subtype": "bot_message", "text": "bot"},
+            ]
+            return {"messages": messages, "response_metadata": {"next_cursor": "page2"}}
+        return {"messages": [{"ts": "1.0", "user": "U1", "text": f"{channel} first"}], "response_metadata": {"next_cursor": ""}}
+
+    def conversations_replies(self, channel, ts, cursor=None, limit=200):
+        messages = [
+            {"ts": ts, "user": "U1", "text": "parent"},
+            {"ts": "3.1", "user": "U2", "text": f"{channel} reply 1", "thread_ts": ts},
+            {"ts": "3.2", "user": "U1", "text": f"{channel} reply 2", "thread_ts": ts},
+        ]
+        return {"messages": messages, "response_metadata": {"next_cursor": ""}}
+
+
+class TestSlackBackfill(unittest.TestCase):
+    """Test parallel, resumable history backfill"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmp.name, "backfill.json")
+        self.stored = []
+        self.lock = threading.Lock()
+
+        def process_message(channel_id, user_id, text, event_data):
+            with self.lock:
+                self.stored.append((channel_id, text, event_data.get("thread_ts")))
+
+        self.adapter = MagicMock()
+        self.adapter._process_message.side_effect = process_message
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def backfill(self, client, **kwargs):
+        self.adapter.slack.client = client
+        return SlackBackfill(self.adapter, ["C1", "C2"], workers=2, rate=1000, checkpoint_path=self.checkpoint, **kwargs)
+
+    def test_backfills_history_and_threads(self):
+        stats = self.backfill(FakeSlackHistory()).run()
+
+        self.assertEqual(stats["messages"], 10)
+        self.assertEqual(stats["threads"], 2)
+        self.assertEqual(stats["errors"], {})
+        self.assertGreater(stats["messages_per_second"], 0)
+        c1 = [text for channel, text, _ in self.stored if channel == "C1"]
+        # Both pages are one window, stored oldest first across the page boundary
+        self.assertEqual(c1[:3], ["C1 first", "C1 second", "C1 third"])
+        self.assertIn("C1 reply 2", c1)
+        self.assertNotIn("parent", c1)
+        self.adapter.store_all_active_conversations.assert_called_once()
+        with open(self.checkpoint) as f:
+            # The bot message is skipped, not counted
+            self.assertEqual(json.load(f)["C1"]["messages"], 5)
+
+    def test_resumes_from_checkpoint(self):
+        stats = self.backfill(FakeSlackHistory(fail_on_cursor="page2"), window_pages=1).run()
+        self.assertEqual(set(stats["errors"]), {"C1", "C2"})
+        with open(self.checkpoint) as f:
+            self.assertEqual(json.load(f)["C1"]["cursor"], "page2")
+
+        self.stored.clear()
+        client = FakeSlackHistory()
+        stats = self.backfill(client, window_pages=1).run()
+        self.assertEqual(sorted(text for _, text, _ in self.stored), ["C1 first", "C2 first"])
+        self.assertEqual({cursor for _, cursor in client.history_calls}, {"page2"})
+
+        # A finished channel is skipped entirely
+        client = FakeSlackHistory()
+        self.backfill(client).run()
+        self.assertEqual(client.history_calls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import sys
+import os
+import time
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.calculator.service import CalculatorService, CalculatorError, compile_expression
+
+
+class TestCalculatorService(unittest.TestCase):
+    """Test the AST-whitelisted calculator used by the calculate tool"""
+
+    def setUp(self):
+        self.calculator = CalculatorService()
+
+    def test_arithmetic(self):
+        self.assertEqual(self.calculator.evaluate("25 * 4 + 10"), 110)
+        self.assertEqual(self.calculator.evaluate("2^10"), 1024)
+        self.assertAlmostEqual(self.calculator.evaluate("sqrt(2) * log(8, 2)"), 3 * 2 ** 0.5)
+
+    def test_vectorized_ranges(self):
+        expected = sum(1.07 ** n for n in range(1, 31))
+        self.assertAlmostEqual(self.calculator.evaluate("sum(1.07^n for n in 1..30)"), expected)
+        self.assertEqual(self.calculator.evaluate("[n for n in 1..10 if n % 2 == 0]"), [2, 4, 6, 8, 10])
+        self.assertEqual(self.calculator.evaluate("max(x^2 - 3*x for x in 0..10)"), 70)
+        self.assertEqual(self.calculator.evaluate("x * 2", {"x": [1, 2, 3]}), [2, 4, 6])
+
+    def test_rejects_unsafe_expressions(self):
+        for expression in [
+            "__import__('os').system('ls')",
+            "(1).__class__",
+            "open('x')",
+            "'a' * 3",
+            "lambda: 1",
+        ]:
+            with self.assertRaises(CalculatorError, msg=expression):
+                self.calculator.evaluate(expression)
+
+    def test_resource_limits(self):
+        with self.assertRaises(CalculatorError):
+            self.calculator.evaluate("10**10**10")
+        with self.assertRaises(CalculatorError):
+            self.calculator.evaluate("sum(1..10000000000)")
+
+    def test_runaway_expressions_fail_cleanly(self):
+        for expression in [
+            "2**20000",
+            "-" * 998 + "1",
+            "1 / 0",
+            "sum(factorial(n % 1000) for n in range(1000000))",
+            "factorial(2.5)",
+            "factorial(-1)",
+        ]:
+            with self.assertRaises(CalculatorError, msg=expression[:40]):
+                self.calculator.evaluate(expression)
+        self.assertEqual(self.calculator.evaluate("factorial([3, 4, 3])"), [6, 24, 6])
+
+    def test_exact_integer_reductions_are_sized_first(self):
+        for expression in [
+            "prod(factorial(1000 + 0*(1..2000)))",
+            "prod(factorial(1..1000))",
+            "cumprod(factorial(1..1000))",
+        ]:
+            start = time.monotonic()
+            with self.assertRaises(CalculatorError, msg=expression):
+                self.calculator.evaluate(expression)
+            self.assertLess(time.monotonic() - start, 1.0, expression)
+        self.assertEqual(self.calculator.evaluate("prod(factorial(1..5))"), 34560)
+        self.assertEqual(self.calculator.evaluate("cumprod(factorial(1..3))"), [1, 2, 12])
+
+    def test_calculate_tool_reports_errors(self):
+        from unittest.mock import MagicMock
+        from tools.tools import ToolCallingLayer
+
+        layer = ToolCallingLayer(llm_client=MagicMock(), slack_service=MagicMock(), linear_service=MagicMock(),
+                                 gcal_service=MagicMock())
+        result = layer._run_tool("calculate", {"expression": "2**20000"})
+        self.assertTrue(result.startswith("Error calculating expression"))
+
+    def test_compiled_forms_are_cached(self):
+        compile_expression.cache_clear()
+        self.calculator.evaluate("n * 3", {"n": 1})
+        self.calculator.evaluate("n * 3", {"n": 2})
+        self.assertEqual(self.calculator.cache_info().hits, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.event_bus import EventBus
+from tools.slack.service import SlackService
+
+
+class TestEventBus(unittest.TestCase):
+    """Test fan-out with independent per-subscriber queues"""
+
+    def setUp(self):
+        self.bus = EventBus(name="test_bus")
+
+    def tearDown(self):
+        self.bus.stop(drain=False, timeout=2)
+
+    def test_every_subscriber_gets_every_event_in_order(self):
+        seen = {"a": [], "b": []}
+        self.bus.subscribe("a", lambda i: seen["a"].append(i))
+        self.bus.subscribe("b", lambda i: seen["b"].append(i), workers=2)
+        for i in range(20):
+            self.assertEqual(self.bus.publish("C1", i), 2)
+        self.assertTrue(self.bus.join(2))
+        self.assertEqual(seen["a"], list(range(20)))
+        self.assertEqual(seen["b"], list(range(20)))
+
+    def test_slow_subscriber_does_not_delay_others(self):
+        release = threading.Event()
+        fast = []
+        self.bus.subscribe("slow", lambda i: release.wait(5), max_pending=2, timeout=0)
+        self.bus.subscribe("fast", fast.append)
+
+        start = time.monotonic()
+        accepted = [self.bus.publish("C1", i) for i in range(10)]
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(accepted[:2], [2, 2])
+        self.assertEqual(accepted[-1], 1)
+        self.assertLessEqual(self.bus.pending["slow"], 2)
+        release.set()
+        self.assertTrue(self.bus.join(2))
+        self.assertEqual(fast, list(range(10)))
+
+    def test_blocking_subscriber_pushes_back(self):
+        release = threading.Event()
+        self.bus.subscribe("assistant", lambda i: release.wait(5), max_pending=1)
+        self.assertEqual(self.bus.publish("C1", 0), 1)
+
+        done = threading.Event()
+        threading.Thread(target=lambda: (self.bus.publish("C1", 1), done.set()), daemon=True).start()
+        self.assertFalse(done.wait(0.1))
+        release.set()
+        self.assertTrue(done.wait(2))
+
+    def test_duplicate_subscriber_is_rejected(self):
+        self.bus.subscribe("a", print)
+        with self.assertRaises(ValueError):
+            self.bus.subscribe("a", print)
+
+    def test_bus_as_slack_dispatcher(self):
+        assistant, memory = MagicMock(), MagicMock()
+        self.bus.subscribe("assistant", assistant)
+        self.bus.subscribe("mem0", memory, timeout=0)
+
+        service = SlackService(bot_token="xoxb-test")
+        service.dispatcher = self.bus
+        event = {"type": "message", "channel": "C1", "user": "U1", "text": "hi", "ts": "1.0"}
+        service.handle_event(event, None, event_id="Ev1")
+        service.handle_event(event, None, event_id="Ev1")
+        self.assertTrue(self.bus.join(2))
+
+        assistant.assert_called_once_with("C1", "U1", "hi", event)
+        memory.assert_called_once_with("C1", "U1", "hi", event)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from graphql import graphql_sync
+
+from tests.fake_linear import SCHEMA, FakeLinear, _Root
+from tools.linear.async_service import AsyncLinearService
+from tools.linear.directory import LinearDirectory
+from tools.linear.schema import LinearSchemaCache
+
+
+class FakeLinearAPI:
+    """FakeLinear served over HTTP, with injectable failures and latency"""
+
+    def __init__(self):
+        self.linear = FakeLinear()
+        self.root = _Root(self.linear)
+        self.queries = []
+        self.failures = []
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.app = web.Application()
+        self.app.router.add_post("/graphql", self.handle)
+
+    async def handle(self, request):
+        body = await request.json()
+        self.queries.append(body["query"])
+        if self.failures:
+            failure = self.failures.pop(0)
+            if isinstance(failure, int):
+                return web.Response(status=failure, text="unavailable")
+            return web.json_response({"data": None, "errors": [failure]})
+
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            result = graphql_sync(SCHEMA, body["query"], root_value=self.root, variable_values=body.get("variables"),
+                                  operation_name=body.get("operationName"))
+        finally:
+            self.in_flight -= 1
+        response = {"data": result.data}
+        if result.errors:
+            response["errors"] = [error.formatted for error in result.errors]
+        return web.json_response(response)
+
+    def sent(self, prefix):
+        return [query for query in self.queries if query.lstrip().startswith(prefix)]
+
+
+class TestAsyncLinearService(unittest.IsolatedAsyncioTestCase):
+    """Test the asyncio Linear service against a local fake API"""
+
+    async def asyncSetUp(self):
+        self.api = FakeLinearAPI()
+        self.runner = web.AppRunner(self.api.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+
+        self.tmp = tempfile.TemporaryDirectory()
+        url = f"http://127.0.0.1:{port}/graphql"
+        self.service = AsyncLinearService(
+            api_key="lin_test", url=url, concurrency=3, timeout=5, backoff=0.01, max_batch=5,
+            schema_cache=LinearSchemaCache(os.path.join(self.tmp.name, "linear_schema.json"), url=url),
+            directory=LinearDirectory(refresh_interval=0),
+        )
+
+    async def asyncTearDown(self):
+        await self.service.close()
+        await self.runner.cleanup()
+        self.tmp.cleanup()
+
+    async def test_same_surface_as_the_threaded_service(self):
+        issue = await self.service.create_urgent_issue("Prod down", "500s", "Engineering", "ada@example.com")
+        self.assertEqual(issue["assignee"]["name"], "Ada Lovelace")
+        self.assertEqual(issue["priority"], 4)
+        self.assertEqual(await self.service.get_state_id("team-eng", "In Progress"), "state-doing")
+        self.assertEqual(await self.service.get_label_ids(["Bug"], "team-eng"), ["label-bug"])
+        updated = await self.service.update_issue(issue["id"], title="Prod is down")
+        self.assertEqual(updated["title"], "Prod is down")
+        self.assertTrue(os.path.exists(self.service.schema_cache.path))
+
+    async def test_concurrency_is_capped(self):
+        await self.service.ensure_directory()
+        self.api.delay = 0.05
+        self.api.max_in_flight = 0
+        issues = await asyncio.gather(*(self.service.create_issue(f"Item {i}", "", "team-eng") for i in range(9)))
+        self.assertEqual(len({issue["id"] for issue in issues}), 9)
+        self.assertEqual(self.api.max_in_flight, 3)
+
+    async def test_batches_are_sent_concurrently(self):
+        await self.service.ensure_directory()
+        self.api.delay = 0.05
+        self.api.max_in_flight = 0
+        results = await self.service.create_issues([{"title": f"Item {i}", "team_id": "team-eng"} for i in range(15)])
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertEqual(len(self.api.sent("mutation")), 3)
+        self.assertEqual(self.api.max_in_flight, 3)
+
+    async def test_queries_are_retried_on_server_errors(self):
+        await self.service.ensure_directory()
+        self.api.failures = [503, 502]
+        self.assertEqual(await self.service.get_team_id("Platform"), None)
+        self.assertEqual(len(self.api.sent("query GetTeam")), 3)
+
+    async def test_mutations_are_retried_only_when_rate_limited(self):
+        await self.service.ensure_directory()
+        self.api.failures = [{"message": "Rate limit exceeded", "extensions": {"code": "RATELIMITED"}}]
+        issue = await self.service.create_issue("Limited", "", "team-eng")
+        self.assertEqual(issue["title"], "Limited")
+
+        self.api.failures = [503]
+        with self.assertRaises(Exception):
+            await self.service.create_issue("Maybe applied", "", "team-eng")
+        self.assertEqual(len(self.api.sent("mutation")), 3)
+        self.assertEqual(len(self.api.linear.issues), 1)
+
+    async def test_failed_batch_does_not_sink_the_others(self):
+        await self.service.ensure_directory()
+        self.api.failures = [503]
+        results = await self.service.create_issues([{"title": f"Item {i}", "team_id": "team-eng"} for i in range(15)])
+
+        failed = [result for result in results if not result["success"]]
+        self.assertEqual(len(failed), 5)
+        self.assertTrue(all(result["issue"]["id"] for result in failed))
+        self.assertEqual(len(self.api.linear.issues), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
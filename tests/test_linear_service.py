@@ -0,0 +1,345 @@
+import sys
+import os
+import json
+import re
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import gql.client
+from gql.transport.exceptions import TransportServerError
+from graphql import build_schema, introspection_from_schema
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.fake_linear import LINEAR_SDL, FakeLinear, FakeLinearTransport
+from tools.linear import documents
+from tools.linear.directory import LinearDirectory
+from tools.linear.schema import LinearSchemaCache
+from tools.linear.service import LinearService
+
+
+class TestLinearSchemaCache(unittest.TestCase):
+    """Test the on-disk schema cache and one-time document validation"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "linear_schema.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def service(self, transport=None, ttl=3600):
+        transport = transport or FakeLinearTransport()
+        cache = LinearSchemaCache(self.path, ttl=ttl, url="https://linear.test/graphql")
+        service = LinearService(api_key="lin_test", schema_cache=cache, transport=transport,
+                                directory=LinearDirectory(refresh_interval=0))
+        return service, transport
+
+    def test_schema_is_introspected_once_and_reused(self):
+        service, transport = self.service()
+        self.assertEqual(service.get_team_id("Engineering"), "team-eng")
+        self.assertEqual(transport.introspections, 1)
+        self.assertTrue(os.path.exists(self.path))
+
+        service, transport = self.service()
+        self.assertIsNotNone(service.client.schema)
+        self.assertEqual(service.get_user_id("ada@example.com"), "user-ada")
+        issue = service.create_issue("Broken login", "Steps...", "team-eng", assignee_id="user-ada")
+        self.assertEqual(issue["assignee"]["name"], "Ada Lovelace")
+        self.assertEqual(transport.introspections, 0)
+
+    def test_stale_or_foreign_cache_is_refetched(self):
+        self.service()[0].get_team_id("Engineering")
+
+        service, transport = self.service(ttl=0)
+        service.get_team_id("Engineering")
+        self.assertEqual(transport.introspections, 1)
+
+        with open(self.path) as f:
+            entry = json.load(f)
+        entry["version"]["gql"] = "0.0.1"
+        with open(self.path, "w") as f:
+            json.dump(entry, f)
+        service, transport = self.service()
+        service.get_team_id("Engineering")
+        self.assertEqual(transport.introspections, 1)
+
+    def test_schema_change_invalidates_cache(self):
+        # A cached schema that lost issueUpdate no longer validates UpdateIssue
+        old_sdl = LINEAR_SDL.replace("issueUpdate(id: String!, input: IssueUpdateInput!): IssuePayload!", "")
+        cache = LinearSchemaCache(self.path, url="https://linear.test/graphql")
+        cache.save(introspection_from_schema(build_schema(old_sdl)))
+
+        service, transport = self.service()
+        self.assertIsNone(service.client.schema)
+        service.get_team_id("Engineering")
+        self.assertEqual(transport.introspections, 1)
+
+    def test_documents_are_validated_once(self):
+        self.service()[0].get_team_id("Engineering")
+        service, _ = self.service()
+        with patch.object(gql.client, "validate", wraps=gql.client.validate) as validate:
+            for _ in range(3):
+                issue = service.create_issue("Broken login", "Steps...", "team-eng")
+                service.update_issue(issue["id"], priority=1)
+        self.assertEqual(validate.call_count, 2)
+
+    def test_documents_match_schema(self):
+        self.assertEqual(documents.validate_documents(build_schema(LINEAR_SDL)), {})
+
+
+class TestLinearDirectory(unittest.TestCase):
+    """Test directory-backed lookups and their refresh"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.transport = FakeLinearTransport()
+        self.linear = self.transport.linear
+        self.directory = LinearDirectory(page_size=2, refresh_interval=0)
+        cache = LinearSchemaCache(os.path.join(self.tmp.name, "linear_schema.json"), url="https://linear.test/graphql")
+        self.service = LinearService(api_key="lin_test", schema_cache=cache, transport=self.transport,
+                                     directory=self.directory)
+
+    def tearDown(self):
+        self.service.close()
+        self.tmp.cleanup()
+
+    def sent(self):
+        sent = [source for source in self.transport.requests if "__schema" not in source]
+        self.transport.requests.clear()
+        return sent
+
+    def test_issue_creation_is_a_single_mutation(self):
+        self.service.get_team_id("Engineering")
+        self.sent()
+
+        for _ in range(3):
+            issue = self.service.create_urgent_issue("Prod down", "500s everywhere", "engineering", "ada@example.com")
+        self.assertEqual(issue["assignee"]["id"], "user-ada")
+        self.assertEqual(len(self.sent()), 3)
+
+    def test_load_follows_pagination(self):
+        self.linear.teams += [{"id": f"team-{i}", "name": f"Team {i}", "key": f"T{i}",
+                               "updatedAt": FakeLinear.UPDATED_AT} for i in range(4)]
+        self.directory.ensure_loaded()
+        self.assertEqual(len(self.directory), 5 + 1 + 2 + 2)
+        # 3 pages of teams, then one each for users, states and labels
+        self.assertEqual(len(self.sent()), 6)
+        self.assertEqual(self.directory.find_team("t3")["id"], "team-3")
+        self.assertEqual(self.directory.find_user("@Ada  Lovelace")["id"], "user-ada")
+        self.assertEqual(self.directory.find_state("team-eng", "in progress")["id"], "state-doing")
+        self.assertEqual([label["id"] for label in self.directory.find_labels(["bug", "ops", "nope"], "team-eng")],
+                         ["label-bug", "label-ops"])
+
+    def test_refresh_fetches_only_updated_nodes(self):
+        self.directory.ensure_loaded()
+        self.sent()
+        self.linear.users.append({"id": "user-grace", "name": "Grace Hopper", "displayName": "grace",
+                                  "email": "grace@example.com", "active": True, "updatedAt": "2024-02-01T00:00:00.000Z"})
+        self.linear.users[0].update(active=False, updatedAt="2024-02-01T00:00:00.000Z")
+
+        self.assertEqual(self.directory.refresh(), 2)
+        self.assertEqual(self.directory.find_user("grace hopper")["id"], "user-grace")
+        self.assertIsNone(self.directory.find_user("ada@example.com"))
+        self.assertEqual(self.directory.find_user("user-ada")["active"], False)
+        self.assertEqual(self.directory.refresh(), 0)
+
+    def test_ttl_reload_drops_deleted_nodes(self):
+        self.directory.ensure_loaded()
+        self.linear.labels.pop()
+        self.directory.ttl = 0
+        self.directory.refresh()
+        self.assertEqual(self.directory.find_labels(["Ops"]), [])
+
+    def test_unknown_team_falls_back_to_a_query(self):
+        self.directory.ensure_loaded()
+        self.linear.teams.append({"id": "team-ops", "name": "Ops", "key": "OPS", "updatedAt": FakeLinear.UPDATED_AT})
+        self.sent()
+        self.assertEqual(self.service.get_team_id("Ops"), "team-ops")
+        self.assertEqual(self.service.get_team_id("Ops"), "team-ops")
+        self.assertEqual(len(self.sent()), 1)
+
+    def test_create_issue_tool_resolves_names_locally(self):
+        from tools.tools import ToolCallingLayer
+
+        layer = ToolCallingLayer(llm_client=MagicMock(), slack_service=MagicMock(), linear_service=self.service,
+                                 gcal_service=MagicMock())
+        self.directory.ensure_loaded()
+        self.sent()
+        result = layer._run_tool("linear_create_issue", {
+            "title": "Flaky deploy", "team_id": "ENG", "assignee_id": "ada@example.com",
+            "state": "In Progress", "labels": ["Bug", "Ops"],
+        })
+        self.assertIn("https://linear.app/issue/issue-1", result)
+        self.assertEqual(len(self.sent()), 1)
+        issue = self.linear.issues["issue-1"]
+        self.assertEqual(issue["state"]["id"], "state-doing")
+        self.assertEqual(issue["labelIds"], ["label-bug", "label-ops"])
+
+    def test_create_issue_tool_reports_what_did_not_resolve(self):
+        from tools.tools import ToolCallingLayer
+
+        layer = ToolCallingLayer(llm_client=MagicMock(), slack_service=MagicMock(), linear_service=self.service,
+                                 gcal_service=MagicMock())
+        result = layer._run_tool("linear_create_issue", {"title": "Lost", "team_id": "Design"})
+        self.assertEqual(result, "Error creating issue: Linear team Design not found")
+        self.assertEqual(self.linear.issues, {})
+
+        result = layer._run_tool("linear_create_issue", {
+            "title": "Partly resolved", "team_id": "ENG", "assignee_id": "nobody@example.com",
+            "state": "Blocked", "labels": ["Bug", "Nope"],
+        })
+        self.assertTrue(result.startswith("Issue created: Partly resolved"))
+        self.assertIn("not found, left unset: assignee nobody@example.com, state Blocked, label Nope", result)
+        self.assertEqual(self.linear.issues["issue-1"]["labelIds"], ["label-bug"])
+
+    def test_ambiguous_names_resolve_to_nothing(self):
+        self.linear.teams.append({"id": "team-eng-2", "name": "Engineering", "key": "ENG2",
+                                  "updatedAt": FakeLinear.UPDATED_AT})
+        self.linear.users.append({"id": "user-ada-2", "name": "Ada Lovelace", "displayName": "ada2",
+                                  "email": "ada2@example.com", "active": True, "updatedAt": FakeLinear.UPDATED_AT})
+        self.directory.ensure_loaded()
+        self.assertIsNone(self.directory.find_team("Engineering"))
+        self.assertEqual(self.directory.find_team("eng")["id"], "team-eng")
+        self.assertIsNone(self.directory.find_user("Ada Lovelace"))
+        self.assertEqual(self.directory.find_user("ada@example.com")["id"], "user-ada")
+        self.assertIsNone(self.service.get_team_id("Engineering"))
+
+    def test_failed_loads_back_off(self):
+        failing = MagicMock(side_effect=ConnectionError("down"))
+        directory = LinearDirectory(execute=failing, refresh_interval=0)
+        with self.assertRaises(ConnectionError):
+            directory.ensure_loaded()
+        with self.assertRaisesRegex(RuntimeError, "next attempt"):
+            directory.ensure_loaded()
+        self.assertEqual(failing.call_count, 1)
+
+        directory._retry_at = 0
+        failing.side_effect = None
+        failing.return_value = {field: {"nodes": [], "pageInfo": {"hasNextPage": False, "endCursor": None}}
+                                for field in ("teams", "users", "workflowStates", "issueLabels")}
+        directory.ensure_loaded()
+        self.assertTrue(directory.loaded)
+
+
+class TestLinearBatches(unittest.TestCase):
+    """Test aliased bulk mutations and per-item failures"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.transport = FakeLinearTransport()
+        self.linear = self.transport.linear
+        cache = LinearSchemaCache(os.path.join(self.tmp.name, "linear_schema.json"), url="https://linear.test/graphql")
+        self.service = LinearService(api_key="lin_test", schema_cache=cache, transport=self.transport,
+                                     directory=LinearDirectory(refresh_interval=0), max_batch=10)
+
+    def tearDown(self):
+        self.service.close()
+        self.tmp.cleanup()
+
+    def mutations(self):
+        return [source for source in self.transport.requests if source.startswith("mutation")]
+
+    def test_issues_are_created_in_batches(self):
+        issues = [{"title": f"Action item {i}", "team_id": "team-eng", "assignee_id": "user-ada"} for i in range(25)]
+        results = self.service.create_issues(issues)
+
+        self.assertEqual(len(self.mutations()), 3)
+        self.assertTrue(all(result["success"] for result in results))
+        self.assertEqual([result["issue"]["title"] for result in results], [issue["title"] for issue in issues])
+        self.assertEqual(len(self.linear.issues), 25)
+
+    def test_complexity_budget_limits_batches(self):
+        self.service.complexity_budget = documents.estimate_complexity(documents.create_issues(4))
+        self.service.create_issues([{"title": f"Item {i}", "team_id": "team-eng"} for i in range(10)])
+        self.assertEqual(len(self.mutations()), 3)
+
+    def test_failed_create_is_reported_without_duplicates(self):
+        issues = [{"title": f"Item {i}", "team_id": "team-eng"} for i in range(5)]
+        issues[2]["team_id"] = "team-gone"
+        results = self.service.create_issues(issues)
+
+        self.assertEqual([result["success"] for result in results], [True, True, False, True, True])
+        self.assertIn("Entity not found", results[2]["error"])
+        # Items applied before the failure keep their client-generated IDs
+        self.assertIn(results[0]["issue"]["id"], self.linear.issues)
+        self.assertEqual(len(self.linear.issues), 4)
+
+    def test_invalid_variables_fail_only_their_item(self):
+        results = self.service.create_issues([{"title": "Good", "team_id": "team-eng"},
+                                              {"title": "Bad", "team_id": "team-eng", "priority": "urgent"}])
+        self.assertEqual([result["success"] for result in results], [True, False])
+        self.assertEqual(len(self.linear.issues), 1)
+
+    def test_failed_update_resends_the_rest(self):
+        created = self.service.create_issues([{"title": f"Item {i}", "team_id": "team-eng"} for i in range(3)])
+        ids = [result["issue"]["id"] for result in created]
+        results = self.service.update_issues([{"id": ids[0], "priority": 1}, {"id": "issue-missing", "priority": 1},
+                                              {"id": ids[2], "title": "Renamed"}])
+
+        self.assertEqual(len(self.mutations()), 3)
+        self.assertEqual([result["success"] for result in results], [True, False, True])
+        self.assertEqual(results[2]["issue"]["title"], "Renamed")
+        self.assertEqual(self.linear.issues[ids[0]]["priority"], 1)
+
+    def test_transport_failure_loses_only_its_batch(self):
+        execute = self.transport.execute
+
+        def flaky(request, *args, **kwargs):
+            result = execute(request, *args, **kwargs)
+            if len(self.mutations()) == 2:
+                # Applied, but the response never arrives
+                raise TransportServerError("502 Bad Gateway", 502)
+            return result
+
+        issues = [{"title": f"Item {i}", "team_id": "team-eng"} for i in range(25)]
+        with patch.object(self.transport, "execute", side_effect=flaky):
+            results = self.service.create_issues(issues)
+
+        self.assertEqual([result["success"] for result in results], [True] * 10 + [False] * 10 + [True] * 5)
+        self.assertIn("may or may not have been applied", results[10]["error"])
+        # The lost batch was applied server side; retrying it under the same IDs creates nothing new
+        retry = [dict(issue, id=result["issue"]["id"]) for issue, result in zip(issues, results) if not result["success"]]
+        self.service.create_issues(retry)
+        self.assertEqual(len(self.linear.issues), 25)
+
+    def test_bulk_tool_creates_every_issue_in_one_call(self):
+        from tools.tools import ToolCallingLayer
+
+        layer = ToolCallingLayer(llm_client=MagicMock(), slack_service=MagicMock(), linear_service=self.service,
+                                 gcal_service=MagicMock())
+        result = layer._run_tool("linear_create_issues", {"issues": [
+            {"title": "Write notes", "team_id": "Engineering", "assignee_id": "ada@example.com"},
+            {"title": "Fix deploy", "team_id": "ENG", "labels": ["Bug"]},
+        ]})
+        self.assertTrue(result.startswith("Created 2 of 2 issues"))
+        self.assertEqual(len(self.mutations()), 1)
+
+    def test_bulk_tool_reports_ids_to_retry_with(self):
+        from tools.tools import ToolCallingLayer
+
+        layer = ToolCallingLayer(llm_client=MagicMock(), slack_service=MagicMock(), linear_service=self.service,
+                                 gcal_service=MagicMock())
+        execute = self.transport.execute
+
+        def lost_response(request, *args, **kwargs):
+            result = execute(request, *args, **kwargs)
+            if self.mutations():
+                # Applied, but the response never arrives
+                raise TransportServerError("502 Bad Gateway", 502)
+            return result
+
+        with patch.object(self.transport, "execute", side_effect=lost_response):
+            result = layer._run_tool("linear_create_issues", {"issues": [{"title": "Write notes", "team_id": "ENG"}]})
+        issue_id = re.search(r"retry with id (\S+?)\)", result).group(1)
+        self.assertIn(issue_id, self.linear.issues)
+
+        # Retrying under the reported ID creates nothing new, from either tool
+        layer._run_tool("linear_create_issues", {"issues": [{"id": issue_id, "title": "Write notes", "team_id": "ENG"}]})
+        layer._run_tool("linear_create_issue", {"id": issue_id, "title": "Write notes", "team_id": "ENG"})
+        self.assertEqual(len(self.linear.issues), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
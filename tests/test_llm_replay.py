@@ -0,0 +1,121 @@
+import sys
+import os
+import gzip
+import json
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openai.types.chat import ChatCompletion
+
+from llm.replay import RecordingTransport, ReplayTransport, ReplayMissError, lognormal_latency
+from orchestrator.client import LLMClient
+from orchestrator.usage import UsageTracker, set_usage_tracker
+from tools.tools import ToolCallingLayer
+
+
+def make_completion(content=None, tool_calls=None):
+    message = {"role": "assistant", "content": content}
+    if tool_calls:
+        message["tool_calls"] = tool_calls
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 1700000000,
+        "model": "gpt-4o",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "tool_calls" if tool_calls else "stop",
+            "message": message,
+        }],
+        "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+    })
+
+
+class TestLLMReplay(unittest.TestCase):
+    """Record a tool-calling session against a fake client and replay it offline"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "session.jsonl.gz")
+        set_usage_tracker(UsageTracker(os.path.join(self.tmpdir.name, "usage.db"), flush_interval=0))
+
+        self.live = MagicMock()
+        self.live.chat.completions.create.side_effect = [
+            make_completion(tool_calls=[{
+                "id": "call_1",
+                "type": "function",
+                "function": {"name": "calculate", "arguments": json.dumps({"expression": "25 * 4 + 10"})},
+            }]),
+            make_completion(content="The answer is 110."),
+        ]
+
+    def tearDown(self):
+        set_usage_tracker(None)
+        self.tmpdir.cleanup()
+
+    def _tool_layer(self, transport):
+        return ToolCallingLayer(
+            llm_client=LLMClient(transport=transport),
+            slack_service=MagicMock(),
+            linear_service=MagicMock(),
+            gcal_service=MagicMock(),
+        )
+
+    def _record(self):
+        recorded = self._tool_layer(RecordingTransport(self.live, self.path)).process_query("What is 25 * 4 + 10?")
+        self.assertEqual(self.live.chat.completions.create.call_count, 2)
+        return recorded
+
+    def test_replay_reproduces_tool_calls(self):
+        recorded = self._record()
+
+        replay = ReplayTransport(self.path, latency="none", strict=True)
+        self.assertEqual(len(replay), 2)
+        replayed = self._tool_layer(replay).process_query("What is 25 * 4 + 10?")
+
+        self.assertEqual(replayed, recorded)
+        self.assertTrue(replayed["tool_called"])
+        self.assertEqual(replayed["tool_results"][0]["tool"], "calculate")
+
+    def test_tools_are_stored_once(self):
+        self._record()
+        # Second session against the same file with the same tool set
+        self.live.chat.completions.create.side_effect = None
+        self.live.chat.completions.create.return_value = make_completion(content="hi")
+        transport = RecordingTransport(self.live, self.path)
+        transport.chat.completions.create(model="gpt-4o", messages=[], tools=[{"a": 1}])
+        transport.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "x"}], tools=[{"a": 1}])
+
+        with gzip.open(self.path, "rt") as f:
+            types = [json.loads(line)["type"] for line in f]
+        self.assertEqual(types.count("tools"), 2)
+        self.assertEqual(types.count("completion"), 4)
+
+    def test_strict_replay_misses(self):
+        self._record()
+        replay = ReplayTransport(self.path, latency="none", strict=True)
+        with self.assertRaises(ReplayMissError):
+            replay.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "unknown"}])
+
+    def test_unmatched_requests_replay_in_order(self):
+        self._record()
+        replay = ReplayTransport(self.path, latency="none")
+        first = replay.chat.completions.create(model="other", messages=[])
+        second = replay.chat.completions.create(model="other", messages=[])
+        self.assertEqual(first.choices[0].message.tool_calls[0].function.name, "calculate")
+        self.assertEqual(second.choices[0].message.content, "The answer is 110.")
+
+    def test_synthetic_latency(self):
+        self._record()
+        replay = ReplayTransport(self.path, latency=lognormal_latency(0.02, sigma=0.1, seed=1))
+        start_time = time.perf_counter()
+        replay.chat.completions.create(model="other", messages=[])
+        self.assertGreater(time.perf_counter() - start_time, 0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from llm.openai import OpenAIClient
+from llm.selector import ProviderSelector, AllProvidersFailedError
+from orchestrator.usage import UsageTracker, set_usage_tracker, usage_context
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible /v1/chat/completions endpoint"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        time.sleep(self.server.delay)
+        if self.server.fail:
+            self.send_response(500)
+            self.end_headers()
+            return
+
+        message = {"role": "assistant", "content": f"served by {self.server.name}"}
+        if body.get("tools"):
+            message = {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{
+                    "id": "call_1",
+                    "type": "function",
+                    "function": {"name": body["tools"][0]["function"]["name"], "arguments": "{}"},
+                }],
+            }
+        payload = json.dumps({
+            "id": "chatcmpl-local",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": message}],
+            "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stand_in(name, delay=0.0, fail=False):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.name, server.delay, server.fail = name, delay, fail
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def local_client(server):
+    return OpenAIClient(
+        model_id="local-model",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        keep_history=False,
+        api_key="not-needed",
+        max_retries=0,
+    )
+
+
+class TestProviderSelector(unittest.TestCase):
+    """Exercise failover and latency routing against local stand-in servers"""
+
+    def setUp(self):
+        self.servers = []
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tracker = UsageTracker(
+            os.path.join(self.tmpdir.name, "usage.db"),
+            budgets={"U_CAPPED": 0},
+            downgrades={"local-model": "local-mini"},
+            flush_interval=0,
+        )
+        set_usage_tracker(self.tracker)
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+        set_usage_tracker(None)
+        self.tmpdir.cleanup()
+
+    def _server(self, name, **kwargs):
+        server = start_stand_in(name, **kwargs)
+        self.servers.append(server)
+        return server
+
+    def test_fails_over_and_cools_down(self):
+        broken = self._server("broken", fail=True)
+        healthy = self._server("healthy")
+        selector = ProviderSelector(
+            {"broken": local_client(broken), "healthy": local_client(healthy)},
+            max_consecutive_failures=2,
+        )
+
+        for _ in range(3):
+            response = selector.get_response("hello")
+            self.assertEqual(response.choices[0].message.content, "served by healthy")
+
+        stats = selector.get_stats()
+        self.assertEqual(stats["broken"]["requests"], 2)
+        self.assertTrue(stats["broken"]["cooling_down"])
+        self.assertEqual(stats["healthy"]["requests"], 3)
+
+    def test_tool_calls_keep_openai_shape(self):
+        selector = ProviderSelector({"local": local_client(self._server("local"))})
+        tools = [{"type": "function", "function": {"name": "calculate", "parameters": {"type": "object"}}}]
+        response = selector.get_response("2+2", tools=tools)
+        tool_call = response.choices[0].message.tool_calls[0]
+        self.assertEqual(tool_call.function.name, "calculate")
+        self.assertEqual(tool_call.id, "call_1")
+
+    def test_fastest_prefers_low_latency(self):
+        slow = self._server("slow", delay=0.05)
+        fast = self._server("fast")
+        selector = ProviderSelector({"slow": local_client(slow), "fast": local_client(fast)}, strategy="fastest")
+
+        # Seed latency samples for both providers
+        selector._record("slow", 0.05, ok=True)
+        selector._record("fast", 0.001, ok=True)
+
+        response = selector.get_response("hello")
+        self.assertEqual(response.choices[0].message.content, "served by fast")
+
+    def test_budget_downgrades_model(self):
+        selector = ProviderSelector({"local": local_client(self._server("local"))})
+        self.assertEqual(selector.get_response("hello").model, "local-model")
+        with usage_context(user_id="U_CAPPED"):
+            response = selector.get_response("hello")
+        self.assertEqual(response.model, "local-mini")
+        models = {row["model"] for row in self.tracker.query(group_by=["model"])}
+        self.assertEqual(models, {"local-model", "local-mini"})
+
+    def test_all_failed(self):
+        selector = ProviderSelector({"broken": local_client(self._server("broken", fail=True))})
+        with self.assertRaises(AllProvidersFailedError):
+            selector.get_response("hello")
+
+
+if __name__ == "__main__":
+    unittest.main()
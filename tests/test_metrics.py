@@ -0,0 +1,107 @@
+import sys
+import os
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from orchestrator import metrics
+from orchestrator.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics(unittest.TestCase):
+    """Test the Prometheus-style collectors and the /metrics endpoint"""
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_counter_sums_thread_shards(self):
+        counter = Counter("test_events_total", "Events", ["kind"], registry=self.registry)
+
+        def work():
+            for _ in range(1000):
+                counter.labels(kind="a").inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counter.labels(kind="a").get(), 8000)
+        self.assertIn('test_events_total{kind="a"} 8000', self.registry.render())
+
+    def test_dead_thread_shards_are_folded(self):
+        counter = Counter("test_churn_total", "Churn", registry=self.registry)
+        for _ in range(50):
+            thread = threading.Thread(target=counter.inc)
+            thread.start()
+            thread.join()
+
+        child = counter._unlabelled()
+        self.assertEqual(child.get(), 50)
+        self.assertLessEqual(len(child._values._shards), 1)
+
+    def test_histogram_buckets(self):
+        histogram = Histogram("test_seconds", "Latency", buckets=(0.1, 1.0), registry=self.registry)
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value)
+
+        output = self.registry.render()
+        self.assertIn('test_seconds_bucket{le="0.1"} 2', output)
+        self.assertIn('test_seconds_bucket{le="1"} 3', output)
+        self.assertIn('test_seconds_bucket{le="+Inf"} 4', output)
+        self.assertIn("test_seconds_count 4", output)
+        self.assertIn("test_seconds_sum 3.65", output)
+        self.assertIn("# TYPE test_seconds histogram", output)
+
+    def test_gauge_function(self):
+        queue = [1, 2, 3]
+        gauge = Gauge("test_depth", "Depth", ["queue"], registry=self.registry)
+        gauge.labels(queue="q").set_function(lambda: len(queue))
+        self.assertIn('test_depth{queue="q"} 3', self.registry.render())
+
+    def test_gauge_functions_from_several_owners_add_up(self):
+        gauge = Gauge("test_shared_depth", "Depth", ["queue"], registry=self.registry)
+        remove = gauge.labels(queue="q").add_function(lambda: 2)
+        gauge.labels(queue="q").add_function(lambda: 3)
+        self.assertEqual(gauge.labels(queue="q").get(), 5)
+        remove()
+        self.assertEqual(gauge.labels(queue="q").get(), 3)
+
+    def test_tool_error_results_count_as_errors(self):
+        from unittest.mock import MagicMock
+        from tools.tools import ToolCallingLayer
+
+        layer = ToolCallingLayer(llm_client=MagicMock(), slack_service=MagicMock(), linear_service=MagicMock(),
+                                 gcal_service=MagicMock())
+        errors = metrics.TOOL_CALLS.labels(tool="calculate", status="error")
+        before = errors.get()
+        layer._execute_tool("calculate", {"expression": "1 +"})
+        self.assertEqual(errors.get(), before + 1)
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("test_escaped_total", "Escaped", ["name"], registry=self.registry)
+        counter.labels(name='a"b').inc()
+        self.assertIn('test_escaped_total{name="a\\"b"} 1', self.registry.render())
+
+    def test_duplicate_registration_fails(self):
+        Counter("test_dup_total", "Dup", registry=self.registry)
+        with self.assertRaises(ValueError):
+            Counter("test_dup_total", "Dup", registry=self.registry)
+
+    def test_metrics_endpoint(self):
+        from server import app
+
+        metrics.TOOL_CALLS.labels(tool="calculate", status="ok").inc()
+        response = TestClient(app).get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn('iris_tool_calls_total{tool="calculate",status="ok"}', response.text)
+        self.assertIn("iris_ws_connections 0", response.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
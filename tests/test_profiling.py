@@ -0,0 +1,97 @@
+import sys
+import os
+import signal
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+
+from orchestrator import profiling
+
+
+def busy_worker(stop):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+class TestProfiling(unittest.TestCase):
+    """Test the sampling profiler, heap diffs and the admin hooks"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"IRIS_PROFILE_DIR": self.tmpdir.name, "IRIS_ADMIN_TOKEN": "secret"})
+        self.env.start()
+
+    def tearDown(self):
+        profiling.stop_heap_tracking()
+        self.env.stop()
+        self.tmpdir.cleanup()
+
+    def test_profile_writes_collapsed_stacks(self):
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_worker, args=(stop,), name="busy-worker")
+        worker.start()
+        try:
+            report = profiling.profile(seconds=0.2, interval=0.005)
+        finally:
+            stop.set()
+            worker.join()
+
+        self.assertGreater(report["samples"], 0)
+        with open(report["path"]) as f:
+            lines = f.read().splitlines()
+        self.assertTrue(any(line.startswith("busy-worker;") and "busy_worker" in line for line in lines))
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in lines))
+
+    def test_only_one_profile_at_a_time(self):
+        thread = threading.Thread(target=profiling.profile, kwargs={"seconds": 0.3})
+        thread.start()
+        time.sleep(0.05)
+        with self.assertRaises(profiling.ProfilerBusyError):
+            profiling.profile(seconds=0.1)
+        thread.join()
+
+    def test_heap_diff_reports_growth(self):
+        self.assertEqual(profiling.heap_diff()["status"], "started")
+        leak = [bytearray(1024) for _ in range(2000)]
+        report = profiling.heap_diff(top=5)
+        self.assertEqual(report["status"], "ok")
+        self.assertGreater(report["top"][0]["size_diff"], 1_000_000)
+        self.assertTrue(os.path.exists(report["path"]))
+        del leak
+
+    @unittest.skipUnless(hasattr(signal, "SIGUSR1"), "requires SIGUSR1")
+    def test_signal_triggers_profile(self):
+        previous = signal.getsignal(signal.SIGUSR1), signal.getsignal(signal.SIGUSR2)
+        try:
+            with patch.dict(os.environ, {"IRIS_PROFILE_SECONDS": "0.1"}):
+                self.assertTrue(profiling.install_signal_handlers())
+            os.kill(os.getpid(), signal.SIGUSR1)
+            deadline = time.time() + 5
+            while not os.listdir(self.tmpdir.name) and time.time() < deadline:
+                time.sleep(0.05)
+            self.assertTrue(any(name.endswith(".folded") for name in os.listdir(self.tmpdir.name)))
+        finally:
+            signal.signal(signal.SIGUSR1, previous[0])
+            signal.signal(signal.SIGUSR2, previous[1])
+
+    def test_admin_endpoints_require_token(self):
+        from server import app
+
+        client = TestClient(app)
+        self.assertEqual(client.post("/admin/profile", params={"seconds": 0.05}).status_code, 403)
+        response = client.post("/admin/profile", params={"seconds": 0.05}, headers={"X-Admin-Token": "secret"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["path"].endswith(".folded"))
+
+        with patch.dict(os.environ, {"IRIS_ADMIN_TOKEN": ""}):
+            self.assertEqual(client.post("/admin/heap").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import sys
+import os
+import asyncio
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiohttp import web
+from slack_sdk.errors import SlackApiError
+
+from tools.slack.async_service import AsyncEventDispatcher, AsyncSlackService
+
+
+class FakeSlackAPI:
+    """Minimal stand-in for the Slack Web API"""
+
+    def __init__(self):
+        self.calls = []
+        self.rate_limited = 0
+        self.app = web.Application()
+        self.app.router.add_route("*", "/api/{method}", self.handle)
+
+    async def handle(self, request):
+        method = request.match_info["method"]
+        params = dict(request.query)
+        if request.content_type == "application/json":
+            params.update(await request.json())
+        elif request.can_read_body:
+            params.update(await request.post())
+        self.calls.append((method, params))
+
+        if method == "users.list":
+            if self.rate_limited:
+                self.rate_limited -= 1
+                return web.json_response({"ok": False, "error": "ratelimited"}, status=429, headers={"Retry-After": "0"})
+            if params.get("cursor") == "page2":
+                members = [{"id": "U2", "profile": {"real_name": "Bob Smith"}}]
+                return web.json_response({"ok": True, "members": members, "response_metadata": {"next_cursor": ""}})
+            members = [{"id": "U1", "profile": {"display_name": "jane", "email": "jane@example.com"}}]
+            return web.json_response({"ok": True, "members": members, "response_metadata": {"next_cursor": "page2"}})
+        if method == "conversations.open":
+            return web.json_response({"ok": True, "channel": {"id": "D1"}})
+        if method == "chat.postMessage":
+            return web.json_response({"ok": True, "channel": params["channel"], "ts": f"{len(self.calls)}.0"})
+        return web.json_response({"ok": False, "error": "unknown_method"})
+
+
+class TestAsyncSlackService(unittest.IsolatedAsyncioTestCase):
+    """Test the asyncio Slack service against a local fake API"""
+
+    async def asyncSetUp(self):
+        self.api = FakeSlackAPI()
+        self.runner = web.AppRunner(self.api.app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+
+        self.service = AsyncSlackService(bot_token="xoxb-test")
+        self.service.client.base_url = f"http://127.0.0.1:{port}/api/"
+
+    async def asyncTearDown(self):
+        await self.service.close_connection()
+        await self.runner.cleanup()
+
+    async def test_concurrent_sends_share_one_session(self):
+        responses = await asyncio.gather(*(self.service.send_message("C1", f"msg {i}") for i in range(50)))
+        self.assertTrue(all(response["ok"] for response in responses))
+        self.assertIs(self.service.client.session, self.service.session)
+        self.assertEqual(len([call for call in self.api.calls if call[0] == "chat.postMessage"]), 50)
+
+    async def test_direct_message(self):
+        response = await self.service.send_direct_message("U1", "hello")
+        self.assertEqual(response["channel"], "D1")
+
+    async def test_lookups_use_paginated_directory(self):
+        self.assertEqual((await self.service.get_user_by_name("Bob Smith"))["id"], "U2")
+        self.assertEqual((await self.service.get_user_by_email("jane@example.com"))["id"], "U1")
+        self.assertEqual([method for method, _ in self.api.calls], ["users.list", "users.list"])
+
+    async def test_handle_event_orders_per_channel(self):
+        seen = []
+
+        async def callback(channel_id, user_id, text, event_data):
+            await asyncio.sleep(0.01 if text == "first" else 0)
+            seen.append((channel_id, text))
+
+        self.service.dispatcher = AsyncEventDispatcher(callback)
+        for channel, text in [("C1", "first"), ("C2", "other"), ("C1", "second")]:
+            await self.service.handle_event({"type": "message", "channel": channel, "user": "U1", "text": text}, callback)
+        await self.service.dispatcher.join()
+
+        self.assertEqual([text for channel, text in seen if channel == "C1"], ["first", "second"])
+        self.assertEqual(seen[0], ("C2", "other"))
+
+    async def test_rate_limit_retries_are_capped(self):
+        self.service.directory.max_rate_limit_retries = 2
+        self.api.rate_limited = 2
+        self.assertEqual(await self.service.load_directory(), 2)
+
+        self.api.rate_limited = 3
+        with self.assertRaises(SlackApiError):
+            await self.service.load_directory()
+        self.assertEqual(self.api.rate_limited, 0)
+
+    async def test_dispatcher_applies_backpressure(self):
+        release = asyncio.Event()
+        handled = []
+
+        async def callback(key):
+            await release.wait()
+            handled.append(key)
+
+        dispatcher = AsyncEventDispatcher(callback, concurrency=1, max_pending=2)
+        self.assertTrue(await dispatcher.submit("C1", "C1"))
+        self.assertTrue(await dispatcher.submit("C2", "C2"))
+        self.assertFalse(await dispatcher.submit("C3", "C3", timeout=0.05))
+        self.assertEqual(dispatcher.pending, 2)
+
+        release.set()
+        self.assertTrue(await dispatcher.join(1))
+        await dispatcher.stop()
+        self.assertEqual(handled, ["C1", "C2"])
+        self.assertFalse(await dispatcher.submit("C4", "C4"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slack_sdk.errors import SlackApiError
+
+from tools.slack.cache import SlackMetadataCache, TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test expiry, LRU eviction and single-flight loading"""
+
+    def test_expiry_and_negative_ttl(self):
+        cache = TTLCache("test", ttl=0.05, negative_ttl=10)
+        loader = MagicMock(side_effect=["a", "b"])
+        self.assertEqual(cache.get("k", loader), "a")
+        self.assertEqual(cache.get("k", loader), "a")
+        time.sleep(0.06)
+        self.assertEqual(cache.get("k", loader), "b")
+
+        missing = MagicMock(return_value=None)
+        self.assertIsNone(cache.get("gone", missing))
+        self.assertIsNone(cache.get("gone", missing))
+        missing.assert_called_once()
+
+    def test_lru_eviction(self):
+        cache = TTLCache("test", max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a", MagicMock())
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a", MagicMock()), 1)
+        self.assertEqual(cache.get("b", lambda: "reloaded"), "reloaded")
+
+    def test_concurrent_misses_share_one_load(self):
+        cache = TTLCache("test")
+        release = threading.Event()
+        calls = []
+
+        def loader():
+            calls.append(1)
+            release.wait(2)
+            return "value"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get("k", loader))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.05)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 8)
+
+    def test_errors_are_not_cached(self):
+        cache = TTLCache("test")
+        with self.assertRaises(RuntimeError):
+            cache.get("k", MagicMock(side_effect=RuntimeError("boom")))
+        self.assertEqual(cache.get("k", lambda: "ok"), "ok")
+
+
+class TestSlackMetadataCache(unittest.TestCase):
+    """Test users.info / conversations.info caching and invalidation"""
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.users_info.return_value = {"user": {"id": "U1", "real_name": "Jane"}}
+        self.client.conversations_info.return_value = {"channel": {"id": "C1", "name": "general", "is_im": False}}
+        self.cache = SlackMetadataCache(self.client)
+
+    def test_lookups_hit_api_once(self):
+        for _ in range(3):
+            self.assertEqual(self.cache.get_user("U1")["real_name"], "Jane")
+            self.assertEqual(self.cache.get_channel("C1")["name"], "general")
+        self.client.users_info.assert_called_once_with(user="U1")
+        self.client.conversations_info.assert_called_once_with(channel="C1")
+
+    def test_unknown_ids_are_negative_cached(self):
+        self.client.users_info.side_effect = SlackApiError("not found", {"ok": False, "error": "user_not_found"})
+        self.assertIsNone(self.cache.get_user("U404"))
+        self.assertIsNone(self.cache.get_user("U404"))
+        self.client.users_info.assert_called_once()
+
+    def test_events_refresh_entries(self):
+        self.cache.get_channel("C1")
+        self.cache.handle_channel_event({"type": "channel_rename", "channel": {"id": "C1", "name": "renamed"}})
+        self.client.conversations_info.return_value = {"channel": {"id": "C1", "name": "renamed", "is_im": False}}
+        self.assertEqual(self.cache.get_channel("C1")["name"], "renamed")
+
+        self.cache.handle_user_event({"type": "user_change", "user": {"id": "U1", "real_name": "Jane Roe"}})
+        self.assertEqual(self.cache.get_user("U1")["real_name"], "Jane Roe")
+        self.client.users_info.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import sys
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.slack.dedup import EventDeduplicator, event_keys
+from tools.slack.service import SlackService
+
+
+class TestEventDeduplicator(unittest.TestCase):
+    """Test the ring-buffer de-dup set"""
+
+    def test_duplicates_within_window(self):
+        dedup = EventDeduplicator(capacity=16, window=60)
+        self.assertTrue(dedup.check("id:Ev1"))
+        self.assertFalse(dedup.check("id:Ev1"))
+        self.assertTrue(dedup.check("id:Ev2"))
+
+    def test_any_matching_key_is_a_duplicate(self):
+        dedup = EventDeduplicator(capacity=16, window=60)
+        message = {"type": "message", "client_msg_id": "abc", "channel": "C1", "ts": "1.0"}
+        self.assertTrue(dedup.check(*event_keys(message, "Ev1")))
+        # Same message replayed after a reconnect under a new envelope id
+        self.assertFalse(dedup.check(*event_keys(message, "Ev2")))
+        # The app_mention for the same message is a different event
+        self.assertTrue(dedup.check(*event_keys(dict(message, type="app_mention"), "Ev3")))
+
+    def test_window_expiry(self):
+        dedup = EventDeduplicator(capacity=16, window=0.05)
+        self.assertTrue(dedup.check("k"))
+        time.sleep(0.06)
+        self.assertTrue(dedup.check("k"))
+
+    def test_capacity_is_fixed(self):
+        dedup = EventDeduplicator(capacity=4, window=60)
+        for i in range(10):
+            dedup.check(f"k{i}")
+        self.assertEqual(len(dedup), 4)
+        self.assertTrue(dedup.check("k0"))
+        self.assertFalse(dedup.check("k9"))
+
+    def test_persists_across_restarts(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "dedup.bin")
+            dedup = EventDeduplicator(capacity=8, window=60, path=path)
+            dedup.check("id:Ev1")
+            dedup.flush()
+
+            restarted = EventDeduplicator(capacity=4, window=60, path=path)
+            self.assertFalse(restarted.check("id:Ev1"))
+            self.assertTrue(restarted.check("id:Ev2"))
+
+    def test_index_survives_heavy_eviction(self):
+        dedup = EventDeduplicator(capacity=5, window=60)
+        recent = []
+        for i in range(500):
+            key = f"k{(i * 7) % 13}"
+            self.assertEqual(dedup.check(key), key not in recent)
+            if key not in recent:
+                recent = (recent + [key])[-5:]
+            self.assertEqual(len(dedup), len(recent))
+        self.assertEqual(len(dedup._table), 16)
+
+    def test_saves_off_the_calling_thread(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "dedup.bin")
+            dedup = EventDeduplicator(capacity=8, window=60, path=path, save_interval=0)
+            writers = []
+            write = dedup._write
+            dedup._write = lambda *args: (writers.append(threading.current_thread()), write(*args))
+
+            dedup.check("id:Ev1")
+            for _ in range(100):
+                if os.path.exists(path):
+                    break
+                time.sleep(0.01)
+            self.assertTrue(os.path.exists(path))
+            self.assertIsNot(writers[0], threading.current_thread())
+
+            dedup.check("id:Ev2")
+            dedup.flush()
+            self.assertFalse(EventDeduplicator(capacity=8, window=60, path=path).check("id:Ev2"))
+
+    def test_service_drops_redelivered_messages(self):
+        service = SlackService(bot_token="xoxb-test")
+        callback = MagicMock()
+        event = {"type": "message", "channel": "C1", "user": "U1", "text": "create an issue", "ts": "1.0"}
+
+        service.handle_event(event, callback, "Ev1")
+        service.handle_event(dict(event), callback, "Ev1")
+        service.handle_event(dict(event), callback, "Ev2")
+
+        callback.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.slack.directory import SlackUserDirectory
+from tools.slack.service import SlackService
+
+
+def make_user(user_id, display_name, real_name, email=None, deleted=False):
+    return {
+        "id": user_id,
+        "name": display_name.lower().replace(" ", "."),
+        "deleted": deleted,
+        "profile": {"display_name": display_name, "real_name": real_name, "email": email},
+    }
+
+
+class TestSlackUserDirectory(unittest.TestCase):
+    """Test the paginated user directory and its indexes"""
+
+    def setUp(self):
+        self.client = MagicMock()
+        self.client.users_list.side_effect = [
+            {"members": [make_user("U1", "jane", "Jane Doe", "Jane@Example.com")],
+             "response_metadata": {"next_cursor": "page2"}},
+            {"members": [make_user("U2", "bob", "Bob Smith", "bob@example.com"),
+                         make_user("U3", "jane", "Old Jane", deleted=True)],
+             "response_metadata": {"next_cursor": ""}},
+        ]
+        self.directory = SlackUserDirectory(self.client, page_size=1)
+
+    def test_load_follows_cursors(self):
+        self.assertEqual(self.directory.load(), 3)
+        self.assertEqual(self.client.users_list.call_count, 2)
+        self.assertEqual(self.client.users_list.call_args.kwargs["cursor"], "page2")
+        self.assertEqual(self.directory.find_by_name("Bob Smith")["id"], "U2")
+
+    def test_lookups_are_normalized(self):
+        self.directory.load()
+        self.assertEqual(self.directory.find_by_name("@JANE")["id"], "U1")
+        self.assertEqual(self.directory.find_by_name("  jane   doe ")["id"], "U1")
+        self.assertEqual(self.directory.find_by_email("jane@example.com")["id"], "U1")
+        self.assertEqual(self.directory.get("U3")["profile"]["real_name"], "Old Jane")
+        self.assertIsNone(self.directory.find_by_name("Old Jane"))
+
+    def test_user_change_reindexes(self):
+        self.directory.load()
+        self.directory.handle_event({"type": "user_change", "user": make_user("U1", "jd", "Jane Roe", "jane@new.com")})
+
+        self.assertIsNone(self.directory.find_by_name("Jane Doe"))
+        self.assertIsNone(self.directory.find_by_email("jane@example.com"))
+        self.assertEqual(self.directory.find_by_name("jane roe")["id"], "U1")
+        self.assertEqual(self.directory.find_by_email("jane@new.com")["id"], "U1")
+        self.assertEqual(len(self.directory), 3)
+
+    def test_shared_names_survive_a_rename(self):
+        self.directory.replace([make_user("U1", "sam", "Sam Lee"), make_user("U2", "sam", "Sam Park")])
+        self.assertEqual(self.directory.find_by_name("sam")["id"], "U1")
+
+        self.directory.upsert(make_user("U1", "samuel", "Samuel Lee"))
+        self.assertEqual(self.directory.find_by_name("sam")["id"], "U2")
+        self.assertEqual(self.directory.find_by_name("samuel")["id"], "U1")
+
+    def test_service_lookups_use_directory(self):
+        service = SlackService(bot_token="xoxb-test")
+        service.client = self.client
+        service.directory.client = self.client
+
+        self.assertEqual(service.get_user_by_name("jane")["id"], "U1")
+        self.assertEqual(service.get_user_by_name("bob")["id"], "U2")
+        self.assertEqual(service.get_user_by_email("BOB@example.com")["id"], "U2")
+        self.assertEqual(self.client.users_list.call_count, 2)
+        self.client.users_lookupByEmail.assert_not_called()
+
+        service._dispatch_event({"type": "team_join", "user": make_user("U4", "new", "New Person")})
+        self.assertEqual(service.get_user_by_name("new person")["id"], "U4")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.slack.dispatcher import EventDispatcher, KeyedQueue, event_key
+from tools.slack.service import SlackService
+
+
+class TestEventDispatcher(unittest.TestCase):
+    """Test per-key ordering, parallelism and backpressure"""
+
+    def test_same_key_runs_in_order(self):
+        seen = []
+        lock = threading.Lock()
+
+        def handler(key, i):
+            time.sleep(0.001 * (i % 3))
+            with lock:
+                seen.append((key, i))
+
+        dispatcher = EventDispatcher(handler, workers=4)
+        for i in range(30):
+            for key in ("C1", "C2", "C3"):
+                dispatcher.submit(key, key, i)
+        self.assertTrue(dispatcher.join(5))
+        dispatcher.stop()
+
+        for key in ("C1", "C2", "C3"):
+            self.assertEqual([i for k, i in seen if k == key], list(range(30)))
+
+    def test_different_keys_run_in_parallel(self):
+        barrier = threading.Barrier(3, timeout=2)
+        dispatcher = EventDispatcher(lambda: barrier.wait(), workers=3)
+        for key in ("C1", "C2", "C3"):
+            dispatcher.submit(key)
+        self.assertTrue(dispatcher.join(3))
+        self.assertFalse(barrier.broken)
+        dispatcher.stop()
+
+    def test_full_queue_pushes_back(self):
+        release = threading.Event()
+        dispatcher = EventDispatcher(lambda: release.wait(2), workers=1, max_pending=2)
+        self.assertTrue(dispatcher.submit("C1"))
+        self.assertTrue(dispatcher.submit("C1"))
+        self.assertFalse(dispatcher.submit("C1", timeout=0.05))
+        release.set()
+        dispatcher.stop()
+        self.assertEqual(dispatcher.pending, 0)
+
+    def test_handler_errors_do_not_stop_workers(self):
+        results = []
+
+        def handler(i):
+            if i == 0:
+                raise RuntimeError("boom")
+            results.append(i)
+
+        dispatcher = EventDispatcher(handler, workers=1)
+        dispatcher.submit("C1", 0)
+        dispatcher.submit("C1", 1)
+        dispatcher.stop()
+        self.assertEqual(results, [1])
+
+    def test_keyed_queue_takes_turns_one_event_per_key(self):
+        events = KeyedQueue()
+        for key, value in [("a", 1), ("a", 2), ("b", 3)]:
+            events.put(key, (value,))
+
+        key, (_, args) = events.pop()
+        self.assertEqual((key, args), ("a", (1,)))
+        # "a" is busy until done(), so "b" is next
+        self.assertEqual(events.pop()[0], "b")
+        self.assertFalse(events)
+        self.assertTrue(events.done("a"))
+        self.assertEqual(events.pop()[1][1], (2,))
+        self.assertFalse(events.done("b"))
+        self.assertFalse(events.done("a"))
+        self.assertEqual(events.pending, 0)
+
+    def test_event_key(self):
+        self.assertEqual(event_key("C1", {"ts": "1.0"}), "C1")
+        self.assertEqual(event_key("C1", {"ts": "1.0", "thread_ts": "1.0"}), "C1")
+        self.assertEqual(event_key("C1", {"ts": "2.0", "thread_ts": "1.0"}), "C1:1.0")
+
+    def test_service_hands_messages_to_dispatcher(self):
+        service = SlackService(bot_token="xoxb-test")
+        callback = MagicMock()
+        service.dispatcher = EventDispatcher(callback, workers=2)
+
+        service.handle_event({"type": "message", "channel": "C1", "user": "U1", "text": "hi", "ts": "1.0"}, callback)
+        service.handle_event({"type": "message", "subtype": "bot_message", "channel": "C1", "text": "bot"}, callback)
+        service.dispatcher.stop()
+
+        callback.assert_called_once()
+        self.assertEqual(callback.call_args.args[:3], ("C1", "U1", "hi"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slack_sdk.errors import SlackApiError
+
+from tools.slack.dm_channels import DMChannelMap
+from tools.slack.outbox import SlackOutbox
+from tools.slack.service import SlackService
+
+
+class TestDMChannelMap(unittest.TestCase):
+    """Test DM channel caching, warming and bulk fan-out"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "dms.json")
+        self.client = MagicMock()
+        self.client.conversations_open.side_effect = lambda users: {"channel": {"id": f"D-{users}"}}
+        self.client.conversations_list.side_effect = [
+            {"channels": [{"id": "D1", "user": "U1"}], "response_metadata": {"next_cursor": "next"}},
+            {"channels": [{"id": "D2", "user": "U2"}], "response_metadata": {"next_cursor": ""}},
+        ]
+        self.client.chat_postMessage.side_effect = lambda channel, **kwargs: {"ok": True, "ts": f"ts-{channel}"}
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_opens_once_and_persists(self):
+        dms = DMChannelMap(self.client, path=self.path)
+        self.assertEqual(dms.get("U9"), "D-U9")
+        self.assertEqual(dms.get("U9"), "D-U9")
+        self.client.conversations_open.assert_called_once()
+
+        reloaded = DMChannelMap(self.client, path=self.path)
+        self.assertEqual(reloaded.get("U9"), "D-U9")
+        self.client.conversations_open.assert_called_once()
+
+    def test_warm_pages_through_ims(self):
+        dms = DMChannelMap(self.client, path=self.path)
+        self.assertEqual(dms.warm(), 2)
+        self.assertEqual(self.client.conversations_list.call_args.kwargs["types"], "im")
+        self.assertEqual(dms.get_many(["U1", "U2"]), {"U1": "D1", "U2": "D2"})
+        self.client.conversations_open.assert_not_called()
+
+    def test_bulk_direct_messages(self):
+        with patch.dict(os.environ, {"IRIS_SLACK_DM_FILE": self.path}):
+            service = SlackService(bot_token="xoxb-test")
+        service.client = self.client
+        service.dm_channels.client = self.client
+        service.outbox = SlackOutbox(self.client.chat_postMessage, rate=100, coalesce_window=0)
+
+        user_ids = [f"U{i}" for i in range(1, 13)]
+        results = service.send_direct_messages(user_ids, "Standup in 5 minutes", timeout=5)
+        service.close_connection()
+
+        self.assertEqual(results["U1"], "ts-D1")
+        self.assertEqual(results["U12"], "ts-D-U12")
+        # Warmed once, then opened only the users without an existing DM
+        self.assertEqual(self.client.conversations_list.call_count, 2)
+        self.assertEqual(self.client.conversations_open.call_count, 10)
+        self.assertEqual(self.client.chat_postMessage.call_count, 12)
+
+    def test_stale_channel_is_reopened(self):
+        with patch.dict(os.environ, {"IRIS_SLACK_DM_FILE": self.path}):
+            service = SlackService(bot_token="xoxb-test")
+        service.client = self.client
+        service.dm_channels.client = self.client
+        service.dm_channels.handle_event({"type": "im_created", "user": "U1", "channel": {"id": "D-old"}})
+
+        stale = SlackApiError("channel_not_found", {"ok": False, "error": "channel_not_found"})
+        self.client.chat_postMessage.side_effect = [stale, {"ok": True, "ts": "1.0"}]
+        self.assertEqual(service.send_direct_message("U1", "hi")["ts"], "1.0")
+        self.assertEqual(self.client.chat_postMessage.call_args.kwargs["channel"], "D-U1")
+
+
+if __name__ == "__main__":
+    unittest.main()
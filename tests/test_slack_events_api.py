@@ -0,0 +1,88 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import server
+from tools.slack.replay import envelope, sign_request
+from tools.slack.workspaces import WorkspaceRegistry
+
+
+class TestSlackEventsEndpoint(unittest.TestCase):
+    """Test HTTP Events API ingestion into the shared dispatcher"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {
+            "SLACK_SIGNING_SECRET": "shh", "IRIS_DATA_DIR": self.tmp.name, "IRIS_SLACK_DEDUP_FILE": "",
+        })
+        self.env.start()
+        self.received = []
+        self.done = threading.Event()
+
+        def callback(workspace, channel_id, user_id, text, event_data):
+            self.received.append((workspace, channel_id, text))
+            self.done.set()
+
+        self.registry = WorkspaceRegistry(workers=2)
+        self.registry.add("acme", bot_token="xoxb-acme", team_id="T1")
+        self.registry.add("globex", bot_token="xoxb-globex", team_id="T2")
+        self.registry.start(callback)
+        self.patch = patch.object(server, "slack_registry", self.registry)
+        self.patch.start()
+        self.client = TestClient(server.app)
+
+    def tearDown(self):
+        self.patch.stop()
+        self.registry.close()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def post(self, payload, secret="shh", timestamp=None):
+        body = json.dumps(payload)
+        return self.client.post("/slack/events", content=body, headers=sign_request(secret, body, timestamp))
+
+    def test_url_verification(self):
+        response = self.post({"type": "url_verification", "challenge": "abc"})
+        self.assertEqual(response.json(), {"challenge": "abc"})
+
+    def test_rejects_bad_signatures(self):
+        event = envelope({"type": "message", "channel": "C1", "user": "U1", "text": "hi", "ts": "1.0"}, team_id="T1")
+        self.assertEqual(self.post(event, secret="wrong").status_code, 403)
+        self.assertEqual(self.post(event, timestamp=int(time.time()) - 3600).status_code, 403)
+
+        body = json.dumps(event)
+        headers = dict(sign_request("shh", body), **{"X-Slack-Request-Timestamp": "yesterday"})
+        self.assertEqual(self.client.post("/slack/events", content=body, headers=headers).status_code, 403)
+        self.assertEqual(self.client.post("/slack/events", content=body).status_code, 403)
+        with patch.dict(os.environ, {"SLACK_SIGNING_SECRET": ""}):
+            self.assertEqual(self.post(event).status_code, 404)
+        self.assertEqual(self.received, [])
+
+    def test_events_reach_the_dispatcher_once(self):
+        event = envelope({"type": "message", "channel": "C1", "user": "U1", "text": "hi", "ts": "1.0"},
+                         team_id="T2", event_id="Ev1")
+        self.assertEqual(self.post(event).status_code, 200)
+        # A Slack retry of the same event is acknowledged but dropped
+        self.assertEqual(self.post(event).status_code, 200)
+        self.assertTrue(self.done.wait(2))
+        self.registry.dispatcher.join(2)
+        self.assertEqual(self.received, [("globex", "C1", "hi")])
+
+    def test_unknown_team_is_dropped(self):
+        event = envelope({"type": "message", "channel": "C1", "user": "U1", "text": "hi", "ts": "1.0"}, team_id="T9")
+        self.assertEqual(self.post(event).status_code, 200)
+        self.registry.dispatcher.join(2)
+        self.assertEqual(self.received, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -102,8 +102,8 @@ class TestSlackMem0Integration(unittest.TestCase):
         self.assertTrue(len(results) > 0)
         console.print(f"[green]✓[/green] Found {len(results)} memories matching the query")
     
-    @patch('tools.slack.service.SlackService')
-    @patch('orchestrator.mem0_integration.Mem0Memory')
+    @patch('orchestrator.memory.slack_mem0_adapter.SlackService')
+    @patch('orchestrator.memory.slack_mem0_adapter.Mem0Memory')
     def test_slack_mem0_adapter_process_message(self, mock_mem0, mock_slack):
         """Test the SlackMem0Adapter's message processing with mocks"""
         # Set up mocks
@@ -114,20 +114,16 @@ class TestSlackMem0Integration(unittest.TestCase):
         mock_slack.return_value = mock_slack_instance
         
         # Mock user and channel info
-        mock_slack_instance.client.users_info.return_value = {
-            "user": {
-                "real_name": "Test User",
-                "profile": {
-                    "email": "test@example.com"
-                }
+        mock_slack_instance.metadata.get_user.return_value = {
+            "real_name": "Test User",
+            "profile": {
+                "email": "test@example.com"
             }
         }
         
-        mock_slack_instance.client.conversations_info.return_value = {
-            "channel": {
-                "name": "test-channel",
-                "is_im": False
-            }
+        mock_slack_instance.metadata.get_channel.return_value = {
+            "name": "test-channel",
+            "is_im": False
         }
         
         # Create adapter with mocks
@@ -145,6 +141,9 @@ class TestSlackMem0Integration(unittest.TestCase):
         
         # Verify that add_memory was called
         mock_mem0_instance.add_memory.assert_called_once()
+        metadata = mock_mem0_instance.add_memory.call_args.kwargs["metadata"]
+        self.assertEqual(metadata["user_name"], "Test User")
+        self.assertEqual(metadata["channel_name"], "test-channel")
         console.print("[green]✓[/green] SlackMem0Adapter successfully processed message")
 
 class SlackMem0Monitor:
@@ -0,0 +1,125 @@
+import sys
+import os
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+
+from tools.slack.outbox import SlackOutbox, TokenBucket
+from tools.slack.service import SlackService
+
+
+def rate_limited(retry_after="0.05"):
+    response = SlackResponse(
+        client=None, http_verb="POST", api_url="chat.postMessage", req_args={},
+        data={"ok": False, "error": "ratelimited"}, headers={"Retry-After": retry_after}, status_code=429,
+    )
+    return SlackApiError("ratelimited", response)
+
+
+class FakeSlack:
+    def __init__(self, failures=None):
+        self.posts = []
+        self.failures = list(failures or [])
+        self.lock = threading.Lock()
+
+    def chat_postMessage(self, channel, text, blocks=None, thread_ts=None):
+        with self.lock:
+            if self.failures:
+                raise self.failures.pop(0)
+            self.posts.append((time.monotonic(), channel, thread_ts, text))
+            return {"ok": True, "ts": f"{len(self.posts)}.000"}
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.assertTrue(bucket.consume())
+        self.assertTrue(bucket.consume())
+        self.assertFalse(bucket.consume())
+        self.assertAlmostEqual(bucket.delay(), 0.1, delta=0.02)
+
+    def test_pause(self):
+        bucket = TokenBucket(rate=1000, capacity=5)
+        bucket.pause(0.05)
+        self.assertFalse(bucket.consume())
+        self.assertTrue(bucket.acquire(timeout=1))
+
+
+class TestSlackOutbox(unittest.TestCase):
+    """Test pacing, coalescing and Retry-After handling"""
+
+    def test_coalesces_messages_within_window(self):
+        slack = FakeSlack()
+        outbox = SlackOutbox(slack.chat_postMessage, rate=100, burst=1, coalesce_window=0.05)
+        futures = [outbox.enqueue("C1", f"line {i}") for i in range(5)]
+        other = outbox.enqueue("C1", "in thread", thread_ts="1.0")
+
+        self.assertEqual({future.result(timeout=2) for future in futures}, {futures[0].result()})
+        self.assertNotEqual(other.result(timeout=2), futures[0].result())
+        outbox.close()
+
+        texts = {thread_ts: text for _, _, thread_ts, text in slack.posts}
+        self.assertEqual(texts[None], "\n".join(f"line {i}" for i in range(5)))
+        self.assertEqual(len(slack.posts), 2)
+
+    def test_paces_each_channel(self):
+        slack = FakeSlack()
+        outbox = SlackOutbox(slack.chat_postMessage, rate=20, burst=1, coalesce_window=0)
+        futures = []
+        for i in range(4):
+            futures.append(outbox.enqueue("C1", "x" * 3000))
+            futures.append(outbox.enqueue("C2", "y" * 3000))
+        for future in futures:
+            future.result(timeout=5)
+        outbox.close()
+
+        c1 = [at for at, channel, _, _ in slack.posts if channel == "C1"]
+        self.assertEqual(len(c1), 4)
+        self.assertTrue(all(b - a >= 0.04 for a, b in zip(c1, c1[1:])))
+
+    def test_retries_after_rate_limit(self):
+        slack = FakeSlack(failures=[rate_limited(), rate_limited()])
+        outbox = SlackOutbox(slack.chat_postMessage, rate=100, coalesce_window=0)
+        self.assertEqual(outbox.enqueue("C1", "hello").result(timeout=5), "1.000")
+        outbox.close()
+
+    def test_gives_up_on_other_errors(self):
+        response = rate_limited().response
+        response.data = {"ok": False, "error": "channel_not_found"}
+        slack = FakeSlack(failures=[SlackApiError("channel_not_found", response)])
+        outbox = SlackOutbox(slack.chat_postMessage, coalesce_window=0)
+        with self.assertRaises(SlackApiError):
+            outbox.enqueue("C404", "hello").result(timeout=5)
+        outbox.close()
+
+    def test_close_delivers_queued_messages(self):
+        slack = FakeSlack()
+        outbox = SlackOutbox(slack.chat_postMessage, rate=100, coalesce_window=10)
+        future = outbox.enqueue("C1", "bye")
+        outbox.close()
+        self.assertTrue(future.done())
+        with self.assertRaises(RuntimeError):
+            outbox.enqueue("C1", "late")
+
+    def test_service_creates_one_outbox_under_concurrency(self):
+        service = SlackService(bot_token="xoxb-test")
+        slack = FakeSlack()
+        service.client.chat_postMessage = slack.chat_postMessage
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            outboxes = set(pool.map(lambda i: service._get_outbox(), range(64)))
+        self.assertEqual(len(outboxes), 1)
+
+        service.enqueue_message("C1", "hello").result(timeout=5)
+        service.close_connection()
+        self.assertIsNone(service.outbox)
+        self.assertEqual(len(slack.posts), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import sys
+import os
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.slack.socket_pool import SocketModePool
+from tools.slack.service import SlackService
+
+
+class FakeSocketClient:
+    """Just enough of SocketModeClient for the pool"""
+
+    def __init__(self, fail=False):
+        self.socket_mode_request_listeners = []
+        self.fail = fail
+        self.connected = False
+        self.connects = 0
+        self.reconnects = 0
+        self.closed = False
+
+    def connect(self):
+        self.connects += 1
+        if self.fail:
+            raise ConnectionError("connect failed")
+        self.connected = True
+
+    def connect_to_new_endpoint(self):
+        self.reconnects += 1
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+    def close(self):
+        self.closed = True
+        self.connected = False
+
+    def deliver(self, req):
+        for listener in self.socket_mode_request_listeners:
+            listener(self, req)
+
+
+class TestSocketModePool(unittest.TestCase):
+    """Test staggered connects, health checks and failover"""
+
+    def make_pool(self, size=3, factory=None):
+        self.created = []
+
+        def new_client():
+            client = factory() if factory else FakeSocketClient()
+            self.created.append(client)
+            return client
+
+        self.listener = MagicMock()
+        return SocketModePool(new_client, [self.listener], size=size, stagger=5, health_interval=10)
+
+    def test_sockets_open_staggered(self):
+        pool = self.make_pool()
+        pool.start()
+        pool._stop.set()
+        self.assertEqual(pool.connected(), 1)
+
+        start = pool._last_attempt
+        self.assertEqual(pool.check(start + 1), 1)
+        self.assertEqual(pool.check(start + 5), 2)
+        self.assertEqual(pool.check(start + 6), 2)
+        self.assertEqual(pool.check(start + 10), 3)
+        pool.close()
+        self.assertTrue(all(client.closed for client in self.created))
+
+    def test_every_socket_feeds_the_listeners(self):
+        pool = self.make_pool(size=2)
+        pool.start()
+        pool._stop.set()
+        pool.check(pool._last_attempt + 5)
+        for i, client in enumerate(self.created):
+            client.deliver(f"req{i}")
+        self.assertEqual([call.args[1] for call in self.listener.call_args_list], ["req0", "req1"])
+        pool.close()
+
+    def test_dropped_socket_is_reconnected_after_grace(self):
+        pool = self.make_pool(size=2)
+        pool.start()
+        pool._stop.set()
+        start = pool._last_attempt
+        pool.check(start + 5)
+        dropped = self.created[0]
+        dropped.connected = False
+
+        self.assertEqual(pool.check(start + 20), 1)
+        self.assertEqual(dropped.reconnects, 0)
+        self.assertEqual(pool.check(start + 30), 2)
+        self.assertEqual(dropped.reconnects, 1)
+        pool.close()
+
+    def test_failed_connects_back_off(self):
+        pool = self.make_pool(size=2, factory=lambda: FakeSocketClient(fail=len(self.created) > 0))
+        pool.start()
+        pool._stop.set()
+        start = pool._last_attempt
+        pool.check(start + 5)
+        self.assertEqual(pool.connections[1].failures, 1)
+        # Backoff is stagger * 2 ** failures
+        pool.check(start + 10)
+        self.assertEqual(pool.connections[1].failures, 1)
+        pool.connections[1].client.fail = False
+        self.assertEqual(pool.check(start + 15), 2)
+        pool.close()
+
+    def test_first_connect_failure_raises(self):
+        pool = self.make_pool(factory=lambda: FakeSocketClient(fail=True))
+        with self.assertRaises(ConnectionError):
+            pool.start()
+
+    def test_service_routes_every_socket_through_dedup(self):
+        service = SlackService(bot_token="xoxb-test")
+        service.socket_client = FakeSocketClient()
+        service.directory.load = MagicMock()
+        service.dm_channels.warm = MagicMock()
+        callback = MagicMock()
+
+        with patch("tools.slack.service.SocketModeClient", side_effect=lambda **kwargs: FakeSocketClient()):
+            service.listen_for_messages(callback, workers=0, connections=2)
+            service.socket_pool._stop.set()
+            service.socket_pool.check(service.socket_pool._last_attempt + 60)
+        clients = service.socket_pool.clients
+        self.assertEqual(len(clients), 2)
+
+        # The same event arriving on both sockets is handled once
+        for client in clients:
+            client.send_socket_mode_response = MagicMock()
+            req = MagicMock(type="events_api", envelope_id="E1", payload={
+                "event_id": "Ev1",
+                "event": {"type": "message", "channel": "C1", "user": "U1", "text": "hi", "ts": "1.0"},
+            })
+            client.deliver(req)
+            client.send_socket_mode_response.assert_called_once()
+        callback.assert_called_once()
+        service.close_connection()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+import sys
+import os
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock, patch
+
+import requests
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.slack.uploads import FileUpload, SlackFileUploader
+
+
+class UploadTarget(BaseHTTPRequestHandler):
+    """Stands in for Slack's upload URL, reading the body the way a server would"""
+
+    received = {}
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        data = self.rfile.read(length)
+        UploadTarget.received[self.path] = data
+        self.send_response(200)
+        self.end_headers()
+        self.wfile.write(b"OK")
+
+    def log_message(self, *args):
+        pass
+
+
+class FakeSlackFiles:
+    """files.getUploadURLExternal / files.completeUploadExternal"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.requested = []
+        self.completed = []
+        self.lock = threading.Lock()
+
+    def files_getUploadURLExternal(self, filename, length, **kwargs):
+        with self.lock:
+            self.requested.append((filename, length))
+            file_id = f"F{len(self.requested)}"
+        return {"ok": True, "upload_url": f"{self.base_url}/{file_id}", "file_id": file_id}
+
+    def files_completeUploadExternal(self, files, **kwargs):
+        self.completed.append((files, kwargs))
+        return {"ok": True, "files": [{"id": f["id"], "name": f["title"]} for f in files]}
+
+
+class TestSlackFileUploader(unittest.TestCase):
+    """Test chunked v2 uploads"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), UploadTarget)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        UploadTarget.received.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = FakeSlackFiles(self.base_url)
+        self.uploader = SlackFileUploader(self.client, chunk_size=64 * 1024, workers=3)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, size):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(os.urandom(size))
+        return path
+
+    def test_streams_a_file_in_chunks(self):
+        path = self.write("report.csv", 1024 * 1024 + 17)
+        progress = []
+        uploaded = self.uploader.upload(path, "C1", progress=lambda name, sent, total: progress.append((sent, total)))
+
+        self.assertEqual(uploaded["id"], "F1")
+        with open(path, "rb") as f:
+            self.assertEqual(UploadTarget.received["/F1"], f.read())
+        self.assertEqual(self.client.requested, [("report.csv", 1024 * 1024 + 17)])
+        self.assertEqual(len(progress), 17)
+        self.assertEqual(progress[-1], (1024 * 1024 + 17, 1024 * 1024 + 17))
+        self.assertTrue(all(b - a <= 64 * 1024 for (a, _), (b, _) in zip([(0, 0)] + progress, progress)))
+        self.assertEqual(self.client.completed[0][1], {"channel_id": "C1"})
+
+    def test_generators_are_streamed_or_spooled(self):
+        chunks = [b"a" * 1000, b"b" * 500]
+        self.uploader.upload((chunk for chunk in chunks), "C1", filename="gen.txt", length=1500)
+        self.uploader.upload((chunk for chunk in chunks), "C1", filename="spooled.txt")
+        self.assertEqual(self.client.requested, [("gen.txt", 1500), ("spooled.txt", 1500)])
+        self.assertEqual(UploadTarget.received["/F1"], b"".join(chunks))
+        self.assertEqual(UploadTarget.received["/F2"], b"".join(chunks))
+
+    def test_parallel_uploads_share_once(self):
+        paths = [self.write(f"part{i}.bin", 100_000 + i) for i in range(5)]
+        files = self.uploader.upload_many([FileUpload(path) for path in paths], "C1", initial_comment="exports")
+
+        self.assertEqual(len(self.client.completed), 1)
+        shared, kwargs = self.client.completed[0]
+        self.assertEqual(kwargs["initial_comment"], "exports")
+        self.assertEqual([f["title"] for f in shared], [f"part{i}.bin" for i in range(5)])
+        self.assertEqual([f["name"] for f in files], [f"part{i}.bin" for i in range(5)])
+        self.assertEqual(sorted(len(data) for data in UploadTarget.received.values()), [100_000 + i for i in range(5)])
+
+    def test_failed_post_is_retried_from_the_start(self):
+        path = self.write("retry.bin", 200_000)
+        session = requests.Session()
+        real_post = session.post
+        calls = []
+
+        def flaky_post(url, data=None, **kwargs):
+            calls.append(url)
+            if len(calls) == 1:
+                next(iter(data))
+                raise requests.ConnectionError("reset")
+            return real_post(url, data=data, **kwargs)
+
+        session.post = flaky_post
+        uploader = SlackFileUploader(self.client, chunk_size=64 * 1024, session=session)
+        with patch("tools.slack.uploads.time.sleep"):
+            uploader.upload(path, "C1")
+        self.assertEqual(len(calls), 2)
+        with open(path, "rb") as f:
+            self.assertEqual(UploadTarget.received["/F1"], f.read())
+
+    def test_upload_tool_stays_in_exports_dir(self):
+        from tools.tools import ToolCallingLayer
+
+        slack = MagicMock()
+        slack.upload_file.return_value = {"name": "report.csv"}
+        layer = ToolCallingLayer(llm_client=MagicMock(), slack_service=slack, linear_service=MagicMock(),
+                                 gcal_service=MagicMock())
+        self.write("report.csv", 10)
+        with patch("tools.tools.SLACK_UPLOAD_DIR", self.tmp.name):
+            result = layer._run_tool("slack_upload_file", {"channel": "C1", "path": "report.csv"})
+            self.assertIn("uploaded", result)
+            refused = layer._run_tool("slack_upload_file", {"channel": "C1", "path": "../../etc/passwd"})
+            self.assertIn("Error", refused)
+        slack.upload_file.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.slack.workspaces import WorkspaceRegistry
+
+
+class TestWorkspaceRegistry(unittest.TestCase):
+    """Test hosting several workspaces on shared pools"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.env = patch.dict(os.environ, {"IRIS_DATA_DIR": self.tmp.name, "IRIS_SLACK_DEDUP_FILE": ""})
+        self.env.start()
+        self.registry = WorkspaceRegistry(workers=2, llm_client=MagicMock(), linear_service=MagicMock(), gcal_service=MagicMock())
+        self.registry.add("acme", bot_token="xoxb-acme")
+        self.registry.add("globex", bot_token="xoxb-globex")
+
+    def tearDown(self):
+        self.registry.close()
+        self.env.stop()
+        self.tmp.cleanup()
+
+    def listen(self, callback):
+        # No app tokens here, so wire the shared dispatcher without opening sockets
+        with patch("tools.slack.workspaces.SlackService.listen_for_messages") as listen:
+            for name in self.registry:
+                self.registry.get(name).socket_client = MagicMock()
+            self.registry.listen(callback)
+        return listen
+
+    def test_workspaces_keep_their_own_clients_and_caches(self):
+        acme, globex = self.registry.get("acme"), self.registry.get("globex")
+        self.assertIsNot(acme.client, globex.client)
+        self.assertIsNot(acme.metadata, globex.metadata)
+        self.assertIsNot(acme.dm_channels, globex.dm_channels)
+        self.assertNotEqual(acme.dm_channels.path, globex.dm_channels.path)
+        self.assertIs(acme.dedup, globex.dedup)
+        with self.assertRaises(ValueError):
+            self.registry.add("acme", bot_token="xoxb-again")
+
+    def test_events_share_one_dispatcher(self):
+        seen = []
+        done = threading.Event()
+
+        def callback(workspace, channel_id, user_id, text, event_data):
+            seen.append((workspace, channel_id, text))
+            if len(seen) == 2:
+                done.set()
+
+        listen = self.listen(callback)
+        dispatchers = [call.kwargs["dispatcher"] for call in listen.call_args_list]
+        self.assertEqual({d.dispatcher for d in dispatchers}, {self.registry.dispatcher})
+
+        event = {"type": "message", "channel": "C1", "user": "U1", "text": "hi", "ts": "1.0"}
+        for name in ("acme", "globex"):
+            service = self.registry.get(name)
+            service.dispatcher = next(d for d in dispatchers if d.workspace == name)
+            service.handle_event(dict(event, text=name), None, event_id=f"Ev{name}")
+        self.assertTrue(done.wait(2))
+        self.assertEqual(sorted(seen), [("acme", "C1", "acme"), ("globex", "C1", "globex")])
+
+        # A redelivery to either workspace is dropped by the shared de-duplicator
+        self.registry.get("acme").handle_event(dict(event, text="acme"), None, event_id="Evacme")
+        self.registry.dispatcher.join(2)
+        self.assertEqual(len(seen), 2)
+
+    def test_tool_layers_share_services(self):
+        acme, globex = self.registry.tool_layer("acme"), self.registry.tool_layer("globex")
+        self.assertIs(self.registry.tool_layer("acme"), acme)
+        self.assertIs(acme.slack_service, self.registry.get("acme"))
+        self.assertIs(globex.slack_service, self.registry.get("globex"))
+        self.assertIs(acme.llm_client, globex.llm_client)
+        self.assertIs(acme.linear_service, globex.linear_service)
+
+    def test_from_env(self):
+        path = os.path.join(self.tmp.name, "workspaces.json")
+        with open(path, "w") as f:
+            json.dump([{"name": "a", "bot_token": "xoxb-a"}, {"name": "b", "bot_token": "xoxb-b"}], f)
+        with patch.dict(os.environ, {"IRIS_SLACK_WORKSPACES": path}):
+            registry = WorkspaceRegistry.from_env(workers=1)
+        self.assertEqual(list(registry), ["a", "b"])
+        registry.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
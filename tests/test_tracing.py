@@ -0,0 +1,88 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+import unittest
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator import tracing
+from orchestrator.tracing import configure_tracing, current_span, start_span, traced, NOOP_SPAN
+
+
+@traced("test.leaf")
+def leaf(value):
+    current_span().set_attribute("value", value)
+    return value * 2
+
+
+class TestTracing(unittest.TestCase):
+    """Test nested spans, sampling and the JSONL/OTLP export"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "traces.jsonl")
+
+    def tearDown(self):
+        configure_tracing(None)
+        self.tmpdir.cleanup()
+
+    def _exported_spans(self):
+        if not os.path.exists(self.path):
+            return []
+        spans = []
+        with open(self.path) as f:
+            for line in f:
+                request = json.loads(line)
+                spans.extend(request["resourceSpans"][0]["scopeSpans"][0]["spans"])
+        return spans
+
+    def test_nested_spans_share_a_trace(self):
+        configure_tracing(self.path)
+        with start_span("test.root", channel="C1") as root:
+            self.assertEqual(leaf(21), 42)
+
+        spans = {span["name"]: span for span in self._exported_spans()}
+        self.assertEqual(set(spans), {"test.root", "test.leaf"})
+        self.assertEqual(spans["test.leaf"]["traceId"], spans["test.root"]["traceId"])
+        self.assertEqual(spans["test.leaf"]["parentSpanId"], root.span_id)
+        self.assertIn({"key": "value", "value": {"intValue": "21"}}, spans["test.leaf"]["attributes"])
+        self.assertGreater(root.duration, 0)
+
+    def test_exceptions_mark_the_span(self):
+        configure_tracing(self.path)
+        with self.assertRaises(RuntimeError):
+            with start_span("test.failing"):
+                raise RuntimeError("boom")
+
+        span = self._exported_spans()[0]
+        self.assertEqual(span["status"]["code"], tracing.STATUS_ERROR)
+        self.assertIn("boom", span["status"]["message"])
+
+    def test_unsampled_traces_are_not_exported(self):
+        configure_tracing(self.path, sample_rate=0.0)
+        with start_span("test.root") as span:
+            leaf(1)
+        self.assertIs(span, NOOP_SPAN)
+        self.assertEqual(self._exported_spans(), [])
+
+    def test_disabled_tracing_is_a_noop(self):
+        configure_tracing(None)
+        with start_span("test.root") as span:
+            self.assertIs(span, NOOP_SPAN)
+            self.assertIs(current_span(), NOOP_SPAN)
+        self.assertEqual(leaf(2), 4)
+
+    def test_threads_start_their_own_traces(self):
+        configure_tracing(self.path)
+        threads = [threading.Thread(target=leaf, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len({span["traceId"] for span in self._exported_spans()}), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
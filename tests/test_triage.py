@@ -0,0 +1,130 @@
+import sys
+import os
+import json
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from orchestrator.triage import ANSWER, DEFER, DROP, DeferredBatcher, Triage, classify
+from tools.slack.service import SlackService
+
+
+class TestTriage(unittest.TestCase):
+    """Test the local gate in front of the LLM"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_path = os.path.join(self.tmp.name, "triage.jsonl")
+        self.slack = SlackService(bot_token="xoxb-test")
+        self.slack.client = MagicMock()
+        self.slack.client.auth_test.return_value = {"user_id": "UBOT"}
+        self.triage = Triage(
+            self.slack,
+            policies={"*": "mentions", "CTEAM": "triage", "CBOT": "all", "CRANDOM": "ignore"},
+            log_path=self.log_path,
+        )
+
+    def tearDown(self):
+        self.triage.close()
+        self.tmp.cleanup()
+
+    def decide(self, text, channel="CGEN", **event):
+        return self.triage.decide(channel, "U1", text, dict({"ts": "1.0"}, **event))
+
+    def test_addressed_messages_are_answered(self):
+        self.assertEqual(self.decide("hello", channel_type="im").reason, "direct_message")
+        self.assertEqual(self.decide("<@UBOT> what's on my calendar?").reason, "mention")
+        decision = self.decide("iris, schedule a sync with Bob tomorrow")
+        self.assertEqual((decision.action, decision.command), (ANSWER, "schedule"))
+        self.assertEqual(self.decide("!remind me at 5").command, "remind")
+
+    def test_ambient_chatter_is_dropped(self):
+        self.assertEqual(self.decide("lol nice").action, DROP)
+        self.assertEqual(self.decide("<@UOTHER> thanks!").action, DROP)
+        self.assertEqual(self.decide("   ").reason, "empty")
+        self.assertEqual(self.decide("can you schedule a meeting?", channel="CRANDOM").reason, "channel_ignored")
+        self.assertEqual(self.decide("<@UBOT> hi", channel="CRANDOM").action, DROP)
+
+    def test_channel_policies(self):
+        request = "can you create a ticket for the login bug?"
+        self.assertEqual(self.decide(request).action, DROP)
+        decision = self.decide(request, channel="CTEAM")
+        self.assertEqual((decision.action, decision.priority, decision.intent), (DEFER, "low", "task"))
+        self.assertEqual(self.decide("lunch?", channel="CTEAM").action, DROP)
+        self.assertEqual(self.decide("lunch?", channel="CBOT").action, ANSWER)
+
+    def test_thread_followups(self):
+        self.assertEqual(self.decide("and make it high priority", thread_ts="5.0").action, DROP)
+        self.triage.mark_engaged("CGEN", "5.0")
+        self.assertEqual(self.decide("and make it high priority", thread_ts="5.0").reason, "thread_followup")
+
+    def test_classifier(self):
+        self.assertEqual(classify("could you schedule a meeting?"), ("meeting", 3))
+        self.assertEqual(classify("see you tomorrow"), (None, 0))
+
+    def test_decisions_are_logged(self):
+        self.decide("lol")
+        self.decide("<@UBOT> help")
+        with open(self.log_path) as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual([entry["action"] for entry in entries], [DROP, ANSWER])
+        self.assertEqual(entries[1]["reason"], "mention")
+        self.assertEqual(entries[1]["policy"], "mentions")
+        self.assertNotIn("text", entries[1])
+        self.slack.client.auth_test.assert_called_once()
+
+    def test_log_is_opt_in_and_rotated(self):
+        with patch.dict(os.environ, {"IRIS_DATA_DIR": self.tmp.name}):
+            os.environ.pop("IRIS_TRIAGE_LOG", None)
+            self.assertIsNone(Triage(self.slack).log_path)
+
+        triage = Triage(self.slack, log_path=self.log_path, log_text=True, log_max_bytes=500, log_backups=2)
+        for i in range(20):
+            triage.decide("CGEN", "U1", f"message {i}", {"ts": f"{i}.0"})
+        triage.close()
+
+        self.assertEqual(sorted(os.listdir(self.tmp.name)), ["triage.jsonl", "triage.jsonl.1", "triage.jsonl.2"])
+        self.assertTrue(all(os.path.getsize(os.path.join(self.tmp.name, name)) <= 500 for name in os.listdir(self.tmp.name)))
+        with open(self.log_path) as f:
+            self.assertEqual(json.loads(f.readlines()[-1])["text"], "message 19")
+
+    def test_unknown_policy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            Triage(self.slack, policies={"C1": "sometimes"})
+
+
+class TestDeferredBatcher(unittest.TestCase):
+    """Test batching of deferred messages"""
+
+    def test_batches_by_key_after_the_delay(self):
+        batches = []
+        done = threading.Event()
+
+        def handler(key, messages):
+            batches.append((key, messages))
+            done.set()
+
+        batcher = DeferredBatcher(handler, delay=0.05, max_batch=10)
+        batcher.add("T1:C1", "first")
+        batcher.add("T1:C1", "second")
+        self.assertEqual(len(batcher), 2)
+        self.assertTrue(done.wait(2))
+        self.assertEqual(batches, [("T1:C1", [("first",), ("second",)])])
+        self.assertEqual(len(batcher), 0)
+
+    def test_full_batches_and_close_flush_early(self):
+        batches = []
+        batcher = DeferredBatcher(lambda key, messages: batches.append((key, len(messages))), delay=60, max_batch=2)
+        batcher.add("C1", "a")
+        batcher.add("C2", "b")
+        batcher.add("C1", "c")
+        self.assertEqual(batches, [("C1", 2)])
+        batcher.close()
+        self.assertEqual(batches, [("C1", 2), ("C2", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
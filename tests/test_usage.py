@@ -0,0 +1,153 @@
+import sys
+import os
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from openai.types.chat import ChatCompletion
+
+from orchestrator.client import LLMClient
+from orchestrator.usage import UsageTracker, add_tool, set_usage_tracker, usage_context
+
+
+def make_completion(prompt_tokens, completion_tokens):
+    return ChatCompletion.model_validate({
+        "id": "chatcmpl-test",
+        "object": "chat.completion",
+        "created": 1700000000,
+        "model": "gpt-4o",
+        "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    })
+
+
+class TestUsageTracker(unittest.TestCase):
+    """Test token/cost attribution, the local store and budgets"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.tracker = UsageTracker(
+            os.path.join(self.tmpdir.name, "usage.db"),
+            budgets={"U_CAPPED": 0.005},
+            flush_interval=0,
+        )
+        set_usage_tracker(self.tracker)
+        self.transport = MagicMock()
+        self.transport.chat.completions.create.return_value = make_completion(1000, 100)
+        self.llm_client = LLMClient(transport=self.transport)
+
+    def tearDown(self):
+        self.tracker.close()
+        set_usage_tracker(None)
+        self.tmpdir.cleanup()
+
+    def test_flow_attribution(self):
+        with usage_context(user_id="U1", channel_id="C1"):
+            self.llm_client.get_response("create an issue", tools=[{"type": "function"}])
+            add_tool("linear_create_issue")
+            self.llm_client.get_response("summarize")
+
+        self.llm_client.get_response("unattributed")
+
+        rows = self.tracker.query(group_by=["user_id", "channel_id", "flow"])
+        by_user = {row["user_id"]: row for row in rows}
+        self.assertEqual(by_user["U1"]["flow"], "linear_create_issue")
+        self.assertEqual(by_user["U1"]["requests"], 2)
+        self.assertEqual(by_user["U1"]["prompt_tokens"], 2000)
+        self.assertAlmostEqual(by_user["U1"]["cost"], 2 * (1000 * 2.50 + 100 * 10.00) / 1_000_000)
+        self.assertEqual(by_user["-"]["flow"], "chat")
+
+    def test_flush_accumulates(self):
+        with usage_context(user_id="U1"):
+            self.llm_client.get_response("one")
+        self.tracker.flush()
+        with usage_context(user_id="U1"):
+            self.llm_client.get_response("two")
+
+        rows = self.tracker.query(group_by=["user_id"])
+        self.assertEqual(rows[0]["requests"], 2)
+
+    def test_budget_downgrades_model(self):
+        for _ in range(3):
+            with usage_context(user_id="U_CAPPED"):
+                self.llm_client.get_response("hello")
+
+        models = [call.kwargs["model"] for call in self.transport.chat.completions.create.call_args_list]
+        self.assertEqual(models, ["gpt-4o", "gpt-4o", "gpt-4o-mini"])
+        self.assertTrue(self.tracker.over_budget("U_CAPPED"))
+        self.assertFalse(self.tracker.over_budget("U1"))
+
+    def test_spend_from_past_days_is_evicted(self):
+        with patch("orchestrator.usage._today", return_value="2026-01-01"):
+            for user_id in ("U1", "U2"):
+                self.tracker.spent_today(user_id)
+        self.assertEqual(len(self.tracker._spend), 2)
+
+        with patch("orchestrator.usage._today", return_value="2026-01-02"):
+            self.assertEqual(self.tracker.spent_today("U1"), 0)
+        self.assertEqual(list(self.tracker._spend), [("2026-01-02", "U1")])
+
+    def test_low_priority_work_is_deferred(self):
+        with usage_context(user_id="U_CAPPED"):
+            self.llm_client.get_response("hello")
+            self.llm_client.get_response("hello")
+
+        self.assertTrue(self.tracker.should_defer("U_CAPPED", priority="low"))
+        self.assertFalse(self.tracker.should_defer("U_CAPPED", priority="normal"))
+
+        job = MagicMock()
+        self.tracker.defer("U_CAPPED", job, "arg")
+        self.tracker.run_deferred()
+        job.assert_not_called()
+
+        self.tracker.budgets["U_CAPPED"] = 100.0
+        self.tracker.run_deferred()
+        self.assertTrue(self.tracker.join_deferred(timeout=5))
+        job.assert_called_once_with("arg")
+        self.assertEqual(len(self.tracker.deferred), 0)
+
+    def test_deferred_jobs_run_off_the_flush_thread(self):
+        ran_on = []
+        self.tracker.defer("U1", lambda: ran_on.append(threading.current_thread().name))
+        self.tracker.run_deferred()
+        self.assertTrue(self.tracker.join_deferred(timeout=5))
+        self.assertEqual(len(ran_on), 1)
+        self.assertNotEqual(ran_on[0], threading.current_thread().name)
+
+    def test_full_deferred_queue_rejects_new_jobs(self):
+        self.tracker.max_deferred = 2
+        job = MagicMock()
+        self.assertTrue(self.tracker.defer("U_CAPPED", job, 1))
+        self.assertTrue(self.tracker.defer("U_CAPPED", job, 2))
+        self.assertFalse(self.tracker.defer("U_CAPPED", job, 3))
+        self.assertEqual([args for _, _, args, _ in self.tracker.deferred], [(1,), (2,)])
+
+    def test_usage_endpoint(self):
+        from server import app
+
+        with usage_context(user_id="U1", channel_id="C1"):
+            self.llm_client.get_response("hello")
+
+        client = TestClient(app)
+        with patch.dict(os.environ, {"IRIS_ADMIN_TOKEN": "s3cret"}):
+            self.assertEqual(client.get("/usage").status_code, 403)
+            headers = {"X-Admin-Token": "s3cret"}
+            response = client.get("/usage", params={"by": "channel_id,model"}, headers=headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()["rows"][0]["channel_id"], "C1")
+            self.assertEqual(client.get("/usage", params={"by": "secret"}, headers=headers).status_code, 400)
+        with patch.dict(os.environ, {}, clear=False):
+            os.environ.pop("IRIS_ADMIN_TOKEN", None)
+            self.assertEqual(client.get("/usage").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
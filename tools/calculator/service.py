@@ -0,0 +1,470 @@
+import ast
+import math
+import operator
+import re
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+
+# Hard limits keep a single expression from exhausting CPU or memory
+MAX_EXPRESSION_LENGTH = 1000
+MAX_ARRAY_SIZE = 1_000_000
+MAX_INT_BITS = 100_000
+MAX_FACTORIAL = 1000
+MAX_AST_DEPTH = 100
+# Integers longer than this cannot be printed (Python's 4300 digit limit)
+MAX_RESULT_BITS = 14_000
+# Array elements plus bits of exact integers one evaluation may produce, and its wall-clock limit
+MAX_WORK = 50_000_000
+MAX_SECONDS = 2.0
+
+_RANGE_PATTERN = re.compile(r"(?<![\w.])(-?\d+)\s*\.\.\s*(-?\d+)(?![\w.])")
+
+Env = Dict[str, Any]
+Compiled = Callable[[Env], Any]
+
+
+class CalculatorError(ValueError):
+    """Raised for expressions that are invalid or not allowed"""
+
+
+class _Budget:
+    """Work and time left for the evaluation in progress"""
+
+    __slots__ = ("work", "deadline")
+
+    def __init__(self, work: float, seconds: float):
+        self.work = work
+        self.deadline = time.monotonic() + seconds
+
+
+_budget: ContextVar[Optional[_Budget]] = ContextVar("calculator_budget", default=None)
+
+
+def _charge(units: float) -> None:
+    """Spend work from the current evaluation's budget, failing once it or the time runs out"""
+    budget = _budget.get()
+    if budget is None:
+        return
+    budget.work -= units
+    if budget.work < 0:
+        raise CalculatorError("Expression needs too much work to evaluate")
+    if time.monotonic() > budget.deadline:
+        raise CalculatorError(f"Expression took longer than {MAX_SECONDS:g}s to evaluate")
+
+
+def _check_size(size: int) -> None:
+    if size > MAX_ARRAY_SIZE:
+        raise CalculatorError(f"Ranges are limited to {MAX_ARRAY_SIZE} elements")
+    _charge(size)
+
+
+def _span(start, stop, step=1):
+    """Inclusive integer range, used for `a..b` syntax"""
+    if step == 0:
+        raise CalculatorError("Range step cannot be zero")
+    _check_size(abs(int((stop - start) / step)) + 1)
+    return np.arange(start, stop + (1 if step > 0 else -1), step)
+
+
+def _arange(*args):
+    if not 1 <= len(args) <= 3:
+        raise CalculatorError("range takes between 1 and 3 arguments")
+    start, stop, step = (0, args[0], 1) if len(args) == 1 else (args[0], args[1], args[2] if len(args) == 3 else 1)
+    if step == 0:
+        raise CalculatorError("Range step cannot be zero")
+    _check_size(max(0, math.ceil((stop - start) / step)))
+    return np.arange(*args)
+
+
+def _linspace(start, stop, num=50):
+    _check_size(int(num))
+    return np.linspace(start, stop, int(num))
+
+
+def _factorial_bits(n: int) -> float:
+    return math.lgamma(n + 1) / math.log(2)
+
+
+def _factorial(n):
+    values = np.asarray(n)
+    if values.dtype.kind not in "biuf" or np.any(values < 0) or np.any(np.mod(values, 1) != 0):
+        raise CalculatorError("factorial is only defined for non-negative integers")
+    if values.size and np.max(values) > MAX_FACTORIAL:
+        raise CalculatorError(f"factorial is limited to n <= {MAX_FACTORIAL}")
+    if not np.ndim(n):
+        _charge(_factorial_bits(int(n)))
+        return math.factorial(int(n))
+
+    # Each distinct value is computed once, but every element still costs its size downstream
+    unique, inverse, counts = np.unique(values.astype(np.int64), return_inverse=True, return_counts=True)
+    _charge(sum(_factorial_bits(int(v)) * int(c) for v, c in zip(unique, counts)))
+    results = np.empty(len(unique), dtype=object)
+    results[:] = [math.factorial(int(v)) for v in unique]
+    return results[inverse].reshape(values.shape)
+
+
+def _log(x, base=None):
+    return np.log(x) if base is None else np.log(x) / np.log(base)
+
+
+def _reduce(array_fn, pairwise_fn):
+    """min()/max() that accept either one iterable or several values"""
+    def call(*args):
+        if len(args) == 1:
+            return array_fn(args[0])
+        return pairwise_fn.reduce(np.broadcast_arrays(*args))
+    return call
+
+
+def _pow(left, right):
+    # Python ints have unbounded precision, so 10**10**10 would never finish
+    if isinstance(left, int) and isinstance(right, int) and right > 0:
+        if left.bit_length() * right > MAX_INT_BITS:
+            left = float(left)
+        else:
+            _charge(left.bit_length() * right)
+    # Arrays of exact integers (from factorial) would do the same element by element
+    if isinstance(left, np.ndarray) and left.dtype == object:
+        left = left.astype(float)
+    return operator.pow(left, right)
+
+
+def _object_bits(values: np.ndarray) -> np.ndarray:
+    """Bit length of each element of an object array, 64 for anything that is not an exact integer"""
+    _charge(values.size)
+    bits = [value.bit_length() if isinstance(value, int) else 64 for value in values.ravel()]
+    return np.array(bits, dtype=np.int64)
+
+
+def _exact_reduction(reduce, cost):
+    """Wrap a NumPy reduction so exact-integer (object) arrays are sized before NumPy multiplies them out
+
+    `cost` maps the operands' bit lengths to (bits of the largest result, total work), which is
+    checked against MAX_INT_BITS and charged before the reduction runs.
+    """
+    def call(values, *args):
+        array = np.asarray(values)
+        if array.dtype == object and array.size:
+            result_bits, work = cost(_object_bits(array))
+            if result_bits > MAX_INT_BITS:
+                raise CalculatorError(f"Result would have about {int(result_bits)} bits, more than {MAX_INT_BITS}")
+            _charge(work)
+        return reduce(values, *args)
+    return call
+
+
+def _sum_cost(bits: np.ndarray):
+    return int(bits.max()) + int(bits.size).bit_length(), int(bits.sum())
+
+
+def _cumsum_cost(bits: np.ndarray):
+    result_bits = int(bits.max()) + int(bits.size).bit_length()
+    return result_bits, result_bits * int(bits.size)
+
+
+def _prod_cost(bits: np.ndarray):
+    # A product has about as many bits as its operands together
+    return int(bits.sum()), int(bits.sum())
+
+
+def _cumprod_cost(bits: np.ndarray):
+    # Every running product is kept, so the work is the sum of the running totals
+    running = np.cumsum(bits)
+    return int(running[-1]), int(running.sum())
+
+
+FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "abs": np.abs,
+    "round": np.round,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": _log,
+    "ln": np.log,
+    "log10": np.log10,
+    "log2": np.log2,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "asin": np.arcsin,
+    "acos": np.arccos,
+    "atan": np.arctan,
+    "floor": np.floor,
+    "ceil": np.ceil,
+    "factorial": _factorial,
+    "sum": _exact_reduction(np.sum, _sum_cost),
+    "prod": _exact_reduction(np.prod, _prod_cost),
+    "mean": np.mean,
+    "median": np.median,
+    "std": np.std,
+    "var": np.var,
+    "cumsum": _exact_reduction(np.cumsum, _cumsum_cost),
+    "cumprod": _exact_reduction(np.cumprod, _cumprod_cost),
+    "min": _reduce(np.min, np.minimum),
+    "max": _reduce(np.max, np.maximum),
+    "len": np.size,
+    "range": _arange,
+    "arange": _arange,
+    "linspace": _linspace,
+    "span": _span,
+}
+
+CONSTANTS: Dict[str, Any] = {
+    "pi": math.pi,
+    "e": math.e,
+    "tau": math.tau,
+}
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _pow,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Not: np.logical_not,
+}
+
+_COMPARE_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+def _normalize(expression: str) -> str:
+    """Rewrite calculator notation into Python syntax"""
+    expression = expression.strip().replace("^", "**").replace("×", "*").replace("÷", "/")
+    return _RANGE_PATTERN.sub(r"span(\1, \2)", expression)
+
+
+def _as_array(value):
+    if isinstance(value, (list, tuple, range)):
+        value = np.asarray(value)
+    return value
+
+
+def _compile_node(node: ast.AST) -> Compiled:
+    """Turn a whitelisted AST node into a closure over an environment dict"""
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float)):
+            raise CalculatorError(f"Unsupported constant: {node.value!r}")
+        value = node.value
+        return lambda env: value
+
+    if isinstance(node, ast.Name):
+        name = node.id
+
+        def lookup(env):
+            if name in env:
+                return env[name]
+            if name in CONSTANTS:
+                return CONSTANTS[name]
+            raise CalculatorError(f"Unknown name: {name}")
+        return lookup
+
+    if isinstance(node, ast.BinOp):
+        op = _BINARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise CalculatorError(f"Unsupported operator: {type(node.op).__name__}")
+        left, right = _compile_node(node.left), _compile_node(node.right)
+        return lambda env: op(left(env), right(env))
+
+    if isinstance(node, ast.UnaryOp):
+        op = _UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise CalculatorError(f"Unsupported operator: {type(node.op).__name__}")
+        operand = _compile_node(node.operand)
+        return lambda env: op(operand(env))
+
+    if isinstance(node, ast.Compare):
+        ops = []
+        for op_node in node.ops:
+            op = _COMPARE_OPERATORS.get(type(op_node))
+            if op is None:
+                raise CalculatorError(f"Unsupported comparison: {type(op_node).__name__}")
+            ops.append(op)
+        operands = [_compile_node(node.left)] + [_compile_node(c) for c in node.comparators]
+
+        def compare(env):
+            values = [operand(env) for operand in operands]
+            result = True
+            for op, left, right in zip(ops, values, values[1:]):
+                result = np.logical_and(result, op(left, right))
+            return result
+        return compare
+
+    if isinstance(node, ast.BoolOp):
+        combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+        values = [_compile_node(v) for v in node.values]
+
+        def boolop(env):
+            result = values[0](env)
+            for value in values[1:]:
+                result = combine(result, value(env))
+            return result
+        return boolop
+
+    if isinstance(node, ast.IfExp):
+        test, body, orelse = _compile_node(node.test), _compile_node(node.body), _compile_node(node.orelse)
+
+        def ifexp(env):
+            condition = test(env)
+            if np.ndim(condition) == 0:
+                return body(env) if condition else orelse(env)
+            return np.where(condition, body(env), orelse(env))
+        return ifexp
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS:
+            name = node.func.id if isinstance(node.func, ast.Name) else type(node.func).__name__
+            raise CalculatorError(f"Unsupported function: {name}")
+        if node.keywords:
+            raise CalculatorError("Keyword arguments are not supported")
+        func = FUNCTIONS[node.func.id]
+        args = [_compile_node(arg) for arg in node.args]
+
+        def call(env):
+            _charge(1)
+            return func(*(_as_array(arg(env)) for arg in args))
+        return call
+
+    if isinstance(node, (ast.List, ast.Tuple)):
+        elements = [_compile_node(e) for e in node.elts]
+        return lambda env: np.asarray([element(env) for element in elements])
+
+    if isinstance(node, (ast.GeneratorExp, ast.ListComp)):
+        return _compile_comprehension(node)
+
+    raise CalculatorError(f"Unsupported syntax: {type(node).__name__}")
+
+
+def _compile_comprehension(node) -> Compiled:
+    """Compile `f(n) for n in xs if cond(n)` into one vectorized evaluation.
+
+    The loop variable is bound to the whole array, so the body runs once
+    with NumPy broadcasting instead of once per element.
+    """
+    if len(node.generators) != 1:
+        raise CalculatorError("Only a single 'for' clause is supported")
+    generator = node.generators[0]
+    if not isinstance(generator.target, ast.Name) or generator.is_async:
+        raise CalculatorError("Comprehension target must be a simple name")
+
+    name = generator.target.id
+    iterable = _compile_node(generator.iter)
+    conditions = [_compile_node(condition) for condition in generator.ifs]
+    element = _compile_node(node.elt)
+
+    def comprehension(env):
+        values = np.asarray(_as_array(iterable(env)))
+        if values.ndim != 1:
+            raise CalculatorError("Comprehensions iterate over one-dimensional values")
+        _charge(values.size)
+        scope = dict(env)
+        for condition in conditions:
+            scope[name] = values
+            values = values[np.broadcast_to(condition(scope), values.shape).astype(bool)]
+        scope[name] = values
+        return np.broadcast_to(element(scope), values.shape)
+    return comprehension
+
+
+@lru_cache(maxsize=512)
+def compile_expression(expression: str) -> Compiled:
+    """Parse, validate and compile an expression once; results are memoized
+
+    Args:
+        expression (str): Calculator expression
+
+    Returns:
+        Callable: Function taking a variables dict and returning the value
+    """
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise CalculatorError(f"Expressions are limited to {MAX_EXPRESSION_LENGTH} characters")
+    try:
+        tree = ast.parse(_normalize(expression), mode="eval")
+    except SyntaxError as e:
+        raise CalculatorError(f"Invalid expression: {e.msg}") from None
+    except (RecursionError, MemoryError):
+        raise CalculatorError("Expression is nested too deeply") from None
+    _check_depth(tree.body)
+    return _compile_node(tree.body)
+
+
+def _check_depth(tree: ast.AST) -> None:
+    # Iterative, so the check itself cannot hit the recursion limit
+    stack = [(tree, 1)]
+    while stack:
+        node, depth = stack.pop()
+        if depth > MAX_AST_DEPTH:
+            raise CalculatorError(f"Expressions are limited to {MAX_AST_DEPTH} levels of nesting")
+        stack.extend((child, depth + 1) for child in ast.iter_child_nodes(node))
+
+
+def _check_int(value: Any) -> None:
+    if isinstance(value, int) and value.bit_length() > MAX_RESULT_BITS:
+        raise CalculatorError("Result is too large to display")
+
+
+def _to_python(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        result = value.tolist()
+        if value.dtype == object:
+            for item in value.flat:
+                _check_int(item)
+        return result
+    if isinstance(value, np.generic):
+        return value.item()
+    _check_int(value)
+    return value
+
+
+class CalculatorService:
+    """Evaluates math expressions without eval
+
+    Expressions use Python syntax plus `^` for powers and `a..b` for
+    inclusive integer ranges. Lists, ranges and comprehensions are evaluated
+    with NumPy broadcasting, e.g. `sum(1.07^n for n in 1..30)`.
+    """
+
+    def evaluate(self, expression: str, variables: Optional[Dict[str, Any]] = None) -> Any:
+        """Evaluate an expression
+
+        Args:
+            expression (str): Expression to evaluate
+            variables (dict, optional): Extra names available to the expression; lists become arrays
+
+        Returns:
+            int | float | list: The result, converted to plain Python types
+        """
+        token = _budget.set(_Budget(MAX_WORK, MAX_SECONDS))
+        try:
+            compiled = compile_expression(expression)
+            env = {name: _as_array(value) for name, value in (variables or {}).items()}
+            with np.errstate(all="ignore"):
+                return _to_python(compiled(env))
+        except CalculatorError:
+            raise
+        except RecursionError:
+            raise CalculatorError("Expression is nested too deeply") from None
+        except (ArithmeticError, TypeError, ValueError, MemoryError) as e:
+            raise CalculatorError(str(e) or type(e).__name__) from None
+        finally:
+            _budget.reset(token)
+
+    def cache_info(self):
+        """Return hit/miss statistics of the compiled expression cache"""
+        return compile_expression.cache_info()
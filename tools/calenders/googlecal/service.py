@@ -7,6 +7,8 @@ import os.path
 import pickle
 import os
 
+from orchestrator.tracing import traced
+
 class GoogleCalendarService:
     SCOPES = ['https://www.googleapis.com/auth/calendar']
     TOKEN_FILE = 'token.pickle'
@@ -48,6 +50,7 @@ class GoogleCalendarService:
         os.environ['GOOGLE_API_USE_CLIENT_CERTIFICATE'] = 'false'
         self.service = build('calendar', 'v3', credentials=self.creds, cache_discovery=False)
 
+    @traced("gcal.create_event")
     def create_event(self, summary, description, start_time, end_time, attendees=None, location=None):
         """Create a calendar event
 
@@ -82,6 +85,7 @@ class GoogleCalendarService:
 
         return self.service.events().insert(calendarId='primary', body=event).execute()
 
+    @traced("gcal.check_availability")
     def check_availability(self, start_time, end_time):
         """Check if there are any conflicts in the given time range
 
@@ -102,6 +106,7 @@ class GoogleCalendarService:
 
         return len(events_result.get('items', [])) == 0
 
+    @traced("gcal.find_next_available_slot")
     def find_next_available_slot(self, duration_minutes, start_from=None, working_hours=(9, 17)):
         """Find the next available time slot of specified duration
 
@@ -135,6 +140,7 @@ class GoogleCalendarService:
 
         return None
 
+    @traced("gcal.update_event")
     def update_event(self, event_id, **kwargs):
         """Update an existing calendar event
 
@@ -155,6 +161,7 @@ class GoogleCalendarService:
 
         return self.service.events().update(calendarId='primary', eventId=event_id, body=event).execute()
 
+    @traced("gcal.delete_event")
     def delete_event(self, event_id):
         """Delete a calendar event
 
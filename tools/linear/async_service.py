@@ -0,0 +1,418 @@
+import asyncio
+import logging
+import os
+from typing import Dict, List, Optional
+
+import aiohttp
+from gql import GraphQLRequest
+from gql.transport.aiohttp import AIOHTTPTransport
+from gql.transport.exceptions import TransportError, TransportQueryError, TransportServerError
+from graphql import OperationDefinitionNode, OperationType
+
+from orchestrator.metrics import Counter
+from orchestrator.tracing import traced
+from tools.linear import documents
+from tools.linear.directory import LISTINGS, LinearDirectory
+from tools.linear.schema import LinearSchemaCache
+from tools.linear.service import LINEAR_API_URL, LinearService, ValidatingClient
+
+LINEAR_RETRIES = Counter("iris_linear_retries_total", "Linear requests retried after a transient error", ["reason"])
+
+
+def _is_mutation(request: GraphQLRequest) -> bool:
+    return any(
+        isinstance(definition, OperationDefinitionNode) and definition.operation == OperationType.MUTATION
+        for definition in request.document.definitions
+    )
+
+
+def _retry_reason(error: Exception, idempotent: bool) -> Optional[str]:
+    """Why a failed request may be sent again, or None if it may not
+
+    Rate limits and failed connects mean Linear never ran the request, so
+    they are retried for mutations too. Timeouts, dropped connections and
+    5xx responses may come after a mutation was applied, so only queries
+    are retried on those.
+    """
+    if isinstance(error, TransportQueryError):
+        codes = {(item.get("extensions") or {}).get("code") for item in error.errors or [] if isinstance(item, dict)}
+        return "ratelimited" if "RATELIMITED" in codes else None
+    if isinstance(error, TransportServerError) and error.code == 429:
+        return "ratelimited"
+    if isinstance(error, aiohttp.ClientConnectorError):
+        return "connect"
+    if not idempotent:
+        return None
+    if isinstance(error, TransportServerError) and (error.code or 0) >= 500:
+        return "server"
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, aiohttp.ClientError):
+        return "connection"
+    return None
+
+
+class AsyncLinearService:
+    """asyncio variant of LinearService
+
+    Sends requests over one pooled aiohttp session, with at most
+    `concurrency` in flight, a per-attempt timeout and retries with
+    exponential backoff, so Linear calls can run concurrently with Slack
+    and Calendar calls on the same event loop. Methods mirror
+    LinearService as coroutines; the schema cache, directory and batch
+    handling are shared with it. Create it anywhere, but call its
+    coroutines from a running loop.
+    """
+
+    # Loop-independent helpers are shared with the threaded service
+    _cached_introspection = LinearService._cached_introspection
+    _chunks = LinearService._chunks
+    _batch_variables = staticmethod(LinearService._batch_variables)
+    _settle_batch = staticmethod(LinearService._settle_batch)
+    _fail_batch = staticmethod(LinearService._fail_batch)
+    _create_items = staticmethod(LinearService._create_items)
+    _update_items = staticmethod(LinearService._update_items)
+
+    def __init__(self, api_key: str = None, schema_cache: LinearSchemaCache = None, transport=None,
+                 directory: LinearDirectory = None, concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None, max_retries: Optional[int] = None,
+                 max_connections: Optional[int] = None, backoff: float = 0.5, max_backoff: float = 30.0,
+                 complexity_budget: Optional[float] = None, max_batch: Optional[int] = None,
+                 url: str = LINEAR_API_URL):
+        """Initialize async Linear service with API key
+
+        Args:
+            api_key (str, optional): Linear API key. If not provided, will look for LINEAR_API_KEY env variable
+            schema_cache (LinearSchemaCache, optional): Schema cache. Defaults to one under IRIS_DATA_DIR
+            transport (optional): gql async transport. Defaults to a pooled AIOHTTPTransport created on first use
+            directory (LinearDirectory, optional): Lookup directory. Defaults to one refreshed in the background
+            concurrency (int, optional): Requests in flight at once. Defaults to IRIS_LINEAR_CONCURRENCY or 10
+            timeout (float, optional): Seconds per attempt. Defaults to IRIS_LINEAR_TIMEOUT or 30
+            max_retries (int, optional): Retries after a transient error. Defaults to IRIS_LINEAR_MAX_RETRIES or 3
+            max_connections (int, optional): Size of the HTTP connection pool. Defaults to the concurrency
+            backoff (float, optional): Seconds before the first retry, doubled on each retry. Defaults to 0.5
+            max_backoff (float, optional): Longest wait between retries. Defaults to 30
+            complexity_budget (float, optional): Estimated complexity allowed per batched request.
+                Defaults to IRIS_LINEAR_COMPLEXITY_BUDGET or 10000
+            max_batch (int, optional): Mutations per batched request. Defaults to IRIS_LINEAR_BATCH_SIZE or 50
+        """
+        self.api_key = api_key or os.environ.get('LINEAR_API_KEY')
+        if not self.api_key:
+            raise ValueError("Linear API key must be provided or set in LINEAR_API_KEY environment variable")
+        self.logger = logging.getLogger(__name__)
+
+        self.concurrency = concurrency or int(os.environ.get("IRIS_LINEAR_CONCURRENCY", 10))
+        self.timeout = timeout or float(os.environ.get("IRIS_LINEAR_TIMEOUT", 30))
+        self.max_retries = max_retries if max_retries is not None else int(os.environ.get("IRIS_LINEAR_MAX_RETRIES", 3))
+        self.max_connections = max_connections or self.concurrency
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.complexity_budget = complexity_budget or float(os.environ.get("IRIS_LINEAR_COMPLEXITY_BUDGET", 10000))
+        self.max_batch = max_batch or int(os.environ.get("IRIS_LINEAR_BATCH_SIZE", 50))
+
+        self.url = url
+        self.schema_cache = schema_cache or LinearSchemaCache(url=url)
+        self.transport = transport
+        self.client: Optional[ValidatingClient] = None
+        self.session = None
+        self.directory = directory if directory is not None else LinearDirectory()
+        self._schema_cached = False
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._connect_lock: Optional[asyncio.Lock] = None
+        self._directory_lock: Optional[asyncio.Lock] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+    def _new_transport(self) -> AIOHTTPTransport:
+        # aiohttp connectors must be created on the loop that uses them
+        return AIOHTTPTransport(
+            url=self.url,
+            headers={'Authorization': self.api_key},
+            client_session_args={
+                "connector": aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300),
+                "timeout": aiohttp.ClientTimeout(total=self.timeout),
+            },
+        )
+
+    async def _connect(self):
+        if self.session is not None:
+            return self.session
+        self._connect_lock = self._connect_lock or asyncio.Lock()
+        async with self._connect_lock:
+            if self.session is None:
+                introspection = self._cached_introspection()
+                self._schema_cached = introspection is not None
+                self.client = ValidatingClient(
+                    transport=self.transport or self._new_transport(),
+                    introspection=introspection,
+                    fetch_schema_from_transport=introspection is None,
+                    execute_timeout=self.timeout,
+                )
+                session = await self.client.connect_async()
+                if not self._schema_cached and self.client.introspection:
+                    self.schema_cache.save(self.client.introspection)
+                    self._schema_cached = True
+                self.session = session
+        return self.session
+
+    async def _execute(self, request: GraphQLRequest, variables: Optional[Dict] = None) -> Dict:
+        """Run a precompiled document from tools.linear.documents, retrying transient errors"""
+        session = await self._connect()
+        idempotent = not _is_mutation(request)
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    return await session.execute(GraphQLRequest(request, variable_values=variables))
+            except Exception as e:
+                reason = _retry_reason(e, idempotent)
+                if reason is None or attempt == self.max_retries:
+                    raise
+                delay = min(self.max_backoff, self.backoff * 2 ** attempt)
+                LINEAR_RETRIES.labels(reason=reason).inc()
+                self.logger.warning(f"Linear request failed ({reason}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+
+    async def _list(self, kind: str, since: Optional[str] = None) -> List[dict]:
+        document, field, variables = self.directory.listing(kind, since)
+        nodes = []
+        while True:
+            connection = (await self._execute(document, variables))[field]
+            nodes.extend(connection["nodes"])
+            if not connection["pageInfo"]["hasNextPage"]:
+                return nodes
+            variables["after"] = connection["pageInfo"]["endCursor"]
+
+    async def load_directory(self) -> int:
+        """Load every team, user, workflow state and label, listing the kinds concurrently
+
+        Returns:
+            int: Number of nodes loaded
+        """
+        listings = await asyncio.gather(*(self._list(kind) for kind in LISTINGS))
+        self.directory.replace(dict(zip(LISTINGS, listings)))
+        return len(self.directory)
+
+    async def refresh_directory(self) -> int:
+        """Fetch nodes updated since the last refresh, or reload once the TTL has passed
+
+        Returns:
+            int: Number of nodes added or changed
+        """
+        if self.directory.needs_reload():
+            return await self.load_directory()
+        changed = await asyncio.gather(*(self._list(kind, self.directory.since(kind)) for kind in LISTINGS))
+        return self.directory.merge(dict(zip(LISTINGS, changed)))
+
+    async def ensure_directory(self):
+        """Load the directory on first use and start the background refresh"""
+        if not self.directory.loaded:
+            self._directory_lock = self._directory_lock or asyncio.Lock()
+            async with self._directory_lock:
+                if not self.directory.loaded:
+                    self.directory.check_backoff()
+                    try:
+                        await self.load_directory()
+                    except Exception as e:
+                        self.directory.load_failed(e)
+                        raise
+        if self._refresher is None and self.directory.refresh_interval > 0:
+            self._refresher = asyncio.create_task(self._refresh_periodically())
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.directory.refresh_interval)
+            try:
+                await self.refresh_directory()
+            except Exception as e:
+                self.logger.error(f"Linear directory refresh failed: {e}")
+
+    async def _lookup(self, find, *args) -> Optional[Dict]:
+        """Look something up in the directory, treating a failed load as a miss"""
+        try:
+            await self.ensure_directory()
+        except Exception as e:
+            self.logger.warning(f"Linear directory unavailable, querying directly: {e}")
+            return None
+        return find(*args)
+
+    async def close(self):
+        """Stop the background refresh and close the HTTP session"""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+        if self.session is not None:
+            await self.client.close_async()
+            self.session = None
+
+    @traced("linear.create_issue")
+    async def create_issue(self,
+                           title: str,
+                           description: str,
+                           team_id: str,
+                           priority: int = 2,
+                           assignee_id: Optional[str] = None,
+                           state_id: Optional[str] = None,
+                           label_ids: Optional[List[str]] = None,
+                           issue_id: Optional[str] = None) -> Dict:
+        """Create a new issue in Linear
+
+        Args:
+            title (str): Issue title
+            description (str): Issue description
+            team_id (str): ID of the team the issue belongs to
+            priority (int, optional): Priority level (0-4). Defaults to 2
+            assignee_id (str, optional): ID of the user to assign the issue to
+            state_id (str, optional): ID of the workflow state. Defaults to the team's default state
+            label_ids (List[str], optional): IDs of labels to apply
+            issue_id (str, optional): Client-chosen issue ID, so a retried call cannot create a duplicate
+
+        Returns:
+            Dict: Created issue data
+        """
+        variables = {
+            "id": issue_id,
+            "title": title,
+            "description": description,
+            "teamId": team_id,
+            "priority": priority,
+            "assigneeId": assignee_id,
+            "stateId": state_id,
+            "labelIds": label_ids
+        }
+
+        result = await self._execute(documents.CREATE_ISSUE, variables)
+        return result["issueCreate"]["issue"]
+
+    @traced("linear.get_team_id")
+    async def get_team_id(self, team_name: str) -> Optional[str]:
+        """Get team ID by name, key or ID, from the directory when it knows the team"""
+        team = await self._lookup(self.directory.find_team, team_name)
+        if team:
+            return team["id"]
+        result = await self._execute(documents.GET_TEAM, {"teamName": team_name})
+        teams = result["teams"]["nodes"]
+        if len(teams) != 1:
+            # Unknown, or a name several teams share
+            return None
+        self.directory.upsert("teams", teams[0])
+        return teams[0]["id"]
+
+    @traced("linear.get_user_id")
+    async def get_user_id(self, email: str) -> Optional[str]:
+        """Get user ID by email, name or display name, from the directory when it knows the user"""
+        if not email:
+            return None
+        user = await self._lookup(self.directory.find_user, email)
+        if user:
+            return user["id"]
+        if "@" not in email:
+            return None
+        result = await self._execute(documents.GET_USER, {"email": email})
+        users = result["users"]["nodes"]
+        if not users:
+            return None
+        self.directory.upsert("users", users[0])
+        return users[0]["id"]
+
+    async def get_state_id(self, team_id: str, state_name: str) -> Optional[str]:
+        """Get a team's workflow state ID by name from the directory"""
+        state = await self._lookup(self.directory.find_state, team_id, state_name)
+        return state["id"] if state else None
+
+    async def get_label_ids(self, label_names: List[str], team_id: Optional[str] = None) -> List[str]:
+        """Get label IDs by name from the directory, skipping unknown names"""
+        labels = await self._lookup(self.directory.find_labels, label_names, team_id) or []
+        return [label["id"] for label in labels]
+
+    @traced("linear.update_issue")
+    async def update_issue(self, issue_id: str, **kwargs) -> Dict:
+        """Update an existing issue
+
+        Args:
+            issue_id (str): ID of the issue to update
+            **kwargs: Fields to update (title, description, priority, etc.)
+
+        Returns:
+            Dict: Updated issue data
+        """
+        result = await self._execute(documents.UPDATE_ISSUE, {"id": issue_id, "input": kwargs})
+        return result["issueUpdate"]["issue"]
+
+    @traced("linear.create_urgent_issue")
+    async def create_urgent_issue(self,
+                                  title: str,
+                                  description: str,
+                                  team_name: str,
+                                  assignee_email: Optional[str] = None) -> Dict:
+        """Create an urgent issue with high priority
+
+        Args:
+            title (str): Issue title
+            description (str): Issue description
+            team_name (str): Name of the team
+            assignee_email (str, optional): Email of the user to assign the issue to
+
+        Returns:
+            Dict: Created issue data
+        """
+        team_id, assignee_id = await asyncio.gather(
+            self.get_team_id(team_name), self.get_user_id(assignee_email)
+        )
+        if not team_id:
+            raise ValueError(f"Team '{team_name}' not found")
+        if assignee_email and not assignee_id:
+            raise ValueError(f"User with email '{assignee_email}' not found")
+
+        return await self.create_issue(
+            title=title,
+            description=description,
+            team_id=team_id,
+            priority=4,  # Highest priority
+            assignee_id=assignee_id
+        )
+
+    async def _run_batch(self, operation: str, document, items, results: List[Optional[Dict]]):
+        while items:
+            try:
+                data, errors = await self._execute(document(len(items)), self._batch_variables(items)), []
+            except TransportQueryError as e:
+                data, errors = e.data, e.errors or []
+            except (TransportError, aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                # Only this batch is lost; the others sent alongside it still report their results
+                self.logger.error(f"Linear batch {operation} of {len(items)} issues failed: {e}")
+                self._fail_batch(operation, items, e, results)
+                return
+            items = self._settle_batch(operation, items, data, errors, results)
+
+    @traced("linear.create_issues")
+    async def create_issues(self, issues: List[Dict]) -> List[Dict]:
+        """Create many issues in aliased batches, sending the batches concurrently
+
+        Args:
+            issues (List[Dict]): create_issue arguments per issue
+
+        Returns:
+            List[Dict]: One {"success", "issue", "error"} result per issue, in order
+        """
+        results: List[Optional[Dict]] = [None] * len(issues)
+        await asyncio.gather(*(
+            self._run_batch("create", documents.create_issues, chunk, results)
+            for chunk in self._chunks(self._create_items(issues), documents.create_issues)
+        ))
+        return results
+
+    @traced("linear.update_issues")
+    async def update_issues(self, updates: List[Dict]) -> List[Dict]:
+        """Update many issues in aliased batches, sending the batches concurrently
+
+        Args:
+            updates (List[Dict]): Per issue, its "id" and the fields to update as in update_issue
+
+        Returns:
+            List[Dict]: One {"success", "issue", "error"} result per update, in order
+        """
+        results: List[Optional[Dict]] = [None] * len(updates)
+        await asyncio.gather(*(
+            self._run_batch("update", documents.update_issues, chunk, results)
+            for chunk in self._chunks(self._update_items(updates), documents.update_issues)
+        ))
+        return results
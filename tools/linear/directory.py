@@ -0,0 +1,303 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from gql import GraphQLRequest
+
+from orchestrator.metrics import Counter
+from tools.linear import documents
+
+LINEAR_DIRECTORY_LOOKUPS = Counter(
+    "iris_linear_directory_lookups_total", "Linear directory lookups by result", ["kind", "result"]
+)
+
+# Directory kind -> (listing document, connection field)
+LISTINGS = {
+    "teams": (documents.LIST_TEAMS, "teams"),
+    "users": (documents.LIST_USERS, "users"),
+    "states": (documents.LIST_WORKFLOW_STATES, "workflowStates"),
+    "labels": (documents.LIST_LABELS, "issueLabels"),
+}
+
+# Seconds before retrying a failed load, doubling per failure up to the maximum
+LOAD_BACKOFF = 5.0
+MAX_LOAD_BACKOFF = 300.0
+
+
+def normalize(value: Optional[str]) -> str:
+    """Normalize a name, key or email for lookups
+
+    Lowercases, drops a leading "@" and collapses whitespace so
+    "@Ada  Lovelace" and "ada lovelace" resolve to the same user.
+    """
+    if not value:
+        return ""
+    return " ".join(value.strip().lstrip("@").split()).casefold()
+
+
+class LinearDirectory:
+    """In-memory directory of Linear teams, users, workflow states and labels
+
+    Loaded with one paginated bulk query per kind, so resolving a team
+    name or assignee email before creating an issue never costs a round
+    trip. A background thread asks for nodes updated since the last
+    refresh every `refresh_interval` seconds, and the whole directory is
+    reloaded once it is older than `ttl` to drop deleted or archived nodes.
+    A name shared by several nodes is ambiguous and resolves to nothing,
+    so callers never act on an arbitrary one of them.
+    """
+
+    def __init__(self, execute: Optional[Callable[[GraphQLRequest, Dict], Dict]] = None,
+                 page_size: Optional[int] = None, refresh_interval: Optional[float] = None,
+                 ttl: Optional[float] = None):
+        """Initialize the directory
+
+        Args:
+            execute (Callable, optional): Runs a document with variables, e.g. LinearService._execute
+            page_size (int, optional): Nodes per page. Defaults to IRIS_LINEAR_PAGE_SIZE or 250
+            refresh_interval (float, optional): Seconds between delta refreshes, 0 disables them.
+                Defaults to IRIS_LINEAR_DIRECTORY_REFRESH or 300
+            ttl (float, optional): Seconds before a full reload. Defaults to IRIS_LINEAR_DIRECTORY_TTL or 86400
+        """
+        self.execute = execute
+        self.page_size = page_size or int(os.environ.get("IRIS_LINEAR_PAGE_SIZE", 250))
+        self.refresh_interval = (
+            refresh_interval if refresh_interval is not None
+            else float(os.environ.get("IRIS_LINEAR_DIRECTORY_REFRESH", 300))
+        )
+        self.ttl = ttl if ttl is not None else float(os.environ.get("IRIS_LINEAR_DIRECTORY_TTL", 24 * 3600))
+        self.logger = logging.getLogger(__name__)
+        self.loaded = False
+
+        self._nodes: Dict[str, Dict[str, dict]] = {kind: {} for kind in LISTINGS}
+        self._since: Dict[str, str] = {}
+        self._loaded_at = 0.0
+        self._load_failures = 0
+        self._retry_at = 0.0
+        self._indexes: Dict[str, dict] = {}
+        self._reindex()
+
+        self._lock = threading.RLock()
+        self._stop = threading.Event()
+        self._refresher: Optional[threading.Thread] = None
+
+    def __len__(self) -> int:
+        return sum(len(nodes) for nodes in self._nodes.values())
+
+    def listing(self, kind: str, since: Optional[str] = None) -> Tuple[GraphQLRequest, str, Dict]:
+        """Document, connection field and first-page variables listing one kind
+
+        Args:
+            kind (str): "teams", "users", "states" or "labels"
+            since (str, optional): Only list nodes updated after this timestamp
+        """
+        document, field = LISTINGS[kind]
+        variables = {"first": self.page_size, "after": None, "filter": None}
+        if since:
+            variables["filter"] = {"updatedAt": {"gt": since}}
+        return document, field, variables
+
+    def _list(self, kind: str, since: Optional[str] = None) -> Iterator[dict]:
+        document, field, variables = self.listing(kind, since)
+        while True:
+            connection = self.execute(document, variables)[field]
+            yield from connection["nodes"]
+            page_info = connection["pageInfo"]
+            if not page_info["hasNextPage"]:
+                return
+            variables["after"] = page_info["endCursor"]
+
+    def load(self) -> int:
+        """Load every team, user, workflow state and label
+
+        Returns:
+            int: Number of nodes loaded
+        """
+        if self.execute is None:
+            raise ValueError("An execute callable is required to load the Linear directory")
+        self.replace({kind: list(self._list(kind)) for kind in LISTINGS})
+        return len(self)
+
+    def refresh(self) -> int:
+        """Fetch nodes updated since the last refresh, or reload once the TTL has passed
+
+        Returns:
+            int: Number of nodes added or changed
+        """
+        if self.needs_reload():
+            return self.load()
+        return self.merge({kind: list(self._list(kind, self.since(kind))) for kind in LISTINGS})
+
+    def needs_reload(self) -> bool:
+        """Whether the directory was never loaded or is older than the TTL"""
+        return not self.loaded or time.monotonic() - self._loaded_at >= self.ttl
+
+    def since(self, kind: str) -> Optional[str]:
+        """Latest updatedAt seen for a kind, the starting point of its next delta"""
+        return self._since.get(kind) or None
+
+    def replace(self, nodes: Dict[str, List[dict]]):
+        """Rebuild the directory from full listings of every kind"""
+        by_kind = {kind: {node["id"]: node for node in nodes.get(kind, [])} for kind in LISTINGS}
+        with self._lock:
+            self._nodes = by_kind
+            self._since = {kind: self._latest(kind_nodes.values()) for kind, kind_nodes in by_kind.items()}
+            self._loaded_at = time.monotonic()
+            self._load_failures = 0
+            self._reindex()
+            self.loaded = True
+        self.logger.info(
+            "Loaded Linear directory: " + ", ".join(f"{len(by_kind[kind])} {kind}" for kind in LISTINGS)
+        )
+
+    def merge(self, changed: Dict[str, List[dict]]) -> int:
+        """Apply nodes updated since the last refresh
+
+        Returns:
+            int: Number of nodes added or changed
+        """
+        count = sum(len(nodes) for nodes in changed.values())
+        if count:
+            with self._lock:
+                for kind, nodes in changed.items():
+                    for node in nodes:
+                        self._nodes[kind][node["id"]] = node
+                    self._since[kind] = max(self._since.get(kind, ""), self._latest(nodes))
+                self._reindex()
+            self.logger.info(f"Refreshed {count} Linear directory entries")
+        return count
+
+    @staticmethod
+    def _latest(nodes) -> str:
+        return max((node.get("updatedAt") or "" for node in nodes), default="")
+
+    def check_backoff(self):
+        """Raise while a failed load is backing off, instead of hitting the API on every lookup"""
+        wait = self._retry_at - time.monotonic()
+        if self._load_failures and wait > 0:
+            raise RuntimeError(
+                f"Linear directory load failed {self._load_failures} time(s), next attempt in {wait:.0f}s"
+            )
+
+    def load_failed(self, error: Exception):
+        """Record a failed load and schedule the next attempt"""
+        self._load_failures += 1
+        backoff = min(LOAD_BACKOFF * 2 ** (self._load_failures - 1), MAX_LOAD_BACKOFF)
+        self._retry_at = time.monotonic() + backoff
+        self.logger.error(f"Loading the Linear directory failed, retrying in {backoff:.0f}s: {error}")
+
+    def ensure_loaded(self):
+        """Load the directory on first use and start the background refresh
+
+        Raises:
+            RuntimeError: While backing off after a failed load
+        """
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.check_backoff()
+                    try:
+                        self.load()
+                    except Exception as e:
+                        self.load_failed(e)
+                        raise
+        if self._refresher is None and self.refresh_interval > 0 and not self._stop.is_set():
+            with self._lock:
+                if self._refresher is None:
+                    self._refresher = threading.Thread(target=self._run, name="linear-directory", daemon=True)
+                    self._refresher.start()
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.logger.error(f"Linear directory refresh failed: {e}")
+
+    def close(self):
+        """Stop the background refresh"""
+        self._stop.set()
+        if self._refresher is not None:
+            self._refresher.join(timeout=5)
+            self._refresher = None
+
+    def upsert(self, kind: str, node: dict):
+        """Add or update a single node, e.g. one found by a direct query after a miss"""
+        if not node or not node.get("id"):
+            return
+        with self._lock:
+            self._nodes[kind][node["id"]] = node
+            self._reindex()
+
+    @staticmethod
+    def _index_name(index: dict, key, node: dict):
+        # None marks a name claimed by several nodes
+        if key in index and index[key] is not None and index[key]["id"] != node["id"]:
+            index[key] = None
+        elif key not in index:
+            index[key] = node
+
+    def _reindex(self):
+        teams, users, states, labels = {}, {}, {}, {}
+        for team in self._nodes["teams"].values():
+            teams[team["id"]] = team
+        for team in self._nodes["teams"].values():
+            for key in (normalize(team.get("key")), normalize(team.get("name"))):
+                if key:
+                    self._index_name(teams, key, team)
+        for user in self._nodes["users"].values():
+            users[user["id"]] = user
+        for user in self._nodes["users"].values():
+            if user.get("active") is False:
+                # Deactivated users stay resolvable by ID but never shadow active users
+                continue
+            for key in (normalize(user.get("email")), normalize(user.get("name")), normalize(user.get("displayName"))):
+                if key:
+                    self._index_name(users, key, user)
+        for state in self._nodes["states"].values():
+            states[state["id"]] = state
+        for state in self._nodes["states"].values():
+            team_id = (state.get("team") or {}).get("id")
+            self._index_name(states, (team_id, normalize(state.get("name"))), state)
+        for label in self._nodes["labels"].values():
+            labels[label["id"]] = label
+        for label in self._nodes["labels"].values():
+            team_id = (label.get("team") or {}).get("id")
+            self._index_name(labels, (team_id, normalize(label.get("name"))), label)
+        self._indexes = {"teams": teams, "users": users, "states": states, "labels": labels}
+
+    def _find(self, kind: str, *keys) -> Optional[dict]:
+        index = self._indexes[kind]
+        for key in keys:
+            if key in index:
+                node = index[key]
+                LINEAR_DIRECTORY_LOOKUPS.labels(kind=kind, result="hit" if node else "ambiguous").inc()
+                return node
+        LINEAR_DIRECTORY_LOOKUPS.labels(kind=kind, result="miss").inc()
+        return None
+
+    def find_team(self, value: str) -> Optional[dict]:
+        """Look up a team by ID, key or name, None if unknown or ambiguous"""
+        return self._find("teams", value, normalize(value))
+
+    def find_user(self, value: str) -> Optional[dict]:
+        """Look up a user by ID, email, name or display name, None if unknown or ambiguous"""
+        return self._find("users", value, normalize(value))
+
+    def find_state(self, team_id: str, name: str) -> Optional[dict]:
+        """Look up a team's workflow state by ID or name, such as In Progress"""
+        return self._find("states", name, (team_id, normalize(name)))
+
+    def find_labels(self, names: List[str], team_id: Optional[str] = None) -> List[dict]:
+        """Look up labels by ID or name, preferring the team's labels over workspace labels
+
+        Names that match no label, or several, are skipped.
+        """
+        labels = []
+        for name in names:
+            label = self._find("labels", name, (team_id, normalize(name)), (None, normalize(name)))
+            if label:
+                labels.append(label)
+        return labels
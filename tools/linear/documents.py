@@ -0,0 +1,245 @@
+from functools import lru_cache
+from typing import Dict, List
+
+from gql import GraphQLRequest, gql
+from graphql import FieldNode, GraphQLError, GraphQLSchema, OperationDefinitionNode, SelectionSetNode, validate
+
+# Every GraphQL document LinearService sends, parsed once at import
+
+CREATE_ISSUE = gql("""
+    mutation CreateIssue(
+        $id: String
+        $title: String!
+        $description: String!
+        $teamId: String!
+        $priority: Int
+        $assigneeId: String
+        $stateId: String
+        $labelIds: [String!]
+    ) {
+        issueCreate(input: {
+            id: $id
+            title: $title
+            description: $description
+            teamId: $teamId
+            priority: $priority
+            assigneeId: $assigneeId
+            stateId: $stateId
+            labelIds: $labelIds
+        }) {
+            success
+            issue {
+                id
+                title
+                url
+                priority
+                assignee {
+                    id
+                    name
+                }
+            }
+        }
+    }
+""")
+
+GET_TEAM = gql("""
+    query GetTeam($teamName: String!) {
+        teams(filter: { name: { eq: $teamName } }) {
+            nodes {
+                id
+                name
+            }
+        }
+    }
+""")
+
+GET_USER = gql("""
+    query GetUser($email: String!) {
+        users(filter: { email: { eq: $email } }) {
+            nodes {
+                id
+                name
+                email
+            }
+        }
+    }
+""")
+
+UPDATE_ISSUE = gql("""
+    mutation UpdateIssue($id: String!, $input: IssueUpdateInput!) {
+        issueUpdate(id: $id, input: $input) {
+            success
+            issue {
+                id
+                title
+                description
+                priority
+                state {
+                    name
+                }
+            }
+        }
+    }
+""")
+
+# Directory listings, paginated and optionally filtered on updatedAt for delta refreshes
+
+LIST_TEAMS = gql("""
+    query ListTeams($first: Int, $after: String, $filter: TeamFilter) {
+        teams(first: $first, after: $after, filter: $filter) {
+            nodes {
+                id
+                name
+                key
+                updatedAt
+            }
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
+        }
+    }
+""")
+
+LIST_USERS = gql("""
+    query ListUsers($first: Int, $after: String, $filter: UserFilter) {
+        users(first: $first, after: $after, filter: $filter, includeDisabled: true) {
+            nodes {
+                id
+                name
+                displayName
+                email
+                active
+                updatedAt
+            }
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
+        }
+    }
+""")
+
+LIST_WORKFLOW_STATES = gql("""
+    query ListWorkflowStates($first: Int, $after: String, $filter: WorkflowStateFilter) {
+        workflowStates(first: $first, after: $after, filter: $filter) {
+            nodes {
+                id
+                name
+                type
+                team {
+                    id
+                }
+                updatedAt
+            }
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
+        }
+    }
+""")
+
+LIST_LABELS = gql("""
+    query ListLabels($first: Int, $after: String, $filter: IssueLabelFilter) {
+        issueLabels(first: $first, after: $after, filter: $filter) {
+            nodes {
+                id
+                name
+                team {
+                    id
+                }
+                updatedAt
+            }
+            pageInfo {
+                hasNextPage
+                endCursor
+            }
+        }
+    }
+""")
+
+# Batched mutations: one aliased field per item, i0 ... iN, each with its own input variable
+
+ISSUE_PAYLOAD = """
+    success
+    issue {
+        id
+        title
+        url
+        priority
+        state {
+            name
+        }
+        assignee {
+            id
+            name
+        }
+    }
+"""
+
+
+def _batch(operation: str, count: int, variables: str, field: str) -> GraphQLRequest:
+    definitions = ", ".join(variables.format(n=n) for n in range(count))
+    fields = "\n".join(f"i{n}: {field.format(n=n)} {{{ISSUE_PAYLOAD}}}" for n in range(count))
+    return gql(f"mutation {operation}({definitions}) {{\n{fields}\n}}")
+
+
+@lru_cache(maxsize=64)
+def create_issues(count: int) -> GraphQLRequest:
+    """Mutation creating `count` issues, with variables $i0 ... as IssueCreateInput"""
+    return _batch("CreateIssues", count, "$i{n}: IssueCreateInput!", "issueCreate(input: $i{n})")
+
+
+@lru_cache(maxsize=64)
+def update_issues(count: int) -> GraphQLRequest:
+    """Mutation updating `count` issues, with variables $id0 ... and $i0 ... as IssueUpdateInput"""
+    return _batch("UpdateIssues", count, "$id{n}: String!, $i{n}: IssueUpdateInput!",
+                  "issueUpdate(id: $id{n}, input: $i{n})")
+
+
+def _selection_complexity(selection_set: SelectionSetNode) -> float:
+    cost = 0.0
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode) and selection.selection_set:
+            cost += 1 + _selection_complexity(selection.selection_set)
+        else:
+            cost += 0.1
+    return cost
+
+
+def estimate_complexity(request: GraphQLRequest) -> float:
+    """Rough complexity of a document by Linear's rules: 1 point per object, 0.1 per scalar field"""
+    return sum(
+        _selection_complexity(definition.selection_set)
+        for definition in request.document.definitions
+        if isinstance(definition, OperationDefinitionNode)
+    )
+
+
+DOCUMENTS = {
+    "CreateIssue": CREATE_ISSUE,
+    "GetTeam": GET_TEAM,
+    "GetUser": GET_USER,
+    "UpdateIssue": UPDATE_ISSUE,
+    "ListTeams": LIST_TEAMS,
+    "ListUsers": LIST_USERS,
+    "ListWorkflowStates": LIST_WORKFLOW_STATES,
+    "ListLabels": LIST_LABELS,
+    "CreateIssues": create_issues(1),
+    "UpdateIssues": update_issues(1),
+}
+
+
+def validate_documents(schema: GraphQLSchema) -> Dict[str, List[GraphQLError]]:
+    """Validate every document against a schema
+
+    Returns:
+        Dict[str, List[GraphQLError]]: Errors by operation name, empty if all documents are valid
+    """
+    errors = {}
+    for name, request in DOCUMENTS.items():
+        document_errors = validate(schema, request.document)
+        if document_errors:
+            errors[name] = document_errors
+    return errors
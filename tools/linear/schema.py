@@ -0,0 +1,77 @@
+import json
+import logging
+import os
+import time
+from typing import Optional
+
+import gql
+import graphql
+
+# Bump when the cache file layout changes
+CACHE_FORMAT = 1
+
+
+class LinearSchemaCache:
+    """Linear's introspection result, cached on disk
+
+    Introspecting the Linear API is a large round-trip, so the result is
+    kept in a JSON file and reused until it expires. An entry is ignored
+    when it is older than the TTL, was written for another API URL, or by
+    another version of gql/graphql-core or of this file format. Callers
+    also invalidate it when the documents stop validating against it,
+    which is how an upstream schema change is noticed.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None, url: str = ""):
+        """Initialize the cache
+
+        Args:
+            path (str, optional): Cache file. Defaults to IRIS_LINEAR_SCHEMA_CACHE or linear_schema.json in IRIS_DATA_DIR
+            ttl (float, optional): Seconds an entry stays valid. Defaults to IRIS_LINEAR_SCHEMA_TTL or 7 days
+            url (str, optional): API URL the schema belongs to
+        """
+        self.path = path or os.environ.get(
+            "IRIS_LINEAR_SCHEMA_CACHE", os.path.join(os.environ.get("IRIS_DATA_DIR", ".iris"), "linear_schema.json")
+        )
+        self.ttl = ttl if ttl is not None else float(os.environ.get("IRIS_LINEAR_SCHEMA_TTL", 7 * 24 * 3600))
+        self.url = url
+        self.logger = logging.getLogger(__name__)
+
+    def _version(self) -> dict:
+        return {"format": CACHE_FORMAT, "gql": gql.__version__, "graphql_core": graphql.__version__, "url": self.url}
+
+    def load(self) -> Optional[dict]:
+        """Cached introspection result, or None if missing, stale or from another version"""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable Linear schema cache {self.path}: {e}")
+            return None
+        if entry.get("version") != self._version():
+            self.logger.info("Linear schema cache was written by another version, refetching")
+            return None
+        if time.time() - entry.get("fetched_at", 0) > self.ttl:
+            self.logger.info("Linear schema cache expired, refetching")
+            return None
+        return entry.get("introspection")
+
+    def save(self, introspection: dict):
+        """Write an introspection result, atomically"""
+        entry = {"version": self._version(), "fetched_at": time.time(), "introspection": introspection}
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            self.logger.warning(f"Could not write Linear schema cache: {e}")
+
+    def invalidate(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
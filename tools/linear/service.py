@@ -1,31 +1,151 @@
-from gql import gql, Client
+from gql import Client, GraphQLRequest
+from gql.transport.exceptions import TransportError, TransportQueryError
 from gql.transport.requests import RequestsHTTPTransport
-from typing import Dict, List, Optional
+from gql.utilities import build_client_schema
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
 import os
+import re
+import uuid
+
+from orchestrator.metrics import Counter
+from orchestrator.tracing import traced
+from tools.linear import documents
+from tools.linear.directory import LinearDirectory
+from tools.linear.schema import LinearSchemaCache
+
+LINEAR_API_URL = 'https://api.linear.app/graphql'
+
+LINEAR_BATCH_ITEMS = Counter(
+    "iris_linear_batch_items_total", "Issues created or updated through batched mutations", ["operation", "status"]
+)
+
+# create_issue argument -> IssueCreateInput field
+_CREATE_FIELDS = {
+    "title": "title",
+    "description": "description",
+    "team_id": "teamId",
+    "priority": "priority",
+    "assignee_id": "assigneeId",
+    "state_id": "stateId",
+    "label_ids": "labelIds",
+}
+
+# Where an error points at a batch item: the i<n> alias in its path, or $i<n> / $id<n> in a variable error
+_ALIAS = re.compile(r"^i(\d+)$")
+_VARIABLE = re.compile(r"\$(?:id|i)(\d+)\b")
+
+# Failures after which a batch may or may not have been applied, e.g. a 5xx, a dropped connection or a timeout
+_TRANSPORT_ERRORS = (TransportError, OSError)
+
+
+class ValidatingClient(Client):
+    """gql Client that validates each document against the schema only once
+    
+    The stock client re-validates the whole document on every execute.
+    Documents here are module-level constants, so a successful validation
+    is remembered per document object.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._validated = {}
+    
+    def validate(self, request):
+        document = request.document
+        if self._validated.get(id(document)) is document:
+            return
+        super().validate(request)
+        self._validated[id(document)] = document
+
 
 class LinearService:
-    def __init__(self, api_key: str = None):
+    def __init__(self, api_key: str = None, schema_cache: LinearSchemaCache = None, transport=None,
+                 directory: LinearDirectory = None, complexity_budget: Optional[float] = None,
+                 max_batch: Optional[int] = None):
         """Initialize Linear service with API key
         
+        The API schema comes from an on-disk cache when it is fresh and
+        every document still validates against it; otherwise it is
+        introspected on the first request and cached for the next start.
+        Team, user, workflow state and label lookups are answered from a
+        LinearDirectory loaded on first use.
+        
         Args:
             api_key (str, optional): Linear API key. If not provided, will look for LINEAR_API_KEY env variable
+            schema_cache (LinearSchemaCache, optional): Schema cache. Defaults to one under IRIS_DATA_DIR
+            transport (optional): gql transport, e.g. a recorded or fake backend. Defaults to HTTP
+            directory (LinearDirectory, optional): Lookup directory. Defaults to one refreshed in the background
+            complexity_budget (float, optional): Estimated complexity allowed per batched request.
+                Defaults to IRIS_LINEAR_COMPLEXITY_BUDGET or 10000, Linear's per-request limit
+            max_batch (int, optional): Mutations per batched request. Defaults to IRIS_LINEAR_BATCH_SIZE or 50
         """
         self.api_key = api_key or os.environ.get('LINEAR_API_KEY')
         if not self.api_key:
             raise ValueError("Linear API key must be provided or set in LINEAR_API_KEY environment variable")
+        self.logger = logging.getLogger(__name__)
+        self.complexity_budget = complexity_budget or float(os.environ.get("IRIS_LINEAR_COMPLEXITY_BUDGET", 10000))
+        self.max_batch = max_batch or int(os.environ.get("IRIS_LINEAR_BATCH_SIZE", 50))
 
-        transport = RequestsHTTPTransport(
-            url='https://api.linear.app/graphql',
+        transport = transport or RequestsHTTPTransport(
+            url=LINEAR_API_URL,
             headers={'Authorization': self.api_key}
         )
-        self.client = Client(transport=transport, fetch_schema_from_transport=True)
+        self.schema_cache = schema_cache or LinearSchemaCache(url=LINEAR_API_URL)
+        introspection = self._cached_introspection()
+        self._schema_cached = introspection is not None
+        self.client = ValidatingClient(
+            transport=transport,
+            introspection=introspection,
+            fetch_schema_from_transport=introspection is None
+        )
+        self.directory = directory if directory is not None else LinearDirectory()
+        if self.directory.execute is None:
+            self.directory.execute = self._execute
+    
+    def _cached_introspection(self) -> Optional[Dict]:
+        introspection = self.schema_cache.load()
+        if introspection is None:
+            return None
+        errors = documents.validate_documents(build_client_schema(introspection))
+        if errors:
+            # Linear changed the schema under us
+            self.logger.info(f"Cached Linear schema rejects {', '.join(errors)}, refetching")
+            self.schema_cache.invalidate()
+            return None
+        return introspection
+    
+    def _execute(self, request: GraphQLRequest, variables: Optional[Dict] = None) -> Dict:
+        """Run a precompiled document from tools.linear.documents"""
+        result = self.client.execute(GraphQLRequest(request, variable_values=variables))
+        if not self._schema_cached and self.client.introspection:
+            self.schema_cache.save(self.client.introspection)
+            self._schema_cached = True
+        return result
+
+    def _lookup(self, find, *args) -> Optional[Dict]:
+        """Look something up in the directory, treating a failed load as a miss"""
+        try:
+            self.directory.ensure_loaded()
+        except Exception as e:
+            self.logger.warning(f"Linear directory unavailable, querying directly: {e}")
+            return None
+        return find(*args)
 
+    def close(self):
+        """Stop the directory's background refresh"""
+        self.directory.close()
+
+    @traced("linear.create_issue")
     def create_issue(self, 
                     title: str, 
                     description: str, 
                     team_id: str,
                     priority: int = 2,
-                    assignee_id: Optional[str] = None) -> Dict:
+                    assignee_id: Optional[str] = None,
+                    state_id: Optional[str] = None,
+                    label_ids: Optional[List[str]] = None,
+                    issue_id: Optional[str] = None) -> Dict:
         print("Creating issue", title, description, team_id, priority, assignee_id)
         """Create a new issue in Linear
         
@@ -35,100 +155,89 @@ class LinearService:
             team_id (str): ID of the team the issue belongs to
             priority (int, optional): Priority level (0-4). Defaults to 2
             assignee_id (str, optional): ID of the user to assign the issue to
+            state_id (str, optional): ID of the workflow state. Defaults to the team's default state
+            label_ids (List[str], optional): IDs of labels to apply
+            issue_id (str, optional): Client-chosen issue ID, so a retried call cannot create a duplicate
         
         Returns:
             Dict: Created issue data
         """
-        mutation = gql("""
-            mutation CreateIssue(
-                $title: String!
-                $description: String!
-                $teamId: String!
-                $priority: Int
-                $assigneeId: String
-            ) {
-                issueCreate(input: {
-                    title: $title
-                    description: $description
-                    teamId: $teamId
-                    priority: $priority
-                    assigneeId: $assigneeId
-                }) {
-                    success
-                    issue {
-                        id
-                        title
-                        url
-                        priority
-                        assignee {
-                            id
-                            name
-                        }
-                    }
-                }
-            }
-        """)
-
         variables = {
+            "id": issue_id,
             "title": title,
             "description": description,
             "teamId": team_id,
             "priority": priority,
-            "assigneeId": assignee_id
+            "assigneeId": assignee_id,
+            "stateId": state_id,
+            "labelIds": label_ids
         }
 
-        result = self.client.execute(mutation, variable_values=variables)
+        result = self._execute(documents.CREATE_ISSUE, variables)
         return result["issueCreate"]["issue"]
 
+    @traced("linear.get_team_id")
     def get_team_id(self, team_name: str) -> Optional[str]:
         """Get team ID by name
         
+        Answered from the directory; only a team it does not know yet
+        costs a query.
+        
         Args:
-            team_name (str): Name of the team
+            team_name (str): Name, key or ID of the team
             
         Returns:
-            Optional[str]: Team ID if found, None otherwise
+            Optional[str]: Team ID if exactly one team matches, None otherwise
         """
-        query = gql("""
-            query GetTeam($teamName: String!) {
-                teams(filter: { name: { eq: $teamName } }) {
-                    nodes {
-                        id
-                        name
-                    }
-                }
-            }
-        """)
-
-        result = self.client.execute(query, variable_values={"teamName": team_name})
+        team = self._lookup(self.directory.find_team, team_name)
+        if team:
+            return team["id"]
+        result = self._execute(documents.GET_TEAM, {"teamName": team_name})
         teams = result["teams"]["nodes"]
-        return teams[0]["id"] if teams else None
+        if len(teams) != 1:
+            # Unknown, or a name several teams share
+            return None
+        self.directory.upsert("teams", teams[0])
+        return teams[0]["id"]
 
+    @traced("linear.get_user_id")
     def get_user_id(self, email: str) -> Optional[str]:
         """Get user ID by email
         
+        Answered from the directory, which also knows users by name; only
+        an email it does not know yet costs a query.
+        
         Args:
-            email (str): User's email address
+            email (str): User's email address, name or display name
             
         Returns:
             Optional[str]: User ID if found, None otherwise
         """
-        query = gql("""
-            query GetUser($email: String!) {
-                users(filter: { email: { eq: $email } }) {
-                    nodes {
-                        id
-                        name
-                        email
-                    }
-                }
-            }
-        """)
-
-        result = self.client.execute(query, variable_values={"email": email})
+        if not email:
+            return None
+        user = self._lookup(self.directory.find_user, email)
+        if user:
+            return user["id"]
+        if "@" not in email:
+            return None
+        result = self._execute(documents.GET_USER, {"email": email})
         users = result["users"]["nodes"]
-        return users[0]["id"] if users else None
+        if not users:
+            return None
+        self.directory.upsert("users", users[0])
+        return users[0]["id"]
 
+    def get_state_id(self, team_id: str, state_name: str) -> Optional[str]:
+        """Get a team's workflow state ID by name, e.g. "In Progress", from the directory"""
+        state = self._lookup(self.directory.find_state, team_id, state_name)
+        return state["id"] if state else None
+
+    def get_label_ids(self, label_names: List[str], team_id: Optional[str] = None) -> List[str]:
+        """Get label IDs by name from the directory, skipping unknown names"""
+        labels = self._lookup(self.directory.find_labels, label_names, team_id) or []
+        return [label["id"] for label in labels]
+
+    @traced("linear.update_issue")
     def update_issue(self, 
                     issue_id: str, 
                     **kwargs) -> Dict:
@@ -141,31 +250,15 @@ class LinearService:
         Returns:
             Dict: Updated issue data
         """
-        mutation = gql("""
-            mutation UpdateIssue($id: String!, $input: IssueUpdateInput!) {
-                issueUpdate(id: $id, input: $input) {
-                    success
-                    issue {
-                        id
-                        title
-                        description
-                        priority
-                        status {
-                            name
-                        }
-                    }
-                }
-            }
-        """)
-
         variables = {
             "id": issue_id,
             "input": kwargs
         }
 
-        result = self.client.execute(mutation, variable_values=variables)
+        result = self._execute(documents.UPDATE_ISSUE, variables)
         return result["issueUpdate"]["issue"]
 
+    @traced("linear.create_urgent_issue")
     def create_urgent_issue(self, 
                           title: str, 
                           description: str,
@@ -199,3 +292,144 @@ class LinearService:
             priority=4,  # Highest priority
             assignee_id=assignee_id
         )
+
+    def _chunks(self, items: List, document: Callable[[int], GraphQLRequest]) -> List[List]:
+        """Split items into batches that stay under the complexity budget and batch size"""
+        cost = documents.estimate_complexity(document(1))
+        per_request = max(1, min(self.max_batch, int(self.complexity_budget // cost)))
+        return [items[i:i + per_request] for i in range(0, len(items), per_request)]
+
+    @staticmethod
+    def _batch_variables(items: List[Tuple[int, str, Dict]]) -> Dict:
+        variables = {}
+        for position, (_, _, item_variables) in enumerate(items):
+            variables.update({name.format(n=position): value for name, value in item_variables.items()})
+        return variables
+
+    @staticmethod
+    def _settle_batch(operation: str, items: List[Tuple[int, str, Dict]], data: Optional[Dict], errors: List,
+                      results: List[Optional[Dict]]) -> List[Tuple[int, str, Dict]]:
+        """Record a result per item of a sent batch and return the items to send again
+
+        Mutations run in order and a failed one aborts the rest with no
+        data. Items before the failure were applied, so they are reported
+        with just their issue ID; items after it are sent again. When a
+        variable is rejected nothing ran, and the other items are resent.
+        """
+        failed, aborted = {}, False
+        for error in errors:
+            message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+            path = (error.get("path") if isinstance(error, dict) else None) or []
+            match = _ALIAS.match(str(path[0])) if path else _VARIABLE.search(message)
+            if match:
+                failed.setdefault(int(match.group(1)), message)
+                aborted = aborted or bool(path)
+            else:
+                # Not tied to an item, e.g. authentication or rate limiting
+                failed = {position: message for position in range(len(items))}
+                break
+
+        for position, message in failed.items():
+            results[items[position][0]] = {"success": False, "issue": None, "error": message}
+            LINEAR_BATCH_ITEMS.labels(operation=operation, status="error").inc()
+
+        if data is not None:
+            for position, (index, _, _) in enumerate(items):
+                payload = data.get(f"i{position}")
+                if payload is not None:
+                    results[index] = {"success": payload["success"], "issue": payload["issue"], "error": None}
+                    LINEAR_BATCH_ITEMS.labels(operation=operation, status="ok").inc()
+                elif results[index] is None:
+                    results[index] = {"success": False, "issue": None, "error": "No result returned"}
+            return []
+
+        if not aborted:
+            return [item for position, item in enumerate(items) if position not in failed]
+        first = min(failed)
+        for index, issue_id, _ in items[:first]:
+            results[index] = {"success": True, "issue": {"id": issue_id}, "error": None}
+            LINEAR_BATCH_ITEMS.labels(operation=operation, status="ok").inc()
+        return items[first + 1:]
+
+    @staticmethod
+    def _fail_batch(operation: str, items: List[Tuple[int, str, Dict]], error: Exception,
+                    results: List[Optional[Dict]]):
+        """Report every item of a batch whose request failed in transport
+
+        The items keep their issue IDs, so sending them again with the same
+        "id" cannot create duplicates of issues that were in fact created.
+        """
+        message = f"Request failed and may or may not have been applied: {error}"
+        for index, issue_id, _ in items:
+            results[index] = {"success": False, "issue": {"id": issue_id}, "error": message}
+            LINEAR_BATCH_ITEMS.labels(operation=operation, status="error").inc()
+
+    def _run_batch(self, operation: str, document: Callable[[int], GraphQLRequest],
+                   items: List[Tuple[int, str, Dict]], results: List[Optional[Dict]]):
+        """Send one batch of (index, issue ID, variables) items until every item has a result"""
+        while items:
+            try:
+                data, errors = self._execute(document(len(items)), self._batch_variables(items)), []
+            except TransportQueryError as e:
+                data, errors = e.data, e.errors or []
+            except _TRANSPORT_ERRORS as e:
+                self.logger.error(f"Linear batch {operation} of {len(items)} issues failed: {e}")
+                self._fail_batch(operation, items, e, results)
+                return
+            items = self._settle_batch(operation, items, data, errors, results)
+
+    @staticmethod
+    def _create_items(issues: List[Dict]) -> List[Tuple[int, str, Dict]]:
+        items = []
+        for index, issue in enumerate(issues):
+            issue_input = {field: issue[name] for name, field in _CREATE_FIELDS.items() if issue.get(name) is not None}
+            issue_input.setdefault("priority", 2)
+            issue_input["id"] = issue.get("id") or str(uuid.uuid4())
+            items.append((index, issue_input["id"], {"i{n}": issue_input}))
+        return items
+
+    @staticmethod
+    def _update_items(updates: List[Dict]) -> List[Tuple[int, str, Dict]]:
+        items = []
+        for index, update in enumerate(updates):
+            fields = {name: value for name, value in update.items() if name != "id"}
+            items.append((index, update["id"], {"id{n}": update["id"], "i{n}": fields}))
+        return items
+
+    @traced("linear.create_issues")
+    def create_issues(self, issues: List[Dict]) -> List[Dict]:
+        """Create many issues with as few requests as possible
+        
+        Issues are packed into aliased issueCreate mutations, split by the
+        complexity budget. Each issue gets a client-generated ID so one
+        applied before a failure in the same request is still reported.
+        A batch whose request fails in transport does not stop the others;
+        its issues are reported failed with their IDs, and passing those
+        back as "id" retries them without creating duplicates.
+        
+        Args:
+            issues (List[Dict]): create_issue arguments per issue (title, description, team_id,
+                priority, assignee_id, state_id, label_ids), optionally with the "id" to create it under
+        
+        Returns:
+            List[Dict]: One {"success", "issue", "error"} result per issue, in order
+        """
+        results: List[Optional[Dict]] = [None] * len(issues)
+        for chunk in self._chunks(self._create_items(issues), documents.create_issues):
+            self._run_batch("create", documents.create_issues, chunk, results)
+        return results
+
+    @traced("linear.update_issues")
+    def update_issues(self, updates: List[Dict]) -> List[Dict]:
+        """Update many issues with as few requests as possible
+        
+        Args:
+            updates (List[Dict]): Per issue, its "id" and the fields to update as in update_issue
+        
+        Returns:
+            List[Dict]: One {"success", "issue", "error"} result per update, in order
+        """
+        results: List[Optional[Dict]] = [None] * len(updates)
+        for chunk in self._chunks(self._update_items(updates), documents.update_issues):
+            self._run_batch("update", documents.update_issues, chunk, results)
+        return results
@@ -0,0 +1,424 @@
+import asyncio
+import inspect
+import logging
+import os
+import time
+from typing import List, Optional
+
+import aiohttp
+from slack_sdk.errors import SlackApiError
+from slack_sdk.socket_mode.aiohttp import SocketModeClient
+from slack_sdk.socket_mode.request import SocketModeRequest
+from slack_sdk.socket_mode.response import SocketModeResponse
+from slack_sdk.web.async_client import AsyncWebClient
+
+from orchestrator.metrics import QUEUE_DEPTH, QUEUE_WAIT, SLACK_EVENT_LAG
+from orchestrator.tracing import traced
+from tools.slack.dedup import EventDeduplicator, event_keys
+from tools.slack.directory import SlackUserDirectory
+from tools.slack.dispatcher import KeyedQueue, event_key
+from tools.slack.service import SlackService
+
+
+class AsyncEventDispatcher:
+    """asyncio counterpart of EventDispatcher
+
+    Both keep their events in a KeyedQueue, so ordering and fairness are
+    the same; this one guards it with asyncio conditions instead of
+    threading ones. Each key (a channel or thread) has its own FIFO and is handled by at
+    most one worker task at a time, so events with the same key run in
+    order while different keys run concurrently. At most `max_pending`
+    events are held; submit() waits for space once that is reached.
+    """
+
+    def __init__(self, handler, concurrency: int = 100, max_pending: int = 1000, name: str = "slack_events_async"):
+        """Initialize the dispatcher
+
+        Args:
+            handler: Coroutine function, or plain function run in a worker thread
+            concurrency (int, optional): Handlers running at once. Defaults to 100
+            max_pending (int, optional): Events queued before submit() waits. Defaults to 1000
+            name (str, optional): Queue name used in metrics. Defaults to "slack_events_async"
+        """
+        self.handler = handler
+        self.concurrency = max(concurrency, 1)
+        self.max_pending = max_pending
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        self._events = KeyedQueue()
+        self._running = True
+        lock = asyncio.Lock()
+        self._condition = asyncio.Condition(lock)
+        self._space = asyncio.Condition(lock)
+        self._idle = asyncio.Condition(lock)
+        self._workers: List[asyncio.Task] = []
+
+        self._unregister_depth = QUEUE_DEPTH.labels(queue=name).add_function(lambda: self._events.pending)
+
+    @property
+    def pending(self) -> int:
+        return self._events.pending
+
+    def _start(self):
+        # Worker tasks need a running loop, so they start with the first event
+        if not self._workers:
+            self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.concurrency)]
+
+    async def submit(self, key: str, *args, timeout: Optional[float] = None) -> bool:
+        """Queue an event behind earlier events with the same key
+
+        Waits while the dispatcher is full, which pushes back on the
+        producer instead of growing without bound.
+
+        Args:
+            key (str): Ordering key, see event_key()
+            *args: Arguments for the handler
+            timeout (float, optional): Seconds to wait for space. Waits forever by default
+
+        Returns:
+            bool: False if the event was dropped because the dispatcher is stopped or stayed full
+        """
+        async with self._condition:
+            try:
+                await asyncio.wait_for(
+                    self._space.wait_for(lambda: self._events.pending < self.max_pending or not self._running), timeout
+                )
+            except asyncio.TimeoutError:
+                self.logger.warning(f"Dropping event for {key}, {self.name} queue is full")
+                return False
+            if not self._running:
+                return False
+
+            self._start()
+            self._events.put(key, args)
+            self._condition.notify()
+        return True
+
+    async def _next(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._events or not self._running)
+            if not self._events:
+                return None, None
+            return self._events.pop()
+
+    async def _done(self, key: str):
+        async with self._condition:
+            if self._events.done(key):
+                self._condition.notify()
+            self._space.notify()
+            if not self._events.pending:
+                self._idle.notify_all()
+
+    async def _work(self):
+        while True:
+            key, item = await self._next()
+            if key is None:
+                return
+            enqueued_at, args = item
+            QUEUE_WAIT.labels(queue=self.name).observe(time.monotonic() - enqueued_at)
+            try:
+                if inspect.iscoroutinefunction(self.handler):
+                    await self.handler(*args)
+                else:
+                    await asyncio.to_thread(self.handler, *args)
+            except Exception as e:
+                self.logger.error(f"Error handling event for {key}: {e}")
+            finally:
+                await self._done(key)
+
+    async def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been handled
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        async with self._condition:
+            try:
+                await asyncio.wait_for(self._idle.wait_for(lambda: not self._events.pending), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return True
+
+    async def stop(self, drain: bool = True, timeout: Optional[float] = 30.0):
+        """Stop accepting events and shut the workers down
+
+        Args:
+            drain (bool, optional): Finish queued events first. Defaults to True
+            timeout (float, optional): Seconds to wait for the queue to drain. Defaults to 30
+        """
+        if drain:
+            await self.join(timeout)
+        async with self._condition:
+            self._running = False
+            if not drain:
+                self._events.clear()
+            self._condition.notify_all()
+            self._space.notify_all()
+        if self._workers:
+            _, running = await asyncio.wait(self._workers, timeout=timeout)
+            for task in running:
+                task.cancel()
+            self._workers = []
+        self._unregister_depth()
+
+
+class AsyncSlackService:
+    """asyncio variant of SlackService
+
+    Uses AsyncWebClient and the aiohttp Socket Mode client on the running
+    event loop, with one pooled aiohttp session for every Web API call, so
+    the listener, the orchestrator and the WebSocket server can share a loop.
+    Create it anywhere, but call its coroutines from a running loop.
+    """
+
+    # Pure formatting helpers are shared with the threaded service
+    format_task_message = SlackService.format_task_message
+    extract_mentions = SlackService.extract_mentions
+
+    def __init__(self, bot_token=None, app_token=None, max_connections=None):
+        """Initialize async Slack service with API tokens
+
+        Args:
+            bot_token (str, optional): Slack bot token. If not provided, will look for SLACK_BOT_TOKEN env variable
+            app_token (str, optional): Slack app token for Socket Mode. If not provided, will look for SLACK_APP_TOKEN env variable
+            max_connections (int, optional): Size of the HTTP connection pool. Defaults to IRIS_SLACK_MAX_CONNECTIONS or 100
+        """
+        self.bot_token = bot_token or os.environ.get('SLACK_BOT_TOKEN')
+        self.app_token = app_token or os.environ.get('SLACK_APP_TOKEN')
+
+        if not self.bot_token:
+            raise ValueError("Slack bot token must be provided or set in SLACK_BOT_TOKEN environment variable")
+        if self.app_token and not self.app_token.startswith("xapp-"):
+            raise ValueError("Slack app token must start with 'xapp-'")
+
+        self.max_connections = max_connections or int(os.environ.get('IRIS_SLACK_MAX_CONNECTIONS', 100))
+        self.client = AsyncWebClient(token=self.bot_token)
+        self.session = None
+        self.socket_client = None
+        self.dispatcher = None
+        self.dedup = EventDeduplicator()
+        self.directory = SlackUserDirectory()
+        self.event_handlers = {}
+        self.add_event_handler("user_change", self.directory.handle_event)
+        self.add_event_handler("team_join", self.directory.handle_event)
+        self.logger = logging.getLogger(__name__)
+
+    def _ensure_session(self):
+        # aiohttp sessions must be created on the loop that uses them
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, ttl_dns_cache=300)
+            )
+            self.client.session = self.session
+
+    def add_event_handler(self, event_type, handler):
+        """Register a handler (function or coroutine function) for non-message events
+
+        Args:
+            event_type (str): Event type, e.g. "user_change"
+            handler: Called with the event payload
+        """
+        self.event_handlers.setdefault(event_type, []).append(handler)
+
+    async def _dispatch_event(self, event_data):
+        for handler in self.event_handlers.get(event_data.get("type"), []):
+            try:
+                result = handler(event_data)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                self.logger.error(f"Error handling {event_data.get('type')} event: {e}")
+
+    @traced("slack.send_message")
+    async def send_message(self, channel, text, blocks=None, thread_ts=None):
+        """Send a message to a Slack channel
+
+        Args:
+            channel (str): Channel ID or name
+            text (str): Message text
+            blocks (list, optional): Block Kit blocks for rich formatting
+            thread_ts (str, optional): Thread timestamp to reply in a thread
+
+        Returns:
+            AsyncSlackResponse: Response from Slack API
+        """
+        self._ensure_session()
+        try:
+            return await self.client.chat_postMessage(channel=channel, text=text, blocks=blocks, thread_ts=thread_ts)
+        except SlackApiError as e:
+            self.logger.error(f"Error sending message: {e}")
+            raise
+
+    @traced("slack.send_direct_message")
+    async def send_direct_message(self, user_id, text, blocks=None):
+        """Send a direct message to a user
+
+        Args:
+            user_id (str): User ID
+            text (str): Message text
+            blocks (list, optional): Block Kit blocks for rich formatting
+
+        Returns:
+            AsyncSlackResponse: Response from Slack API
+        """
+        self._ensure_session()
+        try:
+            response = await self.client.conversations_open(users=user_id)
+            return await self.client.chat_postMessage(channel=response['channel']['id'], text=text, blocks=blocks)
+        except SlackApiError as e:
+            self.logger.error(f"Error sending direct message: {e}")
+            raise
+
+    async def load_directory(self) -> int:
+        """Load every workspace user into the directory, following pagination cursors
+
+        Returns:
+            int: Number of users loaded
+        """
+        self._ensure_session()
+        members, cursor, retries = [], None, 0
+        while True:
+            try:
+                response = await self.client.users_list(cursor=cursor, limit=self.directory.page_size)
+            except SlackApiError as e:
+                if e.response.get("error") != "ratelimited" or retries == self.directory.max_rate_limit_retries:
+                    raise
+                retries += 1
+                retry_after = int(e.response.headers.get("Retry-After", 1))
+                self.logger.warning(f"Slack rate limited, retrying in {retry_after}s")
+                await asyncio.sleep(retry_after)
+                continue
+            retries = 0
+            members.extend(response.get("members", []))
+            cursor = (response.get("response_metadata") or {}).get("next_cursor")
+            if not cursor:
+                break
+        self.directory.replace(members)
+        return len(members)
+
+    @traced("slack.get_user_by_email")
+    async def get_user_by_email(self, email):
+        """Get user info by email address
+
+        Args:
+            email (str): User's email address
+
+        Returns:
+            dict: User information
+        """
+        user = self.directory.find_by_email(email)
+        if user:
+            return user
+
+        self._ensure_session()
+        try:
+            response = await self.client.users_lookupByEmail(email=email)
+            self.directory.upsert(response['user'])
+            return response['user']
+        except SlackApiError as e:
+            self.logger.error(f"Error getting user by email: {e}")
+            return None
+
+    @traced("slack.get_user_by_name")
+    async def get_user_by_name(self, username):
+        """Find a user by their display name
+
+        Args:
+            username (str): User's display name or real name
+
+        Returns:
+            dict: User information or None if not found
+        """
+        try:
+            if not self.directory.loaded:
+                await self.load_directory()
+            return self.directory.find_by_name(username)
+        except SlackApiError as e:
+            self.logger.error(f"Error getting user by name: {e}")
+            return None
+
+    async def handle_event(self, event_data, callback_function, event_id=None):
+        """Route one Events API event to its handlers or the message callback
+
+        Args:
+            event_data (dict): The "event" object from the Events API payload
+            callback_function: Message callback, see listen_for_messages
+            event_id (str, optional): Envelope event_id, used to drop redeliveries
+        """
+        if not self.dedup.check(*event_keys(event_data, event_id)):
+            self.logger.info(f"Skipping duplicate {event_data.get('type')} event {event_id or event_data.get('ts')}")
+            return
+
+        if event_data.get("type") in self.event_handlers:
+            await self._dispatch_event(event_data)
+            return
+
+        if (
+            event_data.get("type") != "message" or
+            event_data.get("subtype") in ["bot_message", "message_changed", "message_deleted"]
+        ):
+            return
+
+        event_ts = event_data.get("event_ts") or event_data.get("ts")
+        if event_ts:
+            SLACK_EVENT_LAG.observe(max(0.0, time.time() - float(event_ts)))
+
+        channel_id = event_data.get("channel")
+        args = (channel_id, event_data.get("user"), event_data.get("text", ""), event_data)
+        if self.dispatcher:
+            await self.dispatcher.submit(event_key(channel_id, event_data), *args)
+        else:
+            result = callback_function(*args)
+            if inspect.isawaitable(result):
+                await result
+
+    async def listen_for_messages(self, callback_function, concurrency=None):
+        """Listen for messages in real-time using async Socket Mode
+
+        Events are acknowledged immediately. Messages in the same channel
+        (or thread) are handled in order, different channels concurrently.
+
+        Args:
+            callback_function: Coroutine function or plain function accepting
+                (channel_id, user_id, text, event_data). Plain functions run in a worker thread
+            concurrency (int, optional): Callbacks running at once. Defaults to IRIS_SLACK_CONCURRENCY or 100
+
+        Returns:
+            SocketModeClient: The connected aiohttp Socket Mode client
+        """
+        if not self.app_token:
+            raise ValueError("Socket Mode requires an app token. Make sure SLACK_APP_TOKEN is set.")
+
+        self._ensure_session()
+        concurrency = concurrency or int(os.environ.get('IRIS_SLACK_CONCURRENCY', 100))
+        self.dispatcher = AsyncEventDispatcher(callback_function, concurrency=concurrency)
+        self.socket_client = SocketModeClient(app_token=self.app_token, web_client=self.client)
+
+        async def process_event(client: SocketModeClient, req: SocketModeRequest):
+            if req.type == "events_api":
+                await client.send_socket_mode_response(SocketModeResponse(envelope_id=req.envelope_id))
+                await self.handle_event(req.payload.get("event", {}), callback_function, req.payload.get("event_id"))
+
+        try:
+            await self.load_directory()
+        except SlackApiError as e:
+            self.logger.error(f"Error loading user directory, will retry on first lookup: {e}")
+
+        self.socket_client.socket_mode_request_listeners.append(process_event)
+        self.logger.info("Starting to listen for Slack messages...")
+        await self.socket_client.connect()
+        return self.socket_client
+
+    async def close_connection(self):
+        """Close the Socket Mode connection, finish queued events and release the connection pool"""
+        if self.socket_client:
+            await self.socket_client.close()
+            self.socket_client = None
+            self.logger.info("Closed Slack connection")
+        if self.dispatcher:
+            await self.dispatcher.stop()
+            self.dispatcher = None
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.dedup.flush()
@@ -0,0 +1,188 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from slack_sdk.errors import SlackApiError
+
+from orchestrator.metrics import Counter
+
+SLACK_CACHE_REQUESTS = Counter(
+    "iris_slack_cache_requests_total", "Slack metadata cache lookups by result", ["cache", "result"]
+)
+
+# Errors that mean the ID does not exist (or is not visible to the bot), so the answer can be cached
+NOT_FOUND_ERRORS = {"user_not_found", "users_not_found", "channel_not_found", "user_not_visible"}
+
+_MISSING = object()
+
+
+class _Flight:
+    """A lookup in progress that concurrent callers wait on"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and single-flight loading
+
+    Concurrent misses for the same key share one call to the loader.
+    A loader result of None is cached as a negative entry with its own,
+    usually shorter, TTL.
+    """
+
+    def __init__(self, name: str, ttl: float = 3600.0, negative_ttl: float = 300.0, max_size: int = 10000):
+        """Initialize the cache
+
+        Args:
+            name (str): Cache name used in metrics
+            ttl (float, optional): Seconds a found entry stays fresh. Defaults to 3600
+            negative_ttl (float, optional): Seconds a "not found" entry stays fresh. Defaults to 300
+            max_size (int, optional): Entries kept before the least recently used is evicted. Defaults to 10000
+        """
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable):
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: Hashable, value: Any):
+        ttl = self.negative_ttl if value is None else self.ttl
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling loader once on a miss
+
+        Args:
+            key (Hashable): Cache key
+            loader (Callable[[], Any]): Fetches the value; return None for "does not exist"
+
+        Returns:
+            Any: Cached or freshly loaded value
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not _MISSING:
+                SLACK_CACHE_REQUESTS.labels(cache=self.name, result="hit").inc()
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            SLACK_CACHE_REQUESTS.labels(cache=self.name, result="shared").inc()
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        SLACK_CACHE_REQUESTS.labels(cache=self.name, result="miss").inc()
+        try:
+            flight.value = loader()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None and self._flights.get(key) is flight:
+                    self._store(key, flight.value)
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.value
+
+    def set(self, key: Hashable, value: Any):
+        """Store a value directly, e.g. from an event payload"""
+        with self._lock:
+            self._store(key, value)
+
+    def invalidate(self, key: Hashable):
+        """Drop a key, including the result of any lookup already in flight"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._flights.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._flights.clear()
+
+
+class SlackMetadataCache:
+    """Shared cache for users.info and conversations.info
+
+    Returns the "user" / "channel" objects from the Web API, or None for
+    IDs Slack does not know. Rate limits and network errors are raised
+    and never cached.
+    """
+
+    def __init__(self, client, ttl: Optional[float] = None, negative_ttl: Optional[float] = None, max_size: int = 10000):
+        """Initialize the cache
+
+        Args:
+            client (WebClient): Slack Web API client
+            ttl (float, optional): Seconds entries stay fresh. Defaults to IRIS_SLACK_CACHE_TTL or 3600
+            negative_ttl (float, optional): Seconds unknown IDs stay cached. Defaults to IRIS_SLACK_NEGATIVE_CACHE_TTL or 300
+            max_size (int, optional): Entries kept per cache. Defaults to 10000
+        """
+        ttl = ttl if ttl is not None else float(os.environ.get("IRIS_SLACK_CACHE_TTL", 3600))
+        negative_ttl = negative_ttl if negative_ttl is not None else float(os.environ.get("IRIS_SLACK_NEGATIVE_CACHE_TTL", 300))
+        self.client = client
+        self.users = TTLCache("users", ttl, negative_ttl, max_size)
+        self.channels = TTLCache("channels", ttl, negative_ttl, max_size)
+        self.logger = logging.getLogger(__name__)
+
+    def _fetch(self, method: Callable, key: str, **kwargs) -> Optional[dict]:
+        try:
+            return method(**kwargs)[key]
+        except SlackApiError as e:
+            if e.response.get("error") in NOT_FOUND_ERRORS:
+                return None
+            raise
+
+    def get_user(self, user_id: str) -> Optional[dict]:
+        """Get a user object, calling users.info only on a cache miss"""
+        return self.users.get(user_id, lambda: self._fetch(self.client.users_info, "user", user=user_id))
+
+    def get_channel(self, channel_id: str) -> Optional[dict]:
+        """Get a channel object, calling conversations.info only on a cache miss"""
+        return self.channels.get(channel_id, lambda: self._fetch(self.client.conversations_info, "channel", channel=channel_id))
+
+    def handle_user_event(self, event: dict):
+        """Event handler for user_change and team_join, which carry the full user object"""
+        user = event.get("user")
+        if isinstance(user, dict) and user.get("id"):
+            self.users.set(user["id"], user)
+
+    def handle_channel_event(self, event: dict):
+        """Event handler for channel renames, archives and deletions"""
+        channel = event.get("channel")
+        channel_id = channel.get("id") if isinstance(channel, dict) else channel
+        if channel_id:
+            self.channels.invalidate(channel_id)
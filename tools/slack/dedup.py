@@ -0,0 +1,227 @@
+import hashlib
+import logging
+import os
+import struct
+import threading
+import time
+from array import array
+from typing import List, Optional, Tuple
+
+from orchestrator.metrics import Counter
+
+SLACK_DUPLICATE_EVENTS = Counter("iris_slack_duplicate_events_total", "Slack events dropped as duplicates")
+
+_MAGIC = b"IRDD"
+_HEADER = struct.Struct("<4sII")
+
+
+def _hash(key: str) -> int:
+    # 0 marks an empty slot, so never return it
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+
+def event_keys(event_data: dict, event_id: Optional[str] = None) -> List[str]:
+    """Identities of an event for de-duplication
+
+    The envelope event_id catches Slack's retries and reconnect replays.
+    The message identity (client_msg_id, or channel and ts) catches the
+    same message redelivered under a new event_id. The event type is part
+    of it so a message and its app_mention are still both handled.
+    """
+    keys = []
+    if event_id:
+        keys.append(f"id:{event_id}")
+    event_type = event_data.get("type")
+    if event_data.get("client_msg_id"):
+        keys.append(f"{event_type}:{event_data['client_msg_id']}")
+    elif event_data.get("ts") and event_data.get("channel"):
+        keys.append(f"{event_type}:{event_data['channel']}:{event_data['ts']}")
+    return keys
+
+
+class EventDeduplicator:
+    """Fixed-memory, time-windowed set of recently seen event keys
+
+    Keys are stored as 64-bit hashes in a ring buffer of `capacity` slots
+    (an 8-byte hash and an 8-byte timestamp each), found through an
+    open-addressing table of 4-byte slot numbers kept at most half full.
+    That is about 24 bytes per key, roughly 1.5 MB at the default
+    capacity, allocated up front and never grown. A key counts as a
+    duplicate while it is both in the ring and younger than `window`
+    seconds. With a path the ring is saved to disk from a background
+    thread and reloaded, so replays after a restart are caught too.
+    """
+
+    def __init__(self, capacity: Optional[int] = None, window: Optional[float] = None,
+                 path: Optional[str] = None, save_interval: float = 5.0):
+        """Initialize the deduplicator
+
+        Args:
+            capacity (int, optional): Keys remembered. Defaults to IRIS_SLACK_DEDUP_CAPACITY or 65536
+            window (float, optional): Seconds a key is remembered. Defaults to IRIS_SLACK_DEDUP_WINDOW or 3600
+            path (str, optional): File to persist to. Defaults to IRIS_SLACK_DEDUP_FILE, in-memory if unset
+            save_interval (float, optional): Minimum seconds between saves. Defaults to 5
+        """
+        self.capacity = capacity or int(os.environ.get("IRIS_SLACK_DEDUP_CAPACITY", 65536))
+        self.window = window if window is not None else float(os.environ.get("IRIS_SLACK_DEDUP_WINDOW", 3600))
+        self.path = path or os.environ.get("IRIS_SLACK_DEDUP_FILE")
+        self.save_interval = save_interval
+        self.logger = logging.getLogger(__name__)
+
+        self._hashes = array("Q", bytes(8 * self.capacity))
+        self._times = array("d", bytes(8 * self.capacity))
+        # Linear-probing table of ring slots, -1 marks an empty position
+        self._table = array("i", [-1]) * (1 << (2 * self.capacity - 1).bit_length())
+        self._mask = len(self._table) - 1
+        self._count = 0
+        self._next = 0
+        self._dirty = False
+        self._saving = False
+        self._last_save = time.monotonic()
+        self._save_seq = 0
+        self._saved_seq = 0
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+        if self.path and os.path.exists(self.path):
+            self._load()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _probe(self, key_hash: int) -> int:
+        """Table position holding key_hash, or the empty position where it would go"""
+        table, hashes, mask = self._table, self._hashes, self._mask
+        position = key_hash & mask
+        while table[position] != -1 and hashes[table[position]] != key_hash:
+            position = (position + 1) & mask
+        return position
+
+    def _unlink(self, position: int):
+        """Empty a table position, shifting later entries of the probe run back into the gap"""
+        table, hashes, mask = self._table, self._hashes, self._mask
+        gap = scan = position
+        while True:
+            scan = (scan + 1) & mask
+            slot = table[scan]
+            if slot == -1:
+                break
+            home = hashes[slot] & mask
+            # An entry can fill the gap unless its home lies cyclically in (gap, scan]
+            if (gap < scan and not gap < home <= scan) or (scan < gap and scan < home <= gap):
+                table[gap] = slot
+                gap = scan
+        table[gap] = -1
+
+    def _insert(self, key_hash: int, seen_at: float):
+        slot = self._next
+        evicted = self._hashes[slot]
+        if evicted:
+            position = self._probe(evicted)
+            if self._table[position] == slot:
+                self._unlink(position)
+                self._count -= 1
+        self._hashes[slot] = key_hash
+        self._times[slot] = seen_at
+        position = self._probe(key_hash)
+        if self._table[position] == -1:
+            self._count += 1
+        # An expired copy of the same key is re-pointed at the new slot
+        self._table[position] = slot
+        self._next = (slot + 1) % self.capacity
+
+    def _is_recent(self, key_hash: int, now: float) -> bool:
+        slot = self._table[self._probe(key_hash)]
+        return slot != -1 and now - self._times[slot] <= self.window
+
+    def check(self, *keys: str) -> bool:
+        """Record an event and report whether it is new
+
+        Args:
+            *keys (str): Every identity of the event, see event_keys()
+
+        Returns:
+            bool: False if any key was seen within the window
+        """
+        if not keys:
+            return True
+        now = time.time()
+        hashes = [_hash(key) for key in keys]
+        with self._lock:
+            duplicate = any(self._is_recent(key_hash, now) for key_hash in hashes)
+            for key_hash in hashes:
+                if not self._is_recent(key_hash, now):
+                    self._insert(key_hash, now)
+            self._dirty = True
+            snapshot = None
+            if self.path and not self._saving and time.monotonic() - self._last_save >= self.save_interval:
+                # Only the copy happens here; the file is written off the caller's thread (often the event loop)
+                self._saving = True
+                snapshot = self._snapshot()
+
+        if snapshot is not None:
+            threading.Thread(target=self._save_in_background, args=snapshot, name="slack-dedup-save", daemon=True).start()
+        if duplicate:
+            SLACK_DUPLICATE_EVENTS.inc()
+        return not duplicate
+
+    def _snapshot(self) -> Tuple[int, bytes]:
+        """Copy the ring for saving; callers hold the lock"""
+        self._dirty = False
+        self._last_save = time.monotonic()
+        self._save_seq += 1
+        data = _HEADER.pack(_MAGIC, self.capacity, self._next) + self._hashes.tobytes() + self._times.tobytes()
+        return self._save_seq, data
+
+    def _write(self, seq: int, data: bytes):
+        with self._save_lock:
+            if seq <= self._saved_seq:
+                # A newer snapshot was already written
+                return
+            tmp_path = f"{self.path}.tmp"
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+            self._saved_seq = seq
+
+    def _save_in_background(self, seq: int, data: bytes):
+        try:
+            self._write(seq, data)
+        except OSError as e:
+            self.logger.error(f"Error saving dedup file {self.path}: {e}")
+            with self._lock:
+                self._dirty = True
+        finally:
+            with self._lock:
+                self._saving = False
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                magic, capacity, next_slot = _HEADER.unpack(f.read(_HEADER.size))
+                if magic != _MAGIC:
+                    raise ValueError("not a dedup file")
+                hashes, times = array("Q"), array("d")
+                hashes.fromfile(f, capacity)
+                times.fromfile(f, capacity)
+        except (OSError, EOFError, ValueError, struct.error) as e:
+            self.logger.warning(f"Ignoring unreadable dedup file {self.path}: {e}")
+            return
+
+        # Replay oldest first so the newest keys survive if the capacity shrank
+        cutoff = time.time() - self.window
+        order = list(range(next_slot, capacity)) + list(range(next_slot))
+        for slot in order:
+            if hashes[slot] and times[slot] >= cutoff:
+                self._insert(hashes[slot], times[slot])
+        self.logger.info(f"Loaded {self._count} recent Slack event keys from {self.path}")
+
+    def flush(self):
+        """Save to disk now if anything changed"""
+        with self._lock:
+            # A background save still in flight counts as unsaved
+            if not self.path or not (self._dirty or self._saved_seq < self._save_seq):
+                return
+            snapshot = self._snapshot()
+        self._write(*snapshot)
@@ -0,0 +1,156 @@
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from tools.slack.pagination import paginate
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """Normalize a display name, real name or handle for lookups
+
+    Lowercases, drops a leading "@" and collapses whitespace so
+    "@Jane  Doe" and "jane doe" resolve to the same user.
+    """
+    if not name:
+        return ""
+    return " ".join(name.strip().lstrip("@").split()).casefold()
+
+
+def normalize_email(email: Optional[str]) -> str:
+    return (email or "").strip().casefold()
+
+
+class SlackUserDirectory:
+    """In-memory Slack user directory with hash indexes
+
+    Loaded once with cursor-paginated users.list calls and kept current
+    from user_change / team_join events, so lookups by ID, name or email
+    never call the Web API.
+    """
+
+    def __init__(self, client=None, page_size: int = 200, max_rate_limit_retries: int = 5):
+        """Initialize the directory
+
+        Args:
+            client (WebClient, optional): Slack Web API client used by load()
+            page_size (int, optional): Users requested per users.list page. Defaults to 200
+            max_rate_limit_retries (int, optional): Retries per page when rate limited. Defaults to 5
+        """
+        self.client = client
+        self.page_size = page_size
+        self.max_rate_limit_retries = max_rate_limit_retries
+        self.logger = logging.getLogger(__name__)
+        self.loaded = False
+        self._by_id: Dict[str, dict] = {}
+        # Several users can share a name (or, rarely, an email), so each key lists every match
+        self._by_name: Dict[str, List[dict]] = {}
+        self._by_email: Dict[str, List[dict]] = {}
+        self._keys: Dict[str, tuple] = {}
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def load(self) -> int:
+        """Load every user in the workspace, following pagination cursors
+
+        Returns:
+            int: Number of users loaded
+        """
+        if self.client is None:
+            raise ValueError("A Slack client is required to load the user directory")
+
+        members = list(paginate(self.client.users_list, "members", self.max_rate_limit_retries, limit=self.page_size))
+        self.replace(members)
+        self.logger.info(f"Loaded {len(members)} Slack users into the directory")
+        return len(members)
+
+    def ensure_loaded(self):
+        """Load the directory on first use"""
+        if not self.loaded:
+            with self._lock:
+                if not self.loaded:
+                    self.load()
+
+    def replace(self, members: Iterable[dict]):
+        """Rebuild every index from a full member list"""
+        by_id, by_name, by_email, keys = {}, {}, {}, {}
+        for user in members:
+            self._index(user, by_id, by_name, by_email, keys)
+        with self._lock:
+            self._by_id, self._by_name, self._by_email, self._keys = by_id, by_name, by_email, keys
+            self.loaded = True
+
+    def upsert(self, user: dict):
+        """Add or update a single user, e.g. from a user_change or team_join event"""
+        if not user or not user.get("id"):
+            return
+        with self._lock:
+            self._unindex(user["id"])
+            self._index(user, self._by_id, self._by_name, self._by_email, self._keys)
+
+    def handle_event(self, event: dict):
+        """Event handler for user_change and team_join"""
+        self.upsert(event.get("user"))
+
+    @staticmethod
+    def _name_keys(user: dict) -> List[str]:
+        profile = user.get("profile", {})
+        names = [
+            profile.get("display_name"),
+            profile.get("display_name_normalized"),
+            profile.get("real_name"),
+            profile.get("real_name_normalized"),
+            user.get("real_name"),
+            user.get("name"),
+        ]
+        return list(dict.fromkeys(key for key in map(normalize_name, names) if key))
+
+    def _index(self, user: dict, by_id, by_name, by_email, keys):
+        user_id = user.get("id")
+        if not user_id:
+            return
+        by_id[user_id] = user
+        if user.get("deleted"):
+            # Deactivated accounts stay resolvable by ID but never shadow active users by name
+            keys[user_id] = ((), "")
+            return
+
+        name_keys = self._name_keys(user)
+        for key in name_keys:
+            by_name.setdefault(key, []).append(user)
+        email = normalize_email(user.get("profile", {}).get("email"))
+        if email:
+            by_email.setdefault(email, []).append(user)
+        keys[user_id] = (tuple(name_keys), email)
+
+    def _unindex(self, user_id: str):
+        name_keys, email = self._keys.pop(user_id, ((), ""))
+        self._by_id.pop(user_id, None)
+        for key in name_keys:
+            self._drop(self._by_name, key, user_id)
+        if email:
+            self._drop(self._by_email, email, user_id)
+
+    @staticmethod
+    def _drop(index: Dict[str, List[dict]], key: str, user_id: str):
+        """Remove one user from a key, keeping every other user that shares it"""
+        users = [user for user in index.get(key, ()) if user.get("id") != user_id]
+        if users:
+            index[key] = users
+        else:
+            index.pop(key, None)
+
+    def get(self, user_id: str) -> Optional[dict]:
+        """Look up a user by ID"""
+        return self._by_id.get(user_id)
+
+    def find_by_name(self, name: str) -> Optional[dict]:
+        """Look up a user by display name, real name or handle"""
+        users = self._by_name.get(normalize_name(name))
+        return users[0] if users else None
+
+    def find_by_email(self, email: str) -> Optional[dict]:
+        """Look up a user by email address"""
+        users = self._by_email.get(normalize_email(email))
+        return users[0] if users else None
@@ -0,0 +1,190 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+from orchestrator.metrics import QUEUE_DEPTH, QUEUE_WAIT
+
+
+def event_key(channel_id: Optional[str], event_data: dict) -> str:
+    """Ordering key for an event: its thread if it is a reply, otherwise its channel"""
+    thread_ts = event_data.get("thread_ts")
+    if thread_ts and thread_ts != event_data.get("ts"):
+        return f"{channel_id}:{thread_ts}"
+    return str(channel_id)
+
+
+class KeyedQueue:
+    """Per-key FIFOs that take turns, shared by the threaded and asyncio dispatchers
+
+    Not synchronized: callers hold their own lock (a threading or asyncio
+    condition) around every call. A key popped with pop() is out of the
+    rotation until done() is called for it, so at most one event per key
+    is in flight.
+    """
+
+    def __init__(self):
+        self._queues: Dict[str, Deque[tuple]] = {}
+        self._ready: Deque[str] = deque()
+        self.pending = 0
+
+    def __bool__(self) -> bool:
+        """Whether an event is ready to be handed to a worker"""
+        return bool(self._ready)
+
+    def put(self, key: str, args: tuple):
+        """Queue an event behind earlier events with the same key"""
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = self._queues[key] = deque()
+            self._ready.append(key)
+        queue.append((time.monotonic(), args))
+        self.pending += 1
+
+    def pop(self) -> Tuple[str, Tuple[float, tuple]]:
+        """Take the next ready key's oldest event as (key, (enqueued_at, args))"""
+        key = self._ready.popleft()
+        return key, self._queues[key].popleft()
+
+    def done(self, key: str) -> bool:
+        """Finish an event popped for `key`, returning whether the key has another one ready"""
+        self.pending -= 1
+        if self._queues.get(key):
+            # Back of the line so other keys get a turn
+            self._ready.append(key)
+            return True
+        self._queues.pop(key, None)
+        return False
+
+    def clear(self):
+        """Drop every queued event that no worker has picked up yet"""
+        self.pending -= sum(len(queue) for queue in self._queues.values())
+        self._queues.clear()
+        self._ready.clear()
+
+
+class EventDispatcher:
+    """Bounded worker pool that keeps events with the same key in order
+
+    Each key (a channel or thread) has its own FIFO and is handled by at
+    most one worker at a time, so replies in a conversation are processed
+    in order while different conversations run in parallel. Keys take
+    turns, so one busy channel cannot starve the rest.
+    """
+
+    def __init__(self, handler: Callable, workers: Optional[int] = None, max_pending: int = 1000, name: str = "slack_events"):
+        """Initialize the dispatcher and start its workers
+
+        Args:
+            handler (Callable): Function called with the arguments passed to submit()
+            workers (int, optional): Worker threads. Defaults to IRIS_SLACK_WORKERS or 8
+            max_pending (int, optional): Events queued before submit() blocks. Defaults to 1000
+            name (str, optional): Queue name used in metrics and thread names. Defaults to "slack_events"
+        """
+        self.handler = handler
+        self.workers = workers if workers is not None else int(os.environ.get("IRIS_SLACK_WORKERS", 8))
+        self.max_pending = max_pending
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        self._events = KeyedQueue()
+        self._running = True
+        self._condition = threading.Condition()
+        self._space = threading.Condition(self._condition)
+        self._idle = threading.Condition(self._condition)
+
+        self._unregister_depth = QUEUE_DEPTH.labels(queue=name).add_function(lambda: self._events.pending)
+        self._threads = [
+            threading.Thread(target=self._work, name=f"{name}-{i}", daemon=True)
+            for i in range(max(self.workers, 1))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    @property
+    def pending(self) -> int:
+        return self._events.pending
+
+    def submit(self, key: str, *args, timeout: Optional[float] = None) -> bool:
+        """Queue an event behind earlier events with the same key
+
+        Blocks while the dispatcher is full, which pushes back on the
+        producer instead of growing without bound.
+
+        Args:
+            key (str): Ordering key, see event_key()
+            *args: Arguments for the handler
+            timeout (float, optional): Seconds to wait for space. Waits forever by default
+
+        Returns:
+            bool: False if the event was dropped because the dispatcher is stopped or stayed full
+        """
+        with self._condition:
+            if not self._space.wait_for(lambda: self._events.pending < self.max_pending or not self._running, timeout):
+                self.logger.warning(f"Dropping event for {key}, {self.name} queue is full")
+                return False
+            if not self._running:
+                return False
+
+            self._events.put(key, args)
+            self._condition.notify()
+        return True
+
+    def _next(self):
+        with self._condition:
+            self._condition.wait_for(lambda: self._events or not self._running)
+            if not self._events:
+                return None, None
+            return self._events.pop()
+
+    def _done(self, key: str):
+        with self._condition:
+            if self._events.done(key):
+                self._condition.notify()
+            self._space.notify()
+            if not self._events.pending:
+                self._idle.notify_all()
+
+    def _work(self):
+        while True:
+            key, item = self._next()
+            if key is None:
+                return
+            enqueued_at, args = item
+            QUEUE_WAIT.labels(queue=self.name).observe(time.monotonic() - enqueued_at)
+            try:
+                self.handler(*args)
+            except Exception as e:
+                self.logger.error(f"Error handling event for {key}: {e}")
+            finally:
+                self._done(key)
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued event has been handled
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        with self._condition:
+            return self._idle.wait_for(lambda: not self._events.pending, timeout)
+
+    def stop(self, drain: bool = True, timeout: Optional[float] = 30.0):
+        """Stop accepting events and shut the workers down
+
+        Args:
+            drain (bool, optional): Finish queued events first. Defaults to True
+            timeout (float, optional): Seconds to wait for the queue to drain. Defaults to 30
+        """
+        if drain:
+            self.join(timeout)
+        with self._condition:
+            self._running = False
+            if not drain:
+                self._events.clear()
+            self._condition.notify_all()
+            self._space.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._unregister_depth()
@@ -0,0 +1,109 @@
+import json
+import logging
+import os
+import threading
+from typing import Dict, Iterable, Optional
+
+from tools.slack.pagination import call_with_retry, paginate
+
+
+class DMChannelMap:
+    """Persistent user ID to DM channel ID map
+
+    DM channel IDs never change, so each user costs at most one
+    conversations.open for the lifetime of the file. warm() fills the map
+    for every existing DM in a few paginated conversations.list calls.
+    """
+
+    def __init__(self, client, path: Optional[str] = None):
+        """Initialize the map
+
+        Args:
+            client (WebClient): Slack Web API client
+            path (str, optional): JSON file to persist to. Defaults to IRIS_SLACK_DM_FILE or slack_dm_channels.json in IRIS_DATA_DIR
+        """
+        self.client = client
+        self.path = path or os.environ.get(
+            "IRIS_SLACK_DM_FILE", os.path.join(os.environ.get("IRIS_DATA_DIR", ".iris"), "slack_dm_channels.json")
+        )
+        self.logger = logging.getLogger(__name__)
+        self.warmed = False
+        self._channels: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._channels)
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._channels = json.load(f)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Ignoring unreadable DM channel map {self.path}: {e}")
+
+    def _save(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._channels, f)
+        os.replace(tmp_path, self.path)
+
+    def _update(self, channels: Dict[str, str]):
+        with self._lock:
+            changed = any(self._channels.get(user_id) != channel_id for user_id, channel_id in channels.items())
+            if changed:
+                self._channels.update(channels)
+                self._save()
+
+    def warm(self) -> int:
+        """Load every open DM channel with conversations.list(types=im)
+
+        Returns:
+            int: Number of DM channels known afterwards
+        """
+        channels = {
+            channel["user"]: channel["id"]
+            for channel in paginate(self.client.conversations_list, "channels", types="im", limit=1000)
+            if channel.get("user")
+        }
+        self._update(channels)
+        self.warmed = True
+        self.logger.info(f"Warmed DM channel map with {len(channels)} channels")
+        return len(self._channels)
+
+    def get(self, user_id: str) -> str:
+        """Return the DM channel for a user, opening it only if it is not known"""
+        channel_id = self._channels.get(user_id)
+        if channel_id:
+            return channel_id
+        response = call_with_retry(self.client.conversations_open, users=user_id)
+        channel_id = response["channel"]["id"]
+        self._update({user_id: channel_id})
+        return channel_id
+
+    def get_many(self, user_ids: Iterable[str], warm_threshold: int = 10) -> Dict[str, str]:
+        """Resolve DM channels for many users
+
+        Warms the map first when more than warm_threshold users are
+        unknown, since one paginated listing is cheaper than many opens.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        missing = [user_id for user_id in user_ids if user_id not in self._channels]
+        if len(missing) > warm_threshold and not self.warmed:
+            self.warm()
+        return {user_id: self.get(user_id) for user_id in user_ids}
+
+    def handle_event(self, event: dict):
+        """Event handler for im_created"""
+        channel = event.get("channel") or {}
+        if event.get("user") and channel.get("id"):
+            self._update({event["user"]: channel["id"]})
+
+    def invalidate(self, user_id: str):
+        """Forget a user's channel, e.g. after channel_not_found"""
+        with self._lock:
+            if self._channels.pop(user_id, None) is not None:
+                self._save()
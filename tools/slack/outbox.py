@@ -0,0 +1,286 @@
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Deque, Dict, List, Optional
+
+from slack_sdk.errors import SlackApiError
+
+from orchestrator.metrics import QUEUE_DEPTH, QUEUE_WAIT, Counter
+
+SLACK_OUTBOX_SENDS = Counter(
+    "iris_slack_outbox_sends_total", "Outbound Slack posts by outcome", ["status"]
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket
+
+    Tokens refill continuously at `rate` per second up to `capacity`.
+    pause() empties the bucket until a point in time, which is how a
+    Retry-After header is honoured.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """Initialize the bucket
+
+        Args:
+            rate (float): Tokens added per second
+            capacity (float, optional): Maximum burst. Defaults to 1
+        """
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: Optional[float] = None) -> float:
+        """Seconds until a token is available, without taking it"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            if now < self.paused_until:
+                return self.paused_until - now
+            self._refill(now)
+            if self.tokens >= 1:
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def consume(self, now: Optional[float] = None) -> bool:
+        """Take a token if one is available"""
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            if now < self.paused_until:
+                return False
+            self._refill(now)
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return True
+            return False
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Block until a token is taken
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.consume():
+            wait = self.delay()
+            if deadline is not None:
+                if time.monotonic() + wait > deadline:
+                    return False
+            time.sleep(max(wait, 0.001))
+        return True
+
+    def pause(self, seconds: float):
+        """Hold back every token for a number of seconds, e.g. from Retry-After"""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.paused_until
+
+
+class _OutboundMessage:
+    __slots__ = ("text", "blocks", "future", "enqueued_at", "attempts")
+
+    def __init__(self, text: str, blocks: Optional[list]):
+        self.text = text
+        self.blocks = blocks
+        self.future: Future = Future()
+        self.enqueued_at = time.monotonic()
+        self.attempts = 0
+
+
+class SlackOutbox:
+    """Rate-limit-aware outbound queue for chat.postMessage
+
+    Each channel has its own token bucket (Slack allows about one message
+    per second per channel). Plain-text messages to the same channel and
+    thread that arrive within the coalescing window are joined into one
+    post. Rate-limited posts are retried after Retry-After instead of
+    being dropped. Every enqueued message gets a Future for the ts of the
+    post that delivered it.
+    """
+
+    def __init__(
+        self,
+        send: Callable,
+        rate: Optional[float] = None,
+        burst: Optional[float] = None,
+        coalesce_window: Optional[float] = None,
+        max_chars: int = 3900,
+        max_retries: int = 5,
+        workers: int = 4,
+    ):
+        """Initialize the outbox and start its scheduler
+
+        Args:
+            send (Callable): chat.postMessage-style callable taking channel, text, blocks and thread_ts
+            rate (float, optional): Posts per second per channel. Defaults to IRIS_SLACK_SEND_RATE or 1
+            burst (float, optional): Posts a channel may burst. Defaults to IRIS_SLACK_SEND_BURST or 3
+            coalesce_window (float, optional): Seconds to wait for more messages to merge. Defaults to IRIS_SLACK_COALESCE_WINDOW or 0.5
+            max_chars (int, optional): Longest coalesced text. Defaults to 3900
+            max_retries (int, optional): Attempts per post on rate limits or network errors. Defaults to 5
+            workers (int, optional): Posts in flight at once across channels. Defaults to 4
+        """
+        self.send = send
+        self.rate = rate if rate is not None else float(os.environ.get("IRIS_SLACK_SEND_RATE", 1.0))
+        self.burst = burst if burst is not None else float(os.environ.get("IRIS_SLACK_SEND_BURST", 3))
+        self.coalesce_window = (
+            coalesce_window if coalesce_window is not None else float(os.environ.get("IRIS_SLACK_COALESCE_WINDOW", 0.5))
+        )
+        self.max_chars = max_chars
+        self.max_retries = max_retries
+        self.logger = logging.getLogger(__name__)
+
+        self._queues: Dict[tuple, Deque[_OutboundMessage]] = {}
+        self._in_flight = set()
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._condition = threading.Condition()
+        self._running = True
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slack-outbox")
+        self._scheduler = threading.Thread(target=self._schedule, name="slack-outbox-scheduler", daemon=True)
+        self._scheduler.start()
+        self._unregister_depth = QUEUE_DEPTH.labels(queue="slack_outbox").add_function(self.pending)
+
+    def pending(self) -> int:
+        """Messages not yet posted"""
+        with self._condition:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def enqueue(self, channel: str, text: str, blocks: Optional[list] = None, thread_ts: Optional[str] = None) -> Future:
+        """Queue a message for delivery
+
+        Args:
+            channel (str): Channel ID or name
+            text (str): Message text
+            blocks (list, optional): Block Kit blocks. Messages with blocks are never coalesced
+            thread_ts (str, optional): Thread timestamp to reply in a thread
+
+        Returns:
+            Future: Resolves to the ts of the post, or raises the final SlackApiError
+        """
+        message = _OutboundMessage(text, blocks)
+        with self._condition:
+            if not self._running:
+                raise RuntimeError("Slack outbox is closed")
+            self._queues.setdefault((channel, thread_ts), deque()).append(message)
+            self._condition.notify()
+        return message.future
+
+    def _bucket(self, channel: str) -> TokenBucket:
+        bucket = self._buckets.get(channel)
+        if bucket is None:
+            bucket = self._buckets[channel] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _take_batch(self, queue: Deque[_OutboundMessage]) -> List[_OutboundMessage]:
+        batch = [queue.popleft()]
+        if batch[0].blocks:
+            return batch
+        length = len(batch[0].text)
+        while queue and not queue[0].blocks and length + 1 + len(queue[0].text) <= self.max_chars:
+            length += 1 + len(queue[0].text)
+            batch.append(queue.popleft())
+        return batch
+
+    def _schedule(self):
+        with self._condition:
+            while self._running or any(self._queues.values()) or self._in_flight:
+                now = time.monotonic()
+                wake_at = None
+                for key, queue in list(self._queues.items()):
+                    if not queue:
+                        if key not in self._in_flight:
+                            del self._queues[key]
+                        continue
+                    if key in self._in_flight:
+                        continue
+                    # Closing flushes immediately instead of waiting for more messages to merge
+                    due = queue[0].enqueued_at + self.coalesce_window if self._running else now
+                    bucket = self._bucket(key[0])
+                    ready_at = max(due, now + bucket.delay(now))
+                    if ready_at <= now and bucket.consume(now):
+                        batch = self._take_batch(queue)
+                        self._in_flight.add(key)
+                        self._executor.submit(self._deliver, key, batch)
+                    else:
+                        ready_at = max(ready_at, now + 0.001)
+                        wake_at = ready_at if wake_at is None else min(wake_at, ready_at)
+                self._condition.wait(None if wake_at is None else wake_at - now)
+
+    def _deliver(self, key: tuple, batch: List[_OutboundMessage]):
+        channel, thread_ts = key
+        retry_after = None
+        for message in batch:
+            message.attempts += 1
+            QUEUE_WAIT.labels(queue="slack_outbox").observe(time.monotonic() - message.enqueued_at)
+        try:
+            response = self.send(
+                channel=channel,
+                text="\n".join(message.text for message in batch),
+                blocks=batch[0].blocks,
+                thread_ts=thread_ts,
+            )
+        except SlackApiError as e:
+            if e.response.get("error") != "ratelimited" or batch[0].attempts >= self.max_retries:
+                SLACK_OUTBOX_SENDS.labels(status="error").inc()
+                self._fail(batch, e)
+            else:
+                retry_after = float(e.response.headers.get("Retry-After", 1))
+        except Exception as e:
+            if batch[0].attempts >= self.max_retries:
+                SLACK_OUTBOX_SENDS.labels(status="error").inc()
+                self._fail(batch, e)
+            else:
+                retry_after = min(2 ** batch[0].attempts * 0.5, 30.0)
+        else:
+            SLACK_OUTBOX_SENDS.labels(status="ok").inc()
+            for message in batch:
+                message.future.set_result(response.get("ts"))
+
+        with self._condition:
+            if retry_after is not None:
+                SLACK_OUTBOX_SENDS.labels(status="retried").inc()
+                self.logger.warning(f"Slack post to {channel} rate limited or failed, retrying in {retry_after}s")
+                self._bucket(channel).pause(retry_after)
+                self._queues.setdefault(key, deque()).extendleft(reversed(batch))
+            self._in_flight.discard(key)
+            self._condition.notify()
+
+    def _fail(self, batch: List[_OutboundMessage], error: Exception):
+        self.logger.error(f"Giving up on Slack post after {batch[0].attempts} attempts: {error}")
+        for message in batch:
+            message.future.set_exception(error)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued message is posted or has failed
+
+        Returns:
+            bool: False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._condition:
+                if not self._in_flight and not any(self._queues.values()):
+                    return True
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.01)
+
+    def close(self, timeout: Optional[float] = 30.0):
+        """Stop accepting messages and deliver what is queued"""
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        self._scheduler.join(timeout)
+        self._executor.shutdown(wait=True)
+        self._unregister_depth()
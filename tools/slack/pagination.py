@@ -0,0 +1,38 @@
+import logging
+import time
+from typing import Callable, Iterator
+
+from slack_sdk.errors import SlackApiError
+
+logger = logging.getLogger(__name__)
+
+
+def call_with_retry(method: Callable, max_rate_limit_retries: int = 5, **kwargs):
+    """Call a Web API method, sleeping through Retry-After when rate limited"""
+    for attempt in range(max_rate_limit_retries + 1):
+        try:
+            return method(**kwargs)
+        except SlackApiError as e:
+            if e.response.get("error") != "ratelimited" or attempt == max_rate_limit_retries:
+                raise
+            retry_after = int(e.response.headers.get("Retry-After", 1))
+            logger.warning(f"Slack rate limited, retrying in {retry_after}s")
+            time.sleep(retry_after)
+
+
+def paginate(method: Callable, items_key: str, max_rate_limit_retries: int = 5, **kwargs) -> Iterator[dict]:
+    """Yield every item of a cursor-paginated Web API method
+
+    Args:
+        method (Callable): WebClient method, e.g. client.users_list
+        items_key (str): Response key holding the page's items, e.g. "members"
+        max_rate_limit_retries (int, optional): Retries per page when rate limited. Defaults to 5
+        **kwargs: Arguments for the method, e.g. limit or types
+    """
+    cursor = None
+    while True:
+        response = call_with_retry(method, max_rate_limit_retries, cursor=cursor, **kwargs)
+        yield from response.get(items_key, [])
+        cursor = (response.get("response_metadata") or {}).get("next_cursor")
+        if not cursor:
+            return
@@ -0,0 +1,126 @@
+import argparse
+import json
+import os
+import time
+import uuid
+from collections import Counter as Tally
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional
+
+import requests
+from slack_sdk.signature import SignatureVerifier
+
+DEFAULT_URL = "http://localhost:8765/slack/events"
+
+
+def envelope(event: dict, team_id: Optional[str] = None, event_id: Optional[str] = None) -> dict:
+    """Wrap a bare event in an event_callback payload, leaving full payloads as they are"""
+    if "type" in event and event["type"] in ("event_callback", "url_verification"):
+        return event
+    return {
+        "type": "event_callback",
+        "team_id": team_id or "T0LOCAL",
+        "event_id": event_id or f"Ev{uuid.uuid4().hex[:10].upper()}",
+        "event_time": int(time.time()),
+        "event": event,
+    }
+
+
+def sign_request(signing_secret: str, body: str, timestamp: Optional[int] = None) -> dict:
+    """Headers Slack would send with this body"""
+    timestamp = str(timestamp if timestamp is not None else int(time.time()))
+    signature = SignatureVerifier(signing_secret).generate_signature(timestamp=timestamp, body=body)
+    return {
+        "Content-Type": "application/json",
+        "X-Slack-Request-Timestamp": timestamp,
+        "X-Slack-Signature": signature,
+    }
+
+
+def replay(payloads: Iterable[dict], url: str = DEFAULT_URL, signing_secret: Optional[str] = None,
+           concurrency: int = 4, session: Optional[requests.Session] = None) -> dict:
+    """POST payloads to the endpoint and time the acks
+
+    Args:
+        payloads (Iterable[dict]): Events API payloads or bare events
+        url (str, optional): Endpoint URL. Defaults to the local server
+        signing_secret (str, optional): Defaults to SLACK_SIGNING_SECRET
+        concurrency (int, optional): Requests in flight. Defaults to 4
+        session (requests.Session, optional): Session to send with
+
+    Returns:
+        dict: Request count, status code counts and ack latency percentiles in milliseconds
+    """
+    signing_secret = signing_secret or os.environ.get("SLACK_SIGNING_SECRET")
+    if not signing_secret:
+        raise ValueError("A signing secret must be provided or set in SLACK_SIGNING_SECRET")
+    session = session or requests.Session()
+
+    def send(payload: dict):
+        body = json.dumps(envelope(payload))
+        start = time.perf_counter()
+        try:
+            status = session.post(url, data=body, headers=sign_request(signing_secret, body), timeout=10).status_code
+        except requests.RequestException:
+            status = "error"
+        return status, (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(send, payloads))
+    elapsed = time.perf_counter() - start
+
+    latencies: List[float] = sorted(latency for _, latency in results)
+
+    def percentile(p: float):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 2)
+
+    return {
+        "requests": len(results),
+        "status": dict(Tally(str(status) for status, _ in results)),
+        "requests_per_second": round(len(results) / elapsed, 2) if elapsed else None,
+        "ack_ms_p50": percentile(0.5),
+        "ack_ms_p95": percentile(0.95),
+        "ack_ms_max": round(latencies[-1], 2) if latencies else None,
+    }
+
+
+def _read_payloads(path: str) -> List[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay signed Slack events against server.py's /slack/events",
+        epilog='e.g. python -m tools.slack.replay --text "iris, schedule a sync" --count 50 --concurrency 8',
+    )
+    parser.add_argument("file", nargs="?", help="JSONL file of Events API payloads or bare events")
+    parser.add_argument("--url", default=DEFAULT_URL, help="Endpoint URL")
+    parser.add_argument("--text", help="Send a synthetic message event with this text")
+    parser.add_argument("--channel", default="C0LOCAL", help="Channel for synthetic messages")
+    parser.add_argument("--user", default="U0LOCAL", help="User for synthetic messages")
+    parser.add_argument("--count", type=int, default=1, help="Synthetic messages to send")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight")
+    args = parser.parse_args()
+
+    import dotenv
+
+    dotenv.load_dotenv()
+    if args.file:
+        payloads = _read_payloads(args.file)
+    elif args.text:
+        now = time.time()
+        payloads = [
+            {"type": "message", "channel": args.channel, "user": args.user, "text": args.text, "ts": f"{now + i / 1000:.6f}"}
+            for i in range(args.count)
+        ]
+    else:
+        parser.error("Pass a JSONL file or --text")
+    print(json.dumps(replay(payloads, url=args.url, concurrency=args.concurrency), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,15 +6,30 @@ from slack_sdk.socket_mode.response import SocketModeResponse
 from slack_sdk.socket_mode.request import SocketModeRequest
 import logging
 import re
+import threading
+import time
 from datetime import datetime
 
+from orchestrator.metrics import SLACK_EVENT_LAG
+from orchestrator.tracing import traced
+from tools.slack.cache import SlackMetadataCache
+from tools.slack.dedup import EventDeduplicator, event_keys
+from tools.slack.directory import SlackUserDirectory
+from tools.slack.dm_channels import DMChannelMap
+from tools.slack.dispatcher import EventDispatcher, event_key
+from tools.slack.outbox import SlackOutbox
+from tools.slack.socket_pool import SocketModePool
+from tools.slack.uploads import FileUpload, SlackFileUploader
+
 class SlackService:
-    def __init__(self, bot_token=None, app_token=None):
+    def __init__(self, bot_token=None, app_token=None, workspace=None, dedup=None):
         """Initialize Slack service with API tokens
         
         Args:
             bot_token (str, optional): Slack bot token. If not provided, will look for SLACK_BOT_TOKEN env variable
             app_token (str, optional): Slack app token for Socket Mode. If not provided, will look for SLACK_APP_TOKEN env variable
+            workspace (str, optional): Workspace name, set when several workspaces share a process
+            dedup (EventDeduplicator, optional): Shared de-duplication set. A private one is created by default
         """
         self.bot_token = bot_token or os.environ.get('SLACK_BOT_TOKEN')
         self.app_token = app_token or os.environ.get('SLACK_APP_TOKEN')
@@ -25,6 +40,34 @@ class SlackService:
         # Initialize regular Web API client
         self.client = WebClient(token=self.bot_token)
         self.socket_client = None
+        self.socket_pool = None
+        self.workspace = workspace
+        self.dispatcher = None
+        self._owns_dispatcher = False
+        self.outbox = None
+        self.uploader = None
+        # Guards lazy creation of the outbox and uploader, which start worker threads
+        self._lazy_lock = threading.Lock()
+        self.dedup = dedup if dedup is not None else EventDeduplicator()
+        dm_path = None
+        if workspace:
+            dm_path = os.path.join(os.environ.get('IRIS_DATA_DIR', '.iris'), f"slack_dm_channels.{workspace}.json")
+        self.dm_channels = DMChannelMap(self.client, path=dm_path)
+        
+        # Local user directory, kept current from user_change / team_join events
+        self.directory = SlackUserDirectory(self.client)
+        self.event_handlers = {}
+        self.add_event_handler("user_change", self.directory.handle_event)
+        self.add_event_handler("team_join", self.directory.handle_event)
+        
+        # Shared users.info / conversations.info cache
+        self.metadata = SlackMetadataCache(self.client)
+        for event_type in ("user_change", "team_join"):
+            self.add_event_handler(event_type, self.metadata.handle_user_event)
+        for event_type in ("channel_rename", "group_rename", "channel_archive", "channel_unarchive",
+                           "group_archive", "group_unarchive", "channel_deleted", "group_deleted"):
+            self.add_event_handler(event_type, self.metadata.handle_channel_event)
+        self.add_event_handler("im_created", self.dm_channels.handle_event)
         
         # Set up logging
         logging.basicConfig(level=logging.INFO)
@@ -39,6 +82,23 @@ class SlackService:
                 web_client=self.client
             )
     
+    def add_event_handler(self, event_type, handler):
+        """Register a handler for non-message Events API events
+        
+        Args:
+            event_type (str): Event type, e.g. "user_change"
+            handler: Function called with the event payload
+        """
+        self.event_handlers.setdefault(event_type, []).append(handler)
+    
+    def _dispatch_event(self, event_data):
+        for handler in self.event_handlers.get(event_data.get("type"), []):
+            try:
+                handler(event_data)
+            except Exception as e:
+                self.logger.error(f"Error handling {event_data.get('type')} event: {e}")
+    
+    @traced("slack.send_message")
     def send_message(self, channel, text, blocks=None, thread_ts=None):
         """Send a message to a Slack channel
         
@@ -62,6 +122,40 @@ class SlackService:
             self.logger.error(f"Error sending message: {e}")
             raise
     
+    def enqueue_message(self, channel, text, blocks=None, thread_ts=None):
+        """Queue a message for rate-limited delivery
+        
+        Unlike send_message this never raises on rate limits: posts are
+        paced per channel, retried after Retry-After, and plain-text
+        messages to the same channel/thread sent close together are
+        coalesced into one post.
+        
+        Args:
+            channel (str): Channel ID or name
+            text (str): Message text
+            blocks (list, optional): Block Kit blocks for rich formatting
+            thread_ts (str, optional): Thread timestamp to reply in a thread
+            
+        Returns:
+            Future: Resolves to the ts of the delivered message
+        """
+        return self._get_outbox().enqueue(channel, text, blocks=blocks, thread_ts=thread_ts)
+    
+    def _get_outbox(self):
+        if self.outbox is None:
+            with self._lazy_lock:
+                if self.outbox is None:
+                    self.outbox = SlackOutbox(self.client.chat_postMessage)
+        return self.outbox
+    
+    def _get_uploader(self):
+        if self.uploader is None:
+            with self._lazy_lock:
+                if self.uploader is None:
+                    self.uploader = SlackFileUploader(self.client)
+        return self.uploader
+    
+    @traced("slack.send_direct_message")
     def send_direct_message(self, user_id, text, blocks=None):
         """Send a direct message to a user
         
@@ -74,20 +168,111 @@ class SlackService:
             dict: Response from Slack API
         """
         try:
-            # Open a DM channel with the user
-            response = self.client.conversations_open(users=user_id)
-            channel_id = response['channel']['id']
+            # Resolve the DM channel, opening it only the first time
+            channel_id = self.dm_channels.get(user_id)
             
             # Send message to the DM channel
-            return self.client.chat_postMessage(
-                channel=channel_id,
-                text=text,
-                blocks=blocks
-            )
+            try:
+                return self.client.chat_postMessage(
+                    channel=channel_id,
+                    text=text,
+                    blocks=blocks
+                )
+            except SlackApiError as e:
+                if e.response.get("error") not in ("channel_not_found", "is_archived"):
+                    raise
+                # Stale cached channel, reopen it once
+                self.dm_channels.invalidate(user_id)
+                return self.client.chat_postMessage(
+                    channel=self.dm_channels.get(user_id),
+                    text=text,
+                    blocks=blocks
+                )
         except SlackApiError as e:
             self.logger.error(f"Error sending direct message: {e}")
             raise
     
+    @traced("slack.upload_file")
+    def upload_file(self, source, channel=None, filename=None, title=None, initial_comment=None,
+                    thread_ts=None, length=None, progress=None):
+        """Upload a file, streaming it in chunks instead of loading it into memory
+        
+        Args:
+            source: File path, open binary file, bytes, or an iterable of byte chunks
+            channel (str, optional): Channel ID to share the file in
+            filename (str, optional): Name shown in Slack. Defaults to the path's base name
+            title (str, optional): File title. Defaults to the filename
+            initial_comment (str, optional): Message posted with the file
+            thread_ts (str, optional): Thread timestamp to share the file in a thread
+            length (int, optional): Size in bytes, for generators of known size
+            progress (optional): Called with (filename, bytes_sent, total_bytes) after every chunk
+            
+        Returns:
+            dict: The uploaded file object
+        """
+        return self._get_uploader().upload(source, channel, filename=filename, title=title, initial_comment=initial_comment,
+                                           thread_ts=thread_ts, length=length, progress=progress)
+    
+    @traced("slack.upload_files")
+    def upload_files(self, sources, channel=None, initial_comment=None, thread_ts=None, progress=None):
+        """Upload several files in parallel and share them in one message
+        
+        Args:
+            sources (list): File paths or FileUpload objects
+            channel (str, optional): Channel ID to share the files in
+            initial_comment (str, optional): Message posted with the files
+            thread_ts (str, optional): Thread timestamp to share the files in a thread
+            progress (optional): Called with (filename, bytes_sent, total_bytes) after every chunk
+            
+        Returns:
+            list: The uploaded file objects
+        """
+        uploads = [source if isinstance(source, FileUpload) else FileUpload(source) for source in sources]
+        return self._get_uploader().upload_many(uploads, channel, initial_comment=initial_comment, thread_ts=thread_ts,
+                                                progress=progress)
+    
+    @traced("slack.send_direct_messages")
+    def send_direct_messages(self, user_ids, text, blocks=None, timeout=None):
+        """Send the same direct message to many users
+        
+        DM channels come from the cached map (warmed in bulk when many are
+        unknown) and posts go through the rate-limited outbound queue, so
+        notifying N users costs close to N API calls.
+        
+        Args:
+            user_ids (list): User IDs
+            text (str): Message text
+            blocks (list, optional): Block Kit blocks for rich formatting
+            timeout (float, optional): Seconds to wait for each delivery
+            
+        Returns:
+            dict: User ID mapped to the message ts, or to the exception that stopped delivery
+        """
+        results = {}
+        try:
+            channels = self.dm_channels.get_many(user_ids)
+        except SlackApiError as e:
+            self.logger.error(f"Error resolving DM channels in bulk, falling back to one by one: {e}")
+            channels = {}
+            for user_id in dict.fromkeys(user_ids):
+                try:
+                    channels[user_id] = self.dm_channels.get(user_id)
+                except SlackApiError as error:
+                    results[user_id] = error
+        
+        deliveries = {
+            user_id: self.enqueue_message(channel_id, text, blocks=blocks)
+            for user_id, channel_id in channels.items()
+        }
+        for user_id, delivery in deliveries.items():
+            try:
+                results[user_id] = delivery.result(timeout=timeout)
+            except Exception as e:
+                self.logger.error(f"Error sending direct message to {user_id}: {e}")
+                results[user_id] = e
+        return results
+    
+    @traced("slack.get_user_by_email")
     def get_user_by_email(self, email):
         """Get user info by email address
         
@@ -97,13 +282,19 @@ class SlackService:
         Returns:
             dict: User information
         """
+        user = self.directory.find_by_email(email)
+        if user:
+            return user
+        
         try:
             response = self.client.users_lookupByEmail(email=email)
+            self.directory.upsert(response['user'])
             return response['user']
         except SlackApiError as e:
             self.logger.error(f"Error getting user by email: {e}")
             return None
     
+    @traced("slack.get_user_by_name")
     def get_user_by_name(self, username):
         """Find a user by their display name
         
@@ -114,65 +305,115 @@ class SlackService:
             dict: User information or None if not found
         """
         try:
-            # Get all users
-            response = self.client.users_list()
-            users = response['members']
-            
-            # Search for user by display name or real name
-            username = username.lower()
-            for user in users:
-                if (
-                    user.get('profile', {}).get('display_name', '').lower() == username or
-                    user.get('profile', {}).get('real_name', '').lower() == username
-                ):
-                    return user
-            
-            return None
+            self.directory.ensure_loaded()
+            return self.directory.find_by_name(username)
         except SlackApiError as e:
             self.logger.error(f"Error getting user by name: {e}")
             return None
     
-    def listen_for_messages(self, callback_function):
+    def listen_for_messages(self, callback_function, workers=None, dispatcher=None, connections=None):
         """Listen for messages in real-time using Socket Mode
         
+        Events are acknowledged immediately and handed to a worker pool.
+        Messages in the same channel (or thread) are handled in order,
+        different channels in parallel. Several sockets are kept open;
+        Slack spreads events across them and redeliveries are dropped
+        before they reach the pool.
+        
         Args:
             callback_function: Function to call when a message is received
                 The function should accept (channel_id, user_id, text, event_data)
+            workers (int, optional): Worker threads. Defaults to IRIS_SLACK_WORKERS or 8;
+                0 runs the callback inline on the Socket Mode thread
+            dispatcher (optional): Existing dispatcher to submit events to instead of
+                starting a pool, e.g. one shared by several workspaces
+            connections (int, optional): Socket Mode connections. Defaults to IRIS_SLACK_CONNECTIONS or 2
         
         Note: Requires app_token to be set and proper permissions
         """
         if not self.socket_client:
             raise ValueError("Socket Mode client not initialized. Make sure SLACK_APP_TOKEN is set.")
         
+        workers = workers if workers is not None else int(os.environ.get('IRIS_SLACK_WORKERS', 8))
+        if dispatcher is not None:
+            self.dispatcher = dispatcher
+        elif workers > 0:
+            self.dispatcher = EventDispatcher(callback_function, workers=workers)
+            self._owns_dispatcher = True
+
         def process_event(client: SocketModeClient, req: SocketModeRequest):
             if req.type == "events_api":
-                # Extract the event from the payload
-                event_data = req.payload.get("event", {})
-                
-                # Acknowledge the request
+                # Acknowledge the request before doing any work
                 client.send_socket_mode_response(SocketModeResponse(envelope_id=req.envelope_id))
-                
-                # Only process message events that are not from bots
-                if (
-                    event_data.get("type") == "message" and
-                    event_data.get("subtype") not in ["bot_message", "message_changed", "message_deleted"]
-                ):
-                    channel_id = event_data.get("channel")
-                    user_id = event_data.get("user")
-                    text = event_data.get("text", "")
-                    
-                    # Call the provided callback function with the message details
-                    callback_function(channel_id, user_id, text, event_data)
-        
-        # Register the event listener
-        self.socket_client.socket_mode_request_listeners.append(process_event)
-        self.logger.info("Starting to listen for Slack messages...")
-        
-        # Start the client
-        self.socket_client.connect()
+                self.handle_event(req.payload.get("event", {}), callback_function, req.payload.get("event_id"))
+        
+        # Load the user directory up front so lookups never hit the API
+        try:
+            self.directory.load()
+        except SlackApiError as e:
+            self.logger.error(f"Error loading user directory, will retry on first lookup: {e}")
+        try:
+            self.dm_channels.warm()
+        except SlackApiError as e:
+            self.logger.error(f"Error warming DM channels, they will be opened on demand: {e}")
+        
+        # Every socket in the pool shares the event listener
+        self.socket_pool = SocketModePool(
+            lambda: SocketModeClient(app_token=self.app_token, web_client=self.client),
+            [process_event],
+            size=connections,
+            clients=[self.socket_client],
+            name=self.workspace or "default",
+        )
+        self.logger.info(f"Starting to listen for Slack messages on {self.socket_pool.size} connection(s)...")
+        
+        # Connect the first socket now, the rest staggered in the background
+        self.socket_pool.start()
         
         return self.socket_client
     
+    def handle_event(self, event_data, callback_function, event_id=None):
+        """Route one Events API event to its handlers or the message callback
+        
+        Args:
+            event_data (dict): The "event" object from the Events API payload
+            callback_function: Message callback, see listen_for_messages
+            event_id (str, optional): Envelope event_id, used to drop redeliveries
+        """
+        # Slack redelivers on slow acks and replays after reconnects
+        keys = event_keys(event_data, event_id)
+        if self.workspace:
+            # The de-duplication set may be shared between workspaces
+            keys = [f"{self.workspace}:{key}" for key in keys]
+        if not self.dedup.check(*keys):
+            self.logger.info(f"Skipping duplicate {event_data.get('type')} event {event_id or event_data.get('ts')}")
+            return
+        
+        if event_data.get("type") in self.event_handlers:
+            self._dispatch_event(event_data)
+            return
+        
+        # Only process message events that are not from bots
+        if (
+            event_data.get("type") != "message" or
+            event_data.get("subtype") in ["bot_message", "message_changed", "message_deleted"]
+        ):
+            return
+        
+        event_ts = event_data.get("event_ts") or event_data.get("ts")
+        if event_ts:
+            SLACK_EVENT_LAG.observe(max(0.0, time.time() - float(event_ts)))
+        
+        channel_id = event_data.get("channel")
+        user_id = event_data.get("user")
+        text = event_data.get("text", "")
+        
+        # Call the provided callback function with the message details
+        if self.dispatcher:
+            self.dispatcher.submit(event_key(channel_id, event_data), channel_id, user_id, text, event_data)
+        else:
+            callback_function(channel_id, user_id, text, event_data)
+    
     def format_task_message(self, task_info):
         """Format a message about a task using Block Kit
         
@@ -274,7 +515,19 @@ class SlackService:
         return re.findall(mention_pattern, text)
     
     def close_connection(self):
-        """Close the Socket Mode connection if open"""
-        if self.socket_client:
+        """Close the Socket Mode connections if open and finish queued events"""
+        if self.socket_pool:
+            self.socket_pool.close()
+            self.socket_pool = None
+            self.logger.info("Closed Slack connections")
+        elif self.socket_client:
             self.socket_client.close()
-            self.logger.info("Closed Slack connection") 
\ No newline at end of file
+            self.logger.info("Closed Slack connection")
+        if self.dispatcher and self._owns_dispatcher:
+            self.dispatcher.stop()
+        self.dispatcher = None
+        with self._lazy_lock:
+            outbox, self.outbox = self.outbox, None
+        if outbox:
+            outbox.close()
+        self.dedup.flush() 
\ No newline at end of file
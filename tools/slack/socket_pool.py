@@ -0,0 +1,200 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+from orchestrator.metrics import Counter, Gauge
+
+SLACK_SOCKETS = Gauge("iris_slack_socket_connections", "Connected Socket Mode sockets", ["pool"])
+SLACK_SOCKET_CONNECTS = Counter(
+    "iris_slack_socket_connects_total", "Socket Mode connection attempts by outcome", ["pool", "status"]
+)
+
+
+class _Connection:
+    __slots__ = ("index", "client", "down_since", "failures", "next_attempt")
+
+    def __init__(self, index: int, client=None):
+        self.index = index
+        self.client = client
+        self.down_since: Optional[float] = None
+        self.failures = 0
+        self.next_attempt = 0.0
+
+
+class SocketModePool:
+    """Several Socket Mode connections for one Slack app
+
+    Slack spreads an app's events across all of its open connections, so
+    extra sockets add throughput and keep events flowing while one of them
+    reconnects. Every socket feeds the same request listeners, and so the
+    same de-duplicated dispatch queue.
+
+    Sockets are opened `stagger` seconds apart, and a health-check thread
+    reconnects dropped ones no faster than one per stagger interval, so
+    the connections never refresh at the same moment. A socket that is
+    down gets one health interval to come back on its own (the client
+    reconnects by itself) before the pool steps in; failed attempts back
+    off exponentially.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable,
+        listeners: List[Callable],
+        size: Optional[int] = None,
+        stagger: Optional[float] = None,
+        health_interval: Optional[float] = None,
+        max_backoff: float = 300.0,
+        clients: Optional[list] = None,
+        name: str = "default",
+    ):
+        """Initialize the pool
+
+        Args:
+            client_factory (Callable): Returns a new, unconnected SocketModeClient
+            listeners (List[Callable]): Request listeners added to every socket
+            size (int, optional): Number of sockets. Defaults to IRIS_SLACK_CONNECTIONS or 2
+            stagger (float, optional): Minimum seconds between connects. Defaults to IRIS_SLACK_CONNECTION_STAGGER or 5
+            health_interval (float, optional): Seconds between health checks. Defaults to IRIS_SLACK_HEALTH_INTERVAL or 10
+            max_backoff (float, optional): Longest wait between failed attempts on one socket. Defaults to 300
+            clients (list, optional): Already-created clients to use for the first sockets
+            name (str, optional): Metrics label. Defaults to "default"
+        """
+        self.client_factory = client_factory
+        self.listeners = list(listeners)
+        self.size = max(1, size if size is not None else int(os.environ.get("IRIS_SLACK_CONNECTIONS", 2)))
+        self.stagger = stagger if stagger is not None else float(os.environ.get("IRIS_SLACK_CONNECTION_STAGGER", 5))
+        self.health_interval = (
+            health_interval if health_interval is not None else float(os.environ.get("IRIS_SLACK_HEALTH_INTERVAL", 10))
+        )
+        self.max_backoff = max_backoff
+        self.name = name
+        self.logger = logging.getLogger(__name__)
+
+        clients = list(clients or [])[: self.size]
+        self.connections = [_Connection(i, clients[i] if i < len(clients) else None) for i in range(self.size)]
+        for connection in self.connections:
+            if connection.client is not None:
+                connection.client.socket_mode_request_listeners.extend(self.listeners)
+
+        self._last_attempt = float("-inf")
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._monitor: Optional[threading.Thread] = None
+        self._unregister_gauge = SLACK_SOCKETS.labels(pool=name).add_function(self.connected)
+
+    @property
+    def clients(self) -> list:
+        return [connection.client for connection in self.connections if connection.client is not None]
+
+    def connected(self) -> int:
+        """Number of sockets currently connected"""
+        return sum(1 for connection in self.connections if self._healthy(connection))
+
+    def start(self):
+        """Connect the first socket now and the rest in the background
+
+        Raises:
+            Exception: Whatever the first connect raised, e.g. an invalid app token
+        """
+        first = self.connections[0]
+        if first.client is None:
+            first.client = self._new_client()
+        self._last_attempt = time.monotonic()
+        try:
+            first.client.connect()
+        except Exception:
+            SLACK_SOCKET_CONNECTS.labels(pool=self.name, status="error").inc()
+            raise
+        SLACK_SOCKET_CONNECTS.labels(pool=self.name, status="ok").inc()
+        self.logger.info(f"Socket Mode connection 1/{self.size} open")
+
+        if self._monitor is None:
+            tick = min(self.health_interval, self.stagger) if self.stagger > 0 else self.health_interval
+            self._monitor = threading.Thread(
+                target=self._run, args=(max(tick, 0.05),), name=f"slack-sockets-{self.name}", daemon=True
+            )
+            self._monitor.start()
+
+    def _new_client(self):
+        client = self.client_factory()
+        client.socket_mode_request_listeners.extend(self.listeners)
+        return client
+
+    def _healthy(self, connection: _Connection) -> bool:
+        if connection.client is None:
+            return False
+        try:
+            return bool(connection.client.is_connected())
+        except Exception:
+            return False
+
+    def _run(self, tick: float):
+        while not self._stop.wait(tick):
+            try:
+                self.check()
+            except Exception as e:
+                self.logger.error(f"Socket Mode health check failed: {e}")
+
+    def check(self, now: Optional[float] = None) -> int:
+        """Run one health check, (re)connecting at most one socket
+
+        Returns:
+            int: Number of connected sockets
+        """
+        now = now if now is not None else time.monotonic()
+        with self._lock:
+            for connection in self.connections:
+                if self._healthy(connection):
+                    connection.down_since = None
+                    continue
+                if connection.client is not None and not connection.failures:
+                    # Give the client's own reconnect a chance first
+                    if connection.down_since is None:
+                        connection.down_since = now
+                    if now - connection.down_since < self.health_interval:
+                        continue
+                if now < connection.next_attempt or now - self._last_attempt < self.stagger:
+                    continue
+                self._connect(connection, now)
+                break
+        return self.connected()
+
+    def _connect(self, connection: _Connection, now: float):
+        self._last_attempt = now
+        label = f"{connection.index + 1}/{self.size}"
+        try:
+            if connection.client is None:
+                connection.client = self._new_client()
+                connection.client.connect()
+            else:
+                connection.client.connect_to_new_endpoint()
+        except Exception as e:
+            connection.failures += 1
+            backoff = min(self.max_backoff, max(self.stagger, 1.0) * 2 ** connection.failures)
+            connection.next_attempt = now + backoff
+            SLACK_SOCKET_CONNECTS.labels(pool=self.name, status="error").inc()
+            self.logger.warning(f"Socket Mode connection {label} failed, retrying in {backoff:.0f}s: {e}")
+            return
+        connection.failures = 0
+        connection.down_since = None
+        connection.next_attempt = 0.0
+        SLACK_SOCKET_CONNECTS.labels(pool=self.name, status="ok").inc()
+        self.logger.info(f"Socket Mode connection {label} open")
+
+    def close(self):
+        """Stop health checks and close every socket"""
+        self._stop.set()
+        self._unregister_gauge()
+        if self._monitor is not None:
+            self._monitor.join(timeout=5)
+            self._monitor = None
+        with self._lock:
+            for connection in self.connections:
+                if connection.client is not None:
+                    try:
+                        connection.client.close()
+                    except Exception as e:
+                        self.logger.warning(f"Error closing Socket Mode connection: {e}")
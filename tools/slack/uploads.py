@@ -0,0 +1,256 @@
+import io
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Optional, Union
+
+import requests
+
+from orchestrator.metrics import Counter
+from tools.slack.pagination import call_with_retry
+
+SLACK_UPLOADS = Counter("iris_slack_uploads_total", "Slack file uploads by outcome", ["status"])
+SLACK_UPLOAD_BYTES = Counter("iris_slack_upload_bytes_total", "Bytes streamed to Slack file uploads")
+
+# A path, an open binary file, bytes, or an iterable of byte chunks (e.g. a generator)
+UploadSource = Union[str, os.PathLike, BinaryIO, bytes, Iterable[bytes]]
+ProgressCallback = Callable[[str, int, int], None]
+
+
+class FileUpload:
+    """One file to upload
+
+    Args:
+        source (UploadSource): Where the bytes come from
+        filename (str, optional): Name shown in Slack. Defaults to the path's base name
+        title (str, optional): File title. Defaults to the filename
+        length (int, optional): Size in bytes. Needed up front by Slack; sources of
+            unknown size are spooled to a temporary file first
+        alt_txt (str, optional): Description for screen readers (images)
+    """
+
+    def __init__(self, source: UploadSource, filename: Optional[str] = None, title: Optional[str] = None,
+                 length: Optional[int] = None, alt_txt: Optional[str] = None):
+        self.source = source
+        if filename is None and isinstance(source, (str, os.PathLike)):
+            filename = os.path.basename(os.fspath(source))
+        if filename is None:
+            filename = os.path.basename(getattr(source, "name", "") or "") or "upload.bin"
+        self.filename = filename
+        self.title = title or filename
+        self.length = length
+        self.alt_txt = alt_txt
+
+
+class _StreamingBody:
+    """Iterable request body with a known length
+
+    requests sends an iterable with __len__ using Content-Length rather
+    than chunked encoding, reading one chunk at a time.
+    """
+
+    def __init__(self, stream: BinaryIO, length: int, chunk_size: int, on_chunk: Callable[[int], None]):
+        self.stream = stream
+        self.length = length
+        self.chunk_size = chunk_size
+        self.on_chunk = on_chunk
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __iter__(self) -> Iterator[bytes]:
+        remaining = self.length
+        while remaining > 0:
+            chunk = self.stream.read(min(self.chunk_size, remaining))
+            if not chunk:
+                raise IOError(f"Upload source ended {remaining} bytes early")
+            remaining -= len(chunk)
+            self.on_chunk(len(chunk))
+            yield chunk
+
+
+class SlackFileUploader:
+    """Streams files to Slack with the v2 upload flow
+
+    Each file gets an upload URL from files.getUploadURLExternal, its bytes
+    are POSTed to that URL in chunks straight from disk (or from a
+    generator), and files.completeUploadExternal then shares the batch in
+    one call. Memory use stays at about one chunk per upload in flight,
+    however large the files. Several files upload in parallel.
+    """
+
+    def __init__(self, client, chunk_size: Optional[int] = None, workers: Optional[int] = None,
+                 session: Optional[requests.Session] = None, timeout: float = 300.0, max_retries: int = 3):
+        """Initialize the uploader
+
+        Args:
+            client (WebClient): Slack Web API client
+            chunk_size (int, optional): Bytes read per chunk. Defaults to IRIS_SLACK_UPLOAD_CHUNK or 1 MiB
+            workers (int, optional): Files uploaded in parallel. Defaults to IRIS_SLACK_UPLOAD_WORKERS or 4
+            session (requests.Session, optional): HTTP session for the upload POSTs
+            timeout (float, optional): Seconds without progress before a POST fails. Defaults to 300
+            max_retries (int, optional): Retries of a failed POST for re-readable sources. Defaults to 3
+        """
+        self.client = client
+        self.chunk_size = chunk_size or int(os.environ.get("IRIS_SLACK_UPLOAD_CHUNK", 1024 * 1024))
+        self.workers = workers or int(os.environ.get("IRIS_SLACK_UPLOAD_WORKERS", 4))
+        self.session = session or requests.Session()
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.logger = logging.getLogger(__name__)
+
+    def upload(self, source: UploadSource, channel: Optional[str] = None, filename: Optional[str] = None,
+               title: Optional[str] = None, initial_comment: Optional[str] = None, thread_ts: Optional[str] = None,
+               length: Optional[int] = None, progress: Optional[ProgressCallback] = None) -> dict:
+        """Upload one file, see upload_many()
+
+        Returns:
+            dict: The file object from files.completeUploadExternal
+        """
+        upload = FileUpload(source, filename=filename, title=title, length=length)
+        return self.upload_many([upload], channel, initial_comment, thread_ts, progress)[0]
+
+    def upload_many(self, uploads: List[FileUpload], channel: Optional[str] = None,
+                    initial_comment: Optional[str] = None, thread_ts: Optional[str] = None,
+                    progress: Optional[ProgressCallback] = None) -> List[dict]:
+        """Upload several files in parallel and share them together
+
+        Args:
+            uploads (List[FileUpload]): Files to upload
+            channel (str, optional): Channel to share the files in. Private to the bot if omitted
+            initial_comment (str, optional): Message posted with the files
+            thread_ts (str, optional): Thread to share the files in
+            progress (ProgressCallback, optional): Called with (filename, bytes_sent, total_bytes)
+                after every chunk, from the upload threads
+
+        Returns:
+            List[dict]: File objects, in the order of uploads
+        """
+        with ThreadPoolExecutor(max_workers=min(self.workers, max(len(uploads), 1))) as pool:
+            file_ids = list(pool.map(lambda upload: self._transfer(upload, progress), uploads))
+
+        kwargs = {"files": [{"id": file_id, "title": upload.title} for file_id, upload in zip(file_ids, uploads)]}
+        if channel:
+            kwargs["channel_id"] = channel
+        if initial_comment:
+            kwargs["initial_comment"] = initial_comment
+        if thread_ts:
+            kwargs["thread_ts"] = thread_ts
+        response = call_with_retry(self.client.files_completeUploadExternal, **kwargs)
+        SLACK_UPLOADS.labels(status="ok").inc(len(uploads))
+        return response.get("files", [])
+
+    def _transfer(self, upload: FileUpload, progress: Optional[ProgressCallback]) -> str:
+        """Get an upload URL and stream the bytes to it, returning the file ID"""
+        try:
+            with _OpenSource(upload.source, upload.length, self.chunk_size) as (stream, length, rewind):
+                kwargs = {"filename": upload.filename, "length": length}
+                if upload.alt_txt:
+                    kwargs["alt_txt"] = upload.alt_txt
+                response = call_with_retry(self.client.files_getUploadURLExternal, **kwargs)
+                self._post(response["upload_url"], upload.filename, stream, length, rewind, progress)
+                return response["file_id"]
+        except Exception:
+            SLACK_UPLOADS.labels(status="error").inc()
+            raise
+
+    def _post(self, url: str, filename: str, stream: BinaryIO, length: int, rewind: Optional[Callable],
+              progress: Optional[ProgressCallback]):
+        start = stream.tell() if rewind else 0
+        for attempt in range(self.max_retries + 1):
+            sent = 0
+
+            def on_chunk(size: int):
+                nonlocal sent
+                sent += size
+                SLACK_UPLOAD_BYTES.inc(size)
+                if progress:
+                    progress(filename, sent, length)
+
+            try:
+                response = self.session.post(
+                    url,
+                    data=_StreamingBody(stream, length, self.chunk_size, on_chunk),
+                    headers={"Content-Type": "application/octet-stream"},
+                    timeout=self.timeout,
+                )
+                if response.status_code < 500:
+                    response.raise_for_status()
+                    return
+                error = requests.HTTPError(f"Upload of {filename} failed with HTTP {response.status_code}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error = e
+            if rewind is None or attempt == self.max_retries:
+                raise error
+            delay = 2 ** attempt
+            self.logger.warning(f"Upload of {filename} failed, retrying in {delay}s: {error}")
+            time.sleep(delay)
+            rewind(start)
+
+
+class _OpenSource:
+    """Context manager yielding (stream, length, rewind) for any UploadSource
+
+    rewind is None when the source cannot be read twice.
+    """
+
+    def __init__(self, source: UploadSource, length: Optional[int], chunk_size: int):
+        self.source = source
+        self.length = length
+        self.chunk_size = chunk_size
+        self._close: Optional[BinaryIO] = None
+
+    def __enter__(self):
+        source = self.source
+        if isinstance(source, (str, os.PathLike)):
+            stream = self._close = open(source, "rb")
+            return stream, os.fstat(stream.fileno()).st_size, stream.seek
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            stream = io.BytesIO(source)
+            return stream, len(source), stream.seek
+        if hasattr(source, "read"):
+            seekable = getattr(source, "seekable", lambda: False)()
+            if self.length is not None:
+                return source, self.length, source.seek if seekable else None
+            if seekable:
+                position = source.tell()
+                length = source.seek(0, os.SEEK_END) - position
+                source.seek(position)
+                return source, length, source.seek
+            return self._spool(iter(lambda: source.read(self.chunk_size), b""))
+        if self.length is not None:
+            return _IterableReader(iter(source)), self.length, None
+        return self._spool(iter(source))
+
+    def _spool(self, chunks: Iterator[bytes]):
+        # Slack needs the length before the first byte, so unknown sizes go to disk first
+        spool = self._close = tempfile.SpooledTemporaryFile(max_size=self.chunk_size)
+        length = 0
+        for chunk in chunks:
+            spool.write(chunk)
+            length += len(chunk)
+        spool.seek(0)
+        return spool, length, spool.seek
+
+    def __exit__(self, *exc):
+        if self._close is not None:
+            self._close.close()
+
+
+class _IterableReader:
+    """read() over an iterable of byte chunks"""
+
+    def __init__(self, chunks: Iterator[bytes]):
+        self.chunks = chunks
+        self.buffer = b""
+
+    def read(self, size: int) -> bytes:
+        while len(self.buffer) < size:
+            chunk = next(self.chunks, None)
+            if chunk is None:
+                break
+            self.buffer += chunk
+        data, self.buffer = self.buffer[:size], self.buffer[size:]
+        return data
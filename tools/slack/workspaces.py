@@ -0,0 +1,243 @@
+import json
+import logging
+import os
+import threading
+from typing import Callable, Dict, Iterator, Optional
+
+from tools.slack.dedup import EventDeduplicator
+from tools.slack.dispatcher import EventDispatcher
+from tools.slack.service import SlackService
+
+DEFAULT_WORKSPACE = "default"
+
+
+class WorkspaceDispatcher:
+    """A workspace's view of the shared dispatcher
+
+    Prefixes ordering keys with the workspace so channels never collide,
+    and passes the workspace name to the shared handler. Stopping it is
+    a no-op; the registry owns the real dispatcher.
+    """
+
+    def __init__(self, dispatcher: EventDispatcher, workspace: str):
+        self.dispatcher = dispatcher
+        self.workspace = workspace
+
+    def submit(self, key: str, *args, timeout: Optional[float] = None) -> bool:
+        return self.dispatcher.submit(f"{self.workspace}:{key}", self.workspace, *args, timeout=timeout)
+
+    def stop(self, *args, **kwargs):
+        pass
+
+
+def _load_workspaces(value: Optional[str]) -> list:
+    """Read workspace configs from inline JSON or a JSON file path"""
+    if not value:
+        return []
+    if os.path.exists(value):
+        with open(value, encoding="utf-8") as f:
+            return json.load(f)
+    return json.loads(value)
+
+
+class WorkspaceRegistry:
+    """Hosts several Slack workspaces in one process
+
+    Each workspace gets its own SlackService, so Web API clients, the user
+    directory, metadata cache, DM map and outbound rate limiters stay per
+    workspace. The event worker pool, the de-duplication set, the LLM
+    client and the Linear/Calendar services are created once and shared,
+    so an extra workspace costs a client and its caches rather than a
+    whole process.
+    """
+
+    def __init__(self, workers: Optional[int] = None, llm_client=None, linear_service=None, gcal_service=None):
+        """Initialize an empty registry
+
+        Args:
+            workers (int, optional): Shared event worker threads. Defaults to IRIS_SLACK_WORKERS or 8
+            llm_client (optional): Shared LLM client for every workspace's tool layer. Created on first use
+            linear_service (LinearService, optional): Shared Linear service. Created on first use
+            gcal_service (GoogleCalendarService, optional): Shared calendar service. Created on first use
+        """
+        self.workers = workers if workers is not None else int(os.environ.get("IRIS_SLACK_WORKERS", 8))
+        self.llm_client = llm_client
+        self.linear_service = linear_service
+        self.gcal_service = gcal_service
+        self.dedup = EventDeduplicator()
+        self.dispatcher: Optional[EventDispatcher] = None
+        self.logger = logging.getLogger(__name__)
+        self._workspaces: Dict[str, SlackService] = {}
+        self._tool_layers: Dict[str, object] = {}
+        self._teams: Dict[str, str] = {}
+        self._callback: Optional[Callable] = None
+        self._connect = False
+        self._owns_dispatcher = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, **kwargs) -> "WorkspaceRegistry":
+        """Build a registry from IRIS_SLACK_WORKSPACES
+
+        IRIS_SLACK_WORKSPACES is a JSON list (inline or a file path) of
+        {"name": ..., "bot_token": ..., "app_token": ..., "team_id": ...};
+        team_id routes Events API requests to the workspace. Without it the
+        registry holds a single "default" workspace from SLACK_BOT_TOKEN
+        and SLACK_APP_TOKEN.
+        """
+        registry = cls(**kwargs)
+        configs = _load_workspaces(os.environ.get("IRIS_SLACK_WORKSPACES"))
+        if not configs:
+            configs = [{"name": DEFAULT_WORKSPACE}]
+        for config in configs:
+            registry.add(config["name"], config.get("bot_token"), config.get("app_token"), config.get("team_id"))
+        return registry
+
+    def __len__(self) -> int:
+        return len(self._workspaces)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._workspaces))
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._workspaces
+
+    def add(self, name: str, bot_token: Optional[str] = None, app_token: Optional[str] = None,
+            team_id: Optional[str] = None) -> SlackService:
+        """Register a workspace, connecting it right away if the registry is listening
+
+        Args:
+            name (str): Workspace name
+            bot_token (str, optional): Bot token. Defaults to SLACK_BOT_TOKEN
+            app_token (str, optional): App token for Socket Mode. Defaults to SLACK_APP_TOKEN
+            team_id (str, optional): Slack team ID, used to route Events API requests
+
+        Returns:
+            SlackService: The workspace's service
+        """
+        with self._lock:
+            if name in self._workspaces:
+                raise ValueError(f"Workspace '{name}' is already registered")
+            service = SlackService(bot_token=bot_token, app_token=app_token, workspace=name, dedup=self.dedup)
+            self._workspaces[name] = service
+            if team_id:
+                self._teams[team_id] = name
+        if self.dispatcher is not None:
+            service.dispatcher = WorkspaceDispatcher(self.dispatcher, name)
+            if self._connect and service.socket_client:
+                self._listen(name, service)
+        return service
+
+    def remove(self, name: str):
+        """Disconnect and forget a workspace"""
+        with self._lock:
+            service = self._workspaces.pop(name)
+            self._tool_layers.pop(name, None)
+            self._teams = {team: workspace for team, workspace in self._teams.items() if workspace != name}
+        service.close_connection()
+
+    def get(self, name: str) -> SlackService:
+        return self._workspaces[name]
+
+    def for_team(self, team_id: Optional[str]) -> Optional[str]:
+        """Workspace name for a Slack team ID
+
+        Falls back to the only workspace when the registry holds just one.
+        """
+        if team_id in self._teams:
+            return self._teams[team_id]
+        if len(self._workspaces) == 1:
+            return next(iter(self._workspaces))
+        return None
+
+    def tool_layer(self, name: str):
+        """Tool layer bound to a workspace's Slack service, sharing the LLM and other services"""
+        layer = self._tool_layers.get(name)
+        if layer is not None:
+            return layer
+
+        from orchestrator.client import create_llm_client
+        from tools.calenders.googlecal.service import GoogleCalendarService
+        from tools.linear.service import LinearService
+        from tools.tools import ToolCallingLayer
+
+        with self._lock:
+            if name not in self._tool_layers:
+                self.llm_client = self.llm_client or create_llm_client()
+                self.linear_service = self.linear_service or LinearService()
+                self.gcal_service = self.gcal_service or GoogleCalendarService()
+                self._tool_layers[name] = ToolCallingLayer(
+                    llm_client=self.llm_client,
+                    slack_service=self._workspaces[name],
+                    linear_service=self.linear_service,
+                    gcal_service=self.gcal_service,
+                )
+            return self._tool_layers[name]
+
+    def _handle(self, workspace: str, channel_id, user_id, text, event_data):
+        self._callback(workspace, channel_id, user_id, text, event_data)
+
+    def _listen(self, name: str, service: SlackService):
+        service.listen_for_messages(
+            lambda *args: self._callback(name, *args),
+            dispatcher=WorkspaceDispatcher(self.dispatcher, name),
+        )
+
+    def start(self, callback_function: Optional[Callable] = None, dispatcher=None):
+        """Start the shared worker pool without opening any sockets
+
+        Events then arrive through handle_event, e.g. from the HTTP Events API.
+
+        Args:
+            callback_function (Callable, optional): Called with (workspace, channel_id, user_id, text, event_data)
+            dispatcher (optional): Existing dispatcher or EventBus to submit
+                (workspace, channel_id, user_id, text, event_data) to instead of starting
+                a pool. The caller stops it
+        """
+        self._callback = callback_function
+        if dispatcher is not None:
+            self.dispatcher = dispatcher
+            self._owns_dispatcher = False
+        else:
+            self.dispatcher = EventDispatcher(self._handle, workers=self.workers)
+            self._owns_dispatcher = True
+        for name, service in list(self._workspaces.items()):
+            service.dispatcher = WorkspaceDispatcher(self.dispatcher, name)
+
+    def handle_event(self, event_data: dict, event_id: Optional[str] = None, team_id: Optional[str] = None) -> bool:
+        """Route one Events API event into the shared dispatcher
+
+        Returns:
+            bool: False if no registered workspace matches the team
+        """
+        name = self.for_team(team_id)
+        if name is None:
+            self.logger.warning(f"Dropping event for unknown team {team_id}")
+            return False
+        self._workspaces[name].handle_event(event_data, lambda *args: self._callback(name, *args), event_id)
+        return True
+
+    def listen(self, callback_function: Optional[Callable] = None, dispatcher=None):
+        """Connect every workspace and route all messages through one worker pool
+
+        Args:
+            callback_function (Callable, optional): Called with (workspace, channel_id, user_id, text, event_data)
+            dispatcher (optional): Existing dispatcher or EventBus, see start()
+        """
+        self.start(callback_function, dispatcher=dispatcher)
+        self._connect = True
+        for name, service in list(self._workspaces.items()):
+            if not service.socket_client:
+                self.logger.warning(f"Workspace '{name}' has no app token, not listening")
+                continue
+            self._listen(name, service)
+            self.logger.info(f"Listening to workspace '{name}'")
+
+    def close(self):
+        """Disconnect every workspace and finish queued events"""
+        for name in list(self._workspaces):
+            self._workspaces[name].close_connection()
+        if self.dispatcher is not None and self._owns_dispatcher:
+            self.dispatcher.stop()
+        self.dispatcher = None
+        self.dedup.flush()
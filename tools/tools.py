@@ -1,27 +1,94 @@
 import os
 import json
-from typing import Dict, List, Any, Optional, Union
-from orchestrator.client import LLMClient
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Dict, List, Any, Optional, Tuple, Union
+from orchestrator.client import create_llm_client
 from tools.slack.service import SlackService
 from tools.linear.service import LinearService
 from tools.calenders.googlecal.service import GoogleCalendarService
+from tools.calculator.service import CalculatorService, CalculatorError
+from orchestrator.metrics import TOOL_CALLS, TOOL_LATENCY
+from orchestrator.tracing import current_span, traced
+from orchestrator.usage import add_tool
+
+# How long the Slack tool waits for a queued message to be posted before reporting it as queued
+SLACK_DELIVERY_TIMEOUT = float(os.environ.get("IRIS_SLACK_DELIVERY_TIMEOUT", 10))
+
+# The Slack upload tool only shares files from this directory, never arbitrary paths the model names
+SLACK_UPLOAD_DIR = os.environ.get(
+    "IRIS_SLACK_UPLOAD_DIR", os.path.join(os.environ.get("IRIS_DATA_DIR", ".iris"), "exports")
+)
+
 class ToolCallingLayer:
-    def __init__(self):
-        self.llm_client = LLMClient()
-        self.slack_service = SlackService()
-        self.linear_service = LinearService()
+    def __init__(self, llm_client=None, slack_service=None, linear_service=None, gcal_service=None):
+        """Initialize the tool layer
+
+        Any service that is not passed in is created from the environment.
+        Passing them in lets the layer run against recorded or fake backends.
+        """
+        self.llm_client = llm_client or create_llm_client()
+        self.slack_service = slack_service or SlackService()
+        self.linear_service = linear_service or LinearService()
         self.tools = self._initialize_tools()
-        self.gcal_service = GoogleCalendarService()
+        self.gcal_service = gcal_service or GoogleCalendarService()
+        self.calculator = CalculatorService()
     
     def _initialize_tools(self) -> List[Dict[str, Any]]:
         """Initialize all available tools."""
+        # Shared by the single and bulk Linear issue tools
+        linear_issue = {
+            "type": "object",
+            "properties": {
+                "id": {
+                    "type": "string",
+                    "description": "Optional issue ID (a UUID). To retry an issue that failed, pass the ID reported for it so it is not created twice",
+                },
+                "title": {
+                    "type": "string",
+                    "description": "The title of the issue",
+                },
+                "description": {
+                    "type": "string",
+                    "description": "The description of the issue",
+                },
+                "priority": {
+                    "type": "integer",
+                    "description": "Priority level (1-4, where 1 is highest)",
+                },
+                "team_id": {
+                    "type": "string",
+                    "description": "The ID of the team to assign the issue to",
+                },
+                "assignee_id": {
+                    "type": "string",
+                    "description": "The EMAIL ID of the user to assign the issue to, if no user is assigned, the issue will be assigned to the team",
+                },
+                "state": {
+                    "type": "string",
+                    "description": "Workflow state name, e.g. Todo or In Progress. Defaults to the team's default state",
+                },
+                "labels": {
+                    "type": "array",
+                    "items": {"type": "string"},
+                    "description": "Label names to apply to the issue",
+                }
+            },
+            "required": ["title", "team_id"],
+        }
+
         return [
             # Calculator tool
             {
                 "type": "function",
                 "function": {
                     "name": "calculate",
-                    "description": "Evaluate a mathematical expression",
+                    "description": (
+                        "Evaluate a mathematical expression. Prefer this over doing arithmetic yourself. "
+                        "Supports + - * / // % and ^ (power), math functions (sqrt, log, exp, sin, round, ...), "
+                        "lists and inclusive ranges written as a..b, and vectorized aggregates such as "
+                        "sum(1.07^n for n in 1..30), mean([3, 5, 8]) or max(x^2 - 3*x for x in 0..10)"
+                    ),
                     "parameters": {
                         "type": "object",
                         "properties": {
@@ -56,6 +123,35 @@ class ToolCallingLayer:
                     },
                 },
             },
+            {
+                "type": "function",
+                "function": {
+                    "name": "slack_upload_file",
+                    "description": "Upload a generated file, such as a report or export, to a Slack channel",
+                    "parameters": {
+                        "type": "object",
+                        "properties": {
+                            "channel": {
+                                "type": "string",
+                                "description": "The channel ID to share the file in",
+                            },
+                            "path": {
+                                "type": "string",
+                                "description": "Path of the file, relative to the exports directory",
+                            },
+                            "title": {
+                                "type": "string",
+                                "description": "Title of the file in Slack",
+                            },
+                            "comment": {
+                                "type": "string",
+                                "description": "Message to post with the file",
+                            }
+                        },
+                        "required": ["channel", "path"],
+                    },
+                },
+            },
             # Google Calendar tool
             {
                 "type": "function",
@@ -97,54 +193,84 @@ class ToolCallingLayer:
                 "function": {
                     "name": "linear_create_issue",
                     "description": "Create a new issue in Linear",
+                    "parameters": linear_issue,
+                },
+            },
+            {
+                "type": "function",
+                "function": {
+                    "name": "linear_create_issues",
+                    "description": (
+                        "Create several Linear issues at once, e.g. every action item from a meeting. "
+                        "Prefer this over repeated linear_create_issue calls"
+                    ),
                     "parameters": {
                         "type": "object",
                         "properties": {
-                            "title": {
-                                "type": "string",
-                                "description": "The title of the issue",
-                            },
-                            "description": {
-                                "type": "string",
-                                "description": "The description of the issue",
-                            },
-                            "priority": {
-                                "type": "integer",
-                                "description": "Priority level (1-4, where 1 is highest)",
-                            },
-                            "team_id": {
-                                "type": "string",
-                                "description": "The ID of the team to assign the issue to",
-                            },
-                            "assignee_id": {
-                                "type": "string",
-                                "description": "The EMAIL ID of the user to assign the issue to, if no user is assigned, the issue will be assigned to the team",
+                            "issues": {
+                                "type": "array",
+                                "items": linear_issue,
+                                "description": "The issues to create",
                             }
                         },
-                        "required": ["title", "team_id"],
+                        "required": ["issues"],
                     },
                 },
             },
         ]
     
+    @traced("tools.execute")
     def _execute_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
         """Execute the specified tool with the given arguments."""
+        current_span().set_attribute("tool.name", tool_name)
+        # Tool names come from the model, keep metric labels bounded
+        known_tools = {tool["function"]["name"] for tool in self.tools}
+        metric_label = tool_name if tool_name in known_tools else "unknown"
+        add_tool(metric_label)
+        start_time = time.perf_counter()
+        status = "error"
+        try:
+            result = self._run_tool(tool_name, arguments)
+            # Tools report failures the model should see as "Error ..." strings rather than raising
+            failed = isinstance(result, str) and result.startswith(("Error", "Unknown tool"))
+            status = "error" if failed else "ok"
+            return result
+        finally:
+            TOOL_LATENCY.labels(tool=metric_label).observe(time.perf_counter() - start_time)
+            TOOL_CALLS.labels(tool=metric_label, status=status).inc()
+
+    def _run_tool(self, tool_name: str, arguments: Dict[str, Any]) -> str:
+        """Dispatch a tool call to the service that implements it."""
         if tool_name == "calculate":
             expression = arguments.get("expression", "")
             try:
-                # WARNING: Using eval is dangerous in production. This is just an example.
-                result = eval(expression)
+                result = self.calculator.evaluate(expression)
                 return f"The result is: {result}"
-            except Exception as e:
+            except CalculatorError as e:
                 return f"Error calculating expression: {str(e)}"
                 
         elif tool_name == "slack_send_message":
             # Implementation for sending Slack messages
             channel = arguments.get("channel", "")
             message = arguments.get("message", "")
-            self.slack_service.send_message(channel, message)
+            delivery = self.slack_service.enqueue_message(channel, message)
+            try:
+                delivery.result(timeout=SLACK_DELIVERY_TIMEOUT)
+            except FutureTimeoutError:
+                return f"Message queued for Slack channel {channel}, it will be delivered once rate limits allow: {message}"
             return f"Message sent to Slack channel {channel}: {message}"
             
+        elif tool_name == "slack_upload_file":
+            channel = arguments.get("channel", "")
+            upload_dir = os.path.realpath(SLACK_UPLOAD_DIR)
+            path = os.path.realpath(os.path.join(upload_dir, arguments.get("path", "")))
+            if os.path.commonpath([upload_dir, path]) != upload_dir or not os.path.isfile(path):
+                return f"Error uploading file: {arguments.get('path')} is not a file in the exports directory"
+            uploaded = self.slack_service.upload_file(
+                path, channel, title=arguments.get("title"), initial_comment=arguments.get("comment")
+            )
+            return f"File {uploaded.get('name', os.path.basename(path))} uploaded to Slack channel {channel}"
+            
         elif tool_name == "gcal_create_event":
             print("Creating Google Calendar event", arguments)
             # Implementation for creating Google Calendar events would go here
@@ -158,24 +284,86 @@ class ToolCallingLayer:
             return f"Event created: {title}"
             
         elif tool_name == "linear_create_issue":
-            # Implementation for creating Linear issues would go here
-            title = arguments.get("title", "")
-            team_id = "Engineering"
-            description = arguments.get("description", "")
-            priority = arguments.get("priority", 2)
-            assignee_id = arguments.get("assignee_id", None)
-            
-            print("team_id", team_id)
-            print("assignee_id", assignee_id)
-            
-            team_id=self.linear_service.get_team_id(team_id)
-            assignee_id=self.linear_service.get_user_id(assignee_id)
-            
-            self.linear_service.create_issue(title,description, team_id,priority,assignee_id)
+            # Names resolve from the Linear directory, so this is a single mutation
+            issue = self._linear_issue(arguments)
+            if isinstance(issue, str):
+                return issue
+            issue, unresolved = issue
+            issue_id = issue.pop("id")
+            created = self.linear_service.create_issue(**issue, issue_id=issue_id)
+            return (f"Issue created: {created.get('title', issue['title'])} {created.get('url', '')}".rstrip()
+                    + self._unresolved_note(unresolved))
+
+        elif tool_name == "linear_create_issues":
+            issues = [self._linear_issue(item) for item in arguments.get("issues", [])]
+            valid = [issue[0] for issue in issues if not isinstance(issue, str)]
+            results = iter(self.linear_service.create_issues(valid) if valid else [])
+            lines = []
+            for item, issue in zip(arguments.get("issues", []), issues):
+                result = {"success": False, "error": issue} if isinstance(issue, str) else next(results)
+                if result["success"]:
+                    lines.append(f"Created: {item.get('title', '')} {(result['issue'] or {}).get('url', '')}".rstrip()
+                                 + self._unresolved_note(issue[1]))
+                else:
+                    issue_id = (result.get("issue") or {}).get("id")
+                    retry = f", retry with id {issue_id}" if issue_id else ""
+                    lines.append(f"Failed: {item.get('title', '')} ({result['error']}{retry})")
+            created = sum(line.startswith("Created") for line in lines)
+            return "\n".join([f"Created {created} of {len(lines)} issues"] + lines)
             
         else:
             return f"Unknown tool: {tool_name}"
     
+    def _linear_issue(self, arguments: Dict[str, Any]) -> Union[Tuple[Dict[str, Any], List[str]], str]:
+        """create_issue arguments for a linear_create_issue(s) call, or an error message
+
+        Team, assignee, state and label names are resolved from the Linear directory.
+        A given "id" is kept, so retrying a failed issue under its reported ID
+        cannot create it twice.
+        The team defaults to Engineering only when none is given; an unknown team is
+        an error. Assignee, state and label names that do not resolve are left out of
+        the issue and returned alongside it so the caller can report them.
+        """
+        team = arguments.get("team_id") or "Engineering"
+        team_id = self.linear_service.get_team_id(team)
+        if not team_id:
+            return f"Error creating issue: Linear team {team} not found"
+
+        unresolved = []
+        assignee_id = None
+        if arguments.get("assignee_id"):
+            assignee_id = self.linear_service.get_user_id(arguments["assignee_id"])
+            if not assignee_id:
+                unresolved.append(f"assignee {arguments['assignee_id']}")
+        state_id = None
+        if arguments.get("state"):
+            state_id = self.linear_service.get_state_id(team_id, arguments["state"])
+            if not state_id:
+                unresolved.append(f"state {arguments['state']}")
+        label_ids = []
+        for name in arguments.get("labels") or []:
+            found = self.linear_service.get_label_ids([name], team_id)
+            if found:
+                label_ids.extend(found)
+            else:
+                unresolved.append(f"label {name}")
+
+        return {
+            "id": arguments.get("id"),
+            "title": arguments.get("title", ""),
+            "description": arguments.get("description", ""),
+            "team_id": team_id,
+            "priority": arguments.get("priority", 2),
+            "assignee_id": assignee_id,
+            "state_id": state_id,
+            "label_ids": label_ids or None,
+        }, unresolved
+
+    @staticmethod
+    def _unresolved_note(unresolved: List[str]) -> str:
+        return f" (not found, left unset: {', '.join(unresolved)})" if unresolved else ""
+
+    @traced("tools.process_query")
     def process_query(self, user_prompt: str, system_prompt: Optional[str] = None) -> Dict[str, Any]:
         """Process a user query and execute any requested tools."""
         messages = []
@@ -207,6 +395,8 @@ class ToolCallingLayer:
                 "tool_called": False
             }
         
+        current_span().set_attribute("tools.called", ",".join(tc.function.name for tc in message.tool_calls))
+
         # Process tool calls
         tool_results = []
         for tool_call in message.tool_calls: